@@ -0,0 +1,6 @@
+"""ベンチマークパッケージ
+
+性能測定用のスクリプトを格納するパッケージです。
+各スクリプトはプロジェクトルートから `python -m benchmarks.<name>` で実行します。
+`python -m benchmarks.suite` は主要な処理をまとめて計測し、結果をJSONに保存してベースラインと比較します。
+"""
@@ -0,0 +1,84 @@
+"""
+マスターデータ読み込みのベンチマーク
+
+ZBLL規模（472パターン x 約10アルゴリズム）の合成カタログを一時ディレクトリに作成し、
+JSONからの読み込みとバイナリキャッシュからの読み込みの時間を比較する。
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src.patterns import CATALOG_CACHE_FILE, PatternDatabase
+
+
+# 実データと同様に重複の多いメモ・フィンガートリック
+SYNTHETIC_NOTES = ("最も一般的", "M回転を使用するバージョン", "向きを変えて実行", "")
+SYNTHETIC_FINGER_TRICKS = ("", "右手人差し指でUを弾く", "左手でU'")
+
+
+def write_synthetic_catalog(data_dir: str, n_patterns: int = 472, algorithms_per_pattern: int = 10):
+    """合成カタログのJSONファイルを作成"""
+    patterns, algorithms = [], []
+    for i in range(n_patterns):
+        pattern_id = f"ZBLL_{i:03d}"
+        patterns.append({
+            'id': pattern_id, 'name': f"ZBLL #{i}", 'category': "PLL",
+            'setup_moves': "R U R' U R U2 R' U2", 'description': "Synthetic ZBLL case", 'difficulty': i % 5 + 1,
+        })
+        for j in range(algorithms_per_pattern):
+            algorithms.append({
+                'id': f"{pattern_id}_{j}", 'pattern_id': pattern_id,
+                'name': "Standard" if j == 0 else f"Alternative {j}",
+                'moves': "R U R' U R U2 R' U2", 'is_default': j == 0,
+                'finger_tricks': SYNTHETIC_FINGER_TRICKS[j % len(SYNTHETIC_FINGER_TRICKS)],
+                'notes': SYNTHETIC_NOTES[j % len(SYNTHETIC_NOTES)],
+            })
+    with open(os.path.join(data_dir, 'patterns.json'), 'w', encoding='utf-8') as f:
+        json.dump({'patterns': patterns}, f)
+    with open(os.path.join(data_dir, 'algorithms.json'), 'w', encoding='utf-8') as f:
+        json.dump({'algorithms': algorithms}, f)
+
+
+def _time_load(data_dir: str, repeat: int) -> float:
+    """ロード + パターン一覧1画面分の検索の平均時間"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db = PatternDatabase(data_dir=data_dir)
+        db.get_patterns_by_category(db.get_available_categories()[0])[:10]
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat: int = 20) -> bool:
+    print("=" * 60)
+    print("マスターデータ読み込みベンチマーク（ZBLL規模の合成カタログ）")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_synthetic_catalog(data_dir)
+        cache_path = os.path.join(data_dir, CATALOG_CACHE_FILE)
+
+        # JSON: 毎回キャッシュを削除して読み込む（キャッシュ書き込み時間を含む）
+        json_times = []
+        for _ in range(repeat):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            json_times.append(_time_load(data_dir, 1))
+        json_time = sum(json_times) / repeat
+
+        cache_time = _time_load(data_dir, repeat)
+        db = PatternDatabase(data_dir=data_dir)
+        print(f"\n  パターン数: {db.get_pattern_count()}, アルゴリズム数: {len(db._algorithms)}")
+
+    print(f"  JSON:       {json_time * 1000:8.2f} ms")
+    print(f"  キャッシュ: {cache_time * 1000:8.2f} ms")
+    print(f"  高速化: {json_time / cache_time:.1f}x")
+
+    ok = cache_time < json_time
+    print("\n✅ キャッシュからの読み込みが高速" if ok else "\n✗ キャッシュからの読み込みがJSONより遅い")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
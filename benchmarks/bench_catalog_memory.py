@@ -0,0 +1,99 @@
+"""
+マスターデータのメモリ使用量ベンチマーク
+
+1万件超のアルゴリズムを持つ合成カタログを読み込み、tracemallocで保持メモリを比較する。
+  アルゴリズムオブジェクトのみ:
+    - 従来の@dataclass（__dict__あり、文字列の共有なし）
+    - __slots__の不変オブジェクト + 文字列の共有
+  PatternDatabase全体（索引を含む）:
+    - JSONから読み込み
+    - キャッシュから読み込み（オブジェクト未生成 / 全件生成後）
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+
+from benchmarks.bench_catalog_load import write_synthetic_catalog
+from src.patterns import CATALOG_CACHE_FILE, Algorithm, PatternDatabase
+
+
+@dataclass
+class _DictAlgorithm:
+    """比較用: 変更前と同じ__dict__を持つアルゴリズム"""
+    id: str
+    pattern_id: str
+    name: str
+    moves: str
+    finger_tricks: str = ""
+    is_default: bool = False
+    notes: str = ""
+
+
+def _measure(build):
+    """build()の返り値が保持しているメモリ（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def _load_algorithms(data_dir: str, cls, intern: bool):
+    """algorithms.jsonからアルゴリズムオブジェクトの辞書を作成"""
+    with open(os.path.join(data_dir, 'algorithms.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    result = {}
+    for a in data['algorithms']:
+        if intern:
+            a = {k: sys.intern(v) if isinstance(v, str) and k != 'moves' else v for k, v in a.items()}
+        result[a['id']] = cls(**a)
+    return result
+
+
+def _load_without_cache(data_dir: str) -> PatternDatabase:
+    os.remove(os.path.join(data_dir, CATALOG_CACHE_FILE))
+    db = PatternDatabase(data_dir=data_dir)
+    db.get_all_algorithms()
+    return db
+
+
+def main(n_patterns: int = 1000, algorithms_per_pattern: int = 12) -> bool:
+    n_algorithms = n_patterns * algorithms_per_pattern
+    print("=" * 60)
+    print(f"マスターデータのメモリ使用量ベンチマーク（{n_patterns}パターン, {n_algorithms}アルゴリズム）")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_synthetic_catalog(data_dir, n_patterns, algorithms_per_pattern)
+        PatternDatabase(data_dir=data_dir)  # キャッシュ作成
+
+        dict_size, _ = _measure(lambda: _load_algorithms(data_dir, _DictAlgorithm, intern=False))
+        slots_size, _ = _measure(lambda: _load_algorithms(data_dir, Algorithm, intern=True))
+        json_size, _ = _measure(lambda: _load_without_cache(data_dir))
+        lazy_size, db = _measure(lambda: PatternDatabase(data_dir=data_dir))
+        full_size, _ = _measure(lambda: db.get_all_algorithms())
+        full_size += lazy_size
+
+    print("\n  アルゴリズムオブジェクト:")
+    for name, size in (("@dataclass（__dict__）", dict_size), ("__slots__ + 共有文字列", slots_size)):
+        print(f"    {name:<22} {size / 1024:8.1f} KiB ({size / n_algorithms:6.1f} B/件)")
+    print(f"    削減率: {1 - slots_size / dict_size:.0%}")
+    print("\n  PatternDatabase全体:")
+    for name, size in (("JSONから読み込み", json_size), ("キャッシュ（未生成）", lazy_size),
+                       ("キャッシュ（全件生成）", full_size)):
+        print(f"    {name:<22} {size / 1024:8.1f} KiB")
+
+    ok = slots_size < dict_size and lazy_size < json_size
+    print("\n✅ メモリ使用量を削減" if ok else "\n✗ メモリ使用量が削減されていない")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
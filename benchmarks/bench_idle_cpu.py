@@ -0,0 +1,95 @@
+"""
+状態ごとのCPU使用率のベンチマーク（アイドル状態の再描画省略の有無の比較）
+
+各状態で入力のない画面を一定時間表示し、プロセスのCPU時間 / 経過時間を
+CPU使用率として測る。アイドル状態（READY・STATS・パターン一覧）は
+再描画の省略（DisplayConfig.SKIP_IDLE_REDRAW）で下がり、
+計測中（RUNNING）は毎フレーム描画されるため変わらないことを確認する。
+
+再描画を省略しても、入力処理（状態ハンドラの update）は毎フレーム実行される。
+その時間も描画と分けて1フレームあたりのCPU時間として表示する。
+
+Pyxelのウィンドウを作成し、pyxel.flip() でフレームレートどおりに進めるため、
+Pyxelとフォント（DisplayConfig.FONT_PATH）がインストールされた環境で実行すること
+（ウィンドウのない環境では SDL_VIDEODRIVER=offscreen）。
+"""
+import os
+import sys
+import time
+
+import pyxel
+
+from benchmarks.bench_renderer import create_app
+from src.constants import DisplayConfig as DC
+from src.renderer import SpeedcubeRenderer
+from src.state_handlers import StateHandlerManager
+from src.states import TimerState
+
+
+def measure_cpu(app, manager, renderer, seconds: float):
+    """
+    seconds秒間フレームを進めたときのCPU使用率と1フレームあたりのCPU時間
+
+    Returns:
+        (CPU使用率（0-1）, updateのCPU時間（秒/フレーム）, drawのCPU時間（秒/フレーム）)
+    """
+    app.dirty = True
+    app.start_time = app.clock()
+    frames = 0
+    update_cpu = draw_cpu = 0.0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < seconds:
+        t0 = time.process_time()
+        manager.update()
+        if app.state == TimerState.RUNNING:
+            app.dirty = True  # SpeedcubeAppでは current_time の代入で立つ
+        t1 = time.process_time()
+        renderer.draw()
+        t2 = time.process_time()
+        update_cpu += t1 - t0
+        draw_cpu += t2 - t1
+        frames += 1
+        pyxel.flip()
+    usage = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    return usage, update_cpu / frames, draw_cpu / frames
+
+
+def main(seconds: float = 3.0) -> bool:
+    print("=" * 60)
+    print(f"状態ごとのCPU使用率ベンチマーク（各{seconds:.0f}秒, {DC.FPS}FPS）")
+    print("=" * 60)
+
+    # フォントのパスはsrcディレクトリからの相対パス
+    os.chdir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    pyxel.init(DC.WINDOW_WIDTH, DC.WINDOW_HEIGHT, title="bench_idle_cpu", fps=DC.FPS)
+    app = create_app()
+    app.start_time = 0.0
+    manager = StateHandlerManager(app)
+    renderer = SpeedcubeRenderer(app)
+
+    ok = True
+    print(f"\n  {'状態':<22}{'省略なし':>10}{'省略あり':>10}  {'update':>8}{'draw(なし)':>12}{'draw(あり)':>12}")
+    for state in (TimerState.READY, TimerState.STATS, TimerState.PATTERN_LIST_SELECT, TimerState.RUNNING):
+        app.state = state
+        renderer.skip_idle_frames = False
+        before, update_cpu, draw_before = measure_cpu(app, manager, renderer, seconds)
+        renderer.skip_idle_frames = True
+        skipped = renderer.skipped_frames
+        after, _, draw_after = measure_cpu(app, manager, renderer, seconds)
+        print(f"  {state.name:<24}{before * 100:8.1f}%{after * 100:9.1f}%"
+              f"{update_cpu * 1000:9.3f}ms{draw_before * 1000:9.3f}ms{draw_after * 1000:9.3f}ms")
+        if state == TimerState.RUNNING:
+            # 計測中は1フレームも省略しないこと
+            ok = ok and renderer.skipped_frames == skipped
+        else:
+            ok = ok and after < before
+    print(f"\n  省略したフレーム数: {renderer.skipped_frames}")
+
+    print("\n✅ アイドル状態のCPU使用率が下がり、計測中は毎フレーム描画された" if ok
+          else "\n✗ アイドル状態のCPU使用率が下がらないか、計測中にフレームが省略された")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
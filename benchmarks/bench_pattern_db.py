@@ -0,0 +1,107 @@
+"""
+PatternDatabaseの検索ベンチマーク
+
+マスターデータを複製して10倍の規模にしたデータベースで、
+パターン一覧画面の1フレーム分の検索（カテゴリ別一覧 + 各行のアルゴリズム取得）を
+線形走査と索引付き検索で比較する。
+また、表示範囲のみを取得する一覧画面の1フレーム分の時間が
+カタログの規模によらず一定であることを確認する。
+"""
+import sys
+import time
+from dataclasses import replace
+
+from src.patterns import PatternCategory, PatternDatabase
+
+
+def build_large_database(scale: int = 10) -> PatternDatabase:
+    """マスターデータをscale倍に複製したデータベースを作成"""
+    base = PatternDatabase()
+    patterns, algorithms = [], []
+    for i in range(scale):
+        for pattern in base.get_all_patterns():
+            patterns.append(replace(pattern, id=f"{pattern.id}_{i}"))
+        for algorithm in base.get_all_algorithms():
+            algorithms.append(replace(algorithm, id=f"{algorithm.id}_{i}",
+                                      pattern_id=f"{algorithm.pattern_id}_{i}"))
+    return PatternDatabase(patterns=patterns, algorithms=algorithms)
+
+
+def frame_linear(db: PatternDatabase, category: PatternCategory) -> int:
+    """索引導入前の実装と同じ線形走査"""
+    count = 0
+    patterns = [p for p in db._patterns.values() if p.category == category]
+    for pattern in patterns:
+        algorithms = [a for a in db._algorithms.values() if a.pattern_id == pattern.id]
+        count += len(algorithms)
+    return count
+
+
+def frame_indexed(db: PatternDatabase, category: PatternCategory) -> int:
+    """索引付き検索"""
+    count = 0
+    for pattern in db.get_patterns_by_category(category):
+        count += len(db.get_algorithms_for_pattern(pattern.id))
+    return count
+
+
+def frame_paged(db: PatternDatabase, category: PatternCategory, page_size: int = 8) -> int:
+    """一覧画面と同じく、表示範囲のパターンとデフォルトアルゴリズムのみ取得"""
+    count = db.get_category_count(category)
+    start = count // 2
+    for pattern in db.get_patterns_page(category, start, page_size):
+        db.get_default_algorithm(pattern.id)
+    return count
+
+
+def measure_paged(scales=(1, 10, 100), frames: int = 600) -> list:
+    """規模ごとの表示範囲取得の1フレームあたりの時間（秒）"""
+    results = []
+    for scale in scales:
+        db = build_large_database(scale)
+        category = db.get_category_tabs()[0]
+        frame_paged(db, category)
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame_paged(db, category)
+        results.append((scale, db.get_pattern_count(), (time.perf_counter() - start) / frames))
+    return results
+
+
+def main(scale: int = 10, frames: int = 60) -> bool:
+    print("=" * 60)
+    print(f"PatternDatabase検索ベンチマーク（{scale}倍のデータ, {frames}フレーム）")
+    print("=" * 60)
+
+    db = build_large_database(scale)
+    print(f"\n  パターン数: {db.get_pattern_count()}, アルゴリズム数: {len(db.get_all_algorithms())}")
+
+    results = {}
+    for name, frame in (("線形走査", frame_linear), ("索引", frame_indexed)):
+        start = time.perf_counter()
+        for _ in range(frames):
+            for category in db.get_available_categories():
+                results[name] = frame(db, category)
+        elapsed = time.perf_counter() - start
+        results[name + "_time"] = elapsed
+        print(f"  {name}: {elapsed / frames * 1000:8.3f} ms/フレーム")
+
+    assert results["線形走査"] == results["索引"]
+    speedup = results["線形走査_time"] / results["索引_time"]
+    print(f"  高速化: {speedup:.1f}x")
+
+    print("\n  表示範囲のみ取得:")
+    paged = measure_paged()
+    for paged_scale, n_patterns, elapsed in paged:
+        print(f"    {paged_scale:4d}倍（{n_patterns:5d}パターン）: {elapsed * 1e6:7.1f} us/フレーム")
+    # 規模が100倍になってもフレーム時間がほぼ変わらないこと
+    flat = paged[-1][2] < paged[0][2] * 3
+
+    ok = speedup > 1.0 and flat
+    print("\n✅ 索引付き検索が高速で、表示範囲の取得時間は規模によらず一定" if ok
+          else "\n✗ 索引付き検索が遅いか、表示範囲の取得時間が規模に比例している")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
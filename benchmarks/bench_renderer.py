@@ -0,0 +1,119 @@
+"""
+描画時間のベンチマーク（テキストレイヤーのキャッシュ有無の比較）
+
+READY画面とパターン一覧画面の1フレーム分の描画（SpeedcubeRenderer.draw）を、
+毎フレームすべての文字列を描画する場合と、
+描画済みレイヤーを転送する場合（DisplayConfig.TEXT_LAYER_CACHE）で比較する。
+1フレームの時間には画面の消去（pyxel.cls）が含まれるため、その時間を除いた
+テキスト部分の時間も表示する。
+
+Pyxelのウィンドウを作成するため、Pyxelとフォント（DisplayConfig.FONT_PATH）が
+インストールされた環境で実行すること（ウィンドウのない環境では SDL_VIDEODRIVER=offscreen）。
+グリフアトラス（python -m src.font_atlas）がある場合はアトラスで、ない場合はBDFフォントで描画する。
+"""
+import os
+import sqlite3
+import sys
+import time
+from types import SimpleNamespace
+
+import pyxel
+
+from src.constants import DisplayConfig as DC
+from src.constants import ProfileConfig as PFC
+from src.database import Database
+from src.font_atlas import GlyphAtlasFont
+from src.patterns import PatternDatabase
+from src.profiles import Profile
+from src.renderer import SpeedcubeRenderer
+from src.states import TimerState
+from src.stats import SpeedcubeStats
+
+
+def create_app():
+    """描画に必要な属性のみを持つアプリケーションの代わり"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE pattern_solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_id TEXT NOT NULL,
+            pattern_name TEXT NOT NULL, pattern_category TEXT NOT NULL, solve_time REAL NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, session_id TEXT, practice_mode TEXT,
+            set_id TEXT, algorithm_id TEXT)
+    """)
+    conn.execute("""
+        CREATE TABLE user_pattern_preferences (
+            pattern_id TEXT PRIMARY KEY, selected_algorithm_id TEXT NOT NULL, last_updated DATETIME)
+    """)
+    stats = SpeedcubeStats()
+    # 統計画面は現在のプロファイルとセッションを表示する
+    logger = SimpleNamespace(db=Database(conn), session_id="bench",
+                             profile=Profile(PFC.DEFAULT_PROFILE_ID, PFC.DEFAULT_PROFILE_NAME, None))
+    stats.logger = logger
+    for i in range(1, 13):
+        stats.record_solve(i, 10.0 + i / 10, "")
+
+    return SimpleNamespace(
+        state=TimerState.READY, bg_color=DC.DEFAULT_BACKGROUND_COLOR, text_color=DC.DEFAULT_TEXT_COLOR,
+        fps=DC.FPS, clock=time.perf_counter,
+        scramble="R U R' U' F2 D' L2 B R2 U2 F' L' D2 R B2 U' F2 R2 D B' L U2 R' F D2",
+        space_hold_start=0, s_key_hold_start=0, stats=stats, logger=logger, pattern_db=PatternDatabase(),
+        selected_category_tab=1, selected_subset=None, selected_pattern_index=0,
+        pattern_list_scroll_offset=0, history_browser=None, monthly_stats_cache=(120, 11.5),
+        current_pattern=None, current_time=12.34, dirty=False)
+
+
+def measure(renderer, frames: int) -> float:
+    """1フレームあたりの描画時間（秒）"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        renderer.draw()
+    return (time.perf_counter() - start) / frames
+
+
+def measure_clear(frames: int) -> float:
+    """画面の消去のみの1フレームあたりの時間（秒）"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        pyxel.cls(DC.DEFAULT_BACKGROUND_COLOR)
+    return (time.perf_counter() - start) / frames
+
+
+def main(frames: int = 300) -> bool:
+    print("=" * 60)
+    print(f"描画時間ベンチマーク（{frames}フレーム）")
+    print("=" * 60)
+
+    # フォントのパスはsrcディレクトリからの相対パス
+    os.chdir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    pyxel.init(DC.WINDOW_WIDTH, DC.WINDOW_HEIGHT, title="bench_renderer")
+    app = create_app()
+    renderer = SpeedcubeRenderer(app)
+    renderer.skip_idle_frames = False  # 毎フレームの描画時間を計測する
+    font = "グリフアトラス" if isinstance(renderer.middle_font, GlyphAtlasFont) else "BDFフォント"
+    clear = measure_clear(frames)
+    print(f"\n  フォント: {font}")
+    print(f"  画面の消去:       {clear * 1000:7.3f} ms/フレーム（以下の時間に含まれる）")
+
+    ok = True
+    for state in (TimerState.READY, TimerState.PATTERN_LIST_SELECT):
+        app.state = state
+        renderer.layers.enabled = False
+        direct = measure(renderer, frames)
+        renderer.layers.enabled = True
+        renderer.layers.invalidate()
+        cached = measure(renderer, frames)
+        direct_text, cached_text = max(direct - clear, 1e-9), max(cached - clear, 1e-9)
+        print(f"\n  {state.name}")
+        print(f"    直接描画:       {direct * 1000:7.3f} ms/フレーム（テキスト部分 {direct_text * 1000:.3f} ms）")
+        print(f"    レイヤー転送:   {cached * 1000:7.3f} ms/フレーム（テキスト部分 {cached_text * 1000:.3f} ms、"
+              f"{direct_text / cached_text:.1f}x）")
+        ok = ok and cached_text < direct_text / 2
+    print(f"\n  レイヤーの描き直し: {renderer.layers.render_count}回")
+
+    print("\n✅ 描画済みレイヤーの転送でテキスト部分の描画時間が半分以下になった" if ok
+          else "\n✗ 描画済みレイヤーによる描画時間の短縮が不十分")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
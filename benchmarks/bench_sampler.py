@@ -0,0 +1,62 @@
+"""
+重み付きランダム選択のベンチマーク
+
+大規模なカタログ（ZBLL規模の約5000パターン）で、1回ごとに候補リストと
+累積重みを作る線形走査（random.choices）とエイリアス法のサンプラーを比較する。
+また、重み変更1回あたりの部分的な作り直しの時間を測る。
+"""
+import random
+import sys
+import time
+
+from src.sampler import WeightedSampler
+
+
+def draw_linear(keys, weights, exclude, rng) -> str:
+    """候補リストと累積重みを毎回作り直す選択"""
+    candidates = [(key, w) for key, w in zip(keys, weights) if key not in exclude]
+    return rng.choices([key for key, _ in candidates], [w for _, w in candidates])[0]
+
+
+def main(n: int = 5000, draws: int = 2000) -> bool:
+    print("=" * 60)
+    print(f"重み付きランダム選択ベンチマーク（{n}パターン, {draws}回）")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    keys = [f"p{i}" for i in range(n)]
+    weights = [rng.uniform(0.5, 5.0) for _ in range(n)]
+    exclude = set(keys[:5])
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        draw_linear(keys, weights, exclude, rng)
+    linear = (time.perf_counter() - start) / draws
+
+    start = time.perf_counter()
+    sampler = WeightedSampler(keys, weights, rng)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler.draw(exclude)
+    alias = (time.perf_counter() - start) / draws
+
+    start = time.perf_counter()
+    for i in range(draws):
+        sampler.update(keys[i % n], rng.uniform(0.5, 5.0))
+    update = (time.perf_counter() - start) / draws
+
+    print(f"\n  線形走査:       {linear * 1e6:8.1f} us/回")
+    print(f"  エイリアス法:   {alias * 1e6:8.1f} us/回（表の作成 {build * 1000:.1f} ms）")
+    print(f"  重みの変更:     {update * 1e6:8.1f} us/回")
+    speedup = linear / alias
+    print(f"  高速化: {speedup:.1f}x")
+
+    ok = speedup > 10 and update < build
+    print("\n✅ エイリアス法の選択が高速で、重みの変更は全体の作り直しより速い" if ok
+          else "\n✗ エイリアス法の選択が遅いか、重みの変更が全体の作り直しより遅い")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,61 @@
+"""
+ランダムステートスクランブルの生成時間ベンチマーク
+
+スクランブルプール（ScrambleConfig.POOL_SIZE件、POOL_LOW_WATER件で補充開始）が
+枯渇しないことを目標値として判定する。1ソルブの最短サイクルを5秒と見込み、
+平均生成時間がそれを十分下回り、最悪値でも補充待ちの余裕（low water分）に収まること。
+"""
+import random
+import statistics
+import sys
+import time
+
+from src.constants import ScrambleConfig as SCC
+from src import cubie
+from src.twophase import get_solver, invert_moves
+
+# 目標値（秒）
+MIN_SOLVE_CYCLE = 5.0
+TARGET_MEAN = 1.0
+TARGET_P95 = 2.5
+TARGET_MAX = MIN_SOLVE_CYCLE * SCC.POOL_LOW_WATER
+
+
+def main(count: int = 50, seed: int = 0) -> bool:
+    print("=" * 60)
+    print("ランダムステートスクランブル生成ベンチマーク")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    solver = get_solver()
+    print(f"\n✓ テーブル読み込み: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(seed)
+    times = []
+    lengths = []
+    for _ in range(count):
+        cube = cubie.random_cube(rng)
+        start = time.perf_counter()
+        solution = solver.solve(cube)
+        times.append(time.perf_counter() - start)
+        lengths.append(len(solution))
+        # 生成したスクランブルが元の状態を再現することを確認
+        assert cubie.CubieCube().apply_moves(invert_moves(solution)) == cube
+
+    times.sort()
+    mean = statistics.mean(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    worst = times[-1]
+    print(f"✓ 生成数: {count}  平均手数: {statistics.mean(lengths):.1f}")
+    print(f"  平均: {mean * 1000:.1f} ms (目標 < {TARGET_MEAN * 1000:.0f} ms)")
+    print(f"  p95 : {p95 * 1000:.1f} ms (目標 < {TARGET_P95 * 1000:.0f} ms)")
+    print(f"  最大: {worst * 1000:.1f} ms (目標 < {TARGET_MAX * 1000:.0f} ms)")
+    print(f"  プール補充レート: {1 / mean:.1f} 件/秒")
+
+    ok = mean < TARGET_MEAN and p95 < TARGET_P95 and worst < TARGET_MAX
+    print("\n✅ 目標達成" if ok else "\n✗ 目標未達")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,41 @@
+"""
+ランダムムーブスクランブルのバッチ生成ベンチマーク
+
+generate_wca_cube_scrambleを1件ずつ呼ぶループと、
+generate_wca_cube_scramble_batchによる一括生成の時間を比較する。
+"""
+import sys
+import time
+
+from src.scramble import generate_wca_cube_scramble, generate_wca_cube_scramble_batch
+
+
+def main(count: int = 10000, length: int = 20) -> bool:
+    print("=" * 60)
+    print(f"スクランブルのバッチ生成ベンチマーク（{count}件 x {length}手）")
+    print("=" * 60)
+
+    # NumPyのインポート等の初回コストを除くためウォームアップ
+    generate_wca_cube_scramble_batch(10, length)
+
+    start = time.perf_counter()
+    loop_result = [generate_wca_cube_scramble(length) for _ in range(count)]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_result = generate_wca_cube_scramble_batch(count, length, seed=0)
+    batch_time = time.perf_counter() - start
+
+    assert len(loop_result) == len(batch_result) == count
+
+    print(f"\n  ループ: {loop_time * 1000:8.1f} ms ({loop_time / count * 1e6:.1f} us/件)")
+    print(f"  バッチ: {batch_time * 1000:8.1f} ms ({batch_time / count * 1e6:.1f} us/件)")
+    print(f"  高速化: {loop_time / batch_time:.1f}x")
+
+    ok = batch_time < loop_time
+    print("\n✅ バッチ生成が高速" if ok else "\n✗ バッチ生成がループより遅い")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
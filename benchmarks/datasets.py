@@ -0,0 +1,32 @@
+"""
+ベンチマーク用の合成データセット
+
+記録は src.history_generator で生成する。同じシードからは常に同じデータを作成する
+（実行環境によらず比較できるように）。
+"""
+import datetime
+
+from src.history_generator import HistoryModel, generate_history
+from src.log_handler import SpeedcubeLogger
+
+# 記録数の規模（名前 -> 試技数。DNFの試技もペナルティ付きで記録する）
+SOLVE_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# 最後のセッションの開始時刻（データセットの「現在」）
+LAST_SESSION_START = datetime.datetime(2026, 1, 31, 20, 0, 0)
+
+
+def dataset_model(seed: int = 0) -> HistoryModel:
+    """毎日練習する利用者の分布（1m件でも期間が数十年に収まるように）"""
+    return HistoryModel(seed=seed, end=LAST_SESSION_START, sessions_per_day=3.0, rest_day_rate=0.0)
+
+
+def create_solve_history(db_path: str, n_solves: int, seed: int = 0) -> SpeedcubeLogger:
+    """
+    合成の記録を持つデータベースを作成する
+
+    Returns:
+        最後のセッションを現在のセッションとしたロガー
+    """
+    result = generate_history(db_path, n_solves, model=dataset_model(seed))
+    return SpeedcubeLogger.open_local(db_path, session_id=result.last_session_id)
@@ -0,0 +1,329 @@
+"""
+ベンチマークスイート（統計・保存・スクランブル・パターン・描画）
+
+合成データセット（記録 1k / 100k / 1m 件、マスターデータを複製した大規模カタログ）で
+以下を計測し、結果をJSONに保存する。ベースラインのJSONがあれば比較し、
+許容範囲を超えて遅くなったベンチマークがあれば失敗（終了コード1）とする。
+
+    stats.update_stats[規模]       現在のセッションの統計の更新
+    stats.monthly_results[規模]    最後の月のソルブ回数と平均（SQLの集計）
+    sync.sync_data[規模]           偽のワークシートとの双方向同期（1%ずつ差分あり）
+    scramble.generate              generate_wca_cube_scramble（100回）
+    patterns.lookup[xN]            パターン一覧1画面分の検索（N倍のカタログ）
+    renderer.frame[状態]x30        30フレームの描画（ウィンドウを作らないpyxelで、描画命令の発行まで）
+
+使い方:
+    python -m benchmarks.suite                         # 1k, 100k で計測し、ベースラインと比較
+    python -m benchmarks.suite --sizes 1k,100k,1m      # 規模を指定
+    python -m benchmarks.suite --only stats            # 名前に含まれる文字列で絞り込み
+    python -m benchmarks.suite --update-baseline       # 結果をベースラインとして保存
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from benchmarks.datasets import LAST_SESSION_START, SOLVE_SIZES, create_solve_history
+from benchmarks.bench_pattern_db import build_large_database, frame_paged
+from src.penalty import encode_sheet_time
+from src.scramble import generate_wca_cube_scramble
+from src.states import TimerState
+from src.stats import SpeedcubeStats
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_SIZES = ("1k", "100k")
+DEFAULT_TOLERANCE = 0.25  # ベースラインの最小値からの許容増加率
+NOISE_FLOOR_MS = 0.05  # これ以下の差は誤差として扱う
+RUN_BUDGET = 3.0  # 1ベンチマークあたりの計測時間の目安（秒。最低1回は実行する）
+PATTERN_SCALES = (10, 100)
+
+
+@dataclass
+class BenchmarkCase:
+    """1つのベンチマーク"""
+    name: str
+    run: Callable[[], object]
+    setup: Optional[Callable[[], None]] = None  # 各回の計測前に実行（計測に含めない）
+    repeat: int = 10
+
+
+def measure(case: BenchmarkCase, budget: float = RUN_BUDGET) -> dict:
+    """
+    ベンチマークを最大repeat回（budget秒を超えたら打ち切り）実行する
+
+    Returns:
+        {"median_ms", "min_ms", "runs"}
+    """
+    times = []
+    spent = 0.0
+    # 計測対象のデバッグ出力（1行ごとの出力など）は捨てる
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while len(times) < case.repeat and (not times or spent < budget):
+            if case.setup is not None:
+                case.setup()
+            start = time.perf_counter()
+            case.run()
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            spent += elapsed
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "min_ms": round(min(times) * 1000, 4),
+        "runs": len(times),
+    }
+
+
+# ---- 統計・保存 ----
+
+class FakeWorksheet:
+    """sync_data の相手となるワークシート（gspreadのWorksheetと同じメソッドのみ）"""
+
+    def __init__(self, rows: List[List[str]]):
+        self.initial_rows = rows
+        self.rows = list(rows)
+
+    def reset(self):
+        self.rows = list(self.initial_rows)
+
+    def get_all_values(self) -> List[List[str]]:
+        return [["datetime", "time"]] + self.rows
+
+    def append_rows(self, rows, value_input_option=None):
+        self.rows.extend(rows)
+
+
+def storage_cases(size: str, tmpdir: str) -> Iterator[BenchmarkCase]:
+    """記録数 size のデータベースに対する統計・同期のベンチマーク"""
+    logger = create_solve_history(os.path.join(tmpdir, f"results_{size}.db"), SOLVE_SIZES[size])
+    stats = SpeedcubeStats(logger)
+    yield BenchmarkCase(f"stats.update_stats[{size}]", stats.update_stats, repeat=50)
+    yield BenchmarkCase(f"stats.monthly_results[{size}]",
+                        lambda: (stats.get_monthly_solve_count(LAST_SESSION_START.year, LAST_SESSION_START.month),
+                                 stats.get_monthly_average_time(LAST_SESSION_START.year, LAST_SESSION_START.month)),
+                        repeat=5)
+
+    # ワークシートには最新1%を除く記録と、データベースにない1%の記録がある
+    db_rows = [[datetime_str, encode_sheet_time(time_result, penalty)] for datetime_str, time_result, penalty
+               in logger.db.fetchall("SELECT datetime, time_result, penalty FROM results ORDER BY id")]
+    diff = max(1, len(db_rows) // 100)
+    sheet_only = [[f"2000/01/01 00:00:{i % 60:02d}", f"{10 + i / 1000:.2f}"] for i in range(diff)]
+    sheet = FakeWorksheet(db_rows[:-diff] + sheet_only)
+    logger.sheet = sheet
+    max_id = logger.db.scalar("SELECT MAX(id) FROM results")
+
+    def reset_sync():
+        # 前回の同期で取り込んだ記録と書き出した行を戻す
+        with logger.db.write() as db:
+            db.execute("DELETE FROM results WHERE id > ?", (max_id,))
+        sheet.reset()
+
+    yield BenchmarkCase(f"sync.sync_data[{size}]", logger.sync_data, setup=reset_sync, repeat=5)
+
+
+# ---- スクランブル・パターン ----
+
+def scramble_cases() -> Iterator[BenchmarkCase]:
+    def generate_100():
+        for _ in range(100):
+            generate_wca_cube_scramble()
+    yield BenchmarkCase("scramble.generate", generate_100, repeat=20)
+
+
+def pattern_cases() -> Iterator[BenchmarkCase]:
+    for scale in PATTERN_SCALES:
+        db = build_large_database(scale)
+        categories = db.get_category_tabs()
+
+        def lookup(db=db, categories=categories):
+            # 一覧画面の全カテゴリ1画面分 + パターンごとの取得
+            for category in categories:
+                frame_paged(db, category)
+                for pattern_id in db.get_pattern_ids_by_category(category)[:50]:
+                    db.get_pattern(pattern_id)
+                    db.get_default_algorithm(pattern_id)
+        yield BenchmarkCase(f"patterns.lookup[x{scale}]", lookup, repeat=50)
+
+
+# ---- 描画 ----
+
+class HeadlessPyxel(types.ModuleType):
+    """ウィンドウを作らないpyxel（描画命令は何もしない）"""
+
+    class Font:
+        def __init__(self, *args):
+            pass
+
+    class Image:
+        def __init__(self, *args):
+            pass
+
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    def __init__(self):
+        super().__init__("pyxel")
+        self.frame_count = 0
+        self.images = [self.Image() for _ in range(3)]
+
+    def __getattr__(self, name):
+        if name.startswith("KEY_"):
+            return name
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: False
+
+
+def _import_with_pyxel(fake_pyxel, module_names):
+    """偽のpyxelでモジュールを読み込む（sys.modulesは元に戻す）"""
+    names = ("pyxel",) + tuple(module_names)
+    saved = {name: sys.modules.get(name) for name in names}
+    sys.modules["pyxel"] = fake_pyxel
+    for name in module_names:
+        sys.modules.pop(name, None)
+    try:
+        return [importlib.import_module(name) for name in module_names]
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def renderer_cases() -> Iterator[BenchmarkCase]:
+    fake_pyxel = HeadlessPyxel()
+    _, renderer_module, bench_renderer = _import_with_pyxel(
+        fake_pyxel, ("src.text_layers", "src.renderer", "benchmarks.bench_renderer"))
+
+    app = bench_renderer.create_app()
+    renderer = renderer_module.SpeedcubeRenderer(app)
+    renderer.skip_idle_frames = False
+    # 偽のpyxelでは文字の描画時間を測れないため、フォントによらずレイヤーを使う経路を計測する
+    renderer.layers.enabled = True
+
+    for state in (TimerState.READY, TimerState.RUNNING, TimerState.STATS, TimerState.PATTERN_LIST_SELECT):
+        def frames(state=state):
+            app.state = state
+            for _ in range(30):
+                renderer.draw()
+        yield BenchmarkCase(f"renderer.frame[{state.name}]x30", frames, repeat=20)
+
+
+# ---- 実行・比較 ----
+
+def iter_cases(sizes, tmpdir: str) -> Iterator[BenchmarkCase]:
+    """ベンチマークを順に作成する（データセットは必要になった時点で作成）"""
+    for size in sizes:
+        yield from storage_cases(size, tmpdir)
+    yield from scramble_cases()
+    yield from pattern_cases()
+    yield from renderer_cases()
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    ベースラインと比較し、遅くなったベンチマーク名を返す
+
+    最小値（他の処理の影響を最も受けにくい値）が tolerance の割合以上、
+    かつ NOISE_FLOOR_MS 以上増えた場合を遅くなったとみなす。
+    """
+    regressions = []
+    print(f"\n  {'ベンチマーク（最小値）':<30}{'基準(ms)':>12}{'今回(ms)':>12}{'比':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:<40}{'-':>12}{result['min_ms']:12.3f}    (新規)")
+            continue
+        ratio = result["min_ms"] / base["min_ms"] if base["min_ms"] > 0 else float("inf")
+        regressed = (result["min_ms"] > base["min_ms"] * (1 + tolerance)
+                     and result["min_ms"] - base["min_ms"] > NOISE_FLOOR_MS)
+        mark = "  ✗" if regressed else ""
+        print(f"  {name:<40}{base['min_ms']:12.3f}{result['min_ms']:12.3f}{ratio:7.2f}x{mark}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="ベンチマークスイート")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help=f"記録数の規模（{', '.join(SOLVE_SIZES)} をカンマ区切り）")
+    parser.add_argument("--only", help="名前にこの文字列を含むベンチマークのみ実行")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果のJSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="比較するベースラインのJSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="許容する増加率")
+    parser.add_argument("--budget", type=float, default=RUN_BUDGET, help="1ベンチマークあたりの計測時間の目安（秒）")
+    parser.add_argument("--update-baseline", action="store_true", help="結果をベースラインとして保存")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in args.sizes.split(",") if size]
+    unknown = [size for size in sizes if size not in SOLVE_SIZES]
+    if unknown:
+        print(f"✗ 不明な規模: {', '.join(unknown)}")
+        return False
+
+    print("=" * 60)
+    print(f"ベンチマークスイート（記録数: {', '.join(sizes)}）")
+    print("=" * 60)
+
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for case in iter_cases(sizes, tmpdir):
+            if args.only and args.only not in case.name:
+                continue
+            results[case.name] = measure(case, args.budget)
+            r = results[case.name]
+            print(f"  {case.name:<40}{r['median_ms']:12.3f} ms（最小 {r['min_ms']:.3f}, {r['runs']}回）")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n  結果: {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"  ベースラインを更新: {args.baseline}")
+        print("\n✅ ベンチマークが完了しました")
+        return True
+
+    if not os.path.exists(args.baseline):
+        print("\n✅ ベンチマークが完了しました（ベースラインなし。--update-baseline で保存）")
+        return True
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)}件のベンチマークがベースラインより{args.tolerance:.0%}以上遅くなりました:")
+        for name in regressions:
+            print(f"  - {name}")
+        return False
+    print("\n✅ ベースラインからの性能低下はありません")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,7 +1,12 @@
-from src.app import SpeedcubeApp
+from src.startup_profile import StartupProfiler
+
+# 起動時間の計測（モジュールの読み込みから計測する）
+profiler = StartupProfiler()
+with profiler.phase("imports"):
+    from src.app import SpeedcubeApp
 
 def main():
-    app = SpeedcubeApp()
+    app = SpeedcubeApp(profiler)
     app.run()
 
 if __name__ == "__main__":
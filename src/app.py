@@ -1,39 +1,100 @@
 """スピードキューブタイマーのメインアプリケーション"""
+import atexit
+import configparser
+import os
+import time
 import pyxel
 from .stats import SpeedcubeStats
-from .scramble import generate_wca_cube_scramble
+from .scramble_pool import create_scramble_pool
 from .log_handler import SpeedcubeLogger
 from .constants import DisplayConfig as DC, GameConfig as GC
 from .constants import SoundConfig as SC
+from .constants import DatabaseConfig as DBC
 from .renderer import SpeedcubeRenderer
 from .states import TimerState
 from .state_handlers import StateHandlerManager
-from .patterns import PatternDatabase
+from .patterns import PatternDatabase, get_default_data_dir
+from .pattern_sets import PatternSetStore
+from .startup_profile import FIRST_FRAME, INTERACTIVE, StartupProfiler
+
+
+# 未設定の属性を表す値（属性変更の検出に使用）
+_UNSET = object()
+
+
+def load_frame_rate() -> int:
+    """
+    config.iniの[Display] fpsからフレームレートを読み込む
+
+    Returns:
+        int: DisplayConfig.SUPPORTED_FPSのいずれか（未設定・不正な値の場合はDisplayConfig.FPS）
+    """
+    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
+    config = configparser.ConfigParser()
+    try:
+        config.read(config_path, encoding='utf-8')
+        fps = config.getint('Display', 'fps', fallback=DC.FPS)
+    except (configparser.Error, ValueError) as e:
+        print(f"DEBUG: フレームレートの読み込みに失敗: {e}")
+        return DC.FPS
+    if fps not in DC.SUPPORTED_FPS:
+        print(f"DEBUG: 未対応のフレームレート {fps}（{DC.SUPPORTED_FPS}のいずれか）。{DC.FPS}FPSで起動します")
+        return DC.FPS
+    return fps
 
 
 class SpeedcubeApp:
-    def __init__(self):
+    def __init__(self, profiler: StartupProfiler = None):
+        """
+        Args:
+            profiler: 起動時間の計測（省略時はここから計測する）
+        """
+        # 描画内容に影響する変更があったか（属性の変更で自動的にTrueになる）
+        self.dirty = True
+        
+        # 起動処理のフェーズごとの所要時間を記録（最初のフレーム・入力処理の完了まで）
+        self.profiler = profiler or StartupProfiler()
+        
+        # フレームレートと時刻（状態の経過時間はフレーム数ではなくこの時刻の差で計算する）
+        self.fps = load_frame_rate()
+        self.clock = time.perf_counter
+        
         # ウィンドウサイズとタイトルの設定
-        pyxel.init(
-            DC.WINDOW_WIDTH,
-            DC.WINDOW_HEIGHT,
-            title="Speedcube Timer",
-            fps=DC.FPS,
-            quit_key=pyxel.KEY_END
-        )
+        with self.profiler.phase("window"):
+            pyxel.init(
+                DC.WINDOW_WIDTH,
+                DC.WINDOW_HEIGHT,
+                title="Speedcube Timer",
+                fps=self.fps,
+                quit_key=pyxel.KEY_END
+            )
         # アセットの読み込み
-        pyxel.load('../data/speedcube_timer.pyxres')
+        with self.profiler.phase("assets"):
+            pyxel.load('../data/speedcube_timer.pyxres')
+
+        # スクランブルプールの初期化（前回の未使用分を読み込み、バックグラウンドで補充）
+        with self.profiler.phase("scramble_pool"):
+            self.scramble_pool = create_scramble_pool()
+            self.scramble_pool.start()
+        atexit.register(self.scramble_pool.close)
 
         # コンポーネントの初期化
-        self.logger = SpeedcubeLogger()
-        self.stats = SpeedcubeStats(self.logger)  # ロガーを渡す
+        # スプレッドシートへの接続は最初の同期まで行わない
+        with self.profiler.phase("database"):
+            self.logger = SpeedcubeLogger(self.profiler)
+        atexit.register(self._report_queries)
+        with self.profiler.phase("stats"):
+            self.stats = SpeedcubeStats(self.logger)  # ロガーを渡す
         
         # パターンデータベースの初期化（Phase 2）
-        self.pattern_db = PatternDatabase()
+        # 読み込みはパターンモードを最初に開くまで遅延する（pattern_db・pattern_setsプロパティ）
+        self._pattern_db = None
+        self._pattern_sets = None
         self.selected_pattern_index = 0
         self.selected_algorithm_index = 0
         self.pattern_list_scroll_offset = 0  # パターン一覧のスクロールオフセット
-        self.selected_category_tab = 0  # カテゴリタブのインデックス（0: RAND, 1: PLL, 2: OLL）
+        self.selected_category_tab = 0  # カテゴリタブのインデックス（0: RAND, 1以降: pattern_db.get_category_tabs()の順）
+        self.selected_subset = None  # 選択中のサブセット（None: カテゴリ全体）
         self.current_pattern = None
         self.current_algorithm = None
         self.available_algorithms = []
@@ -42,36 +103,88 @@ class SpeedcubeApp:
         
         # ランダムモード用変数（Phase 3）
         self.random_mode = False  # ランダムモード実行中フラグ
-        self.random_category = "ALL"  # ランダム選択カテゴリ（"OLL", "PLL", "ALL"）
+        self.random_category = "ALL"  # ランダム選択カテゴリ（PatternCategoryの名前または"ALL"）
         self.recent_random_patterns = []  # 直近のランダムパターンID履歴（最大5件）
+        self.random_strategy = "uniform"  # 選択方式（PatternConfig.RANDOM_STRATEGIES）
+        self.practice_scheduler = None  # 間隔反復スケジューラー（"spaced"選択時に作成）
+        
+        # 練習セット用変数（Phase 4-5）
+        self.practice_sets = None  # セット一覧のキャッシュ（(セットのリスト, 進捗)、Noneの場合は再読み込み）
+        self.selected_set_index = 0  # RANDタブで選択中のセット
+        self.practice_set_run = None  # 実行中のセットの出題キュー（PatternSetRun）
+        
+        # パターン統計画面用変数（Phase 6）
+        self.pattern_histograms = None  # タイム分布（統計画面の初回表示時に作成し、以降はソルブごとに追加）
+        self.stats_pattern_ids = ()  # 統計画面で切り替えるパターンID（一覧の表示中カテゴリ）
+        self.stats_pattern_index = 0
+        self.stats_algorithm_index = 0  # 0: 全アルゴリズム, 1以降: get_algorithms_for_pattern()の順
 
         # 状態の初期化
         self.bg_color = DC.DEFAULT_BACKGROUND_COLOR
         self.text_color = DC.DEFAULT_TEXT_COLOR
         self.warning_color = DC.DEFAULT_WARNING_COLOR
         self.state = TimerState.READY
+        # 時刻はすべてself.clock()の値（秒）。ホールド開始時刻の0は未ホールドを表す
         self.space_hold_start = 0
-        self.s_key_hold_start = 0  # Sキー長押し開始時間を追加
+        self.s_key_hold_start = 0  # Sキー長押し開始時刻
         self.countdown_start = 0
+        self.countdown_elapsed = 0.0  # 前フレームまでのインスペクション経過時間（カウントダウン音の判定用）
         self.start_time = 0
         self.current_time = 0.0
-        self.scramble = generate_wca_cube_scramble()
-        self.finish_frame_count = 0  # 完了時刻を保存する変数を追加
+        self.scramble = self.scramble_pool.next()
+        self.finish_time = 0  # 完了時刻
         self.sync_result = None  # 同期結果を保存する変数を追加
-        self.sync_end_frame = 0  # 同期終了フレームを保存する変数を追加
+        self.sync_thread = None  # 同期処理のスレッド（同期中のみ）
+        self.sync_end_time = 0  # 同期終了時刻
         
         # 月次統計キャッシュ（STATS状態初回時のみ計算）
         self.monthly_stats_cache = None  # (solve_count, avg_time) のタプル
         
+        # 履歴画面のブラウザ（初回表示時に作成）
+        self.history_browser = None
+        
+        # プロファイル選択画面用変数
+        self.profile_list = []  # 選択画面を開いたときのプロファイル一覧（Profileのリスト）
+        self.selected_profile_index = 0
+        self.profile_sessions = [None]  # 選択中のプロファイルのセッション（Noneは起動時刻のセッション）
+        self.selected_session_index = 0
+        
         # 状態ハンドラマネージャーの初期化
         self.state_handler_manager = StateHandlerManager(self)
         
         # レンダラーの初期化（自身を渡す）
-        self.renderer = SpeedcubeRenderer(self)
+        with self.profiler.phase("renderer"):
+            self.renderer = SpeedcubeRenderer(self)
 
         # Pyxelの実行
         pyxel.run(self.update, self.draw)
 
+    def __setattr__(self, name, value):
+        """属性が変わった場合に再描画が必要であることを記録する（同じ値の再代入は無視）"""
+        if name != 'dirty':
+            old = self.__dict__.get(name, _UNSET)
+            if old is not value and old != value:
+                self.__dict__['dirty'] = True
+        self.__dict__[name] = value
+
+    @property
+    def pattern_db(self) -> PatternDatabase:
+        """パターンデータベース（初回アクセス時に読み込む）"""
+        if self._pattern_db is None:
+            with self.profiler.phase("pattern_db"):
+                self._pattern_db = PatternDatabase()
+        return self._pattern_db
+
+    @property
+    def pattern_sets(self) -> PatternSetStore:
+        """練習セットのストア（初回アクセス時にプリセットを同期する）"""
+        if self._pattern_sets is None:
+            pattern_db = self.pattern_db
+            with self.profiler.phase("pattern_sets"):
+                self._pattern_sets = PatternSetStore(self.logger)
+                self._pattern_sets.sync_presets(pattern_db)
+        return self._pattern_sets
+
     def update(self):
         """状態に応じた更新処理を実行"""
         if pyxel.btnp(pyxel.KEY_C):
@@ -82,15 +195,36 @@ class SpeedcubeApp:
         # 状態ハンドラマネージャーを使用して状態更新を委譲
         self.state_handler_manager.update()
         
+        # 最初のフレームを描画した後の最初の入力処理で起動完了とする
+        if FIRST_FRAME in self.profiler.marks and self.profiler.mark(INTERACTIVE):
+            self._report_startup()
+        
         # Qキーでアプリケーション終了（READY状態のときのみ）
         if pyxel.btnp(pyxel.KEY_Q) and self.state == TimerState.READY:
             result = self.logger.sync_data()
             print(result[1])
+            self.scramble_pool.close()
             pyxel.quit()
             
     def draw(self):
         """描画処理を実行"""
         self.renderer.draw()
+        self.profiler.mark(FIRST_FRAME)
+        # 1フレーム（更新と描画）で実行したクエリ数を記録する
+        self.logger.db.monitor.end_frame()
+
+    def _report_startup(self):
+        """起動時間レポートを出力し、dataディレクトリに保存する"""
+        for line in self.profiler.report().splitlines():
+            print(f"DEBUG: {line}")
+        self.profiler.save(os.path.join(get_default_data_dir(), GC.STARTUP_PROFILE_FILE))
+
+    def _report_queries(self):
+        """終了時にクエリの計測結果を出力し、dataディレクトリに保存する"""
+        monitor = self.logger.db.monitor
+        for line in monitor.report().splitlines():
+            print(f"DEBUG: {line}")
+        monitor.save(os.path.join(get_default_data_dir(), DBC.QUERY_PROFILE_FILE))
 
     def run(self):
         """アプリケーションを実行"""
@@ -0,0 +1,287 @@
+"""パターン・アルゴリズムのマスターデータのバイナリキャッシュ
+
+patterns.json / algorithms.json を起動のたびに解析しないよう、
+文字列テーブルと列ごとの整数配列（struct-of-arrays）に変換したキャッシュファイルを作成する。
+キャッシュはmmapで読み込み、Pattern / Algorithm は参照されたときに初めて生成する。
+生成前のレコードは1フィールド4バイトの配列要素としてのみ保持するため、
+大規模なカタログでもオブジェクト数・メモリ使用量が参照した件数に比例する。
+
+ファイル構成（リトルエンディアン）:
+    ヘッダー     マジック、バージョン、ソースごとの (mtime_ns, サイズ, SHA-256)、各件数
+    文字列表     NUL区切りで連結したUTF-8バイト列（一括でデコードする）
+    パターン     列ごとのuint32配列: id, name, category, setup_moves, description（文字列番号）, difficulty, subset（文字列番号）
+    アルゴリズム 列ごとのuint32配列: id, pattern_id, name, moves, finger_tricks, notes（文字列番号）, is_default
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"SCPC"
+VERSION = 3
+
+_HEADER = struct.Struct("<4sHH")
+_SOURCE = struct.Struct("<qq32s")
+_COUNTS = struct.Struct("<IIII")
+
+# 列の並び（列番号）
+PATTERN_COLUMNS = ('id', 'name', 'category', 'setup_moves', 'description', 'difficulty', 'subset')
+ALGORITHM_COLUMNS = ('id', 'pattern_id', 'name', 'moves', 'finger_tricks', 'notes', 'is_default')
+_COLUMN_SIZE = array('I').itemsize
+
+
+def _to_le_bytes(column: array) -> bytes:
+    """列をリトルエンディアンのバイト列に変換"""
+    if sys.byteorder != 'little':
+        column = array('I', column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le_bytes(data: bytes) -> array:
+    """リトルエンディアンのバイト列から列を復元"""
+    column = array('I')
+    column.frombytes(data)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def source_fingerprint(path: str, digest: bool = True) -> Tuple[int, int, bytes]:
+    """ソースファイルの (mtime_ns, サイズ, SHA-256) を取得（digest=Falseの場合ハッシュは空）"""
+    st = os.stat(path)
+    sha = b""
+    if digest:
+        with open(path, 'rb') as f:
+            sha = hashlib.sha256(f.read()).digest()
+    return st.st_mtime_ns, st.st_size, sha
+
+
+def _is_fresh(stored: Tuple[int, int, bytes], path: str) -> bool:
+    """キャッシュ作成時のソースと現在のソースが同じか
+
+    mtimeとサイズが一致すれば同一とみなし、mtimeのみ異なる場合
+    （チェックアウトやコピーで更新された場合）はハッシュで比較する。
+    """
+    try:
+        mtime_ns, size, _ = source_fingerprint(path, digest=False)
+        if size != stored[1]:
+            return False
+        if mtime_ns == stored[0]:
+            return True
+        return source_fingerprint(path)[2] == stored[2]
+    except OSError:
+        return False
+
+
+class _StringTable:
+    """文字列の登録（重複排除）"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def write_catalog_cache(cache_path: str, sources: Sequence[str], patterns, algorithms) -> bool:
+    """
+    パターン・アルゴリズムをキャッシュファイルに書き出す
+
+    Args:
+        cache_path: キャッシュファイルのパス
+        sources: 元になったJSONファイルのパス（鮮度確認に使用）
+        patterns: Patternのイテラブル
+        algorithms: Algorithmのイテラブル
+
+    Returns:
+        bool: 書き出しに成功したか
+    """
+    strings = _StringTable()
+    pattern_columns = tuple(array('I') for _ in PATTERN_COLUMNS)
+    for p in patterns:
+        for column, value in zip(pattern_columns, (
+                strings.add(p.id), strings.add(p.name), strings.add(p.category.name),
+                strings.add(p.setup_moves), strings.add(p.description), p.difficulty, strings.add(p.subset))):
+            column.append(value)
+    algorithm_columns = tuple(array('I') for _ in ALGORITHM_COLUMNS)
+    for a in algorithms:
+        for column, value in zip(algorithm_columns, (
+                strings.add(a.id), strings.add(a.pattern_id), strings.add(a.name), strings.add(a.moves),
+                strings.add(a.finger_tricks), strings.add(a.notes), 1 if a.is_default else 0)):
+            column.append(value)
+    n_patterns = len(pattern_columns[0])
+    n_algorithms = len(algorithm_columns[0])
+
+    if any("\0" in value for value in strings.strings):
+        print("DEBUG: NUL文字を含むためマスターデータをキャッシュしません")
+        return False
+    text = "\0".join(strings.strings).encode('utf-8')
+
+    try:
+        header = bytearray(_HEADER.pack(MAGIC, VERSION, len(sources)))
+        for path in sources:
+            header += _SOURCE.pack(*source_fingerprint(path))
+        header += _COUNTS.pack(len(strings.strings), n_patterns, n_algorithms, len(text))
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        # 書き込み途中で終了しても壊れないよう一時ファイル経由で置き換える
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(text)
+            for column in pattern_columns + algorithm_columns:
+                f.write(_to_le_bytes(column))
+        os.replace(tmp_path, cache_path)
+        return True
+    except (OSError, struct.error, OverflowError) as e:
+        print(f"DEBUG: マスターデータキャッシュの書き込みに失敗: {e}")
+        return False
+
+
+class _LazyRecords(Mapping):
+    """ID -> オブジェクトの読み取り専用マップ（参照時にレコードから生成）"""
+
+    def __init__(self, ids: List[str], make):
+        self._ids = ids
+        self._position = {record_id: i for i, record_id in enumerate(ids)}
+        self._make = make
+        self._objects: List[Optional[object]] = [None] * len(ids)
+
+    def __getitem__(self, record_id: str):
+        return self.at(self._position[record_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, record_id) -> bool:
+        return record_id in self._position
+
+    def at(self, i: int):
+        """登録順でi番目のオブジェクト"""
+        obj = self._objects[i]
+        if obj is None:
+            obj = self._objects[i] = self._make(i)
+        return obj
+
+    @property
+    def materialized_count(self) -> int:
+        """生成済みのオブジェクト数"""
+        return sum(1 for obj in self._objects if obj is not None)
+
+
+class CachedCatalog:
+    """mmapで開いたキャッシュファイル
+
+    patterns / algorithms はID順序を保った読み取り専用マップで、
+    各オブジェクトは初回参照時にのみ列から生成される。文字列はsys.internで共有する。
+    列は開いた時点で配列にコピーするため、mmapは読み込み後すぐに閉じる。
+    """
+
+    def __init__(self, buffer, n_strings: int, n_patterns: int, n_algorithms: int, offset: int, text_size: int):
+        patterns_offset = offset + text_size
+        algorithms_offset = patterns_offset + _COLUMN_SIZE * n_patterns * len(PATTERN_COLUMNS)
+        if algorithms_offset + _COLUMN_SIZE * n_algorithms * len(ALGORITHM_COLUMNS) != len(buffer):
+            raise ValueError("catalog cache size mismatch")
+
+        # 文字列表は1回のデコードと分割で復元し、同じ文字列は同じオブジェクトを共有する
+        text = buffer[offset:patterns_offset].decode('utf-8')
+        self._strings: List[str] = list(map(sys.intern, text.split("\0"))) if n_strings else []
+        if len(self._strings) != n_strings:
+            raise ValueError("catalog cache string table mismatch")
+
+        self._pattern_columns = self._read_columns(buffer, patterns_offset, n_patterns, len(PATTERN_COLUMNS))
+        self._algorithm_columns = self._read_columns(buffer, algorithms_offset, n_algorithms, len(ALGORITHM_COLUMNS))
+
+        strings = self._strings
+        self.patterns = _LazyRecords([strings[i] for i in self._pattern_columns[0]], self._make_pattern)
+        self.algorithms = _LazyRecords([strings[i] for i in self._algorithm_columns[0]], self._make_algorithm)
+
+    @staticmethod
+    def _read_columns(buffer, offset: int, count: int, n_columns: int) -> Tuple[array, ...]:
+        """連続したn_columns個の列を読み込む"""
+        size = _COLUMN_SIZE * count
+        return tuple(_from_le_bytes(buffer[offset + size * k:offset + size * (k + 1)]) for k in range(n_columns))
+
+    def pattern_keys(self) -> List[Tuple[str, object, str]]:
+        """索引構築用の (パターンID, カテゴリ, サブセット) をオブジェクトを生成せずに取得"""
+        from .patterns import PatternCategory
+        strings = self._strings
+        columns = self._pattern_columns
+        category_of = {i: PatternCategory[strings[i]] for i in set(columns[2])}
+        return [(strings[i], category_of[c], strings[subset])
+                for i, c, subset in zip(columns[0], columns[2], columns[6])]
+
+    def algorithm_keys(self) -> List[Tuple[str, str, bool]]:
+        """索引構築用の (アルゴリズムID, パターンID, デフォルトか) をオブジェクトを生成せずに取得"""
+        strings = self._strings
+        columns = self._algorithm_columns
+        return [(strings[i], strings[p], bool(d)) for i, p, d in zip(columns[0], columns[1], columns[6])]
+
+    def _make_pattern(self, i: int):
+        from .patterns import Pattern, PatternCategory
+        s = self._strings
+        c = self._pattern_columns
+        return Pattern(id=s[c[0][i]], name=s[c[1][i]], category=PatternCategory[s[c[2][i]]],
+                       setup_moves=s[c[3][i]], description=s[c[4][i]], difficulty=c[5][i], subset=s[c[6][i]])
+
+    def _make_algorithm(self, i: int):
+        from .patterns import Algorithm
+        s = self._strings
+        c = self._algorithm_columns
+        return Algorithm(id=s[c[0][i]], pattern_id=s[c[1][i]], name=s[c[2][i]], moves=s[c[3][i]],
+                         finger_tricks=s[c[4][i]], notes=s[c[5][i]], is_default=bool(c[6][i]))
+
+
+def open_catalog_cache(cache_path: str, sources: Sequence[str]) -> Optional[CachedCatalog]:
+    """
+    キャッシュファイルを開く
+
+    Args:
+        cache_path: キャッシュファイルのパス
+        sources: 元になったJSONファイルのパス
+
+    Returns:
+        CachedCatalog: キャッシュが存在し、ソースと一致する場合のみ。それ以外はNone
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"DEBUG: マスターデータキャッシュを開けません: {e}")
+        return None
+
+    try:
+        magic, version, n_sources = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or n_sources != len(sources):
+            raise ValueError("catalog cache format mismatch")
+        offset = _HEADER.size
+        for path in sources:
+            if not _is_fresh(_SOURCE.unpack_from(buffer, offset), path):
+                buffer.close()
+                return None
+            offset += _SOURCE.size
+        n_strings, n_patterns, n_algorithms, text_size = _COUNTS.unpack_from(buffer, offset)
+        catalog = CachedCatalog(buffer, n_strings, n_patterns, n_algorithms, offset + _COUNTS.size, text_size)
+        buffer.close()
+        return catalog
+    except (ValueError, struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        print(f"DEBUG: マスターデータキャッシュが壊れています: {e}")
+        buffer.close()
+        return None
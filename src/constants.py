@@ -21,6 +21,11 @@ class DisplayConfig:
     MIDDLE_FONT_FILE = f"{FONT_PATH}/umplus_j10r.bdf"
     LARGE_FONT_FILE = f"{FONT_PATH}/umplus_j12r.bdf"
     
+    # グリフアトラス（python -m src.font_atlas で作成。dataディレクトリ内。ない場合はBDFフォントを使用）
+    GLYPH_ATLAS_IMAGE_FILE = "font_atlas.png"
+    GLYPH_ATLAS_METRICS_FILE = "font_atlas.json"
+    GLYPH_ATLAS_IMAGE_BANK = 2  # アトラスを読み込むイメージバンク
+    
     # レイアウト
     FONT_SPACING_X = 1
     FONT_SPACING_Y = 5
@@ -37,12 +42,30 @@ class DisplayConfig:
     TIMER_Y = SCRAMBLE_TEXT_Y + MIDDLE_FONT_HEIGHT + MARGIN_Y * 3
     RESULTS_Y = TIMER_Y + LARGE_FONT_HEIGHT + MARGIN_Y * 3
     
-    # フレームレート
+    # フレームレート（既定値。config.iniの[Display] fpsでSUPPORTED_FPSのいずれかに変更可能）
+    # ゲームの処理はすべて経過時間（秒）で行うため、フレームレートを上げても挙動は変わらない
     FPS = 30
+    SUPPORTED_FPS = (30, 60, 120, 240)
+    
+    # アイドル状態（READY・統計・一覧など）で変化がないフレームの描画を省略する
+    SKIP_IDLE_REDRAW = True
+    
+    # 変化の少ないテキストを描画済みレイヤーとしてキャッシュする（Falseで毎フレーム直接描画）
+    # グリフアトラスで描画する場合のみ有効（BDFフォントでは短縮されないため直接描画）
+    TEXT_LAYER_CACHE = True
+    
+    # 履歴画面
+    HISTORY_VISIBLE_ROWS = 14  # 1画面に表示する行数
+    HISTORY_ROW_HEIGHT = 12
+    
+    # パターン統計画面のグラフ
+    STATS_HISTOGRAM_HEIGHT = 60
+    STATS_TREND_HEIGHT = 40
+    STATS_BAND_COLOR = 12  # パーセンタイル帯（P25-P75）の色
     
-    # 点滅表示
-    BLINK_CYCLE = FPS
-    BLINK_ON_TIME = (FPS // 3) * 2  # 1サイクル中の表示時間
+    # 点滅表示（秒）
+    BLINK_PERIOD = 1.0
+    BLINK_ON_DURATION = 2 / 3  # 1周期中の表示時間
 
 class GameConfig:
     """ゲームロジックに関する定数"""
@@ -51,6 +74,18 @@ class GameConfig:
     BUTTON_HOLD_TIME = 1.0  # スペースキー長押しの必要時間
     COUNTDOWN_BEEP_TIMES = [3, 2, 1, 0]  # ビープ音を鳴らすタイミング（残り秒数）
     INSPECTION_GRACE_PERIOD = 2.0  # インスペクション開始後のホールドチェックスキップ時間（秒）
+    SYNC_RESULT_DISPLAY_TIME = 1.5  # 同期結果の表示時間（秒）
+    
+    # ペナルティと平均（WCAルール）
+    PLUS2_PENALTY = 2.0  # +2のペナルティで加える秒数
+    AVERAGE_TRIM_RATIO = 0.05  # AoNで上下それぞれ除く割合（切り上げ、最低1件）
+    
+    # キーリピート（秒。一覧のスクロールなど）
+    KEY_REPEAT_DELAY = 1 / 3
+    KEY_REPEAT_INTERVAL = 1 / 15
+    
+    # 起動時間レポート（フェーズごとの所要時間）の保存先（dataディレクトリ内）
+    STARTUP_PROFILE_FILE = "startup_profile.json"
 
 class TextConstants:
     """表示テキストの定数"""
@@ -61,10 +96,11 @@ class TextConstants:
     PRESS_SPACE = "PRESS [SPACE] TO STOP"
     RECENT = "RECENT"
     AVERAGE = "AVERAGE OF N"
-    AO5_FORMAT = "AO5 : {:.2f}"
-    AO12_FORMAT = "AO12: {:.2f}"
+    AO5_FORMAT = "AO5 : {}"
+    AO12_FORMAT = "AO12: {}"
     AO_EMPTY = "{}: -"
-    SOLVE_FORMAT = "#{:02d}:  {:.2f}"  # 例: #01: 12.34
+    SOLVE_FORMAT = "#{:02d}:  {}"  # 例: #01: 12.34 / #02: 14.34+ / #03: DNF
+    DNF = "DNF"
     QUIT = "PRESS [Q] TO QUIT"
 
 
@@ -79,4 +115,64 @@ class SoundConfig:
     FINISH_SOUND = 2
     CHANGE_SOUND = 3
     HOLD_SOUND = 4
-    SYNC_SOUND = 5
\ No newline at end of file
+    SYNC_SOUND = 5
+
+class ScrambleConfig:
+    """スクランブル生成に関する定数"""
+    # スクランブルの種類（"random_state": ランダムステート, "random_move": ランダムムーブ）
+    SCRAMBLE_TYPE = "random_state"
+    POOL_SIZE = 50  # 事前生成しておくスクランブル数
+    POOL_LOW_WATER = 20  # この数を下回ったらバックグラウンド補充を開始
+    POOL_CACHE_FILE = "scramble_pool.json"  # 未使用スクランブルの保存先（dataディレクトリ内）
+
+class HistoryConfig:
+    """履歴画面（resultsのページ単位の閲覧）に関する定数"""
+    PAGE_SIZE = 64  # 1ページのidの範囲
+    CACHE_PAGES = 16  # LRUキャッシュに保持するページ数
+
+class DatabaseConfig:
+    """データアクセス層（src/database.py）のクエリ計測に関する定数"""
+    STATEMENT_CACHE_SIZE = 256  # 接続ごとに再利用するプリペアドステートメントの数
+    SLOW_QUERY_MS = 10.0  # この時間（ミリ秒）以上かかったクエリを実行計画とともに記録する
+    SLOW_QUERY_LOG_SIZE = 100  # 保持する遅いクエリの件数
+    FRAME_QUERY_WARNING = 20  # 1フレームのクエリ数がこれを超えたら最も多いSQL文を出力する
+    QUERY_PROFILE_FILE = "query_profile.json"  # 終了時の計測結果の保存先（dataディレクトリ内）
+    READER_POOL_SIZE = 4  # 読み込み専用の接続の最大数（スレッドごとに1つ）
+    READER_WAIT_INTERVAL = 0.1  # プールが一杯の場合に終了したスレッドを確認する間隔（秒）
+
+class ProfileConfig:
+    """プロファイル（利用者）とセッションに関する定数"""
+    DEFAULT_PROFILE_ID = 1  # 既定のプロファイル（既存の results テーブルを使う）
+    DEFAULT_PROFILE_NAME = "DEFAULT"
+    RESULTS_TABLE = "results"  # 既定のプロファイルの記録のテーブル
+    RESULTS_TABLE_FORMAT = "results_p{}"  # それ以外のプロファイルの記録のテーブル（プロファイルのid）
+    SHEET_NAME_FORMAT = "{} - {}"  # 既定以外のプロファイルの同期先のワークシート名（シート名, プロファイル名）
+    SHEET_HEADER = ("datetime", "time")  # 同期先のワークシートを作成する場合のヘッダー行
+    VISIBLE_PROFILES = 6  # 選択画面に一度に表示するプロファイル数
+
+class PatternConfig:
+    """パターン練習モードに関する定数"""
+    # パターン一覧のタブの並び順（PatternCategoryの名前。データが存在するカテゴリのみ表示）
+    TAB_ORDER = ("PLL", "OLL", "F2L", "COLL", "CMLL", "ZBLL", "CROSS")
+    
+    # RANDモードの選択方式（"uniform": 一様ランダム, "spaced": 間隔反復, "weighted": 重み付きランダム,
+    # "set": 練習セットを1周）
+    RANDOM_STRATEGIES = ("uniform", "spaced", "weighted", "set")
+    RANDOM_RECENT_LIMIT = 5  # 一様ランダムで直近の出題を避ける件数
+    
+    # 間隔反復スケジューラー（間隔の単位は出題回数）
+    SCHEDULER_RECENT_SOLVES = 12  # 速度・ばらつきの計算に使う直近のソルブ数
+    SCHEDULER_BASE_INTERVAL = 10.0  # 平均的なパターンの出題間隔
+    SCHEDULER_MIN_INTERVAL = 3.0  # 同じパターンを続けて出題しないための最小間隔
+    SCHEDULER_MAX_INTERVAL = 200.0
+    SCHEDULER_DEFAULT_VARIATION = 0.3  # ソルブ数が少ない場合の変動係数
+    
+    # 練習セット
+    WEAK_SET_SIZE = 10  # 苦手セットのパターン数
+    
+    # パターン統計画面（タイム分布）
+    HISTOGRAM_BUCKETS = 48  # ヒストグラムのビン数（対数間隔）
+    HISTOGRAM_MIN_TIME = 0.5  # ヒストグラムの範囲（秒）
+    HISTOGRAM_MAX_TIME = 60.0
+    TREND_POINTS = 48  # 推移グラフの最大点数（偶数）
+    TREND_WINDOW = 12  # 推移の指数移動平均の窓（件）
@@ -0,0 +1,188 @@
+"""置換テーブルによる3x3キューブのシミュレーター
+
+キューブの状態を54枚のステッカーの色配列で表し、各ムーブをステッカー位置の
+置換テーブルとして事前計算する。手順全体も1つの置換に合成できるため、
+多数の状態に対する適用はNumPyのインデックス操作1回で完了する。
+
+ステッカーの並びはURFDLBの順に各面9枚（左上から行優先）。
+"""
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from .notation import BASE_MOVES, N_BASE_MOVES, compile_moves, make_move
+
+N_STICKERS = 54
+FACE_NAMES = "URFDLB"
+
+# 色番号（= 揃った状態での面番号）
+U_COLOR, R_COLOR, F_COLOR, D_COLOR, L_COLOR, B_COLOR = range(6)
+
+
+def _sticker_positions() -> np.ndarray:
+    """各ステッカーの3次元座標（x: 右, y: 上, z: 手前。面は±3、それ以外は-2/0/2）"""
+    positions = []
+    for face in FACE_NAMES:
+        for r in range(3):
+            for c in range(3):
+                a, b = -2 + 2 * c, -2 + 2 * r
+                positions.append({
+                    'U': (a, 3, b),
+                    'R': (3, -b, -a),
+                    'F': (a, -b, 3),
+                    'D': (a, -3, -b),
+                    'L': (-3, -b, a),
+                    'B': (-a, -b, -3),
+                }[face])
+    return np.array(positions, dtype=np.int64)
+
+
+# 基本ムーブごとの回転軸（時計回りに見る面の法線方向）と回転する層の条件
+_AXES = {
+    'U': (0, 1, 0), 'D': (0, -1, 0), 'F': (0, 0, 1), 'B': (0, 0, -1), 'L': (-1, 0, 0), 'R': (1, 0, 0),
+    'M': (-1, 0, 0), 'E': (0, -1, 0), 'S': (0, 0, 1),
+    'x': (1, 0, 0), 'y': (0, 1, 0), 'z': (0, 0, 1),
+}
+
+
+def _layer_mask(base: str, along: np.ndarray) -> np.ndarray:
+    """回転軸方向の座標alongから、ムーブで動くステッカーのマスクを返す"""
+    if base in "UDFBLR":
+        return along >= 2
+    if base in "udfblr":
+        return along >= 0
+    if base in "MES":
+        return along == 0
+    return np.ones_like(along, dtype=bool)
+
+
+def _build_quarter_turn(base: str, positions: np.ndarray, index_of: Dict[Tuple[int, int, int], int]) -> np.ndarray:
+    """基本ムーブの時計回り90度の置換（new[i] = old[perm[i]]）を作成"""
+    axis = np.array(_AXES[base.upper() if base in "udfblr" else base], dtype=np.int64)
+    along = positions @ axis
+    mask = _layer_mask(base, along)
+    # 軸の先から見て時計回り（-90度）の回転: v' = -(a x v) + a (a . v)
+    rotated = -np.cross(axis, positions) + np.outer(along, axis)
+    perm = np.arange(N_STICKERS)
+    for i in np.nonzero(mask)[0]:
+        perm[index_of[tuple(rotated[i])]] = i
+    return perm
+
+
+def _build_move_tables() -> np.ndarray:
+    """全ムーブコード（基本ムーブ x 回転数）の置換テーブル"""
+    positions = _sticker_positions()
+    index_of = {tuple(p): i for i, p in enumerate(positions)}
+    tables = np.empty((3 * N_BASE_MOVES, N_STICKERS), dtype=np.intp)
+    for base_index, base in enumerate(BASE_MOVES):
+        quarter = _build_quarter_turn(base, positions, index_of)
+        perm = quarter
+        for amount in range(1, 4):
+            tables[make_move(base_index, amount)] = perm
+            perm = perm[quarter]
+    return tables
+
+
+MOVE_TABLES = _build_move_tables()
+POSITIONS = _sticker_positions()
+SOLVED = np.repeat(np.arange(6, dtype=np.uint8), 9)
+IDENTITY = np.arange(N_STICKERS, dtype=np.intp)
+CENTERS = np.arange(4, N_STICKERS, 9)
+
+# 上の層（U面とその周囲のステッカー）以外 = F2L部分
+F2L_MASK = POSITIONS[:, 1] < 2
+U_FACE = np.arange(0, 9)
+
+
+def sequence_permutation(moves) -> np.ndarray:
+    """
+    ムーブ列全体を1つの置換に合成する
+
+    Args:
+        moves: 記法文字列またはMoveSequence
+
+    Returns:
+        np.ndarray: 合成した置換（new[i] = old[perm[i]]）
+    """
+    if isinstance(moves, str):
+        moves = compile_moves(moves)
+    perm = IDENTITY
+    for code in moves:
+        perm = perm[MOVE_TABLES[code]]
+    return perm
+
+
+def apply(states: np.ndarray, moves) -> np.ndarray:
+    """
+    状態（1つまたは複数）にムーブ列を適用する
+
+    Args:
+        states: 形状(54,)または(N, 54)の状態配列
+        moves: 記法文字列、MoveSequence、または合成済みの置換
+
+    Returns:
+        np.ndarray: 適用後の状態
+    """
+    perm = moves if isinstance(moves, np.ndarray) else sequence_permutation(moves)
+    return states[..., perm]
+
+
+def apply_each(states: np.ndarray, perms: np.ndarray) -> np.ndarray:
+    """状態ごとに異なる置換を適用する（states: (N, 54), perms: (N, 54)）"""
+    return np.take_along_axis(states, perms, axis=1)
+
+
+def _build_orientation_table() -> np.ndarray:
+    """センターの色（U面, F面）から、向きを元に戻す持ち替えの置換を引く表"""
+    rotations = [IDENTITY]
+    for first in ("", "x", "x2", "x'", "z", "z'"):
+        for second in ("", "y", "y2", "y'"):
+            rotations.append(sequence_permutation(f"{first} {second}"))
+    table = np.tile(IDENTITY, (36, 1))
+    for perm in rotations:
+        centers = SOLVED[perm][CENTERS]
+        # この持ち替え後の状態を元に戻すには逆の置換を適用する
+        inverse = np.empty_like(perm)
+        inverse[perm] = IDENTITY
+        table[centers[U_COLOR] * 6 + centers[F_COLOR]] = inverse
+    return table
+
+
+ORIENTATION_TABLE = _build_orientation_table()
+
+
+def normalize_orientation(states: np.ndarray) -> np.ndarray:
+    """持ち替えを打ち消し、センターが揃った状態の向きに正規化する（states: (N, 54)）"""
+    keys = states[:, CENTERS[U_COLOR]].astype(np.intp) * 6 + states[:, CENTERS[F_COLOR]]
+    return apply_each(states, ORIENTATION_TABLE[keys])
+
+
+def is_solved(states: np.ndarray) -> np.ndarray:
+    """持ち替えを除いて完成しているか（states: (N, 54)）"""
+    return np.all(normalize_orientation(states) == SOLVED, axis=1)
+
+
+def is_oll_solved(states: np.ndarray) -> np.ndarray:
+    """持ち替えを除いてF2L完成かつU面が1色か（states: (N, 54)）"""
+    normalized = normalize_orientation(states)
+    return (np.all(normalized[:, F2L_MASK] == SOLVED[F2L_MASK], axis=1)
+            & np.all(normalized[:, U_FACE] == U_COLOR, axis=1))
+
+
+def is_solved_modulo_auf(states: np.ndarray) -> np.ndarray:
+    """持ち替えとU面の調整（AUF）を除いて完成しているか（states: (N, 54)）"""
+    result = np.zeros(len(states), dtype=bool)
+    for auf in AUF_PERMS:
+        result |= is_solved(states[:, auf])
+    return result
+
+
+AUF_PERMS = [sequence_permutation(auf) for auf in ("", "U", "U2", "U'")]
+
+
+def states_from(moves_list: Iterable, base_state: np.ndarray = SOLVED) -> np.ndarray:
+    """複数のムーブ列をそれぞれbase_stateに適用した状態の配列を返す"""
+    perms = np.array([sequence_permutation(moves) for moves in moves_list], dtype=np.intp)
+    if len(perms) == 0:
+        return np.empty((0, N_STICKERS), dtype=np.uint8)
+    return base_state[perms]
@@ -0,0 +1,343 @@
+"""キュービーレベルのキューブモデル
+
+コーナー・エッジそれぞれの位置（permutation）と向き（orientation）を配列で保持する。
+二段階ソルバー（twophase.py）で使用する座標（twist, flip, slice, corners, ud_edges）の
+変換もここで定義する。
+
+コーナー・エッジの番号付けはKociembaの表記に従う。
+    コーナー: URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+    エッジ: UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+"""
+import random
+from math import comb
+from typing import List, Optional
+
+# コーナー番号
+URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB = range(8)
+# エッジ番号
+UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR = range(12)
+
+# 面の並び（ムーブ番号は 3 * 面番号 + (回転数 - 1)）
+FACES = "URFDLB"
+POWER_SUFFIXES = ("", "2", "'")
+N_MOVES = 18
+
+# 座標の範囲
+N_TWIST = 2187        # 3^7
+N_FLIP = 2048         # 2^11
+N_SLICE = 495         # 12C4
+N_SLICE_SORTED = 11880  # 12! / 8!
+N_CORNERS = 40320     # 8!
+N_UD_EDGES = 40320    # 8!
+N_PERM_4 = 24         # 4!
+
+
+def _rotate_left(arr: List[int], left: int, right: int):
+    """arr[left..right]を左に1つ回転"""
+    temp = arr[left]
+    for i in range(left, right):
+        arr[i] = arr[i + 1]
+    arr[right] = temp
+
+
+def _rotate_right(arr: List[int], left: int, right: int):
+    """arr[left..right]を右に1つ回転"""
+    temp = arr[right]
+    for i in range(right, left, -1):
+        arr[i] = arr[i - 1]
+    arr[left] = temp
+
+
+class CubieCube:
+    """コーナー・エッジの配置と向きで表したキューブの状態"""
+
+    __slots__ = ('cp', 'co', 'ep', 'eo')
+
+    def __init__(self, cp: Optional[List[int]] = None, co: Optional[List[int]] = None,
+                 ep: Optional[List[int]] = None, eo: Optional[List[int]] = None):
+        """
+        Args:
+            cp: コーナーの配置（位置iにあるコーナー番号）
+            co: コーナーの向き（0-2）
+            ep: エッジの配置（位置iにあるエッジ番号）
+            eo: エッジの向き（0-1）
+        """
+        self.cp = list(cp) if cp is not None else list(range(8))
+        self.co = list(co) if co is not None else [0] * 8
+        self.ep = list(ep) if ep is not None else list(range(12))
+        self.eo = list(eo) if eo is not None else [0] * 12
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, CubieCube) and self.cp == other.cp and self.co == other.co
+                and self.ep == other.ep and self.eo == other.eo)
+
+    def __repr__(self) -> str:
+        return f"CubieCube(cp={self.cp}, co={self.co}, ep={self.ep}, eo={self.eo})"
+
+    def copy(self) -> 'CubieCube':
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+    # ========================================
+    # 演算
+    # ========================================
+
+    def corner_multiply(self, b: 'CubieCube'):
+        """コーナーのみ self = self * b を計算"""
+        cp, co = self.cp, self.co
+        self.cp = [cp[b.cp[i]] for i in range(8)]
+        self.co = [(co[b.cp[i]] + b.co[i]) % 3 for i in range(8)]
+
+    def edge_multiply(self, b: 'CubieCube'):
+        """エッジのみ self = self * b を計算"""
+        ep, eo = self.ep, self.eo
+        self.ep = [ep[b.ep[i]] for i in range(12)]
+        self.eo = [(eo[b.ep[i]] + b.eo[i]) % 2 for i in range(12)]
+
+    def multiply(self, b: 'CubieCube'):
+        """self = self * b（selfの状態にbを適用）"""
+        self.corner_multiply(b)
+        self.edge_multiply(b)
+
+    def move(self, move: int):
+        """ムーブ番号（0-17）のムーブを適用"""
+        face, power = divmod(move, 3)
+        for _ in range(power + 1):
+            self.multiply(BASIC_MOVES[face])
+
+    def apply_moves(self, moves: List[int]) -> 'CubieCube':
+        """ムーブ番号の列を順に適用して自身を返す"""
+        for m in moves:
+            self.move(m)
+        return self
+
+    def inverse(self) -> 'CubieCube':
+        """逆元のキューブを返す"""
+        inv = CubieCube()
+        for i in range(8):
+            inv.cp[self.cp[i]] = i
+        for i in range(8):
+            inv.co[i] = (-self.co[inv.cp[i]]) % 3
+        for i in range(12):
+            inv.ep[self.ep[i]] = i
+        for i in range(12):
+            inv.eo[i] = self.eo[inv.ep[i]]
+        return inv
+
+    # ========================================
+    # 検証
+    # ========================================
+
+    def corner_parity(self) -> int:
+        """コーナー置換の偶奇（0: 偶, 1: 奇）"""
+        s = 0
+        for i in range(7, 0, -1):
+            for j in range(i - 1, -1, -1):
+                if self.cp[j] > self.cp[i]:
+                    s += 1
+        return s % 2
+
+    def edge_parity(self) -> int:
+        """エッジ置換の偶奇（0: 偶, 1: 奇）"""
+        s = 0
+        for i in range(11, 0, -1):
+            for j in range(i - 1, -1, -1):
+                if self.ep[j] > self.ep[i]:
+                    s += 1
+        return s % 2
+
+    def is_solvable(self) -> bool:
+        """物理的に到達可能な状態かどうか"""
+        return (sorted(self.cp) == list(range(8)) and sorted(self.ep) == list(range(12))
+                and sum(self.co) % 3 == 0 and sum(self.eo) % 2 == 0
+                and self.corner_parity() == self.edge_parity())
+
+    def is_solved(self) -> bool:
+        return self == SOLVED
+
+    # ========================================
+    # 座標（Phase 1）
+    # ========================================
+
+    def get_twist(self) -> int:
+        """コーナーの向き座標（0..2186）"""
+        ret = 0
+        for i in range(7):
+            ret = 3 * ret + self.co[i]
+        return ret
+
+    def set_twist(self, twist: int):
+        twist_parity = 0
+        for i in range(6, -1, -1):
+            self.co[i] = twist % 3
+            twist_parity += self.co[i]
+            twist //= 3
+        self.co[7] = (-twist_parity) % 3
+
+    def get_flip(self) -> int:
+        """エッジの向き座標（0..2047）"""
+        ret = 0
+        for i in range(11):
+            ret = 2 * ret + self.eo[i]
+        return ret
+
+    def set_flip(self, flip: int):
+        flip_parity = 0
+        for i in range(10, -1, -1):
+            self.eo[i] = flip % 2
+            flip_parity += self.eo[i]
+            flip //= 2
+        self.eo[11] = (-flip_parity) % 2
+
+    def get_slice_sorted(self) -> int:
+        """FR, FL, BL, BRエッジの位置と並び座標（0..11879）
+
+        slice_sorted // 24 はスライスエッジの位置のみ（Phase 1の目標は0）、
+        Phase 2では常に24未満となり並びのみを表す。
+        """
+        a = x = 0
+        edge4 = [0] * 4
+        for j in range(BR, UR - 1, -1):
+            if FR <= self.ep[j] <= BR:
+                a += comb(11 - j, x + 1)
+                edge4[3 - x] = self.ep[j]
+                x += 1
+        b = 0
+        for j in range(3, 0, -1):
+            k = 0
+            while edge4[j] != j + 8:
+                _rotate_left(edge4, 0, j)
+                k += 1
+            b = (j + 1) * b + k
+        return N_PERM_4 * a + b
+
+    def set_slice_sorted(self, idx: int):
+        slice_edge = [FR, FL, BL, BR]
+        other_edge = [UR, UF, UL, UB, DR, DF, DL, DB]
+        b = idx % N_PERM_4
+        a = idx // N_PERM_4
+        self.ep = [-1] * 12
+        j = 1
+        while j < 4:
+            k = b % (j + 1)
+            b //= j + 1
+            while k > 0:
+                _rotate_right(slice_edge, 0, j)
+                k -= 1
+            j += 1
+        x = 4
+        for j in range(12):
+            if a - comb(11 - j, x) >= 0:
+                self.ep[j] = slice_edge[4 - x]
+                a -= comb(11 - j, x)
+                x -= 1
+        x = 0
+        for j in range(12):
+            if self.ep[j] == -1:
+                self.ep[j] = other_edge[x]
+                x += 1
+
+    # ========================================
+    # 座標（Phase 2）
+    # ========================================
+
+    def get_corners(self) -> int:
+        """コーナーの配置座標（0..40319）"""
+        perm = list(self.cp)
+        b = 0
+        for j in range(DRB, URF, -1):
+            k = 0
+            while perm[j] != j:
+                _rotate_left(perm, 0, j)
+                k += 1
+            b = (j + 1) * b + k
+        return b
+
+    def set_corners(self, idx: int):
+        self.cp = list(range(8))
+        for j in range(8):
+            k = idx % (j + 1)
+            idx //= j + 1
+            while k > 0:
+                _rotate_right(self.cp, 0, j)
+                k -= 1
+
+    def get_ud_edges(self) -> int:
+        """U面・D面エッジの配置座標（0..40319、Phase 2でのみ有効）"""
+        perm = self.ep[0:8]
+        b = 0
+        for j in range(DB, UR, -1):
+            k = 0
+            while perm[j] != j:
+                _rotate_left(perm, 0, j)
+                k += 1
+            b = (j + 1) * b + k
+        return b
+
+    def set_ud_edges(self, idx: int):
+        self.ep = list(range(12))
+        for j in range(8):
+            k = idx % (j + 1)
+            idx //= j + 1
+            while k > 0:
+                _rotate_right(self.ep, 0, j)
+                k -= 1
+
+
+# 基本ムーブ（U, R, F, D, L Bの時計回り90度）
+BASIC_MOVES = [
+    CubieCube(cp=[UBR, URF, UFL, ULB, DFR, DLF, DBL, DRB], co=[0, 0, 0, 0, 0, 0, 0, 0],
+              ep=[UB, UR, UF, UL, DR, DF, DL, DB, FR, FL, BL, BR], eo=[0] * 12),
+    CubieCube(cp=[DFR, UFL, ULB, URF, DRB, DLF, DBL, UBR], co=[2, 0, 0, 1, 1, 0, 0, 2],
+              ep=[FR, UF, UL, UB, BR, DF, DL, DB, DR, FL, BL, UR], eo=[0] * 12),
+    CubieCube(cp=[UFL, DLF, ULB, UBR, URF, DFR, DBL, DRB], co=[1, 2, 0, 0, 2, 1, 0, 0],
+              ep=[UR, FL, UL, UB, DR, FR, DL, DB, UF, DF, BL, BR],
+              eo=[0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0]),
+    CubieCube(cp=[URF, UFL, ULB, UBR, DLF, DBL, DRB, DFR], co=[0, 0, 0, 0, 0, 0, 0, 0],
+              ep=[UR, UF, UL, UB, DF, DL, DB, DR, FR, FL, BL, BR], eo=[0] * 12),
+    CubieCube(cp=[URF, ULB, DBL, UBR, DFR, UFL, DLF, DRB], co=[0, 1, 2, 0, 0, 2, 1, 0],
+              ep=[UR, UF, BL, UB, DR, DF, FL, DB, FR, UL, DL, BR], eo=[0] * 12),
+    CubieCube(cp=[URF, UFL, UBR, DRB, DFR, DLF, ULB, DBL], co=[0, 0, 1, 2, 0, 0, 2, 1],
+              ep=[UR, UF, UL, BR, DR, DF, DL, BL, FR, FL, UB, DB],
+              eo=[0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1]),
+]
+
+SOLVED = CubieCube()
+
+
+def move_to_string(move: int) -> str:
+    """ムーブ番号を記法文字列に変換（例: 4 -> "R2"）"""
+    face, power = divmod(move, 3)
+    return FACES[face] + POWER_SUFFIXES[power]
+
+
+def moves_to_string(moves: List[int]) -> str:
+    return ' '.join(move_to_string(m) for m in moves)
+
+
+def parse_face_moves(text: str) -> List[int]:
+    """U/R/F/D/L Bの面回転のみからなる記法をムーブ番号の列に変換"""
+    moves = []
+    for token in text.split():
+        face = FACES.index(token[0])
+        suffix = token[1:]
+        power = POWER_SUFFIXES.index(suffix) if suffix in POWER_SUFFIXES else None
+        if power is None:
+            raise ValueError(f"Unsupported move: {token}")
+        moves.append(3 * face + power)
+    return moves
+
+
+def random_cube(rng: Optional[random.Random] = None) -> CubieCube:
+    """一様ランダムな到達可能状態を生成する"""
+    rng = rng or random
+    cube = CubieCube()
+    cube.set_corners(rng.randrange(N_CORNERS))
+    ep = list(range(12))
+    rng.shuffle(ep)
+    cube.ep = ep
+    # コーナーとエッジの偶奇を揃える
+    if cube.edge_parity() != cube.corner_parity():
+        cube.ep[0], cube.ep[1] = cube.ep[1], cube.ep[0]
+    cube.set_twist(rng.randrange(N_TWIST))
+    cube.set_flip(rng.randrange(N_FLIP))
+    return cube
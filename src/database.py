@@ -0,0 +1,406 @@
+"""SQLiteのデータアクセス層（クエリの計測）
+
+記録・統計・練習セットのクエリはすべて Database を通して実行する。
+Database はSQLiteの接続を包み、クエリごとに次を記録する（QueryMonitor）。
+
+    所要時間:       SQL文ごとの実行回数・合計・最大と、2のべき乗（マイクロ秒）の区間のヒストグラム
+    遅いクエリ:     DatabaseConfig.SLOW_QUERY_MS を超えたクエリ。SQL文ごとに初回のみ
+                    EXPLAIN QUERY PLAN の結果を合わせて記録する
+    フレームごとの件数: end_frame() を呼ぶまでに実行したクエリ数。
+                    DatabaseConfig.FRAME_QUERY_WARNING を超えたフレームでは、
+                    最も多く実行したSQL文を出力する（1行ごとにクエリを発行する N+1 の検出用）。
+                    数えるのは end_frame() を呼ぶスレッド（メインループ）のクエリのみで、
+                    同期や履歴の先読みなどバックグラウンドのスレッドのクエリはフレームに含めない
+
+プリペアドステートメントは接続の文キャッシュ（cached_statements）で再利用する。
+SQL文を定数の文字列にしておけば、同じ文を2回目以降に解析し直すことはない。
+
+接続（ConnectionManager）:
+    書き込みは1つの接続（writer）で write() のブロックごとに1トランザクションとして行う。
+    読み込みはWALモードの読み込み専用接続を使い、スレッドごとに同じ接続を割り当てる
+    （最大 DatabaseConfig.READER_POOL_SIZE 個）。長い読み込み（同期・分布の作成）の間も
+    書き込みは待たされず、バックグラウンドのスレッドも自分の接続で読み込める。
+"""
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from .constants import DatabaseConfig as DBC
+
+HISTOGRAM_BUCKETS = 24  # 区間 i は [2^(i-1), 2^i) マイクロ秒（最後の区間は約8秒以上）
+
+
+@dataclass
+class QueryStats:
+    """1つのSQL文の計測結果"""
+    calls: int = 0
+    total: float = 0.0  # 合計（秒）
+    max: float = 0.0
+    histogram: Optional[List[int]] = None
+
+    def __post_init__(self):
+        if self.histogram is None:
+            self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, elapsed: float):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[min(int(elapsed * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, q: float) -> float:
+        """q（0-1）パーセンタイルを含む区間の上限（秒）"""
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """遅いクエリの記録"""
+    sql: str
+    elapsed: float  # 秒
+    plan: Optional[str]  # EXPLAIN QUERY PLAN の結果（SQL文ごとに初回のみ）
+
+
+def normalize_sql(sql: str) -> str:
+    """集計のキーにするため、SQL文の空白・改行を1つの空白にまとめる"""
+    return " ".join(sql.split())
+
+
+class QueryMonitor:
+    """クエリの所要時間・遅いクエリ・フレームごとのクエリ数を記録する（複数の接続で共有できる）"""
+
+    def __init__(self, slow_query_ms: float = DBC.SLOW_QUERY_MS,
+                 frame_query_warning: int = DBC.FRAME_QUERY_WARNING):
+        self.slow_query = slow_query_ms / 1000
+        self.frame_query_warning = frame_query_warning
+        self.queries: Dict[str, QueryStats] = {}  # 正規化したSQL文 -> 計測結果
+        self.slow_queries = deque(maxlen=DBC.SLOW_QUERY_LOG_SIZE)
+        self.plans: Dict[str, str] = {}  # 遅いクエリの実行計画（正規化したSQL文 -> 計画）
+        self.frames = 0
+        self.frame_counts = Counter()  # 1フレームのクエリ数 -> フレーム数
+        self._frame = Counter()  # 現在のフレームで実行したSQL文 -> 回数
+        self._frame_thread = threading.main_thread().ident  # フレームを進めるスレッド（end_frameで更新）
+        self._warned = set()  # N+1を出力済みのSQL文
+        self._keys: Dict[str, str] = {}  # SQL文 -> 正規化したSQL文
+        self._lock = threading.Lock()
+
+    def key(self, sql: str) -> str:
+        key = self._keys.get(sql)
+        if key is None:
+            key = self._keys[sql] = normalize_sql(sql)
+        return key
+
+    def record(self, sql: str, elapsed: float) -> bool:
+        """
+        クエリの所要時間を記録する
+
+        Returns:
+            bool: 実行計画を取得すべき遅いクエリ（このSQL文で初めて遅かった）場合はTrue
+        """
+        key = self.key(sql)
+        with self._lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats()
+            stats.add(elapsed)
+            if threading.get_ident() == self._frame_thread:
+                self._frame[key] += 1
+            if elapsed < self.slow_query:
+                return False
+            if key in self.plans:
+                self.slow_queries.append(SlowQuery(key, elapsed, self.plans[key]))
+                return False
+            return True
+
+    def record_plan(self, sql: str, elapsed: float, plan: Optional[str]):
+        """遅いクエリを実行計画とともに記録し、出力する"""
+        key = self.key(sql)
+        with self._lock:
+            self.plans[key] = plan
+            self.slow_queries.append(SlowQuery(key, elapsed, plan))
+        print(f"DEBUG: 遅いクエリ {elapsed * 1000:.1f} ms: {key[:120]}")
+        if plan:
+            print(f"DEBUG:   実行計画: {plan}")
+
+    def end_frame(self) -> int:
+        """
+        フレームの区切り（描画の後に呼ぶ）。フレーム中のクエリ数を記録する
+
+        呼び出したスレッドをフレームを進めるスレッドとし、以降はそのスレッドのクエリのみを数える。
+
+        Returns:
+            int: このフレームでフレームのスレッドが実行したクエリ数
+        """
+        with self._lock:
+            self._frame_thread = threading.get_ident()
+            frame, self._frame = self._frame, Counter()
+        count = sum(frame.values())
+        self.frames += 1
+        self.frame_counts[count] += 1
+        if count > self.frame_query_warning:
+            key, repeats = frame.most_common(1)[0]
+            if key not in self._warned:
+                self._warned.add(key)
+                print(f"DEBUG: 1フレームで{count}件のクエリ（{repeats}件: {key[:120]}）")
+        return count
+
+    def summary(self) -> dict:
+        """計測結果（JSONに保存できる形式。時間はミリ秒）"""
+        with self._lock:
+            queries = sorted(self.queries.items(), key=lambda item: item[1].total, reverse=True)
+            slow_queries = list(self.slow_queries)
+        return {
+            "queries": [
+                {"sql": key, "calls": stats.calls, "total_ms": round(stats.total * 1000, 3),
+                 "mean_ms": round(stats.total / stats.calls * 1000, 3), "max_ms": round(stats.max * 1000, 3),
+                 "p50_ms": round(stats.percentile(0.5) * 1000, 3),
+                 "p95_ms": round(stats.percentile(0.95) * 1000, 3), "histogram_us_log2": stats.histogram}
+                for key, stats in queries],
+            "slow_queries": [
+                {"sql": slow.sql, "elapsed_ms": round(slow.elapsed * 1000, 3), "plan": slow.plan}
+                for slow in slow_queries],
+            "frames": self.frames,
+            "queries_per_frame": {str(count): frames for count, frames in sorted(self.frame_counts.items())},
+        }
+
+    def report(self, top: int = 10) -> str:
+        """合計時間の長いSQL文の一覧（ログ出力用）"""
+        summary = self.summary()
+        lines = [f"クエリ: {len(summary['queries'])}種類, "
+                 f"{sum(query['calls'] for query in summary['queries'])}回, {self.frames}フレーム"]
+        for query in summary["queries"][:top]:
+            lines.append(f"  {query['total_ms']:9.1f} ms  {query['calls']:6d}回  "
+                         f"p95 {query['p95_ms']:7.2f} ms  {query['sql'][:80]}")
+        if self.frame_counts:
+            lines.append(f"  1フレームの最大クエリ数: {max(self.frame_counts)}")
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        """計測結果をJSONファイルに保存する（失敗してもアプリは止めない）"""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"DEBUG: クエリの計測結果の保存に失敗: {e}")
+
+
+class Database:
+    """計測付きでクエリを実行するSQLiteの接続"""
+
+    def __init__(self, conn: sqlite3.Connection, monitor: QueryMonitor = None):
+        self.conn = conn
+        self.monitor = monitor if monitor is not None else QueryMonitor()
+
+    def _finish(self, sql: str, params, elapsed: float, explain: bool = True):
+        if self.monitor.record(sql, elapsed):
+            self.monitor.record_plan(sql, elapsed, self.explain(sql, params) if explain else None)
+
+    def explain(self, sql: str, params=()) -> Optional[str]:
+        """EXPLAIN QUERY PLAN の結果（各行の説明を ; で連結）。取得できない場合はNone"""
+        try:
+            rows = self.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error:
+            return None
+        return "; ".join(row[-1] for row in rows) or None
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """更新系のクエリを実行する（結果を読むクエリは fetchone / fetchall を使う）"""
+        start = time.perf_counter()
+        cursor = self.conn.execute(sql, params)
+        self._finish(sql, params, time.perf_counter() - start)
+        return cursor
+
+    def executemany(self, sql: str, rows) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        cursor = self.conn.executemany(sql, rows)
+        self._finish(sql, None, time.perf_counter() - start, explain=False)
+        return cursor
+
+    def fetchone(self, sql: str, params=()):
+        start = time.perf_counter()
+        row = self.conn.execute(sql, params).fetchone()
+        self._finish(sql, params, time.perf_counter() - start)
+        return row
+
+    def fetchall(self, sql: str, params=()) -> list:
+        start = time.perf_counter()
+        rows = self.conn.execute(sql, params).fetchall()
+        self._finish(sql, params, time.perf_counter() - start)
+        return rows
+
+    def scalar(self, sql: str, params=()):
+        """1行目の1列目の値（行がない場合はNone）"""
+        row = self.fetchone(sql, params)
+        return row[0] if row else None
+
+    def iterate(self, sql: str, params=(), batch_size: int = 10000) -> Iterator[tuple]:
+        """
+        結果を batch_size 行ずつ読み込む（専用のカーソルを使うため、読み込み中に他のクエリを実行できる）
+
+        所要時間は読み込みの合計（呼び出し側の処理時間は含まない）。
+        """
+        elapsed = 0.0
+        start = time.perf_counter()
+        cursor = self.conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            elapsed += time.perf_counter() - start
+            if not rows:
+                break
+            yield from rows
+            start = time.perf_counter()
+        self._finish(sql, params, elapsed)
+
+    def commit(self):
+        start = time.perf_counter()
+        self.conn.commit()
+        self._finish("COMMIT", None, time.perf_counter() - start, explain=False)
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+def connect(path: str, monitor: QueryMonitor = None, **kwargs) -> Database:
+    """
+    SQLiteファイルを開く（文キャッシュの大きさは DatabaseConfig.STATEMENT_CACHE_SIZE）
+
+    Args:
+        path: データベースファイルのパス
+        monitor: 計測結果の記録先（複数の接続で共有する場合に指定）
+        **kwargs: sqlite3.connect に渡す引数
+    """
+    kwargs.setdefault("cached_statements", DBC.STATEMENT_CACHE_SIZE)
+    return Database(sqlite3.connect(path, **kwargs), monitor)
+
+
+class ConnectionManager:
+    """書き込み用の接続1つと、スレッドごとに割り当てる読み込み専用の接続のプール"""
+
+    def __init__(self, path: str, monitor: QueryMonitor = None, readers: int = DBC.READER_POOL_SIZE):
+        """
+        Args:
+            path: データベースファイルのパス（":memory:" の場合は読み込みも書き込み用の接続で行う）
+            monitor: 計測結果の記録先（省略時は新しく作成）
+            readers: 読み込み専用の接続の最大数
+        """
+        self.path = path
+        self.monitor = monitor if monitor is not None else QueryMonitor()
+        self.size = readers
+        self._memory = path == ":memory:"
+        # 書き込み用の接続は write() のロックを持つスレッドだけが使う
+        self.writer = connect(path, self.monitor, check_same_thread=False)
+        if not self._memory:
+            self.writer.fetchone("PRAGMA journal_mode = WAL")
+        self._write_lock = threading.RLock()
+        self._depth = 0  # write() の入れ子の深さ（一番外側でコミットする）
+        self._readers: Dict[int, Database] = {}  # スレッドID -> 割り当てた接続
+        self._idle: List[Database] = []  # 返却された接続
+        self._opened = 0
+        self._pool = threading.Condition()
+
+    # ---- 書き込み ----
+
+    @contextmanager
+    def write(self) -> Iterator[Database]:
+        """
+        書き込み用の接続でトランザクションを実行する（ブロックを抜けるとコミット、例外の場合はロールバック）
+
+        入れ子にしたブロックは外側のトランザクションに含まれる。
+        """
+        with self._write_lock:
+            self._depth += 1
+            try:
+                yield self.writer
+            except BaseException:
+                if self._depth == 1:
+                    self.writer.rollback()
+                raise
+            else:
+                if self._depth == 1:
+                    self.writer.commit()
+            finally:
+                self._depth -= 1
+
+    # ---- 読み込み ----
+
+    def read(self) -> Database:
+        """
+        呼び出したスレッドの読み込み専用の接続（初回のみプールから割り当て、以降は同じ接続）
+
+        プールが一杯の場合は、終了したスレッドの接続を引き継ぐか、返却されるまで待つ。
+        """
+        if self._memory:
+            return self.writer
+        ident = threading.get_ident()
+        db = self._readers.get(ident)
+        if db is not None:
+            return db
+        with self._pool:
+            while True:
+                if self._idle:
+                    db = self._idle.pop()
+                elif self._opened < self.size:
+                    db = connect(pathlib.Path(self.path).absolute().as_uri() + "?mode=ro", self.monitor,
+                                 uri=True, check_same_thread=False)
+                    self._opened += 1
+                else:
+                    db = self._reclaim()
+                if db is not None:
+                    self._readers[ident] = db
+                    return db
+                self._pool.wait(DBC.READER_WAIT_INTERVAL)
+
+    def _reclaim(self) -> Optional[Database]:
+        """終了したスレッドに割り当てていた接続を取り戻す"""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in list(self._readers):
+            if ident not in alive:
+                return self._readers.pop(ident)
+        return None
+
+    def release(self):
+        """呼び出したスレッドの読み込み専用の接続をプールに返す（バックグラウンドのスレッドの終了時に呼ぶ）"""
+        with self._pool:
+            db = self._readers.pop(threading.get_ident(), None)
+            if db is not None:
+                self._idle.append(db)
+                self._pool.notify()
+
+    def fetchone(self, sql: str, params=()):
+        return self.read().fetchone(sql, params)
+
+    def fetchall(self, sql: str, params=()) -> list:
+        return self.read().fetchall(sql, params)
+
+    def scalar(self, sql: str, params=()):
+        return self.read().scalar(sql, params)
+
+    def iterate(self, sql: str, params=(), batch_size: int = 10000) -> Iterator[tuple]:
+        return self.read().iterate(sql, params, batch_size)
+
+    def close(self):
+        """すべての接続を閉じる"""
+        with self._pool:
+            readers = list(self._readers.values()) + self._idle
+            self._readers.clear()
+            self._idle.clear()
+        for db in readers:
+            db.close()
+        with self._write_lock:
+            self.writer.close()
@@ -0,0 +1,387 @@
+"""
+グリフアトラス（UIで使う文字だけを抜き出したフォント画像）の作成と描画
+
+BDFフォント（DisplayConfig.MIDDLE_FONT_FILE / LARGE_FONT_FILE）は日本語を含む全文字を
+起動のたびに解析するため読み込みに時間がかかる。UIで使う文字（ASCII・描画処理の文字列・
+パターン/アルゴリズムのマスターデータに含まれる文字）のグリフだけを1枚の画像に並べ、
+グリフの位置と字送りをメトリクス表（JSON）として data ディレクトリに保存しておく。
+
+起動時は画像をイメージバンクに読み込み、1文字ずつ blt で転送して描画する。
+アトラスにない文字を含む文字列（ユーザーが付けたセット名など）は元のBDFフォントで描画する。
+
+使い方:
+    python -m src.font_atlas                # DisplayConfigのフォントからアトラスを作成
+    python -m src.font_atlas --font-dir DIR # フォントのディレクトリを指定
+"""
+import argparse
+import ast
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .constants import DisplayConfig as DC
+
+ATLAS_VERSION = 1
+ATLAS_WIDTH = 256  # Pyxelのイメージバンクの幅
+ATLAS_MAX_HEIGHT = 256
+ATLAS_INK = 7  # アトラス内のグリフの色（白。描画時にパレットで文字色に置き換える）
+ATLAS_BACKGROUND = 0  # アトラスの背景色（転送時の透明色）
+
+# 描画に使う文字列を含むソースファイル（srcディレクトリからの相対パス）
+TEXT_SOURCES = ("renderer.py", "constants.py")
+# 描画に使う文字列を含むマスターデータ（dataディレクトリからの相対パス）
+TEXT_DATA_FILES = ("patterns.json", "algorithms.json")
+
+# グリフ: (u, v, 幅, 高さ, x方向のオフセット, 上端のオフセット, 字送り)
+Glyph = Tuple[int, int, int, int, int, int, int]
+
+
+class BdfGlyph:
+    """BDFフォントの1文字分のビットマップ"""
+
+    __slots__ = ('char', 'width', 'height', 'x_offset', 'y_offset', 'advance', 'rows')
+
+    def __init__(self, char: str, width: int, height: int, x_offset: int, y_offset: int,
+                 advance: int, rows: List[int]):
+        self.char = char
+        self.width = width
+        self.height = height
+        self.x_offset = x_offset
+        self.y_offset = y_offset  # ベースラインからグリフの下端までの高さ
+        self.advance = advance
+        self.rows = rows  # 各行のビット列（左端が最上位ビット）
+
+    def pixel(self, x: int, y: int) -> bool:
+        """グリフ内の (x, y) が描画されるか"""
+        row_bits = (self.width + 7) // 8 * 8
+        return bool(self.rows[y] >> (row_bits - 1 - x) & 1)
+
+
+def parse_bdf(path: str, chars: Iterable[str]) -> Tuple[int, int, Dict[str, BdfGlyph]]:
+    """
+    BDFフォントから指定の文字のグリフを読み込む（ENCODINGはUnicodeのコードポイント）
+
+    Args:
+        path: BDFファイルのパス
+        chars: 読み込む文字
+
+    Returns:
+        (アセント, 行の高さ, 文字 -> グリフ)。フォントにない文字は含まない
+    """
+    wanted = {ord(c) for c in chars}
+    glyphs: Dict[str, BdfGlyph] = {}
+    ascent = None
+    line_height = 0
+    bbox_ascent = 0
+    with open(path, encoding='latin-1') as f:
+        lines = iter(f)
+        for line in lines:
+            key, _, value = line.strip().partition(' ')
+            if key == 'FONTBOUNDINGBOX':
+                _, height, _, y_offset = (int(v) for v in value.split())
+                line_height = height
+                bbox_ascent = height + y_offset
+            elif key == 'FONT_ASCENT':
+                ascent = int(value)
+            elif key == 'STARTCHAR':
+                glyph = _parse_char(lines, wanted)
+                if glyph is not None:
+                    glyphs[glyph.char] = glyph
+    return (ascent if ascent is not None else bbox_ascent), line_height, glyphs
+
+
+def _parse_char(lines, wanted) -> Optional[BdfGlyph]:
+    """STARTCHARの次の行からENDCHARまでを読み、対象の文字であればグリフを返す"""
+    code = advance = None
+    bbx = (0, 0, 0, 0)
+    rows: List[int] = []
+    in_bitmap = False
+    for line in lines:
+        line = line.strip()
+        if line == 'ENDCHAR':
+            break
+        if in_bitmap:
+            if code in wanted:
+                rows.append(int(line, 16))
+            continue
+        key, _, value = line.partition(' ')
+        if key == 'ENCODING':
+            code = int(value.split()[0])
+        elif key == 'DWIDTH':
+            advance = int(value.split()[0])
+        elif key == 'BBX':
+            bbx = tuple(int(v) for v in value.split())
+        elif key == 'BITMAP':
+            in_bitmap = True
+    if code is None or code < 0 or code not in wanted:
+        return None
+    width, height, x_offset, y_offset = bbx
+    return BdfGlyph(chr(code), width, height, x_offset, y_offset,
+                    advance if advance is not None else width, rows[:height])
+
+
+def collect_ui_chars(src_dir: str, data_dir: str) -> str:
+    """
+    UIで描画する可能性のある文字を集める
+
+    ASCIIの印字可能文字に加え、描画処理のソース中の文字列リテラル（f-stringの固定部分を含み、
+    docstringは除く）とマスターデータの文字列に含まれる文字。
+
+    Returns:
+        文字を並べた文字列（コードポイント順）
+    """
+    chars = {chr(c) for c in range(0x20, 0x7F)}
+    for name in TEXT_SOURCES:
+        with open(os.path.join(src_dir, name), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        docstrings = {
+            id(node.body[0].value) for node in ast.walk(tree)
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+            and node.body and isinstance(node.body[0], ast.Expr)
+        }
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in docstrings:
+                chars.update(node.value)
+    for name in TEXT_DATA_FILES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                _collect_json_strings(json.load(f), chars)
+    return ''.join(sorted(c for c in chars if c.isprintable()))
+
+
+def _collect_json_strings(value, chars: set):
+    """JSONの値に含まれる文字列（キーを含む）の文字を集める"""
+    if isinstance(value, str):
+        chars.update(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            chars.update(key)
+            _collect_json_strings(item, chars)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_json_strings(item, chars)
+
+
+def build_atlas(fonts: Dict[str, str], chars: str) -> Tuple[List[bytearray], dict]:
+    """
+    フォントごとに指定の文字のグリフを1枚の画像に並べる
+
+    Args:
+        fonts: フォント名 -> BDFファイルのパス
+        chars: アトラスに含める文字
+
+    Returns:
+        (画像の各行のピクセル値, メトリクス表)
+
+    Raises:
+        ValueError: グリフがアトラスの大きさに収まらない場合
+    """
+    pixels: List[bytearray] = []
+    metrics = {"version": ATLAS_VERSION, "width": ATLAS_WIDTH, "height": 0, "fonts": {}}
+    v = 0
+    for name, path in fonts.items():
+        ascent, line_height, glyphs = parse_bdf(path, chars)
+        row_height = max((g.height for g in glyphs.values()), default=0)
+        entries: Dict[str, Glyph] = {}
+        u = 0
+        for char in sorted(glyphs):
+            glyph = glyphs[char]
+            if u + glyph.width > ATLAS_WIDTH:
+                u, v = 0, v + row_height
+            while len(pixels) < v + row_height:
+                pixels.append(bytearray(ATLAS_WIDTH))
+            for y in range(glyph.height):
+                row = pixels[v + y]
+                for x in range(glyph.width):
+                    if glyph.pixel(x, y):
+                        row[u + x] = ATLAS_INK
+            top = ascent - glyph.y_offset - glyph.height
+            entries[char] = (u, v, glyph.width, glyph.height, glyph.x_offset, top, glyph.advance)
+            u += glyph.width
+        v += row_height
+        metrics["fonts"][name] = {
+            "source": os.path.basename(path), "line_height": line_height, "glyphs": entries}
+    if v > ATLAS_MAX_HEIGHT:
+        raise ValueError(f"グリフがアトラスに収まりません（高さ {v} > {ATLAS_MAX_HEIGHT}）")
+    metrics["height"] = v
+    return pixels[:v], metrics
+
+
+def write_png(path: str, pixels: List[bytearray]):
+    """
+    ピクセル値（ATLAS_INK / ATLAS_BACKGROUND）を白黒のグレースケールPNGとして保存する
+
+    Pyxelは読み込み時に最も近いパレット色に変換するため、白がATLAS_INK、黒が背景色になる。
+    """
+    height = len(pixels)
+    width = len(pixels[0]) if pixels else 0
+    raw = b''.join(b'\x00' + bytes(255 if p else 0 for p in row) for row in pixels)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def get_atlas_paths(data_dir: str) -> Tuple[str, str]:
+    """(アトラス画像のパス, メトリクス表のパス)"""
+    return (os.path.join(data_dir, DC.GLYPH_ATLAS_IMAGE_FILE),
+            os.path.join(data_dir, DC.GLYPH_ATLAS_METRICS_FILE))
+
+
+def load_atlas_metrics(data_dir: str) -> Optional[dict]:
+    """
+    メトリクス表を読み込む
+
+    Returns:
+        メトリクス表。アトラスがない・形式が異なる場合はNone（BDFフォントを使う）
+    """
+    image_path, metrics_path = get_atlas_paths(data_dir)
+    if not (os.path.exists(image_path) and os.path.exists(metrics_path)):
+        return None
+    try:
+        with open(metrics_path, encoding='utf-8') as f:
+            metrics = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"DEBUG: グリフアトラスの読み込みに失敗: {e}")
+        return None
+    if metrics.get("version") != ATLAS_VERSION:
+        print("DEBUG: グリフアトラスの形式が異なるため、BDFフォントを使用します")
+        return None
+    return metrics
+
+
+class GlyphAtlasFont:
+    """グリフアトラスから1文字ずつ転送して描画するフォント"""
+
+    def __init__(self, image, font_metrics: dict, fallback: Callable[[], object]):
+        """
+        Args:
+            image: アトラスを読み込んだイメージ（pyxel.Image）
+            font_metrics: メトリクス表のフォント1つ分
+            fallback: アトラスにない文字を含む文字列の描画に使うフォントを返す関数
+                      （初回に必要になったときのみ呼び出す）
+        """
+        self.image = image
+        self.line_height = font_metrics["line_height"]
+        self.glyphs: Dict[str, Glyph] = {char: tuple(g) for char, g in font_metrics["glyphs"].items()}
+        self._fallback = fallback
+        self._fallback_font = None
+
+    def covers(self, text: str) -> bool:
+        """文字列のすべての文字がアトラスにあるか（改行を除く）"""
+        glyphs = self.glyphs
+        return all(c in glyphs or c == '\n' for c in text)
+
+    def _get_fallback_font(self):
+        """BDFフォント（読み込めない場合はFalse）"""
+        if self._fallback_font is None:
+            try:
+                self._fallback_font = self._fallback()
+            except Exception as e:
+                print(f"DEBUG: BDFフォントの読み込みに失敗: {e}")
+                self._fallback_font = False
+        return self._fallback_font
+
+    def draw(self, canvas, x: int, y: int, text: str, col: int):
+        """
+        文字列を描画する
+
+        Args:
+            canvas: 描画先（pyxelモジュールまたはpyxel.Image）
+        """
+        if not self.covers(text):
+            font = self._get_fallback_font()
+            if font:
+                canvas.text(x, y, text, col, font)
+                return
+        glyphs = self.glyphs
+        canvas.pal(ATLAS_INK, col)
+        start_x = x
+        for c in text:
+            if c == '\n':
+                x = start_x
+                y += self.line_height
+                continue
+            glyph = glyphs.get(c)
+            if glyph is None:
+                continue
+            u, v, w, h, x_offset, top, advance = glyph
+            if w and h:
+                canvas.blt(x + x_offset, y + top, self.image, u, v, w, h, ATLAS_BACKGROUND)
+            x += advance
+        canvas.pal()
+
+
+def draw_text(canvas, x: int, y: int, text: str, col: int, font=None):
+    """
+    フォントの種類に応じて文字列を描画する
+
+    Args:
+        canvas: 描画先（pyxelモジュールまたはpyxel.Image）
+        font: GlyphAtlasFont・pyxel.Font、またはNone（Pyxel組み込みのフォント）
+    """
+    if font is None:
+        canvas.text(x, y, text, col)
+    elif isinstance(font, GlyphAtlasFont):
+        font.draw(canvas, x, y, text, col)
+    else:
+        canvas.text(x, y, text, col, font)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="UIで使う文字のグリフアトラスを作成する")
+    parser.add_argument("--font-dir", help="BDFフォントのディレクトリ（省略時はDisplayConfig.FONT_PATH）")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("グリフアトラスの作成")
+    print("=" * 60)
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(src_dir), 'data')
+    font_files = {"middle": DC.MIDDLE_FONT_FILE, "large": DC.LARGE_FONT_FILE}
+    if args.font_dir:
+        fonts = {name: os.path.join(args.font_dir, os.path.basename(path)) for name, path in font_files.items()}
+    else:
+        # フォントのパスはsrcディレクトリからの相対パス
+        fonts = {name: os.path.normpath(os.path.join(src_dir, path)) for name, path in font_files.items()}
+    missing = [path for path in fonts.values() if not os.path.exists(path)]
+    if missing:
+        print(f"✗ フォントが見つかりません: {', '.join(missing)}")
+        return 1
+
+    start = time.perf_counter()
+    chars = collect_ui_chars(src_dir, data_dir)
+    try:
+        pixels, metrics = build_atlas(fonts, chars)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    image_path, metrics_path = get_atlas_paths(data_dir)
+    write_png(image_path, pixels)
+    with open(metrics_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False, separators=(',', ':'))
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ 対象の文字: {len(chars)}文字")
+    for name, font in metrics["fonts"].items():
+        absent = len(chars) - len(font["glyphs"])
+        print(f"✓ {name} ({font['source']}): {len(font['glyphs'])}グリフ（フォントにない文字 {absent}）")
+    print(f"✓ アトラス: {metrics['width']}x{metrics['height']} -> {image_path}")
+    print(f"✓ 作成時間: {elapsed * 1000:.1f} ms")
+    print("\n✅ グリフアトラスを作成しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""セッション履歴ブラウザ（results テーブルのページ単位の閲覧）
+
+results を全件読み込まずに閲覧するため、id の範囲でページを区切って読み込む
+（ページ k は id が [k * PAGE_SIZE, (k + 1) * PAGE_SIZE) の行）。
+読み込んだページは表示用に変換してLRUキャッシュに保持し、
+表示中のページの前後はバックグラウンドスレッドで先読みする。
+
+セッション・日付へのジャンプはインデックス（idx_results_session, idx_results_datetime）
+を使った1行の検索で先頭の id を求めるため、記録件数によらずO(log n)で完了する。
+閲覧するのは現在のプロファイルの記録のテーブルのみ（src/profiles.py）。
+"""
+import datetime
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .constants import HistoryConfig as HC
+from .database import ConnectionManager, Database
+from .penalty import Penalty, format_result
+
+DATE_FORMAT = "%Y/%m/%d"
+
+
+def create_history_indexes(cursor, table: str = "results"):
+    """
+    履歴ブラウザのジャンプ用インデックスを作成する（存在しない場合のみ）
+
+    Args:
+        cursor: SQLiteのカーソル（または Database）
+        table: 記録のテーブル（プロファイルごとのテーブル。インデックス名は idx_<テーブル名>_session など）
+    """
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_{table}_session
+        ON {table}(session)
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_{table}_datetime
+        ON {table}(datetime)
+    ''')
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryRow:
+    """表示用に変換した results の1行"""
+    id: int
+    datetime: str
+    time_result: float
+    session: Optional[str]
+    penalty: Penalty
+    text: str  # 1行分の表示テキスト（描画時に整形しないよう読み込み時に作成）
+
+
+def _decode_row(row) -> HistoryRow:
+    """results の行 (id, datetime, time_result, session, penalty) を表示用に変換"""
+    solve_id, datetime_str, time_result, session, penalty = row
+    text = f"#{solve_id:<7} {datetime_str}  {format_result(time_result, penalty):>7}   {session or 'IMPORTED'}"
+    return HistoryRow(solve_id, datetime_str, time_result, session, Penalty(penalty), text)
+
+
+class HistoryBrowser:
+    """results をページ単位で読み込み、表示中の行だけを返すブラウザ
+
+    表示位置は先頭行の id（top_id）で保持し、新しい順（id の降順）に表示する。
+    メインスレッドとバックグラウンドスレッドはそれぞれ別のSQLite接続を使う。
+    """
+
+    def __init__(self, db_path: str, page_size: int = HC.PAGE_SIZE, cache_pages: int = HC.CACHE_PAGES,
+                 connections: ConnectionManager = None, table: str = "results"):
+        """
+        Args:
+            db_path: SQLiteデータベースのパス（先読みスレッドが別接続を使うためファイルが必要）
+            page_size: 1ページの id の範囲
+            cache_pages: キャッシュに保持するページ数
+            connections: 接続の管理（ロガーの接続を共有する場合に指定。省略時は専用に作成し、close()で閉じる）
+            table: 閲覧する記録のテーブル（現在のプロファイルのテーブル）
+        """
+        self.db_path = db_path
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.table = table
+        self._owns_connections = connections is None
+        self.connections = connections if connections is not None else ConnectionManager(db_path)
+
+        self._cache: "OrderedDict[int, Tuple[HistoryRow, ...]]" = OrderedDict()  # ページ番号 -> 行（id降順）
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._prefetch_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.min_id = 0
+        self.max_id = 0
+        self.top_id = 0
+        self._visible_key = None
+        self._visible: List[HistoryRow] = []
+        self.refresh()
+
+    # ---- ページの読み込み ----
+
+    def _page_no(self, solve_id: int) -> int:
+        return solve_id // self.page_size
+
+    def _query_page(self, db: Database, page: int) -> Tuple[HistoryRow, ...]:
+        """ページの行を主キーの範囲検索で読み込む"""
+        start = page * self.page_size
+        rows = db.fetchall(
+            f"SELECT id, datetime, time_result, session, penalty FROM {self.table} "
+            "WHERE id >= ? AND id < ? ORDER BY id DESC",
+            (start, start + self.page_size))
+        return tuple(_decode_row(row) for row in rows)
+
+    def _store(self, page: int, rows: Tuple[HistoryRow, ...]):
+        """ページをキャッシュに追加し、最も古く使われたページを破棄する"""
+        with self._lock:
+            self._cache[page] = rows
+            self._cache.move_to_end(page)
+            while len(self._cache) > self.cache_pages:
+                self._cache.popitem(last=False)
+
+    def _page(self, page: int) -> Tuple[HistoryRow, ...]:
+        """ページの行（キャッシュにない場合はその場で読み込む）"""
+        with self._lock:
+            rows = self._cache.get(page)
+            if rows is not None:
+                self._cache.move_to_end(page)
+                return rows
+        rows = self._query_page(self.connections.read(), page)
+        self._store(page, rows)
+        return rows
+
+    def is_cached(self, page: int) -> bool:
+        with self._lock:
+            return page in self._cache
+
+    def _request_prefetch(self, *pages: int):
+        """キャッシュにない範囲内のページを先読みキューに追加"""
+        low, high = self._page_no(self.min_id), self._page_no(self.max_id)
+        requested = False
+        for page in pages:
+            if low <= page <= high and page not in self._pending and not self.is_cached(page):
+                self._pending.append(page)
+                requested = True
+        if requested:
+            self._prefetch_event.set()
+
+    # ---- 先読みスレッド ----
+
+    def start(self):
+        """先読みスレッドを開始する"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._prefetch_loop, name="HistoryPrefetch", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """先読みスレッドを停止し、接続を閉じる（複数回呼び出し可）"""
+        self._stop_event.set()
+        self._prefetch_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._owns_connections and self.connections is not None:
+            self.connections.close()
+            self.connections = None
+
+    def wait_prefetch(self, timeout: float = 1.0) -> bool:
+        """先読みキューが空になるまで待つ（テスト用）"""
+        deadline = time.monotonic() + timeout
+        while self._pending:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _prefetch_loop(self):
+        """先読み要求を待ち、キューのページを別接続で読み込む"""
+        db = self.connections.read()
+        try:
+            while not self._stop_event.is_set():
+                self._prefetch_event.wait()
+                self._prefetch_event.clear()
+                while self._pending and not self._stop_event.is_set():
+                    page = self._pending[0]
+                    if not self.is_cached(page):
+                        try:
+                            self._store(page, self._query_page(db, page))
+                        except sqlite3.Error as e:
+                            print(f"DEBUG: 履歴ページの先読みに失敗: {e}")
+                    self._pending.popleft()
+        finally:
+            self.connections.release()
+
+    # ---- 表示位置 ----
+
+    def refresh(self):
+        """
+        記録の範囲を読み直す（画面を開くたびに呼ぶ）
+
+        前回以降に追加された記録は最後のページに入るため、
+        最後のページ以降のキャッシュのみを破棄する。
+        """
+        min_id, max_id = self.connections.fetchone(f"SELECT MIN(id), MAX(id) FROM {self.table}")
+        last_page = self._page_no(self.max_id)
+        with self._lock:
+            for page in [page for page in self._cache if page >= last_page]:
+                del self._cache[page]
+        self.min_id = min_id or 0
+        self.max_id = max_id or 0
+        self._visible_key = None
+        if not self.top_id or self.top_id > self.max_id:
+            self.top_id = self.max_id
+
+    @property
+    def empty(self) -> bool:
+        return self.max_id == 0
+
+    def rows_from(self, start_id: int, count: int) -> List[HistoryRow]:
+        """start_id 以下の行を新しい順に最大 count 件"""
+        rows = []
+        page = self._page_no(start_id)
+        last_page = self._page_no(self.min_id)
+        while len(rows) < count and page >= last_page:
+            for row in self._page(page):
+                if row.id <= start_id:
+                    rows.append(row)
+                    if len(rows) == count:
+                        break
+            page -= 1
+        return rows
+
+    def rows_after(self, start_id: int, count: int) -> List[HistoryRow]:
+        """start_id より新しい行を古い順に最大 count 件"""
+        rows = []
+        page = self._page_no(start_id)
+        last_page = self._page_no(self.max_id)
+        while len(rows) < count and page <= last_page:
+            for row in reversed(self._page(page)):
+                if row.id > start_id:
+                    rows.append(row)
+                    if len(rows) == count:
+                        break
+            page += 1
+        return rows
+
+    def visible_rows(self, count: int) -> List[HistoryRow]:
+        """
+        表示中の行（先頭行から count 件）
+
+        表示位置が変わらない間は前回の結果を返す。
+        表示範囲の前後のページは先読みを要求する。
+        """
+        if self.empty:
+            return []
+        key = (self.top_id, count)
+        if key != self._visible_key:
+            self._visible = self.rows_from(self.top_id, count)
+            self._visible_key = key
+            if self._visible:
+                self._request_prefetch(self._page_no(self._visible[0].id) + 1,
+                                       self._page_no(self._visible[-1].id) - 1)
+        return self._visible
+
+    def scroll(self, delta: int):
+        """表示位置を delta 行移動する（正: 古い方向, 負: 新しい方向）"""
+        if self.empty or delta == 0:
+            return
+        if delta > 0:
+            rows = self.rows_from(self.top_id, delta + 1)
+        else:
+            rows = self.rows_after(self.top_id, -delta)
+        if rows:
+            self.top_id = rows[-1].id
+
+    def jump_to_latest(self):
+        self.top_id = self.max_id
+
+    def _top_row(self) -> Optional[HistoryRow]:
+        rows = self.rows_from(self.top_id, 1)
+        return rows[0] if rows else None
+
+    # ---- インデックスを使ったジャンプ ----
+
+    def _lookup(self, sql: str, params: tuple):
+        row = self.connections.fetchone(sql, params)
+        return row[0] if row else None
+
+    def jump_to_session(self, session: Optional[str]) -> bool:
+        """
+        セッションの最新の記録を先頭に表示する
+
+        Args:
+            session: セッションID（Noneはスプレッドシートから取り込んだ記録）
+
+        Returns:
+            bool: 記録が存在した場合True
+        """
+        solve_id = self._lookup(
+            f"SELECT id FROM {self.table} WHERE session IS ? ORDER BY id DESC LIMIT 1", (session,))
+        if solve_id is None:
+            return False
+        self.top_id = solve_id
+        return True
+
+    def previous_session(self) -> bool:
+        """先頭行のセッションより1つ古いセッションへ移動"""
+        row = self._top_row()
+        if row is None:
+            return False
+        first_id = self._lookup(
+            f"SELECT id FROM {self.table} WHERE session IS ? ORDER BY id LIMIT 1", (row.session,))
+        previous_id = self._lookup(
+            f"SELECT id FROM {self.table} WHERE id < ? ORDER BY id DESC LIMIT 1", (first_id,))
+        if previous_id is None:
+            return False
+        self.top_id = previous_id
+        return True
+
+    def next_session(self) -> bool:
+        """先頭行のセッションより1つ新しいセッションへ移動"""
+        row = self._top_row()
+        if row is None:
+            return False
+        last_id = self._lookup(
+            f"SELECT id FROM {self.table} WHERE session IS ? ORDER BY id DESC LIMIT 1", (row.session,))
+        next_rows = self.rows_after(last_id, 1)
+        if not next_rows:
+            return False
+        return self.jump_to_session(next_rows[0].session)
+
+    def jump_to_date(self, date) -> bool:
+        """
+        指定日の最新の記録を先頭に表示する（記録がない日はそれ以前の最新の記録）
+
+        Args:
+            date: datetime.date または "YYYY/MM/DD"
+
+        Returns:
+            bool: 指定日以前に記録が存在した場合True
+        """
+        if isinstance(date, str):
+            date = datetime.datetime.strptime(date, DATE_FORMAT).date()
+        next_day = (date + datetime.timedelta(days=1)).strftime(DATE_FORMAT)
+        solve_id = self._lookup(
+            f"SELECT id FROM {self.table} WHERE datetime < ? ORDER BY datetime DESC LIMIT 1", (next_day,))
+        if solve_id is None:
+            return False
+        self.top_id = solve_id
+        return True
+
+    def previous_day(self) -> bool:
+        """先頭行の日付より前の、記録がある最新の日へ移動"""
+        row = self._top_row()
+        if row is None:
+            return False
+        date = datetime.datetime.strptime(row.datetime[:10], DATE_FORMAT).date()
+        return self.jump_to_date(date - datetime.timedelta(days=1))
+
+    def next_day(self) -> bool:
+        """先頭行の日付より後の、記録がある最も古い日へ移動"""
+        row = self._top_row()
+        if row is None:
+            return False
+        date = datetime.datetime.strptime(row.datetime[:10], DATE_FORMAT).date()
+        next_day = (date + datetime.timedelta(days=1)).strftime(DATE_FORMAT)
+        datetime_str = self._lookup(
+            f"SELECT datetime FROM {self.table} WHERE datetime >= ? ORDER BY datetime LIMIT 1", (next_day,))
+        if datetime_str is None:
+            return False
+        return self.jump_to_date(datetime_str[:10])
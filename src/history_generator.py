@@ -0,0 +1,429 @@
+"""
+合成のソルブ履歴の生成ツール（負荷試験・ベンチマーク・マイグレーションの確認用）
+
+SpeedcubeLogger._init_database と同じスキーマのSQLiteファイルに、
+results（通常のソルブ）と pattern_solves（パターン練習）の記録を一括で書き込む。
+
+分布（HistoryModel）:
+    タイム:     対数正規分布。中央値は上達曲線（全体の進捗に対して指数関数的に
+                initial_median から final_median へ近づく）に従う
+    セッション: 1セッションのソルブ数はポアソン分布、練習する日のセッション数もポアソン分布。
+                休みの日を挟みながら、最後のセッション（end）まで日ごとに並べる
+    ペナルティ: +2 / DNF をそれぞれの割合で付ける（results.penalty に保存し、
+                time_result は計測したタイムのまま）
+    パターン:   パターンごとの得意・不得意（対数正規の倍率）と同じ上達曲線
+
+乱数はNumPyでセッションのまとまりごとに配列として生成し、executemanyで挿入する。
+
+使い方:
+    python -m src.history_generator OUT.db --solves 1000000 --pattern-solves 100000
+    python -m src.history_generator OUT.db --solves 10000000 --overwrite
+
+記録の期間はセッション数から決まる。既定の分布のままでは1900年より前に及ぶ記録数の場合は、
+期間に収まるよう1セッションのソルブ数の平均を増やす（HistoryModel.for_attempts）。
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .log_handler import SpeedcubeLogger
+from .penalty import Penalty
+
+CHUNK_ROWS = 200_000  # 1回に生成・挿入する行数の目安
+MAX_SESSIONS_PER_DAY = 6
+MIN_YEAR = 1900  # 記録の期間の下限（日時の文字列の並びが年の桁数で崩れないように）
+PRACTICE_MODES = ('manual', 'random', 'spaced', 'weighted')
+
+
+@dataclass
+class HistoryModel:
+    """生成する記録の分布"""
+    seed: int = 0
+    end: datetime.datetime = datetime.datetime(2026, 1, 31, 20, 0, 0)  # 最後のセッションの開始時刻
+    # セッション
+    solves_per_session: float = 50.0  # 1セッションのソルブ数の平均
+    sessions_per_day: float = 1.5  # 練習する日のセッション数の平均
+    rest_day_rate: float = 0.3  # 練習しない日の割合
+    session_gap_hours: float = 3.0  # 同じ日のセッションの開始時刻の間隔
+    solve_interval: float = 40.0  # ソルブの間隔の平均（秒）
+    # タイム
+    initial_median: float = 30.0  # 最初のタイムの中央値（秒）
+    final_median: float = 12.0  # 上達しきったときの中央値（秒）
+    improvement_rate: float = 5.0  # 上達の速さ（進捗0-1に対する指数関数の係数）
+    sigma: float = 0.18  # タイムの対数の標準偏差
+    # ペナルティ
+    plus2_rate: float = 0.03
+    dnf_rate: float = 0.01
+    # パターン練習
+    pattern_initial_median: float = 4.0  # パターン1回の最初のタイムの中央値（秒）
+    pattern_sigma: float = 0.25
+    pattern_skill_sigma: float = 0.35  # パターンごとの得意・不得意の倍率（対数の標準偏差）
+    # スクランブル（Trueの場合はgenerate_wca_cube_scramble_batchで生成。容量・時間が増える）
+    with_scrambles: bool = False
+
+    def for_attempts(self, attempts: int) -> 'HistoryModel':
+        """
+        attempts 件の記録が MIN_YEAR から end までに収まるよう、1セッションのソルブ数を増やした分布
+
+        練習する日の割合・1日のセッション数から必要な日数を見積もり、期間の8割を超える場合のみ
+        1セッションのソルブ数の平均をその比で増やす（1日のセッション数は実際には平均より多いため、
+        見積もりは多めになる）。
+
+        Returns:
+            HistoryModel: 収まる場合は自身、そうでない場合は solves_per_session を変えたコピー
+        """
+        available_days = (self.end.date() - datetime.date(MIN_YEAR, 1, 1)).days * 0.8
+        solves_per_day = self.solves_per_session * self.sessions_per_day * max(1.0 - self.rest_day_rate, 0.01)
+        needed_days = attempts / solves_per_day
+        if needed_days <= available_days or available_days <= 0:
+            return self
+        return replace(self, solves_per_session=self.solves_per_session * needed_days / available_days)
+
+    def improvement(self, progress: np.ndarray) -> np.ndarray:
+        """進捗（0-1）に対する中央値の倍率（最初が1、上達しきると final_median / initial_median）"""
+        ratio = self.final_median / self.initial_median
+        return ratio + (1.0 - ratio) * np.exp(-self.improvement_rate * progress)
+
+
+@dataclass
+class GenerationResult:
+    """生成結果"""
+    results_rows: int = 0
+    pattern_rows: int = 0
+    plus2: int = 0
+    dnf: int = 0
+    sessions: int = 0
+    last_session_id: Optional[str] = None
+    elapsed: float = 0.0
+    first_datetime: Optional[str] = None
+    last_datetime: Optional[str] = None
+
+
+@dataclass
+class _SessionLayout:
+    """セッションの並び（古い順）"""
+    sizes: np.ndarray  # セッションごとの試技数
+    starts: np.ndarray  # 開始時刻（base_dateの0時からの秒）
+    base_date: datetime.date
+
+
+def _session_layout(rng: np.random.Generator, attempts: int, model: HistoryModel) -> _SessionLayout:
+    """試技数 attempts を満たすセッションの並びを、最後のセッションから日をさかのぼって作る"""
+    if attempts <= 0:
+        return _SessionLayout(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), model.end.date())
+
+    # セッションごとの試技数（最低1、合計がattemptsになるよう最初のセッションで調整）
+    sizes = np.zeros(0, dtype=np.int64)
+    while sizes.sum() < attempts:
+        n = max(16, int((attempts - sizes.sum()) / model.solves_per_session * 1.2) + 1)
+        sizes = np.concatenate([sizes, np.maximum(1, rng.poisson(model.solves_per_session, n))])
+    cumulative = np.cumsum(sizes)
+    n_sessions = int(np.searchsorted(cumulative, attempts) + 1)
+    sizes = sizes[:n_sessions][::-1].copy()  # 最後に作ったものを最初のセッションにする
+    sizes[0] -= int(cumulative[n_sessions - 1] - attempts)
+
+    # 日ごとのセッション数（最後の日から）
+    per_day = np.zeros(0, dtype=np.int64)
+    while per_day.sum() < n_sessions:
+        n = max(16, int((n_sessions - per_day.sum()) / model.sessions_per_day * 1.5) + 1)
+        counts = np.clip(rng.poisson(model.sessions_per_day, n), 1, MAX_SESSIONS_PER_DAY)
+        counts[rng.random(n) < model.rest_day_rate] = 0
+        per_day = np.concatenate([per_day, counts])
+    per_day[0] = max(per_day[0], 1)  # 最後の日（endの日）は必ず練習する
+    days_cumulative = np.cumsum(per_day)
+    n_days = int(np.searchsorted(days_cumulative, n_sessions) + 1)
+    per_day = per_day[:n_days]
+    per_day[-1] -= int(days_cumulative[n_days - 1] - n_sessions)
+
+    # 最後のセッションから順に (さかのぼる日数, その日のk番目に遅いセッション)
+    days_back = np.repeat(np.arange(n_days), per_day)
+    nth_latest = np.arange(n_sessions) - np.repeat(days_cumulative[:n_days] - per_day, per_day)
+    end_seconds = model.end.hour * 3600 + model.end.minute * 60 + model.end.second
+    base_date = model.end.date() - datetime.timedelta(days=n_days - 1)
+    if base_date.year < MIN_YEAR:
+        raise ValueError(f"記録の期間が{MIN_YEAR}年より前に及びます（{n_days}日）。"
+                         "--end を遅くするか、1日のセッション数を増やしてください")
+    starts = ((n_days - 1 - days_back) * 86400 + end_seconds
+              - (nth_latest * model.session_gap_hours * 3600).astype(np.int64))
+    return _SessionLayout(sizes, starts[::-1].copy(), base_date)
+
+
+def _solve_seconds(rng: np.random.Generator, sizes: np.ndarray, starts: np.ndarray,
+                   model: HistoryModel) -> np.ndarray:
+    """各試技の時刻（base_dateの0時からの秒）。セッション内は指数分布の間隔で進む"""
+    total = int(sizes.sum())
+    intervals = rng.exponential(model.solve_interval, total)
+    intervals[np.cumsum(sizes)[:-1]] = 0.0  # 各セッションの最初の試技は開始時刻ちょうど
+    if total:
+        intervals[0] = 0.0
+    elapsed = np.cumsum(intervals)
+    session_offsets = np.repeat(elapsed[np.cumsum(sizes) - sizes], sizes)
+    return np.repeat(starts, sizes) + (elapsed - session_offsets).astype(np.int64)
+
+
+class _DatetimeFormatter:
+    """秒（base_dateの0時から）から日時の文字列を作る（日付と時刻の文字列を表から引く）"""
+
+    def __init__(self, layout: _SessionLayout, date_format: str):
+        # 最後のセッションが日付をまたいでも引けるよう1日分余分に作る
+        n_days = int(layout.starts[-1]) // 86400 + 2
+        self._days = np.array(
+            [(layout.base_date + datetime.timedelta(days=d)).strftime(date_format) + " " for d in range(n_days)],
+            dtype=object)
+        self._times = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)],
+                               dtype=object)
+
+    def format(self, seconds: np.ndarray) -> list:
+        return (self._days[seconds // 86400] + self._times[seconds % 86400]).tolist()
+
+
+def _session_ids(base_date: datetime.date, starts: np.ndarray) -> np.ndarray:
+    """セッションID（開始時刻の %Y%m%d_%H%M%S）"""
+    base = datetime.datetime.combine(base_date, datetime.time())
+    return np.array([(base + datetime.timedelta(seconds=int(s))).strftime("%Y%m%d_%H%M%S") for s in starts],
+                    dtype=object)
+
+
+def _chunks(sizes: np.ndarray):
+    """セッションをおよそCHUNK_ROWS行ずつのまとまりに分ける（開始・終了のセッション番号）"""
+    cumulative = np.cumsum(sizes)
+    start = 0
+    while start < len(sizes):
+        base = cumulative[start - 1] if start else 0
+        end = int(np.searchsorted(cumulative, base + CHUNK_ROWS, side='right'))
+        end = max(end, start + 1)
+        yield start, end
+        start = end
+
+
+def _write_results(db, table: str, rng: np.random.Generator, attempts: int, model: HistoryModel,
+                   result: GenerationResult):
+    """results（プロファイルの記録のテーブル）に通常のソルブを書き込む"""
+    layout = _session_layout(rng, attempts, model)
+    if not len(layout.sizes):
+        return
+    formatter = _DatetimeFormatter(layout, "%Y/%m/%d")
+    session_ids = _session_ids(layout.base_date, layout.starts)
+    done = 0
+    for first, last in _chunks(layout.sizes):
+        sizes = layout.sizes[first:last]
+        n = int(sizes.sum())
+        seconds = _solve_seconds(rng, sizes, layout.starts[first:last], model)
+        progress = (done + np.arange(n)) / max(attempts - 1, 1)
+        times = model.initial_median * model.improvement(progress) * np.exp(model.sigma * rng.standard_normal(n))
+        draw = rng.random(n)
+        plus2 = draw < model.plus2_rate
+        dnf = (draw >= model.plus2_rate) & (draw < model.plus2_rate + model.dnf_rate)
+        penalties = np.where(dnf, int(Penalty.DNF), np.where(plus2, int(Penalty.PLUS2), int(Penalty.OK)))
+        times = np.round(times, 2)
+
+        datetimes = formatter.format(seconds)
+        sessions = np.repeat(session_ids[first:last], sizes).tolist()
+        if model.with_scrambles:
+            from .scramble import generate_wca_cube_scramble_batch
+            scrambles = generate_wca_cube_scramble_batch(n, seed=int(rng.integers(2 ** 31)))
+        else:
+            scrambles = [None] * n
+        db.executemany(
+            f"INSERT INTO {table} (datetime, time_result, scramble, session, penalty) VALUES (?, ?, ?, ?, ?)",
+            zip(datetimes, times.tolist(), scrambles, sessions, penalties.tolist()))
+
+        if result.first_datetime is None and n:
+            result.first_datetime = datetimes[0]
+        if n:
+            result.last_datetime = datetimes[-1]
+        result.results_rows += n
+        result.plus2 += int(plus2.sum())
+        result.dnf += int(dnf.sum())
+        done += n
+    result.sessions += len(layout.sizes)
+    result.last_session_id = session_ids[-1]
+
+
+def _load_catalog() -> List[Tuple[str, str, str, Optional[str]]]:
+    """パターン練習の対象 (pattern_id, name, category, デフォルトのalgorithm_id)"""
+    from .patterns import get_pattern_database
+    db = get_pattern_database()
+    catalog = []
+    for pattern in db.get_all_patterns():
+        algorithm = db.get_default_algorithm(pattern.id)
+        catalog.append((pattern.id, pattern.name, pattern.category.value, algorithm.id if algorithm else None))
+    return catalog
+
+
+def _write_pattern_solves(db, rng: np.random.Generator, attempts: int, model: HistoryModel,
+                          catalog, result: GenerationResult):
+    """pattern_solves にパターン練習の記録を書き込む"""
+    if not catalog:
+        return
+    layout = _session_layout(rng, attempts, model)
+    if not len(layout.sizes):
+        return
+    # pattern_solves.timestamp は CURRENT_TIMESTAMP と同じ形式
+    formatter = _DatetimeFormatter(layout, "%Y-%m-%d")
+    session_ids = _session_ids(layout.base_date, layout.starts)
+    skill = np.exp(model.pattern_skill_sigma * rng.standard_normal(len(catalog)))
+    ids, names, categories, algorithm_ids = (np.array(column, dtype=object) for column in zip(*catalog))
+    done = 0
+    for first, last in _chunks(layout.sizes):
+        sizes = layout.sizes[first:last]
+        n = int(sizes.sum())
+        seconds = _solve_seconds(rng, sizes, layout.starts[first:last], model)
+        progress = (done + np.arange(n)) / max(attempts - 1, 1)
+        chosen = rng.integers(0, len(catalog), n)
+        times = (model.pattern_initial_median * skill[chosen] * model.improvement(progress)
+                 * np.exp(model.pattern_sigma * rng.standard_normal(n)))
+        modes = np.array(PRACTICE_MODES, dtype=object)[rng.integers(0, len(PRACTICE_MODES), n)]
+        db.executemany(
+            """
+            INSERT INTO pattern_solves
+            (pattern_id, pattern_name, pattern_category, solve_time, timestamp,
+             session_id, practice_mode, set_id, algorithm_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            """,
+            zip(ids[chosen].tolist(), names[chosen].tolist(), categories[chosen].tolist(),
+                np.round(times, 2).tolist(), formatter.format(seconds),
+                np.repeat(session_ids[first:last], sizes).tolist(), modes.tolist(),
+                algorithm_ids[chosen].tolist()))
+        result.pattern_rows += n
+        done += n
+
+
+@contextmanager
+def _without_indexes(db, tables):
+    """
+    一括挿入の間だけテーブルのインデックスを削除し、挿入後に作り直す
+
+    1行ごとにインデックスを更新するより、挿入後にまとめて作るほうが速い。
+    """
+    placeholders = ", ".join("?" * len(tables))
+    indexes = db.fetchall(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        f"AND tbl_name IN ({placeholders})", tuple(tables))
+    for name, _ in indexes:
+        db.execute(f'DROP INDEX "{name}"')
+    try:
+        yield
+    finally:
+        for _, sql in indexes:
+            db.execute(sql)
+
+
+def generate_history(db_path: str, solves: int, pattern_solves: int = 0,
+                     model: Optional[HistoryModel] = None, catalog=None,
+                     profile: Optional[str] = None) -> GenerationResult:
+    """
+    合成の記録をデータベースに書き込む（テーブルがなければ作成し、既存の記録には追加する）
+
+    Args:
+        db_path: SQLiteファイルのパス
+        solves: results に書き込む試技数（DNFの試技もペナルティ付きで記録する）
+        pattern_solves: pattern_solves に書き込む行数
+        model: 分布（省略時は既定値。期間に収まらない場合は HistoryModel.for_attempts で調整する）
+        catalog: パターン練習の対象 [(pattern_id, name, category, algorithm_id)]
+                 （省略時はマスターデータのパターンとデフォルトのアルゴリズム）
+        profile: results を書き込むプロファイル名（なければ作成。省略時は既定のプロファイル）
+
+    Returns:
+        GenerationResult
+    """
+    model = model or HistoryModel()
+    result = GenerationResult()
+    start = time.perf_counter()
+    logger = SpeedcubeLogger.open_local(db_path, profile=profile)
+    try:
+        # 一括挿入中は同期書き込みを省略し、1トランザクションで書き込む
+        with logger.db.write() as db:
+            db.execute("PRAGMA synchronous = OFF")
+            rng = np.random.default_rng(model.seed)
+            with _without_indexes(db, (logger.results_table, "pattern_solves")):
+                _write_results(db, logger.results_table, rng, solves, model.for_attempts(solves), result)
+                if pattern_solves > 0:
+                    _write_pattern_solves(db, rng, pattern_solves, model.for_attempts(pattern_solves),
+                                          catalog if catalog is not None else _load_catalog(), result)
+    finally:
+        logger.db.close()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(argv=None) -> int:
+    defaults = HistoryModel()
+    parser = argparse.ArgumentParser(
+        description="合成のソルブ履歴をSQLiteファイルに書き込む",
+        epilog=f"記録数が多く{MIN_YEAR}年より前に及ぶ場合は、1セッションのソルブ数の平均を自動的に増やす"
+               "（例: --solves 10000000 で約260）")
+    parser.add_argument("db_path", help="書き込み先のSQLiteファイル")
+    parser.add_argument("--solves", type=int, default=100_000, help="results の試技数")
+    parser.add_argument("--pattern-solves", type=int, default=0, help="pattern_solves の行数")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--end", default=defaults.end.strftime("%Y/%m/%d %H:%M:%S"),
+                        help="最後のセッションの開始時刻（YYYY/MM/DD HH:MM:SS）")
+    parser.add_argument("--solves-per-session", type=float, default=defaults.solves_per_session,
+                        help="1セッションのソルブ数の平均（期間に収まらない場合は自動的に増やす）")
+    parser.add_argument("--sessions-per-day", type=float, default=defaults.sessions_per_day)
+    parser.add_argument("--rest-day-rate", type=float, default=defaults.rest_day_rate)
+    parser.add_argument("--initial-median", type=float, default=defaults.initial_median)
+    parser.add_argument("--final-median", type=float, default=defaults.final_median)
+    parser.add_argument("--improvement-rate", type=float, default=defaults.improvement_rate)
+    parser.add_argument("--sigma", type=float, default=defaults.sigma)
+    parser.add_argument("--plus2-rate", type=float, default=defaults.plus2_rate)
+    parser.add_argument("--dnf-rate", type=float, default=defaults.dnf_rate)
+    parser.add_argument("--pattern-skill-sigma", type=float, default=defaults.pattern_skill_sigma)
+    parser.add_argument("--with-scrambles", action="store_true", help="スクランブルも生成する")
+    parser.add_argument("--profile", default=None, help="results を書き込むプロファイル名（省略時は既定のプロファイル）")
+    parser.add_argument("--overwrite", action="store_true", help="既存のファイルを削除してから書き込む")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("合成ソルブ履歴の生成")
+    print("=" * 60)
+
+    if os.path.exists(args.db_path):
+        if not args.overwrite:
+            print(f"✗ {args.db_path} は既に存在します（--overwrite で置き換え）")
+            return 1
+        os.remove(args.db_path)
+    try:
+        end = datetime.datetime.strptime(args.end, "%Y/%m/%d %H:%M:%S")
+    except ValueError as e:
+        print(f"✗ --end の形式が正しくありません: {e}")
+        return 1
+
+    model = HistoryModel(
+        seed=args.seed, end=end, solves_per_session=args.solves_per_session,
+        sessions_per_day=args.sessions_per_day, rest_day_rate=args.rest_day_rate,
+        initial_median=args.initial_median, final_median=args.final_median,
+        improvement_rate=args.improvement_rate, sigma=args.sigma,
+        plus2_rate=args.plus2_rate, dnf_rate=args.dnf_rate,
+        pattern_skill_sigma=args.pattern_skill_sigma, with_scrambles=args.with_scrambles)
+    fitted = model.for_attempts(max(args.solves, args.pattern_solves))
+    if fitted is not model:
+        print(f"✓ {MIN_YEAR}年以降に収まるよう1セッションのソルブ数の平均を"
+              f"{model.solves_per_session:g} から {fitted.solves_per_session:.0f} に増やします")
+    try:
+        result = generate_history(args.db_path, args.solves, args.pattern_solves, model, profile=args.profile)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+
+    rows = result.results_rows + result.pattern_rows
+    print(f"✓ results: {result.results_rows}行（{result.sessions}セッション, "
+          f"+2: {result.plus2}, DNF: {result.dnf}）")
+    if result.results_rows:
+        print(f"✓ 期間: {result.first_datetime} - {result.last_datetime}")
+    print(f"✓ pattern_solves: {result.pattern_rows}行")
+    print(f"✓ 生成時間: {result.elapsed:.1f} 秒（{rows / max(result.elapsed, 1e-9):,.0f} 行/秒）")
+    print(f"\n✅ {args.db_path} に書き込みました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,15 @@
-import gspread
 import configparser
 import datetime
 import os
 import sqlite3
+from contextlib import nullcontext
+from dataclasses import replace
+from typing import Optional
+from .constants import ProfileConfig as PFC
+from .database import ConnectionManager
+from .penalty import Penalty, decode_sheet_time, encode_sheet_time
+from .pattern_sets import create_pattern_set_tables
+from .profiles import Profile, ProfileStore, create_profile_tables, create_results_table
 
 class SpeedcubeLoggerError(Exception):
     """スピードキューブタイマーのログ処理に関する例外クラス
@@ -14,11 +21,21 @@ class SpeedcubeLoggerError(Exception):
         self.message = message
         super().__init__(self.message)
 
+def _split_names(text: str) -> list:
+    """config.iniのカンマ区切りの名前の列挙をリストにする（空の要素は除く）"""
+    return [name.strip() for name in text.split(',') if name.strip()]
+
 class SpeedcubeLogger:
-    def __init__(self):
+    def __init__(self, profiler=None):
+        """
+        Args:
+            profiler: 起動時間の計測（StartupProfiler）。スプレッドシートへの接続時間を記録する
+        """
+        self.profiler = profiler
         try:
-            # セッションIDを生成 (起動時のタイムスタンプ)
-            self.session_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            # セッションIDを生成 (起動時のタイムスタンプ。名前付きセッションを選んでいない場合に使う)
+            self.startup_session_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.session_id = self.startup_session_id
             
             # プロジェクトのルートディレクトリのパスを取得
             self.root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -28,9 +45,9 @@ class SpeedcubeLogger:
             config = configparser.ConfigParser()
             config.read(config_path, encoding='utf-8')
 
-            spreadsheet_key = config['GoogleSpreadsheet']['spreadsheet_key']
-            sheet_name = config['GoogleSpreadsheet']['sheet_name']
-            credentials_file = config['GoogleSpreadsheet']['credentials_file']
+            self.spreadsheet_key = config['GoogleSpreadsheet']['spreadsheet_key']
+            self.sheet_name = config['GoogleSpreadsheet']['sheet_name']
+            self.credentials_file = config['GoogleSpreadsheet']['credentials_file']
 
             # SQLiteデータベースのパスを設定
             # config.iniから読み込むか、デフォルト値を使用
@@ -45,96 +62,164 @@ class SpeedcubeLogger:
             # データベース接続とテーブル作成
             self._init_database()
 
-            # Google Spreadsheetに接続
-            self.gc = gspread.service_account(filename=credentials_file)
-            self.spreadsheet = self.gc.open_by_key(spreadsheet_key)
-            self.sheet = self.spreadsheet.worksheet(sheet_name)
+            # Google Spreadsheetへの接続は最初の同期まで遅延する（_connect_sheet）
+            self.gc = None
+            self.spreadsheet = None
+            self.sheet = None
+            
+            # config.iniの[Profiles]に列挙したプロファイル・セッションを登録し、最後に使ったものを再開
+            self.profiles.register(_split_names(config.get('Profiles', 'profiles', fallback='')),
+                                   _split_names(config.get('Profiles', 'sessions', fallback='')))
+            profile = self.profiles.last_used()
+            self._use_profile(profile, profile.current_session)
             
         except (configparser.Error, KeyError) as e:
             raise SpeedcubeLoggerError(f"設定ファイルの読み込みに失敗しました: {str(e)}")
         except Exception as e:
             raise SpeedcubeLoggerError(f"初期化中にエラーが発生しました: {str(e)}")
 
+    @classmethod
+    def open_local(cls, db_path: str, session_id: str = None, profile: str = None) -> 'SpeedcubeLogger':
+        """
+        config.iniを読まずにローカルのデータベースのみを開く（ベンチマーク・データ生成用）
+
+        スプレッドシートの設定を持たないため、同期する場合は sheet にワークシート
+        （get_all_values / append_rows を持つオブジェクト）を設定すること
+        （プロファイルを切り替えても同じワークシートを使う）。
+
+        Args:
+            db_path: データベースファイルのパス（テーブルがなければ作成）
+            session_id: 起動時刻のセッションのID（省略時は現在時刻）
+            profile: プロファイル名（なければ作成。省略時は既定のプロファイル）
+
+        Raises:
+            SpeedcubeLoggerError: データベースの初期化に失敗した場合
+        """
+        logger = cls.__new__(cls)
+        logger.profiler = None
+        logger.startup_session_id = session_id or datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        logger.root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        logger.spreadsheet_key = logger.sheet_name = logger.credentials_file = None
+        logger.db_path = db_path
+        logger._init_database()
+        logger.gc = logger.spreadsheet = logger.sheet = None
+        # 最後に使ったプロファイルとしては保存しない（アプリの次回の起動に影響しない）
+        if profile is None:
+            logger._use_profile(Profile(PFC.DEFAULT_PROFILE_ID, PFC.DEFAULT_PROFILE_NAME, None), None)
+        else:
+            selected = logger.profiles.create_profile(profile)
+            if selected is None:
+                raise SpeedcubeLoggerError(f"プロファイルの作成に失敗しました: {profile}")
+            logger._use_profile(selected, None)
+        return logger
+
     def _init_database(self):
         """SQLiteデータベースの初期化とテーブル作成"""
         try:
-            # データベース接続
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-            
-            # resultsテーブルの作成（存在しない場合）
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    datetime TEXT NOT NULL,
-                    time_result REAL NOT NULL,
-                    scramble TEXT,
-                    session TEXT
-                )
-            ''')
-            
-            # パターン解法記録テーブルの作成（Phase 1: パターン習得モード用）
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pattern_solves (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pattern_id TEXT NOT NULL,
-                    pattern_name TEXT NOT NULL,
-                    pattern_category TEXT NOT NULL,
-                    solve_time REAL NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    session_id TEXT,
-                    practice_mode TEXT,
-                    set_id TEXT,
-                    algorithm_id TEXT
-                )
-            ''')
-            
-            # パターン用インデックスの作成
-            self.cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_pattern_solves_pattern_id 
-                ON pattern_solves(pattern_id)
-            ''')
-            
-            self.cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_pattern_solves_category 
-                ON pattern_solves(pattern_category)
-            ''')
-            
-            self.cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_pattern_solves_timestamp 
-                ON pattern_solves(timestamp)
-            ''')
-            
-            # ユーザーのパターン別アルゴリズム選択設定テーブル（Phase 2用）
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_pattern_preferences (
-                    pattern_id TEXT PRIMARY KEY,
-                    selected_algorithm_id TEXT NOT NULL,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # ユーザーのアルゴリズム評価テーブル（Phase 2用）
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_algorithm_ratings (
-                    algorithm_id TEXT PRIMARY KEY,
-                    rating INTEGER CHECK(rating >= 1 AND rating <= 5),
-                    notes TEXT,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # データベース接続（書き込み用の接続と読み込み専用の接続のプール。
+            # クエリはすべて計測付きのデータアクセス層を通す）
+            self.db = ConnectionManager(self.db_path)
+            self.profiles = ProfileStore(self)
             
-            self.conn.commit()
+            with self.db.write() as db:
+                # 既定のプロファイルのresultsテーブルとインデックスの作成（存在しない場合）
+                create_results_table(db)
+            
+                # プロファイルと名前付きセッションのテーブル
+                create_profile_tables(db)
+            
+                # パターン解法記録テーブルの作成（Phase 1: パターン習得モード用）
+                db.execute('''
+                    CREATE TABLE IF NOT EXISTS pattern_solves (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        pattern_id TEXT NOT NULL,
+                        pattern_name TEXT NOT NULL,
+                        pattern_category TEXT NOT NULL,
+                        solve_time REAL NOT NULL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        session_id TEXT,
+                        practice_mode TEXT,
+                        set_id TEXT,
+                        algorithm_id TEXT
+                    )
+                ''')
+            
+                # パターン用インデックスの作成
+                db.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_pattern_solves_pattern_id 
+                    ON pattern_solves(pattern_id)
+                ''')
+            
+                db.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_pattern_solves_category 
+                    ON pattern_solves(pattern_category)
+                ''')
+            
+                db.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_pattern_solves_timestamp 
+                    ON pattern_solves(timestamp)
+                ''')
+            
+                # ユーザーのパターン別アルゴリズム選択設定テーブル（Phase 2用）
+                db.execute('''
+                    CREATE TABLE IF NOT EXISTS user_pattern_preferences (
+                        pattern_id TEXT PRIMARY KEY,
+                        selected_algorithm_id TEXT NOT NULL,
+                        last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+            
+                # ユーザーのアルゴリズム評価テーブル（Phase 2用）
+                db.execute('''
+                    CREATE TABLE IF NOT EXISTS user_algorithm_ratings (
+                        algorithm_id TEXT PRIMARY KEY,
+                        rating INTEGER CHECK(rating >= 1 AND rating <= 5),
+                        notes TEXT,
+                        last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+            
+                # 練習セットと実行状況のテーブル（Phase 4-5用）
+                create_pattern_set_tables(db)
         except sqlite3.Error as e:
             raise SpeedcubeLoggerError(f"データベースの初期化に失敗しました: {str(e)}")
 
-    def save_result(self, time_result: float, scramble: str = None) -> None:
+    def switch_profile(self, profile: Profile, session: Optional[str] = None):
+        """
+        記録の保存先のプロファイルとセッションを切り替える
+        
+        以降の保存・取得・同期は切り替えたプロファイルのテーブルのみを対象にする
+        （記録の移動はない）。選んだプロファイルとセッションは次回の起動時に再開する。
+        
+        Args:
+            profile (Profile): プロファイル
+            session (str, optional): 名前付きセッション（Noneの場合は起動時刻のセッション）
+        """
+        if session is not None:
+            self.profiles.create_session(profile, session)
+        self.profiles.set_current(profile, session)
+        self._use_profile(profile, session)
+
+    def _use_profile(self, profile: Profile, session: Optional[str]):
+        """記録の保存先を切り替える（データベースには保存しない）"""
+        self.profile = replace(profile, current_session=session)
+        self.results_table = profile.table
+        self.session_id = session or self.startup_session_id
+        # 同期先のワークシートはプロファイルごと（次の同期で開き直す）
+        if self.spreadsheet is not None:
+            self.sheet = None
+
+    def save_result(self, time_result: float, scramble: str = None, penalty: Penalty = Penalty.OK) -> int:
         """
         スピードキューブの結果をローカルデータベースに保存する
         
         Args:
-            time_result (float): 計測タイム（秒）
+            time_result (float): 計測タイム（秒。+2のペナルティは含めない）
             scramble (str, optional): キューブのスクランブル（初期状態）
+            penalty (Penalty, optional): ペナルティ
+            
+        Returns:
+            int: 保存した記録のid
             
         Raises:
             SpeedcubeLoggerError: データの保存に失敗した場合
@@ -148,34 +233,49 @@ class SpeedcubeLogger:
         
         # SQLiteデータベースにデータを追加（scrambleとsessionも保存）
         try:
-            self.cursor.execute(
-                "INSERT INTO results (datetime, time_result, scramble, session) VALUES (?, ?, ?, ?)",
-                (datetime_str, rounded_time, scramble, self.session_id)
-            )
-            self.conn.commit()
+            with self.db.write() as db:
+                cursor = db.execute(
+                    f"INSERT INTO {self.results_table} (datetime, time_result, scramble, session, penalty) VALUES (?, ?, ?, ?, ?)",
+                    (datetime_str, rounded_time, scramble, self.session_id, int(penalty))
+                )
+            return cursor.lastrowid
         except sqlite3.Error as e:
             raise SpeedcubeLoggerError(f"ローカルデータベースへのデータ保存に失敗しました: {str(e)}")
 
+    def set_penalty(self, solve_id: int, penalty: Penalty) -> None:
+        """
+        保存済みの記録のペナルティを変更する
+        
+        Args:
+            solve_id (int): 記録のid（save_resultの戻り値）
+            penalty (Penalty): 新しいペナルティ
+            
+        Raises:
+            SpeedcubeLoggerError: 更新に失敗した場合
+        """
+        try:
+            with self.db.write() as db:
+                db.execute(f"UPDATE {self.results_table} SET penalty = ? WHERE id = ?", (int(penalty), solve_id))
+        except sqlite3.Error as e:
+            raise SpeedcubeLoggerError(f"ペナルティの変更に失敗しました: {str(e)}")
+
     def get_results(self, limit: int = None) -> list:
         """
-        ローカルデータベースから結果を取得する
+        ローカルデータベースから現在のプロファイルの結果を取得する
 
         Args:
             limit (int, optional): 取得する結果の最大数。指定がない場合はすべての結果を取得。
 
         Returns:
-            list: 結果リスト（各要素は (datetime, time_result, scramble, session) のタプル）
+            list: 結果リスト（各要素は (datetime, time_result, scramble, session, penalty) のタプル）
 
         Raises:
             SpeedcubeLoggerError: データの取得に失敗した場合
         """
         try:
             if limit:
-                self.cursor.execute("SELECT datetime, time_result, scramble, session FROM results ORDER BY id DESC LIMIT ?", (limit,))
-            else:
-                self.cursor.execute("SELECT datetime, time_result, scramble, session FROM results ORDER BY id DESC")
-            
-            return self.cursor.fetchall()
+                return self.db.fetchall(f"SELECT datetime, time_result, scramble, session, penalty FROM {self.results_table} ORDER BY id DESC LIMIT ?", (limit,))
+            return self.db.fetchall(f"SELECT datetime, time_result, scramble, session, penalty FROM {self.results_table} ORDER BY id DESC")
         except sqlite3.Error as e:
             raise SpeedcubeLoggerError(f"データベースからの結果取得に失敗しました: {str(e)}")
 
@@ -188,67 +288,107 @@ class SpeedcubeLogger:
             limit (int, optional): 取得する結果の最大数。指定がない場合はすべての結果を取得。
 
         Returns:
-            list: 結果リスト（各要素は (scramble, time_result, id) のタプル）
+            list: 結果リスト（新しい順。各要素は (id, time_result, scramble, session, penalty) のタプル）
 
         Raises:
             SpeedcubeLoggerError: データの取得に失敗した場合
         """
         try:
             if limit:
-                self.cursor.execute(
-                    "SELECT datetime, time_result, scramble, session FROM results WHERE session = ? ORDER BY id DESC LIMIT ?",
+                return self.db.fetchall(
+                    f"SELECT id, time_result, scramble, session, penalty FROM {self.results_table} WHERE session = ? ORDER BY id DESC LIMIT ?",
                     (self.session_id, limit)
                 )
-            else:
-                self.cursor.execute(
-                    "SELECT datetime, time_result, scramble, session FROM results WHERE session = ? ORDER BY id DESC",
-                    (self.session_id,)
-                )
-            return self.cursor.fetchall()
+            return self.db.fetchall(
+                f"SELECT id, time_result, scramble, session, penalty FROM {self.results_table} WHERE session = ? ORDER BY id DESC",
+                (self.session_id,)
+            )
         except sqlite3.Error as e:
             raise SpeedcubeLoggerError(f"セッションの結果取得に失敗しました: {str(e)}")
 
-    def _convert_to_comparable_records(self, data_list: list) -> set:
+    def _convert_to_comparable_records(self, data_list: list, positions: dict = None) -> dict:
         """
-        データソースを比較可能なセットに変換する
+        データソースを比較可能な辞書に変換する
+        
+        記録は (日時, 計測したタイム) で照合し、ペナルティは照合に使わない
+        （スプレッドシートのタイムの文字列は penalty.encode_sheet_time の形式）。
         
         Args:
-            data_list (list): 変換するデータのリスト
+            data_list (list): 変換するデータのリスト（スプレッドシートの行、または get_results の結果）
+            positions (dict, optional): 指定した場合、(datetime_str, time_result) -> data_list内の位置 を格納する
             
         Returns:
-            set: (datetime_str, time_result) のタプルのセット
+            dict: (datetime_str, time_result) -> ペナルティ
         """
-        result_set = set()
+        records = {}
         
-        for item in data_list:
+        for position, item in enumerate(data_list):
             try:
                 # データが最低2つの要素を持つことを確認
                 if len(item) >= 2:
                     # 日時文字列を標準化
                     datetime_str = self._standardize_datetime_format(item[0])
                     
-                    # 数値を浮動小数点に変換（文字列の場合はカンマをピリオドに置換）
-                    # スプシはカンマ区切りの数値を返すため、置換処理を行う
-                    if isinstance(item[1], str):
-                        time_value = item[1].replace(',', '.')
-                    else:
-                        time_value = item[1]
+                    # タイムとペナルティに変換（スプシはカンマ区切りの数値を返すこともある）
+                    # データベースの行はペナルティを5列目に持つ
+                    time_value, penalty = decode_sheet_time(item[1])
+                    if len(item) >= 5 and isinstance(item[4], int):
+                        penalty = Penalty(item[4])
                     
-                    # 浮動小数点に変換して丸める
-                    time_result = round(float(time_value), 2)
+                    # 丸めたタイムで照合する
+                    time_result = round(time_value, 2)
                     
-                    # 結果をセットに追加
-                    result_set.add((datetime_str, time_result))
+                    # 結果を辞書に追加
+                    records[(datetime_str, time_result)] = penalty
+                    if positions is not None:
+                        positions[(datetime_str, time_result)] = position
             except (ValueError, TypeError, IndexError):
                 # 変換できない項目はスキップ
                 continue
                 
-        return result_set
+        return records
+
+    def _connect_sheet(self):
+        """
+        Google Spreadsheetに接続し、現在のプロファイルのワークシートを開く
+        （接続は初回のみ。gspreadの読み込みと認証を含む）
+
+        Raises:
+            SpeedcubeLoggerError: 接続に失敗した場合
+        """
+        if self.sheet is not None:
+            return
+        phase = self.profiler.phase("spreadsheet") if self.profiler is not None else nullcontext()
+        try:
+            with phase:
+                import gspread
+                if self.spreadsheet is None:
+                    self.gc = gspread.service_account(filename=self.credentials_file)
+                    self.spreadsheet = self.gc.open_by_key(self.spreadsheet_key)
+                title = self._worksheet_title()
+                try:
+                    self.sheet = self.spreadsheet.worksheet(title)
+                except gspread.WorksheetNotFound:
+                    if title == self.sheet_name:
+                        raise
+                    # 既定以外のプロファイルのワークシートは初回の同期で作成する
+                    self.sheet = self.spreadsheet.add_worksheet(title=title, rows=1, cols=len(PFC.SHEET_HEADER))
+                    self.sheet.append_row(list(PFC.SHEET_HEADER))
+        except Exception as e:
+            raise SpeedcubeLoggerError(f"スプレッドシートへの接続に失敗しました: {str(e)}")
+
+    def _worksheet_title(self) -> str:
+        """現在のプロファイルの同期先のワークシート名（既定のプロファイルは設定のシート名）"""
+        if self.profile.id == PFC.DEFAULT_PROFILE_ID:
+            return self.sheet_name
+        return PFC.SHEET_NAME_FORMAT.format(self.sheet_name, self.profile.name)
 
     def sync_data(self) -> tuple:
         """
         SQLiteデータベースとGoogle Spreadsheetの間でデータを双方向に同期する
         
+        片方にしかない記録を追加し、両方にある記録はペナルティ（+2 / DNF）の変更を反映する。
+        
         Returns:
             tuple: 成功した場合は (True, メッセージ)、失敗した場合は (False, エラーメッセージ)
         """
@@ -256,40 +396,43 @@ class SpeedcubeLogger:
             # スプレッドシートとデータベースのデータを比較可能なセットに変換
             
             # --- Google Spreadsheetからデータを取得 ---
+            self._connect_sheet()
             all_records = self.sheet.get_all_values()
             # ヘッダー行はスキップ
             sheet_rows = all_records[1:] if len(all_records) > 0 else []
-            sheet_records = self._convert_to_comparable_records(sheet_rows)
+            sheet_positions = {}
+            sheet_records = self._convert_to_comparable_records(sheet_rows, sheet_positions)
             
             # --- SQLiteからデータを取得 ---
-            all_db_results = self.get_results()
-            db_records = self._convert_to_comparable_records(all_db_results)
+            # (datetime, time_result, scramble, session, penalty, id, penalty_synced)
+            all_db_results = self.db.fetchall(
+                f"SELECT datetime, time_result, scramble, session, penalty, id, penalty_synced FROM {self.results_table}")
+            db_positions = {}
+            db_records = self._convert_to_comparable_records(all_db_results, db_positions)
             
             # --- インポート処理 (Spreadsheet -> SQLite) ---
-            to_import = sheet_records - db_records
+            to_import = sheet_records.keys() - db_records.keys()
             imported_count = 0
             
             if to_import:
                 # 一括インサート用のリスト
-                import_data = [(datetime_str, time_result, None, None) 
+                import_data = [(datetime_str, time_result, None, None, int(sheet_records[(datetime_str, time_result)]))
                               for datetime_str, time_result in to_import]
                 
-                # 一括でインポート
-                self.cursor.executemany(
-                    "INSERT INTO results (datetime, time_result, scramble, session) VALUES (?, ?, ?, ?)",
-                    import_data
-                )
+                # 一括でインポート（1トランザクション）
+                with self.db.write() as db:
+                    db.executemany(
+                        f"INSERT INTO {self.results_table} (datetime, time_result, scramble, session, penalty) VALUES (?, ?, ?, ?, ?)",
+                        import_data
+                    )
                 imported_count = len(import_data)
-                
-                # インポート処理が完了したらコミット
-                self.conn.commit()
             
             # --- エクスポート処理 (SQLite -> Spreadsheet) ---
-            to_export = db_records - sheet_records
+            to_export = db_records.keys() - sheet_records.keys()
             exported_count = 0
             
-            # エクスポート用のリストを作成
-            export_rows = [[datetime_str, f"{time_result:.2f}"] 
+            # エクスポート用のリストを作成（ペナルティはタイムの文字列に含める）
+            export_rows = [[datetime_str, encode_sheet_time(time_result, db_records[(datetime_str, time_result)])] 
                           for datetime_str, time_result in to_export]
             
             # バッチ処理のサイズ
@@ -304,9 +447,35 @@ class SpeedcubeLogger:
                     )
                     exported_count += len(batch)
 
+            # --- ペナルティの同期（両方にある記録） ---
+            # 前回の同期で一致したペナルティ（penalty_synced）からデータベース側が変わっていなければ
+            # スプレッドシートで変更されたものとして取り込み、それ以外はデータベースの値を書き出す
+            pulled = []  # (ペナルティ, id)
+            pushed = []  # スプレッドシートのセルの更新
+            for key in sheet_records.keys() & db_records.keys():
+                local, remote = db_records[key], sheet_records[key]
+                if local == remote:
+                    continue
+                row = all_db_results[db_positions[key]]
+                if row[6] is not None and local == row[6]:
+                    pulled.append((int(remote), row[5]))
+                else:
+                    # タイムは2列目（ヘッダー行の分、行番号は位置 + 2）
+                    pushed.append({'range': f"B{sheet_positions[key] + 2}",
+                                   'values': [[encode_sheet_time(key[1], local)]]})
+            if pushed:
+                self.sheet.batch_update(pushed, value_input_option='USER_ENTERED')
+            
+            # 同期後は両方のペナルティが一致している
+            with self.db.write() as db:
+                if pulled:
+                    db.executemany(f"UPDATE {self.results_table} SET penalty = ? WHERE id = ?", pulled)
+                db.execute(f"UPDATE {self.results_table} SET penalty_synced = penalty WHERE penalty_synced IS NOT penalty")
             
-            # 成功メッセージを返す
+            # 成功メッセージを返す（ペナルティの変更があった場合のみ件数を加える）
             message = f"downloaded: {imported_count}, Uploaded: {exported_count}"
+            if pulled or pushed:
+                message += f", Penalties: {len(pulled)} down / {len(pushed)} up"
             return (True, message)
             
         except SpeedcubeLoggerError as e:
@@ -361,8 +530,8 @@ class SpeedcubeLogger:
 
     def __del__(self):
         """デストラクタ：データベース接続を閉じる"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        if hasattr(self, 'db'):
+            self.db.close()
 
 if __name__ == '__main__':
     logger = SpeedcubeLogger()
@@ -0,0 +1,221 @@
+"""ムーブ記法のパーサーと整数コード化されたムーブ列
+
+"R U R' U'" のような記法文字列を1手1バイトの整数コード列にコンパイルする。
+面回転（U D F B L R）、ワイドムーブ（u d f b l r / Rw 表記）、スライス（M E S）、
+持ち替え（x y z）に対応し、括弧によるグループ化と繰り返し（"(R U)2"）も扱える。
+
+ムーブコードは 3 * 基本ムーブ番号 + (回転数 - 1) で表す（回転数3は逆回転）。
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List
+
+# 基本ムーブ（並び順がそのまま基本ムーブ番号になる）
+BASE_MOVES = "UDFBLR" + "udfblr" + "MES" + "xyz"
+N_BASE_MOVES = len(BASE_MOVES)
+
+# 基本ムーブの種類
+KIND_FACE = 0      # 外側1層の回転
+KIND_WIDE = 1      # 外側2層の回転
+KIND_SLICE = 2     # 中層の回転
+KIND_ROTATION = 3  # キューブ全体の持ち替え
+BASE_KIND = bytes([KIND_FACE] * 6 + [KIND_WIDE] * 6 + [KIND_SLICE] * 3 + [KIND_ROTATION] * 3)
+
+# 基本ムーブの回転軸（0: U-D軸, 1: F-B軸, 2: L-R軸）。同じ軸のムーブは互いに可換
+_AXIS_OF = {'U': 0, 'D': 0, 'E': 0, 'y': 0, 'F': 1, 'B': 1, 'S': 1, 'z': 1, 'L': 2, 'R': 2, 'M': 2, 'x': 2}
+BASE_AXIS = bytes(_AXIS_OF[b.upper() if b.upper() in 'UDFBLR' else b] for b in BASE_MOVES)
+
+_SUFFIXES = ("", "2", "'")
+_TOKEN_RE = re.compile(r"\s*(?:(?P<open>\()|(?P<close>\))(?P<repeat>\d+)?|"
+                       r"(?P<base>[UDFBLRudfblrMESxyz])(?P<wide>w)?(?P<amount>\d+)?(?P<prime>['’])?)")
+
+
+class NotationError(ValueError):
+    """ムーブ記法の解析に関する例外クラス
+
+    Attributes:
+        message -- エラーの説明メッセージ
+    """
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+def make_move(base: int, amount: int) -> int:
+    """基本ムーブ番号と回転数（1-3）からムーブコードを作成"""
+    return 3 * base + (amount % 4) - 1
+
+
+def move_base(code: int) -> int:
+    """ムーブコードの基本ムーブ番号"""
+    return code // 3
+
+
+def move_amount(code: int) -> int:
+    """ムーブコードの回転数（1: 時計回り, 2: 半回転, 3: 反時計回り）"""
+    return code % 3 + 1
+
+
+def move_to_string(code: int) -> str:
+    """ムーブコードを記法文字列に変換"""
+    return BASE_MOVES[code // 3] + _SUFFIXES[code % 3]
+
+
+class MoveSequence:
+    """整数コード化されたムーブ列（不変）"""
+
+    __slots__ = ('codes',)
+
+    def __init__(self, codes: Iterable[int] = b""):
+        """
+        Args:
+            codes: ムーブコードの列
+        """
+        self.codes = bytes(codes)
+
+    @classmethod
+    def parse(cls, text: str) -> 'MoveSequence':
+        """記法文字列を解析してムーブ列を作成（キャッシュ付き）"""
+        return compile_moves(text)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MoveSequence(self.codes[index])
+        return self.codes[index]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MoveSequence) and self.codes == other.codes
+
+    def __hash__(self) -> int:
+        return hash(self.codes)
+
+    def __add__(self, other: 'MoveSequence') -> 'MoveSequence':
+        return MoveSequence(self.codes + other.codes)
+
+    def __mul__(self, count: int) -> 'MoveSequence':
+        return MoveSequence(self.codes * count)
+
+    def __str__(self) -> str:
+        return ' '.join(move_to_string(code) for code in self.codes)
+
+    def __repr__(self) -> str:
+        return f"MoveSequence('{self}')"
+
+    def inverse(self) -> 'MoveSequence':
+        """逆手順を返す（順序を逆にし、各ムーブを逆回転にする）"""
+        return MoveSequence(3 * (c // 3) + 2 - c % 3 for c in reversed(self.codes))
+
+    def simplify(self) -> 'MoveSequence':
+        """
+        打ち消し・結合を行った最短表現を返す
+
+        同じ基本ムーブが（同じ軸の可換なムーブを挟んで）続く場合は回転数を合算し、
+        合計が0になったムーブは取り除く。例: "R U U' R'" -> "", "U D U" -> "U2 D"
+        """
+        stack: List[int] = []
+        for code in self.codes:
+            base, amount = code // 3, code % 3 + 1
+            axis = BASE_AXIS[base]
+            # 同じ軸のムーブを遡って同じ基本ムーブを探す
+            i = len(stack) - 1
+            while i >= 0 and BASE_AXIS[stack[i] // 3] == axis and stack[i] // 3 != base:
+                i -= 1
+            if i >= 0 and stack[i] // 3 == base:
+                total = (stack[i] % 3 + 1 + amount) % 4
+                if total == 0:
+                    del stack[i]
+                else:
+                    stack[i] = make_move(base, total)
+            else:
+                stack.append(code)
+        return MoveSequence(stack)
+
+    def htm(self) -> int:
+        """HTM（Half Turn Metric）での手数。スライスは2手、持ち替えは0手"""
+        count = 0
+        for code in self.codes:
+            kind = BASE_KIND[code // 3]
+            if kind == KIND_SLICE:
+                count += 2
+            elif kind != KIND_ROTATION:
+                count += 1
+        return count
+
+    def qtm(self) -> int:
+        """QTM（Quarter Turn Metric）での手数。半回転は2手、スライスは倍、持ち替えは0手"""
+        count = 0
+        for code in self.codes:
+            kind = BASE_KIND[code // 3]
+            if kind == KIND_ROTATION:
+                continue
+            quarters = 2 if code % 3 == 1 else 1
+            count += 2 * quarters if kind == KIND_SLICE else quarters
+        return count
+
+    def stm(self) -> int:
+        """STM（Slice Turn Metric）での手数。スライスも1手、持ち替えは0手"""
+        return sum(1 for code in self.codes if BASE_KIND[code // 3] != KIND_ROTATION)
+
+
+def _parse(text: str) -> List[int]:
+    """記法文字列をムーブコードのリストに変換"""
+    stack: List[List[int]] = [[]]
+    pos = 0
+    length = len(text)
+    while pos < length:
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise NotationError(f"Invalid move notation at {pos}: {text!r}")
+        pos = match.end()
+        if match.group('open'):
+            stack.append([])
+        elif match.group('close'):
+            if len(stack) == 1:
+                raise NotationError(f"Unbalanced ')' in: {text!r}")
+            group = stack.pop()
+            repeat = int(match.group('repeat') or 1)
+            stack[-1].extend(group * repeat)
+        else:
+            base = match.group('base')
+            # Rw表記は小文字のワイドムーブと同じ
+            if match.group('wide'):
+                if base not in "UDFBLR":
+                    raise NotationError(f"Invalid wide move '{match.group(0).strip()}' in: {text!r}")
+                base = base.lower()
+            amount = int(match.group('amount') or 1)
+            if match.group('prime'):
+                amount = -amount
+            amount %= 4
+            if amount:
+                stack[-1].append(make_move(BASE_MOVES.index(base), amount))
+    if len(stack) != 1:
+        raise NotationError(f"Unbalanced '(' in: {text!r}")
+    return stack[0]
+
+
+@lru_cache(maxsize=4096)
+def compile_moves(text: str) -> MoveSequence:
+    """
+    記法文字列をムーブ列にコンパイルする
+
+    同じ文字列は一度だけ解析し、以降はキャッシュしたMoveSequenceを返す。
+
+    Args:
+        text: ムーブ記法の文字列
+
+    Returns:
+        MoveSequence: コンパイル済みのムーブ列
+
+    Raises:
+        NotationError: 記法が不正な場合
+    """
+    return MoveSequence(_parse(text))
@@ -0,0 +1,177 @@
+"""パターン・アルゴリズム別のタイム分布（ヒストグラム・パーセンタイル・推移）
+
+パターン統計画面の描画用に、pattern_solves を一度だけ読み込んで
+パターン別・アルゴリズム別の集計を作成し、以降はソルブごとに追加更新する。
+描画時は固定長の配列（ヒストグラムのビン、推移の点）のみを参照するため、
+記録件数によらず1フレームの処理量が一定になる。
+
+ヒストグラムのビンは対数間隔（速いタイムほど細かい）。推移は指数移動平均
+（直近 PatternConfig.TREND_WINDOW 件程度の重み）を一定件数ごとに記録した点の列で、
+点数が上限に達したら1つおきに間引いて間隔を倍にする。平均の窓は記録件数によらないため、
+最近の変化は最後の点にすぐ現れる。
+"""
+import math
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .constants import PatternConfig as PC
+
+# 表示するパーセンタイル
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# 推移の指数移動平均の係数（窓 N 件の単純移動平均と同じ重心になる 2 / (N + 1)）
+TREND_ALPHA = 2 / (PC.TREND_WINDOW + 1)
+
+
+def _bucket_edges() -> Tuple[float, ...]:
+    """ヒストグラムのビンの境界（両端を含むHISTOGRAM_BUCKETS + 1個）"""
+    low = math.log(PC.HISTOGRAM_MIN_TIME)
+    high = math.log(PC.HISTOGRAM_MAX_TIME)
+    n = PC.HISTOGRAM_BUCKETS
+    return tuple(math.exp(low + (high - low) * i / n) for i in range(n + 1))
+
+
+BUCKET_EDGES = _bucket_edges()
+
+
+def bucket_index(solve_time: float) -> int:
+    """タイムが入るビンの番号（範囲外は両端のビン）"""
+    i = bisect_right(BUCKET_EDGES, solve_time) - 1
+    return min(max(i, 0), PC.HISTOGRAM_BUCKETS - 1)
+
+
+class TimeDistribution:
+    """1つのパターンまたはアルゴリズムのタイム分布"""
+
+    __slots__ = ('counts', 'count', 'total', 'best', 'worst',
+                 '_trend', '_ema', '_sample_interval', '_since_sample', '_percentiles')
+
+    def __init__(self):
+        self.counts = array('I', bytes(4 * PC.HISTOGRAM_BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.best: Optional[float] = None
+        self.worst: Optional[float] = None
+        self._trend: List[float] = []   # _sample_interval 件ごとに記録した指数移動平均
+        self._ema: Optional[float] = None
+        self._sample_interval = 1
+        self._since_sample = 0
+        self._percentiles: Optional[Tuple[float, ...]] = None
+
+    def add(self, solve_time: float):
+        """ソルブのタイムを追加（記録順に呼ぶこと）"""
+        self.counts[bucket_index(solve_time)] += 1
+        self.count += 1
+        self.total += solve_time
+        if self.best is None or solve_time < self.best:
+            self.best = solve_time
+        if self.worst is None or solve_time > self.worst:
+            self.worst = solve_time
+        self._percentiles = None
+
+        if self._ema is None:
+            self._ema = solve_time
+        else:
+            self._ema += TREND_ALPHA * (solve_time - self._ema)
+        self._since_sample += 1
+        if self._since_sample == self._sample_interval:
+            self._trend.append(self._ema)
+            self._since_sample = 0
+            if len(self._trend) >= PC.TREND_POINTS:
+                # 1つおきに間引いて点数を半分にする（各点は間隔の最後のソルブ時点の値）
+                self._trend = self._trend[1::2]
+                self._sample_interval *= 2
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        パーセンタイル（ビン内は対数スケールで線形補間）
+
+        Args:
+            q: 0-100
+
+        Returns:
+            float: タイム（記録がない場合はNone）
+        """
+        if not self.count:
+            return None
+        target = self.count * q / 100
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= target:
+                fraction = (target - cumulative) / n
+                low, high = math.log(BUCKET_EDGES[i]), math.log(BUCKET_EDGES[i + 1])
+                value = math.exp(low + (high - low) * fraction)
+                # ビンの補間値は実際の最速・最遅の範囲に収める
+                return min(max(value, self.best), self.worst)
+            cumulative += n
+        return self.worst
+
+    def percentiles(self) -> Tuple[float, ...]:
+        """PERCENTILESの各パーセンタイル（追加があるまでキャッシュ）"""
+        if self._percentiles is None:
+            self._percentiles = tuple(self.percentile(q) for q in PERCENTILES) if self.count else ()
+        return self._percentiles
+
+    def trend(self) -> List[float]:
+        """推移（古い順の指数移動平均。最後の点は常に最新のソルブ時点の値）"""
+        if self._since_sample:
+            return self._trend + [self._ema]
+        return list(self._trend)
+
+
+class PatternHistograms:
+    """パターン別・アルゴリズム別のタイム分布の集合"""
+
+    def __init__(self):
+        self._by_pattern: Dict[str, TimeDistribution] = {}
+        self._by_algorithm: Dict[Tuple[str, str], TimeDistribution] = {}
+        self._algorithms: Dict[str, List[str]] = {}
+
+    def add(self, pattern_id: str, algorithm_id: Optional[str], solve_time: float):
+        """ソルブを1件追加（O(1)）"""
+        distribution = self._by_pattern.get(pattern_id)
+        if distribution is None:
+            distribution = self._by_pattern[pattern_id] = TimeDistribution()
+        distribution.add(solve_time)
+        if algorithm_id:
+            key = (pattern_id, algorithm_id)
+            distribution = self._by_algorithm.get(key)
+            if distribution is None:
+                distribution = self._by_algorithm[key] = TimeDistribution()
+                self._algorithms.setdefault(pattern_id, []).append(algorithm_id)
+            distribution.add(solve_time)
+
+    def add_many(self, rows: Iterable[Tuple[str, Optional[str], float]]):
+        """(パターンID, アルゴリズムID, タイム) を記録順にまとめて追加"""
+        for pattern_id, algorithm_id, solve_time in rows:
+            self.add(pattern_id, algorithm_id, solve_time)
+
+    def get(self, pattern_id: str, algorithm_id: Optional[str] = None) -> Optional[TimeDistribution]:
+        """パターン全体（algorithm_id=None）またはアルゴリズム別の分布"""
+        if algorithm_id is None:
+            return self._by_pattern.get(pattern_id)
+        return self._by_algorithm.get((pattern_id, algorithm_id))
+
+    def algorithms_for(self, pattern_id: str) -> Sequence[str]:
+        """記録のあるアルゴリズムID（最初に記録された順）"""
+        return self._algorithms.get(pattern_id, ())
+
+
+def load_pattern_histograms(stats) -> PatternHistograms:
+    """
+    全パターン記録から分布を作成する
+
+    Args:
+        stats: SpeedcubeStats
+
+    Returns:
+        PatternHistograms: 作成した分布
+    """
+    histograms = PatternHistograms()
+    histograms.add_many(stats.iter_pattern_solve_times())
+    return histograms
@@ -0,0 +1,337 @@
+"""練習セット（プリセット・苦手パターン・カスタム）と出題キューの保存
+
+セットはSQLiteの pattern_sets テーブルに、実行状況は pattern_set_runs テーブルに保存する。
+実行開始時にセットのパターンをシャッフルした出題キューを作成して保存し、
+以降は位置（position）のみを更新する。1パターン進めるごとの処理は主キーでの
+1行の更新だけで、キューやpattern_solvesの走査は行わない。
+中断した場合は次回同じ位置から再開できる。
+
+セットID:
+    preset:<カテゴリ名>  カテゴリ内の全パターン（preset:ALL は全パターン）
+    weak:<カテゴリ名>    カテゴリ内の苦手パターン（実行開始時に練習記録から選び直す）
+    custom:<番号>        ユーザーが作成したセット
+"""
+import random
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .constants import PatternConfig as PC
+
+SET_KIND_PRESET = "preset"
+SET_KIND_WEAK = "weak"
+SET_KIND_CUSTOM = "custom"
+
+# 一覧での並び順（種類ごと）
+_KIND_ORDER = {SET_KIND_PRESET: 0, SET_KIND_WEAK: 1, SET_KIND_CUSTOM: 2}
+
+
+def create_pattern_set_tables(db):
+    """練習セット用のテーブルを作成（存在しない場合）"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS pattern_sets (
+            set_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            pattern_ids TEXT NOT NULL,
+            sort_order INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS pattern_set_runs (
+            set_id TEXT PRIMARY KEY,
+            queue TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+@dataclass(frozen=True, slots=True)
+class PatternSet:
+    """練習セット"""
+    id: str                           # セットID（"preset:PLL" など）
+    name: str                         # 表示名
+    kind: str                         # 種類（preset / weak / custom）
+    pattern_ids: Tuple[str, ...]      # 含まれるパターンID
+
+
+class PatternSetRun:
+    """実行中のセットの出題キュー"""
+
+    __slots__ = ('set_id', 'queue', 'position')
+
+    def __init__(self, set_id: str, queue: Sequence[str], position: int = 0):
+        """
+        Args:
+            set_id: セットID
+            queue: シャッフル済みのパターンIDの列
+            position: 次に出題するキューの位置
+        """
+        self.set_id = set_id
+        self.queue = tuple(queue)
+        self.position = position
+
+    @property
+    def finished(self) -> bool:
+        """全パターンを練習したか"""
+        return self.position >= len(self.queue)
+
+    def current(self) -> Optional[str]:
+        """現在出題中のパターンID（完了している場合はNone）"""
+        return None if self.finished else self.queue[self.position]
+
+
+def _join_ids(pattern_ids: Sequence[str]) -> str:
+    return " ".join(pattern_ids)
+
+
+def _split_ids(text: str) -> Tuple[str, ...]:
+    return tuple(text.split())
+
+
+class PatternSetStore:
+    """練習セットと実行状況のSQLite上の保存先"""
+
+    def __init__(self, logger):
+        """
+        Args:
+            logger: SpeedcubeLoggerのインスタンス（db を使用）
+        """
+        self.logger = logger
+
+    def sync_presets(self, pattern_db):
+        """
+        パターンデータに合わせてプリセットセット・苦手セットを登録・更新
+
+        Args:
+            pattern_db: PatternDatabase
+        """
+        available = pattern_db.get_available_categories()
+        categories = [category.name for category in available]
+        rows = [(f"{SET_KIND_PRESET}:{category.name}", f"ALL {category.name}", SET_KIND_PRESET,
+                 _join_ids(pattern_db.get_pattern_ids_by_category(category)), order)
+                for order, category in enumerate(available)]
+        all_ids = [pattern_id for category in available for pattern_id in pattern_db.get_pattern_ids_by_category(category)]
+        rows.append((f"{SET_KIND_PRESET}:ALL", "ALL PATTERNS", SET_KIND_PRESET, _join_ids(all_ids), len(available)))
+        try:
+            with self.logger.db.write() as db:
+                db.executemany(
+                    """
+                    INSERT INTO pattern_sets (set_id, name, kind, pattern_ids, sort_order)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(set_id) DO UPDATE SET
+                        name = excluded.name, pattern_ids = excluded.pattern_ids, sort_order = excluded.sort_order
+                    """,
+                    rows
+                )
+                # 苦手セットは中身を実行開始時に決めるため、未登録の場合のみ空で登録する
+                db.executemany(
+                    """
+                    INSERT OR IGNORE INTO pattern_sets (set_id, name, kind, pattern_ids, sort_order)
+                    VALUES (?, ?, ?, '', ?)
+                    """,
+                    [(f"{SET_KIND_WEAK}:{category}", f"WEAK {category}", SET_KIND_WEAK, order)
+                     for order, category in enumerate(categories)]
+                )
+        except sqlite3.Error as e:
+            print(f"DEBUG: プリセットセットの登録に失敗: {e}")
+
+    def list_sets(self) -> List[PatternSet]:
+        """
+        全セットを一覧用の順序で取得
+
+        Returns:
+            list: PatternSetのリスト（プリセット、苦手、カスタムの順）
+        """
+        try:
+            rows = self.logger.db.fetchall("SELECT set_id, name, kind, pattern_ids, sort_order FROM pattern_sets")
+        except sqlite3.Error as e:
+            print(f"DEBUG: list_sets error: {e}")
+            return []
+        rows.sort(key=lambda row: (_KIND_ORDER.get(row[2], len(_KIND_ORDER)), row[4], row[0]))
+        return [PatternSet(set_id, name, kind, _split_ids(pattern_ids)) for set_id, name, kind, pattern_ids, _ in rows]
+
+    def get_set(self, set_id: str) -> Optional[PatternSet]:
+        """セットIDからセットを取得"""
+        try:
+            row = self.logger.db.fetchone("SELECT name, kind, pattern_ids FROM pattern_sets WHERE set_id = ?", (set_id,))
+        except sqlite3.Error as e:
+            print(f"DEBUG: get_set error: {e}")
+            return None
+        return PatternSet(set_id, row[0], row[1], _split_ids(row[2])) if row else None
+
+    def save_custom_set(self, name: str, pattern_ids: Sequence[str]) -> Optional[PatternSet]:
+        """
+        カスタムセットを作成
+
+        Args:
+            name: 表示名
+            pattern_ids: 含めるパターンID（順序を保持）
+
+        Returns:
+            PatternSet: 作成したセット、失敗した場合はNone
+        """
+        try:
+            with self.logger.db.write() as db:
+                number = db.scalar(
+                    "SELECT COALESCE(MAX(sort_order), -1) + 1 FROM pattern_sets WHERE kind = ?", (SET_KIND_CUSTOM,))
+                set_id = f"{SET_KIND_CUSTOM}:{number}"
+                db.execute(
+                    "INSERT INTO pattern_sets (set_id, name, kind, pattern_ids, sort_order) VALUES (?, ?, ?, ?, ?)",
+                    (set_id, name, SET_KIND_CUSTOM, _join_ids(pattern_ids), number)
+                )
+            return PatternSet(set_id, name, SET_KIND_CUSTOM, tuple(pattern_ids))
+        except sqlite3.Error as e:
+            print(f"DEBUG: カスタムセットの保存に失敗: {e}")
+            return None
+
+    def update_set_patterns(self, set_id: str, pattern_ids: Sequence[str]):
+        """セットのパターンを置き換える（実行中のキューには影響しない）"""
+        try:
+            with self.logger.db.write() as db:
+                db.execute("UPDATE pattern_sets SET pattern_ids = ? WHERE set_id = ?", (_join_ids(pattern_ids), set_id))
+        except sqlite3.Error as e:
+            print(f"DEBUG: セットの更新に失敗: {e}")
+
+    def delete_set(self, set_id: str):
+        """セットと実行状況を削除"""
+        try:
+            with self.logger.db.write() as db:
+                db.execute("DELETE FROM pattern_set_runs WHERE set_id = ?", (set_id,))
+                db.execute("DELETE FROM pattern_sets WHERE set_id = ?", (set_id,))
+        except sqlite3.Error as e:
+            print(f"DEBUG: セットの削除に失敗: {e}")
+
+    def get_run(self, set_id: str) -> Optional[PatternSetRun]:
+        """
+        中断中の実行状況を取得
+
+        Returns:
+            PatternSetRun: 未完了の実行がある場合のみ。それ以外はNone
+        """
+        try:
+            row = self.logger.db.fetchone("SELECT queue, position FROM pattern_set_runs WHERE set_id = ?", (set_id,))
+        except sqlite3.Error as e:
+            print(f"DEBUG: get_run error: {e}")
+            return None
+        if not row:
+            return None
+        run = PatternSetRun(set_id, _split_ids(row[0]), row[1])
+        return None if run.finished else run
+
+    def get_progress(self) -> Dict[str, Tuple[int, int]]:
+        """
+        全セットの進捗を1回のクエリで取得
+
+        Returns:
+            dict: セットID -> (練習済み件数, キューの件数)。未完了の実行のみ
+        """
+        try:
+            rows = self.logger.db.fetchall("SELECT set_id, queue, position FROM pattern_set_runs")
+        except sqlite3.Error as e:
+            print(f"DEBUG: get_progress error: {e}")
+            return {}
+        progress = {}
+        for set_id, queue, position in rows:
+            total = len(_split_ids(queue))
+            if position < total:
+                progress[set_id] = (position, total)
+        return progress
+
+    def start_run(self, pattern_set: PatternSet, rng: Optional[random.Random] = None) -> Optional[PatternSetRun]:
+        """
+        セットの実行を開始（シャッフルした出題キューを作成して保存）
+
+        Args:
+            pattern_set: 実行するセット
+            rng: 乱数生成器
+
+        Returns:
+            PatternSetRun: 作成した実行状況、セットが空の場合や保存に失敗した場合はNone
+        """
+        if not pattern_set.pattern_ids:
+            return None
+        queue = list(pattern_set.pattern_ids)
+        (rng or random).shuffle(queue)
+        try:
+            with self.logger.db.write() as db:
+                db.execute(
+                    """
+                    INSERT INTO pattern_set_runs (set_id, queue, position, started_at, updated_at)
+                    VALUES (?, ?, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                    ON CONFLICT(set_id) DO UPDATE SET
+                        queue = excluded.queue, position = 0,
+                        started_at = excluded.started_at, updated_at = excluded.updated_at
+                    """,
+                    (pattern_set.id, _join_ids(queue))
+                )
+        except sqlite3.Error as e:
+            print(f"DEBUG: セットの開始に失敗: {e}")
+            return None
+        return PatternSetRun(pattern_set.id, queue)
+
+    def advance(self, run: PatternSetRun):
+        """
+        次のパターンへ進め、位置を保存する（主キーでの1行更新のみ）
+
+        呼び出し側の write() ブロックの中で呼んだ場合は、そのトランザクションに含まれる
+        （ソルブ記録と同じトランザクションで保存する場合）。
+
+        Args:
+            run: 実行状況
+        """
+        if run.finished:
+            return
+        run.position += 1
+        try:
+            with self.logger.db.write() as db:
+                db.execute(
+                    "UPDATE pattern_set_runs SET position = ?, updated_at = CURRENT_TIMESTAMP WHERE set_id = ?",
+                    (run.position, run.set_id)
+                )
+        except sqlite3.Error as e:
+            print(f"DEBUG: セットの進捗の保存に失敗: {e}")
+
+
+def start_or_resume(store: PatternSetStore, pattern_db, stats, set_id: str,
+                    rng: Optional[random.Random] = None) -> Optional[PatternSetRun]:
+    """
+    中断中の実行があれば再開し、なければ新しく開始する
+
+    苦手セットは新しく開始するときに練習記録から選び直す。
+
+    Args:
+        store: PatternSetStore
+        pattern_db: PatternDatabase
+        stats: SpeedcubeStats（苦手パターンの選択に使用）
+        set_id: セットID
+        rng: 乱数生成器
+
+    Returns:
+        PatternSetRun: 実行状況、開始できない場合はNone
+    """
+    run = store.get_run(set_id)
+    if run is not None:
+        # マスターデータから削除されたパターンは飛ばす
+        while not run.finished and pattern_db.get_pattern(run.current()) is None:
+            store.advance(run)
+        if not run.finished:
+            return run
+
+    pattern_set = store.get_set(set_id)
+    if pattern_set is None:
+        return None
+    if pattern_set.kind == SET_KIND_WEAK:
+        from .scheduler import create_practice_scheduler
+        category = set_id.split(":", 1)[1]
+        scheduler = create_practice_scheduler(pattern_db, stats, category, rng=rng)
+        pattern_ids = scheduler.weakest(PC.WEAK_SET_SIZE)
+        store.update_set_patterns(set_id, pattern_ids)
+        pattern_set = PatternSet(set_id, pattern_set.name, pattern_set.kind, tuple(pattern_ids))
+
+    pattern_ids = tuple(pattern_id for pattern_id in pattern_set.pattern_ids
+                        if pattern_db.get_pattern(pattern_id) is not None)
+    return store.start_run(PatternSet(set_id, pattern_set.name, pattern_set.kind, pattern_ids), rng)
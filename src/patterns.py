@@ -3,10 +3,19 @@
 OLL、PLL、F2L、Crossなどのパターンデータを管理する
 """
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Sequence, Tuple
 from enum import Enum
 import json
 import os
+import sys
+
+from .catalog_cache import open_catalog_cache, write_catalog_cache
+from .constants import PatternConfig as PC
+from .notation import MoveSequence, compile_moves
+from .sampler import WeightedSampler
+
+# マスターデータのバイナリキャッシュ（dataディレクトリ内）
+CATALOG_CACHE_FILE = "catalog_cache.bin"
 
 
 class PatternCategory(Enum):
@@ -15,11 +24,18 @@ class PatternCategory(Enum):
     PLL = "PLL"
     F2L = "F2L"
     CROSS = "Cross"
+    COLL = "COLL"
+    CMLL = "CMLL"
+    ZBLL = "ZBLL"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Algorithm:
-    """アルゴリズムデータクラス（マスターデータ）"""
+    """アルゴリズムデータクラス（マスターデータ）
+    
+    大規模なカタログでもメモリを抑えるため__slots__を使った不変オブジェクトとし、
+    name・notesなど重複しやすい文字列はロード時にsys.internで共有する。
+    """
     id: str                    # アルゴリズムID（例："PLL_Ua_standard", "PLL_Ua_rud"）
     pattern_id: str            # 関連するパターンID
     name: str                  # アルゴリズム名（例："Standard", "RUD", "Two-gen"）
@@ -28,53 +44,186 @@ class Algorithm:
     is_default: bool = False   # デフォルトで使用するか
     notes: str = ""            # メモ（オプション）
     
+    _compiled_moves: Optional[MoveSequence] = field(default=None, init=False, repr=False, compare=False)
+    
     # 注: ユーザー個別の評価（speed_rating, ergonomics_rating）は
     # user_algorithm_ratingsテーブルで管理し、stats.pyで取得
     
+    @property
+    def compiled_moves(self) -> MoveSequence:
+        """コンパイル済みのムーブ列（初回アクセス時のみ解析）"""
+        if self._compiled_moves is None:
+            object.__setattr__(self, '_compiled_moves', compile_moves(self.moves))
+        return self._compiled_moves
+    
     def __str__(self) -> str:
         return f"{self.name}: {self.moves}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Pattern:
-    """パターンデータクラス"""
+    """パターンデータクラス（__slots__を使った不変オブジェクト）"""
     id: str                    # パターンID（例："OLL_01", "PLL_Aa"）
     name: str                  # パターン名（例："OLL #1", "PLL Aa"）
     category: PatternCategory  # カテゴリ
     setup_moves: str          # セットアップムーブ（パターンを作るためのムーブ）
     description: str          # パターンの説明
     difficulty: int           # 難易度（1-5）
+    subset: str = ""          # サブセット（例：ZBLLの"T", "U"。なしの場合は空文字）
+    _compiled_setup_moves: Optional[MoveSequence] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def compiled_setup_moves(self) -> MoveSequence:
+        """コンパイル済みのセットアップムーブ（初回アクセス時のみ解析）"""
+        if self._compiled_setup_moves is None:
+            object.__setattr__(self, '_compiled_setup_moves', compile_moves(self.setup_moves))
+        return self._compiled_setup_moves
     
     def __str__(self) -> str:
         return f"{self.name} ({self.category.value})"
 
 
 class PatternDatabase:
-    """パターンマスターデータベース"""
+    """パターンマスターデータベース
     
-    def __init__(self):
-        """パターンデータの初期化"""
-        self._patterns: Dict[str, Pattern] = {}
-        self._algorithms: Dict[str, Algorithm] = {}
-        self._load_from_json()
+    ロード時にカテゴリ別・パターン別の索引を構築するため、
+    検索メソッドはすべてO(1)で、呼び出しごとのリスト生成も行わない。
+    返り値のタプルは共有されるため変更しないこと。
+    """
+    
+    def __init__(self, patterns: Optional[Sequence[Pattern]] = None,
+                 algorithms: Optional[Sequence[Algorithm]] = None,
+                 data_dir: Optional[str] = None):
+        """
+        パターンデータの初期化
+        
+        Args:
+            patterns: パターンのリスト（省略時はキャッシュまたはJSONファイルからロード）
+            algorithms: アルゴリズムのリスト（省略時はキャッシュまたはJSONファイルからロード）
+            data_dir: JSONファイルとキャッシュのディレクトリ（省略時はプロジェクトルートのdata）
+        """
+        self._patterns: Mapping[str, Pattern] = {}
+        self._algorithms: Mapping[str, Algorithm] = {}
+        self._catalog = None
+        if patterns is None and algorithms is None:
+            self._load(data_dir or get_default_data_dir())
+        else:
+            self._patterns = {p.id: p for p in patterns or ()}
+            self._algorithms = {a.id: a for a in algorithms or ()}
+        self._build_indexes()
     
     @property
     def patterns(self) -> List[Pattern]:
         """全パターンをリストで取得"""
-        return list(self._patterns.values())
+        return list(self.get_all_patterns())
     
     @property
     def algorithms(self) -> List[Algorithm]:
         """全アルゴリズムをリストで取得"""
-        return list(self._algorithms.values())
-    
-    def _load_from_json(self):
-        """JSONファイルからパターンとアルゴリズムをロード"""
-        # プロジェクトルートのdataディレクトリからロード
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        patterns_path = os.path.join(project_root, 'data', 'patterns.json')
-        algorithms_path = os.path.join(project_root, 'data', 'algorithms.json')
+        return list(self.get_all_algorithms())
+    
+    def _build_indexes(self):
+        """検索用の索引を構築する（ロード時・追加時のみ）
+        
+        索引はIDのみで構築し、Pattern / Algorithm のタプルは初回の検索時に作成する。
+        キャッシュから読み込んだ場合、参照されないオブジェクトは生成されない。
+        """
+        if self._catalog is not None:
+            pattern_keys = self._catalog.pattern_keys()
+            algorithm_keys = self._catalog.algorithm_keys()
+        else:
+            pattern_keys = [(p.id, p.category, p.subset) for p in self._patterns.values()]
+            algorithm_keys = [(a.id, a.pattern_id, a.is_default) for a in self._algorithms.values()]
+        
+        # カテゴリ -> パターンID、(カテゴリ, サブセット) -> パターンID（登録順）
+        by_category: Dict[PatternCategory, List[str]] = {category: [] for category in PatternCategory}
+        by_subset: Dict[Tuple[PatternCategory, str], List[str]] = {}
+        self._pattern_categories: Dict[str, PatternCategory] = {}
+        for pattern_id, category, subset in pattern_keys:
+            by_category[category].append(pattern_id)
+            self._pattern_categories[pattern_id] = category
+            if subset:
+                by_subset.setdefault((category, subset), []).append(pattern_id)
+        self._pattern_ids_by_category: Dict[PatternCategory, Tuple[str, ...]] = {
+            category: tuple(ids) for category, ids in by_category.items()
+        }
+        self._pattern_ids_by_subset: Dict[Tuple[PatternCategory, str], Tuple[str, ...]] = {
+            key: tuple(ids) for key, ids in by_subset.items()
+        }
+        # カテゴリ -> サブセット（初出順）
+        self._subsets: Dict[PatternCategory, Tuple[str, ...]] = {
+            category: tuple(subset for c, subset in by_subset if c == category) for category in PatternCategory
+        }
+        self._all_pattern_ids: Tuple[str, ...] = tuple(self._pattern_categories)
+        # カテゴリの定義順（OLL, PLL, F2L, CROSS）で、データが存在するもののみ
+        self._available_categories: Tuple[PatternCategory, ...] = tuple(
+            category for category in PatternCategory if by_category[category]
+        )
+        # タブの表示順（PatternConfig.TAB_ORDER順、未指定のカテゴリは定義順で後ろに追加）
+        tab_order = [PatternCategory[name] for name in PC.TAB_ORDER]
+        self._category_tabs: Tuple[PatternCategory, ...] = tuple(
+            [category for category in tab_order if by_category[category]] +
+            [category for category in self._available_categories if category not in tab_order]
+        )
+        
+        # パターンID -> アルゴリズムID（登録順）、デフォルトアルゴリズムID
+        by_pattern: Dict[str, List[str]] = {}
+        self._default_algorithm_ids: Dict[str, str] = {}
+        for algorithm_id, pattern_id, is_default in algorithm_keys:
+            by_pattern.setdefault(pattern_id, []).append(algorithm_id)
+            # デフォルトが設定されていない場合は最初のアルゴリズム
+            if is_default and pattern_id not in self._default_algorithm_ids:
+                self._default_algorithm_ids[pattern_id] = algorithm_id
+        self._algorithm_ids_by_pattern: Dict[str, Tuple[str, ...]] = {
+            pattern_id: tuple(ids) for pattern_id, ids in by_pattern.items()
+        }
+        for pattern_id, ids in self._algorithm_ids_by_pattern.items():
+            self._default_algorithm_ids.setdefault(pattern_id, ids[0])
+        
+        # オブジェクトのタプル（初回の検索時に作成）
+        self._all_patterns: Optional[Tuple[Pattern, ...]] = None
+        self._all_algorithms: Optional[Tuple[Algorithm, ...]] = None
+        self._patterns_by_category: Dict[PatternCategory, Tuple[Pattern, ...]] = {}
+        self._algorithms_by_pattern: Dict[str, Tuple[Algorithm, ...]] = {}
+    
+    def add_patterns(self, patterns: Sequence[Pattern] = (), algorithms: Sequence[Algorithm] = ()):
+        """パターン・アルゴリズムを追加して索引を再構築する"""
+        # キャッシュの読み取り専用マップは通常の辞書に置き換える
+        self._patterns = dict(self._patterns)
+        self._algorithms = dict(self._algorithms)
+        self._catalog = None
+        for pattern in patterns:
+            self._patterns[pattern.id] = pattern
+        for algorithm in algorithms:
+            self._algorithms[algorithm.id] = algorithm
+        self._build_indexes()
+    
+    def _load(self, data_dir: str):
+        """キャッシュが最新ならキャッシュから、そうでなければJSONファイルからロード"""
+        patterns_path = os.path.join(data_dir, 'patterns.json')
+        algorithms_path = os.path.join(data_dir, 'algorithms.json')
+        cache_path = os.path.join(data_dir, CATALOG_CACHE_FILE)
+        sources = (patterns_path, algorithms_path)
+        
+        catalog = open_catalog_cache(cache_path, sources)
+        if catalog is not None:
+            self._catalog = catalog
+            self._patterns = catalog.patterns
+            self._algorithms = catalog.algorithms
+            return
+        
+        # フォールバックデータはキャッシュしない
+        if self._load_from_json(patterns_path, algorithms_path):
+            write_catalog_cache(cache_path, sources, self._patterns.values(), self._algorithms.values())
+    
+    def _load_from_json(self, patterns_path: str, algorithms_path: str) -> bool:
+        """
+        JSONファイルからパターンとアルゴリズムをロード
+        
+        Returns:
+            bool: 両方のファイルから読み込めた場合True（フォールバックを使用した場合False）
+        """
+        loaded = True
         
         # パターンのロード
         try:
@@ -87,16 +236,19 @@ class PatternDatabase:
                         name=pattern_dict['name'],
                         category=PatternCategory[pattern_dict['category']],
                         setup_moves=pattern_dict['setup_moves'],
-                        description=pattern_dict['description'],
-                        difficulty=pattern_dict['difficulty']
+                        description=sys.intern(pattern_dict['description']),
+                        difficulty=pattern_dict['difficulty'],
+                        subset=sys.intern(pattern_dict.get('subset', ''))
                     )
                     self._patterns[pattern.id] = pattern
         except FileNotFoundError:
             print(f"Warning: {patterns_path} not found. Using fallback patterns.")
             self._initialize_patterns_fallback()
+            loaded = False
         except json.JSONDecodeError as e:
             print(f"Error decoding {patterns_path}: {e}. Using fallback patterns.")
             self._initialize_patterns_fallback()
+            loaded = False
         
         # アルゴリズムのロード
         try:
@@ -106,20 +258,25 @@ class PatternDatabase:
                 for algo_dict in algorithms_data:
                     algorithm = Algorithm(
                         id=algo_dict['id'],
-                        pattern_id=algo_dict['pattern_id'],
-                        name=algo_dict['name'],
+                        # 同じ値が多い文字列は共有する
+                        pattern_id=sys.intern(algo_dict['pattern_id']),
+                        name=sys.intern(algo_dict['name']),
                         moves=algo_dict['moves'],
-                        finger_tricks=algo_dict.get('finger_tricks', ''),
+                        finger_tricks=sys.intern(algo_dict.get('finger_tricks', '')),
                         is_default=algo_dict.get('is_default', False),
-                        notes=algo_dict.get('notes', '')
+                        notes=sys.intern(algo_dict.get('notes', ''))
                     )
                     self._algorithms[algorithm.id] = algorithm
         except FileNotFoundError:
             print(f"Warning: {algorithms_path} not found. Using fallback algorithms.")
             self._initialize_algorithms_fallback()
+            loaded = False
         except json.JSONDecodeError as e:
             print(f"Error decoding {algorithms_path}: {e}. Using fallback algorithms.")
             self._initialize_algorithms_fallback()
+            loaded = False
+        
+        return loaded
     
     def _initialize_patterns_fallback(self):
         """パターンマスターデータの初期化（フォールバック用）"""
@@ -315,38 +472,74 @@ class PatternDatabase:
         """パターンIDからパターンを取得"""
         return self._patterns.get(pattern_id)
     
-    def get_all_patterns(self) -> List[Pattern]:
+    def get_pattern_category(self, pattern_id: str) -> Optional[PatternCategory]:
+        """パターンIDからカテゴリを取得（パターンのオブジェクトは生成しない）"""
+        return self._pattern_categories.get(pattern_id)
+    
+    def get_all_patterns(self) -> Tuple[Pattern, ...]:
         """全パターンを取得"""
-        return list(self._patterns.values())
+        if self._all_patterns is None:
+            self._all_patterns = tuple(self._patterns.values())
+        return self._all_patterns
     
-    def get_patterns_by_category(self, category: PatternCategory) -> List[Pattern]:
+    def get_patterns_by_category(self, category: PatternCategory) -> Tuple[Pattern, ...]:
         """カテゴリ別にパターンを取得"""
-        return [p for p in self._patterns.values() if p.category == category]
+        patterns = self._patterns_by_category.get(category)
+        if patterns is None:
+            patterns = tuple(self._patterns[pattern_id]
+                             for pattern_id in self._pattern_ids_by_category.get(category, ()))
+            self._patterns_by_category[category] = patterns
+        return patterns
     
-    def get_pattern_ids_by_category(self, category: PatternCategory) -> List[str]:
-        """カテゴリ別にパターンIDを取得"""
-        return [p.id for p in self._patterns.values() if p.category == category]
+    def get_pattern_ids_by_category(self, category: PatternCategory, subset: Optional[str] = None) -> Tuple[str, ...]:
+        """カテゴリ別（サブセット指定時はサブセット別）にパターンIDを取得"""
+        if subset:
+            return self._pattern_ids_by_subset.get((category, subset), ())
+        return self._pattern_ids_by_category.get(category, ())
+    
+    def get_patterns_page(self, category: PatternCategory, start: int, count: int,
+                          subset: Optional[str] = None) -> Tuple[Pattern, ...]:
+        """
+        カテゴリ別のパターンのうち、指定範囲のみを取得
+        
+        一覧画面の表示範囲だけを取り出すためのメソッド。キャッシュから読み込んだ場合、
+        範囲外のパターンはオブジェクトを生成しない。
+        
+        Args:
+            category: カテゴリ
+            start: 開始位置
+            count: 最大件数
+            subset: サブセット（Noneの場合はカテゴリ全体）
+        
+        Returns:
+            Tuple[Pattern, ...]: 範囲内のパターン
+        """
+        ids = self.get_pattern_ids_by_category(category, subset)
+        return tuple(self._patterns[pattern_id] for pattern_id in ids[max(start, 0):start + count])
+    
+    def get_subsets(self, category: PatternCategory) -> Tuple[str, ...]:
+        """カテゴリ内のサブセット一覧を取得（サブセットがない場合は空）"""
+        return self._subsets.get(category, ())
     
     def get_categories(self) -> List[PatternCategory]:
         """利用可能なカテゴリ一覧を取得"""
         return list(PatternCategory)
     
-    def get_available_categories(self) -> List[PatternCategory]:
-        """実際にデータが存在するカテゴリ一覧を取得"""
-        categories = set()
-        for pattern in self._patterns.values():
-            categories.add(pattern.category)
-        # カテゴリの定義順にソート（OLL, PLL, F2L, CROSS）
-        all_categories = list(PatternCategory)
-        return [cat for cat in all_categories if cat in categories]
+    def get_available_categories(self) -> Tuple[PatternCategory, ...]:
+        """実際にデータが存在するカテゴリ一覧を取得（PatternCategoryの定義順）"""
+        return self._available_categories
+    
+    def get_category_tabs(self) -> Tuple[PatternCategory, ...]:
+        """パターン一覧画面のタブに表示するカテゴリ一覧を取得（データが存在するもののみ）"""
+        return self._category_tabs
     
     def get_pattern_count(self) -> int:
         """総パターン数を取得"""
         return len(self._patterns)
     
-    def get_category_count(self, category: PatternCategory) -> int:
-        """カテゴリ別パターン数を取得"""
-        return len(self.get_patterns_by_category(category))
+    def get_category_count(self, category: PatternCategory, subset: Optional[str] = None) -> int:
+        """カテゴリ別（サブセット指定時はサブセット別）パターン数を取得"""
+        return len(self.get_pattern_ids_by_category(category, subset))
     
     # ========================================
     # アルゴリズム管理メソッド
@@ -356,26 +549,34 @@ class PatternDatabase:
         """アルゴリズムIDからアルゴリズムを取得"""
         return self._algorithms.get(algorithm_id)
     
-    def get_algorithms_for_pattern(self, pattern_id: str) -> List[Algorithm]:
+    def get_algorithms_for_pattern(self, pattern_id: str) -> Tuple[Algorithm, ...]:
         """特定パターンの全アルゴリズムを取得"""
-        return [alg for alg in self._algorithms.values() if alg.pattern_id == pattern_id]
+        algorithms = self._algorithms_by_pattern.get(pattern_id)
+        if algorithms is None:
+            algorithms = tuple(self._algorithms[algorithm_id]
+                               for algorithm_id in self._algorithm_ids_by_pattern.get(pattern_id, ()))
+            self._algorithms_by_pattern[pattern_id] = algorithms
+        return algorithms
+    
+    def get_pattern_algorithm(self, pattern_id: str, algorithm_id: str) -> Optional[Algorithm]:
+        """特定パターンのアルゴリズムをIDで取得（別パターンのIDの場合はNone）"""
+        algorithm = self._algorithms.get(algorithm_id)
+        return algorithm if algorithm is not None and algorithm.pattern_id == pattern_id else None
     
     def get_default_algorithm(self, pattern_id: str) -> Optional[Algorithm]:
         """特定パターンのデフォルトアルゴリズムを取得"""
-        algorithms = self.get_algorithms_for_pattern(pattern_id)
-        for alg in algorithms:
-            if alg.is_default:
-                return alg
-        # デフォルトが設定されていない場合は最初のアルゴリズムを返す
-        return algorithms[0] if algorithms else None
-    
-    def get_all_algorithms(self) -> List[Algorithm]:
+        algorithm_id = self._default_algorithm_ids.get(pattern_id)
+        return self._algorithms[algorithm_id] if algorithm_id is not None else None
+    
+    def get_all_algorithms(self) -> Tuple[Algorithm, ...]:
         """全アルゴリズムを取得"""
-        return list(self._algorithms.values())
+        if self._all_algorithms is None:
+            self._all_algorithms = tuple(self._algorithms.values())
+        return self._all_algorithms
     
     def has_multiple_algorithms(self, pattern_id: str) -> bool:
         """パターンが複数のアルゴリズムを持つかチェック"""
-        return len(self.get_algorithms_for_pattern(pattern_id)) > 1
+        return len(self._algorithm_ids_by_pattern.get(pattern_id, ())) > 1
     
     # ========================================
     # ランダム選択メソッド（Phase 3）
@@ -386,7 +587,7 @@ class PatternDatabase:
         カテゴリ別にランダムなパターンを取得
         
         Args:
-            category: "OLL", "PLL", "ALL" のいずれか
+            category: カテゴリ名（"OLL", "PLL" など PatternCategory の名前）または "ALL"
             exclude_ids: 除外するパターンIDのリスト（重複回避用）
         
         Returns:
@@ -394,35 +595,65 @@ class PatternDatabase:
         """
         import random
         
-        exclude_ids = exclude_ids or []
-        
-        # カテゴリに応じてパターンを取得
-        if category == "ALL":
-            candidates = self.get_all_patterns()
-        elif category == "OLL":
-            candidates = self.get_patterns_by_category(PatternCategory.OLL)
-        elif category == "PLL":
-            candidates = self.get_patterns_by_category(PatternCategory.PLL)
-        else:
+        # カテゴリに応じてパターンIDを取得
+        candidates = self._random_candidates(category)
+        if not candidates:
             return None
         
-        # 除外IDを適用
-        available_patterns = [p for p in candidates if p.id not in exclude_ids]
+        # 除外IDを適用（候補のリストは作らず、除外されていないIDが出るまで引き直す）
+        excluded = {pattern_id for pattern_id in exclude_ids or ()
+                    if pattern_id in self._pattern_categories
+                    and (category == "ALL" or self._pattern_categories[pattern_id].name == category)}
         
-        if not available_patterns:
-            # 除外後に候補がない場合は除外なしで再試行
-            available_patterns = candidates
+        # 全候補が除外対象の場合は除外なしで選択
+        pattern_id = random.choice(candidates)
+        if len(excluded) < len(candidates):
+            while pattern_id in excluded:
+                pattern_id = random.choice(candidates)
         
-        if not available_patterns:
-            return None
+        return self._patterns[pattern_id]
+    
+    def _random_candidates(self, category: str) -> Tuple[str, ...]:
+        """ランダム選択の候補となるパターンID（"ALL" またはカテゴリ名で指定）"""
+        if category == "ALL":
+            return self._all_pattern_ids
+        if category in PatternCategory.__members__:
+            return self._pattern_ids_by_category[PatternCategory[category]]
+        return ()
+    
+    def create_weighted_sampler(self, category: str = "ALL", weights: Optional[Mapping[str, float]] = None,
+                                rng=None) -> Optional[WeightedSampler]:
+        """
+        カテゴリ内のパターンを重みに比例した確率で選ぶサンプラーを作成
         
-        return random.choice(available_patterns)
+        Args:
+            category: カテゴリ名（"OLL", "PLL" など PatternCategory の名前）または "ALL"
+            weights: パターンID -> 重み（指定のないパターンは難易度を重みとする）
+            rng: 乱数生成器
+        
+        Returns:
+            WeightedSampler: パターンIDを選ぶサンプラー、候補がない場合はNone
+        """
+        candidates = self._random_candidates(category)
+        if not candidates:
+            return None
+        weights = weights or {}
+        values = [weights[pattern_id] if pattern_id in weights else self._patterns[pattern_id].difficulty
+                  for pattern_id in candidates]
+        return WeightedSampler(candidates, values, rng)
 
 
 # グローバルインスタンス
 _pattern_db_instance: Optional[PatternDatabase] = None
 
 
+def get_default_data_dir() -> str:
+    """マスターデータのディレクトリ（プロジェクトルートのdata）を取得"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    return os.path.join(project_root, 'data')
+
+
 def get_pattern_database() -> PatternDatabase:
     """パターンデータベースのシングルトンインスタンスを取得"""
     global _pattern_db_instance
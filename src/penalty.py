@@ -0,0 +1,173 @@
+"""ソルブのペナルティ（OK / +2 / DNF）とペナルティを考慮した集計
+
+results には計測したタイム（time_result）とペナルティ（penalty）を別々に保存し、
+集計にはペナルティを反映した実効タイムを使う:
+    OK   -> time_result
+    +2   -> time_result + 2秒
+    DNF  -> 無限大（ベスト・平均の対象外。並べ替えでは常に最も遅い）
+
+直近n回の平均（AoN）はWCAと同じく、上下それぞれ trim_count(n) 件を除いた平均。
+除く件数より多くDNFがあれば平均もDNFになる。
+"""
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from enum import IntEnum
+from typing import Optional, Tuple
+
+from .constants import GameConfig as GC, TextConstants as TC
+
+DNF_TIME = math.inf
+
+
+class Penalty(IntEnum):
+    """ペナルティ（results.penalty に保存する値）"""
+    OK = 0
+    PLUS2 = 1
+    DNF = 2
+
+
+# ペナルティを反映した実効タイムのSQL式（DNFはNULLのため、AVG・MINの対象外になる）
+EFFECTIVE_TIME_SQL = (f"CASE penalty WHEN {Penalty.DNF:d} THEN NULL "
+                      f"WHEN {Penalty.PLUS2:d} THEN time_result + {GC.PLUS2_PENALTY} ELSE time_result END")
+
+
+def effective_time(time_result: float, penalty: int) -> float:
+    """ペナルティを反映したタイム（DNFは無限大）"""
+    if penalty == Penalty.DNF:
+        return DNF_TIME
+    if penalty == Penalty.PLUS2:
+        return time_result + GC.PLUS2_PENALTY
+    return time_result
+
+
+def format_time(value: Optional[float]) -> str:
+    """実効タイム・平均を表示用に整形する（DNFは "DNF"、なしは "-"）"""
+    if value is None:
+        return "-"
+    if math.isinf(value):
+        return TC.DNF
+    return f"{value:.2f}"
+
+
+def format_result(time_result: float, penalty: int) -> str:
+    """1回の記録を表示用に整形する（例: 12.34 / 14.34+ / DNF）"""
+    if penalty == Penalty.DNF:
+        return TC.DNF
+    if penalty == Penalty.PLUS2:
+        return f"{time_result + GC.PLUS2_PENALTY:.2f}+"
+    return f"{time_result:.2f}"
+
+
+def encode_sheet_time(time_result: float, penalty: int) -> str:
+    """スプレッドシートに書き出すタイムの文字列（例: 12.34 / 14.34+ / DNF(12.34)）"""
+    if penalty == Penalty.DNF:
+        return f"{TC.DNF}({time_result:.2f})"
+    return format_result(time_result, penalty)
+
+
+def decode_sheet_time(text) -> Tuple[float, Penalty]:
+    """
+    スプレッドシートのタイムの文字列を (計測したタイム, ペナルティ) に変換する
+
+    ペナルティの付かない数値（カンマの小数点を含む）は従来どおりOKとして読む。
+    タイムのない "DNF" は0秒のDNFとする。
+
+    Raises:
+        ValueError: タイムとして読めない場合
+    """
+    if not isinstance(text, str):
+        return float(text), Penalty.OK
+    value = text.strip().replace(',', '.')
+    if value.upper().startswith(TC.DNF):
+        inner = value[len(TC.DNF):].strip("() ")
+        return (float(inner) if inner else 0.0), Penalty.DNF
+    if value.endswith("+"):
+        return round(float(value[:-1]) - GC.PLUS2_PENALTY, 2), Penalty.PLUS2
+    return float(value), Penalty.OK
+
+
+def trim_count(n: int) -> int:
+    """n回の平均で上下それぞれ除く件数（5%を切り上げ、最低1件）"""
+    return max(1, math.ceil(n * GC.AVERAGE_TRIM_RATIO))
+
+
+def average_of(values) -> Optional[float]:
+    """
+    実効タイムのトリム平均を1回だけ求める（RollingAverage と同じ規則）
+
+    Returns:
+        平均（3件未満の場合はNone、DNFが除く件数より多い場合は無限大）
+    """
+    n = len(values)
+    if n < 3:
+        return None
+    trim = trim_count(n)
+    middle = sorted(values)[trim:n - trim]
+    if math.isinf(middle[-1]):
+        return DNF_TIME
+    return sum(middle) / len(middle)
+
+
+class RollingAverage:
+    """
+    直近n回のトリム平均（AoN）を1回ごとに更新する
+
+    直近n件を並べ替えたリストと、有限のタイムの合計・DNFの件数を保持する。
+    追加・置き換えは二分探索による挿入・削除のみで、記録の件数によらない
+    （比較はO(log n)回。リストの移動はn件以内）。
+    """
+
+    def __init__(self, n: int):
+        """
+        Args:
+            n: 平均を取る件数（上下それぞれ trim_count(n) 件を除くため 3 以上）
+        """
+        self.n = n
+        self.trim = trim_count(n)
+        self._window = deque()  # 古い順の実効タイム
+        self._sorted = []       # 直近n件のタイム（昇順）
+        self._sum = 0.0         # 有限のタイムの合計
+        self._dnf = 0           # DNFの件数
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def _insert(self, value: float):
+        insort(self._sorted, value)
+        if math.isinf(value):
+            self._dnf += 1
+        else:
+            self._sum += value
+
+    def _remove(self, value: float):
+        del self._sorted[bisect_left(self._sorted, value)]
+        if math.isinf(value):
+            self._dnf -= 1
+        else:
+            self._sum -= value
+
+    def add(self, value: float):
+        """新しい記録の実効タイムを追加する（n件を超えた分は古い順に除く）"""
+        self._window.append(value)
+        self._insert(value)
+        if len(self._window) > self.n:
+            self._remove(self._window.popleft())
+
+    def replace_latest(self, value: float):
+        """最新の記録の実効タイムを置き換える（ペナルティの変更用）"""
+        self._remove(self._window[-1])
+        self._window[-1] = value
+        self._insert(value)
+
+    @property
+    def value(self) -> Optional[float]:
+        """平均（記録がn件未満の場合はNone、DNFが除く件数より多い場合は無限大）"""
+        if len(self._window) < self.n:
+            return None
+        if self._dnf > self.trim:
+            return DNF_TIME
+        # 上側で除く trim 件にはDNFがすべて含まれるため、有限の値だけを差し引く
+        lowest = sum(self._sorted[:self.trim])
+        highest = sum(self._sorted[self.n - self.trim:self.n - self._dnf])
+        return (self._sum - lowest - highest) / (self.n - 2 * self.trim)
@@ -0,0 +1,213 @@
+"""プロファイル（利用者）と名前付きセッション、プロファイルごとの記録のテーブル
+
+1台のタイマーを複数の利用者で使うため、通常のソルブの記録はプロファイルごとに
+別のテーブル（同じスキーマ・同じインデックス）に保存する:
+    既定のプロファイル（id 1）  results（既存の記録はそのまま既定のプロファイルの記録になる）
+    それ以外のプロファイル      results_p<id>
+統計・履歴・同期のクエリは現在のプロファイルのテーブルのみを参照するため、
+他の利用者の記録の件数に影響されない。プロファイルの切り替えは参照するテーブル名と
+セッションの変更のみで、記録の移動や読み直し以外のクエリは発生しない。
+
+セッション:
+    プロファイルごとに名前付きのセッション（"3x3 main"、"OH" など）を登録でき、
+    results.session にはセッション名を保存する。名前付きのセッションを選んでいない場合は
+    従来どおり起動時刻（YYYYMMDD_HHMMSS）のセッションに記録する。
+    プロファイルごとに最後に選んだセッションを保存し、切り替え時に再開する。
+
+テーブル名はプロファイルのidから作るため、利用者の入力がSQL文に入ることはない。
+"""
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .constants import ProfileConfig as PFC
+from .history import create_history_indexes
+
+
+def results_table_name(profile_id: int) -> str:
+    """プロファイルの記録のテーブル名"""
+    if profile_id == PFC.DEFAULT_PROFILE_ID:
+        return PFC.RESULTS_TABLE
+    return PFC.RESULTS_TABLE_FORMAT.format(int(profile_id))
+
+
+def create_results_table(db, table: str = PFC.RESULTS_TABLE):
+    """
+    記録のテーブルとインデックスを作成する（存在しない場合のみ）
+
+    Args:
+        db: Database（書き込み用の接続）
+        table: テーブル名（results_table_name の戻り値）
+    """
+    db.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT NOT NULL,
+            time_result REAL NOT NULL,
+            scramble TEXT,
+            session TEXT,
+            penalty INTEGER NOT NULL DEFAULT 0,
+            penalty_synced INTEGER
+        )
+    ''')
+    # 列がない既存のデータベースには列を追加（既存の記録はOK・未同期）
+    # penalty_synced は最後の同期でスプレッドシートと一致したペナルティ（どちらで変更されたかの判定用）
+    columns = {row[1] for row in db.fetchall(f"PRAGMA table_info({table})")}
+    if "penalty" not in columns:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN penalty INTEGER NOT NULL DEFAULT 0")
+    if "penalty_synced" not in columns:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN penalty_synced INTEGER")
+
+    # 履歴画面のセッション・日付ジャンプ用インデックス
+    create_history_indexes(db, table)
+
+
+def create_profile_tables(db):
+    """プロファイルとセッションのテーブルを作成し、既定のプロファイルを登録（存在しない場合）"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            current_session TEXT,
+            last_used_at DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS profile_sessions (
+            profile_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (profile_id, name)
+        )
+    ''')
+    db.execute("INSERT OR IGNORE INTO profiles (id, name) VALUES (?, ?)",
+               (PFC.DEFAULT_PROFILE_ID, PFC.DEFAULT_PROFILE_NAME))
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """プロファイル"""
+    id: int
+    name: str
+    current_session: Optional[str]  # 最後に選んだ名前付きセッション（Noneは起動時刻のセッション）
+
+    @property
+    def table(self) -> str:
+        """記録のテーブル名"""
+        return results_table_name(self.id)
+
+
+class ProfileStore:
+    """プロファイルとセッションのSQLite上の保存先"""
+
+    def __init__(self, logger):
+        """
+        Args:
+            logger: SpeedcubeLoggerのインスタンス（db を使用）
+        """
+        self.logger = logger
+
+    def list_profiles(self) -> List[Profile]:
+        """
+        全プロファイルを作成順で取得
+
+        Returns:
+            list: Profileのリスト（先頭は既定のプロファイル）
+        """
+        try:
+            rows = self.logger.db.fetchall("SELECT id, name, current_session FROM profiles ORDER BY id")
+        except sqlite3.Error as e:
+            print(f"DEBUG: list_profiles error: {e}")
+            return []
+        return [Profile(*row) for row in rows]
+
+    def get_profile(self, name: str) -> Optional[Profile]:
+        """名前からプロファイルを取得"""
+        try:
+            row = self.logger.db.fetchone("SELECT id, name, current_session FROM profiles WHERE name = ?", (name,))
+        except sqlite3.Error as e:
+            print(f"DEBUG: get_profile error: {e}")
+            return None
+        return Profile(*row) if row else None
+
+    def last_used(self) -> Profile:
+        """最後に使ったプロファイル（一度も切り替えていない場合は既定のプロファイル）"""
+        try:
+            row = self.logger.db.fetchone(
+                "SELECT id, name, current_session FROM profiles "
+                "ORDER BY last_used_at IS NULL, last_used_at DESC, id LIMIT 1")
+        except sqlite3.Error as e:
+            print(f"DEBUG: last_used error: {e}")
+            row = None
+        return Profile(*row) if row else Profile(PFC.DEFAULT_PROFILE_ID, PFC.DEFAULT_PROFILE_NAME, None)
+
+    def create_profile(self, name: str) -> Optional[Profile]:
+        """
+        プロファイルを作成し、記録のテーブルとインデックスを作成する（同じ名前があればそれを返す）
+
+        Args:
+            name: プロファイル名
+
+        Returns:
+            Profile: 作成した（または既存の）プロファイル、失敗した場合はNone
+        """
+        try:
+            with self.logger.db.write() as db:
+                db.execute("INSERT OR IGNORE INTO profiles (name) VALUES (?)", (name,))
+                row = db.fetchone("SELECT id, name, current_session FROM profiles WHERE name = ?", (name,))
+                profile = Profile(*row)
+                create_results_table(db, profile.table)
+            return profile
+        except sqlite3.Error as e:
+            print(f"DEBUG: プロファイルの作成に失敗: {e}")
+            return None
+
+    def list_sessions(self, profile: Profile) -> List[str]:
+        """プロファイルの名前付きセッションを登録順で取得"""
+        try:
+            rows = self.logger.db.fetchall(
+                "SELECT name FROM profile_sessions WHERE profile_id = ? ORDER BY created_at, rowid", (profile.id,))
+        except sqlite3.Error as e:
+            print(f"DEBUG: list_sessions error: {e}")
+            return []
+        return [row[0] for row in rows]
+
+    def create_session(self, profile: Profile, name: str):
+        """プロファイルに名前付きセッションを登録（登録済みの場合は何もしない）"""
+        try:
+            with self.logger.db.write() as db:
+                db.execute("INSERT OR IGNORE INTO profile_sessions (profile_id, name) VALUES (?, ?)",
+                           (profile.id, name))
+        except sqlite3.Error as e:
+            print(f"DEBUG: セッションの登録に失敗: {e}")
+
+    def set_current(self, profile: Profile, session: Optional[str]):
+        """使用中のプロファイルとセッションを保存する（次回の起動時に再開する）"""
+        try:
+            with self.logger.db.write() as db:
+                db.execute(
+                    "UPDATE profiles SET current_session = ?, "
+                    "last_used_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = ?",
+                    (session, profile.id))
+        except sqlite3.Error as e:
+            print(f"DEBUG: プロファイルの保存に失敗: {e}")
+
+    def register(self, profile_names: Sequence[str], session_names: Sequence[str]):
+        """
+        config.iniに列挙したプロファイルとセッションを登録する（登録済みのものは変更しない）
+
+        Args:
+            profile_names: プロファイル名
+            session_names: 各プロファイル（既定のプロファイルを含む）に登録するセッション名
+        """
+        try:
+            with self.logger.db.write() as db:
+                db.executemany("INSERT OR IGNORE INTO profiles (name) VALUES (?)", [(name,) for name in profile_names])
+                profile_ids = [row[0] for row in db.fetchall("SELECT id FROM profiles ORDER BY id")]
+                for profile_id in profile_ids:
+                    create_results_table(db, results_table_name(profile_id))
+                db.executemany("INSERT OR IGNORE INTO profile_sessions (profile_id, name) VALUES (?, ?)",
+                               [(profile_id, name) for profile_id in profile_ids for name in session_names])
+        except sqlite3.Error as e:
+            print(f"DEBUG: プロファイルの登録に失敗: {e}")
@@ -1,19 +1,97 @@
 """スピードキューブタイマーの描画処理を管理するクラス"""
+import math
+from itertools import islice
 import pyxel
 from .states import TimerState
-from .constants import DisplayConfig as DC, GameConfig as GC, TextConstants as TC
+from .pattern_histograms import BUCKET_EDGES
+from .text_layers import TextLayerCache
+from .font_atlas import GlyphAtlasFont, draw_text, get_atlas_paths, load_atlas_metrics
+from .patterns import get_default_data_dir
+from .penalty import format_result, format_time
+from .constants import DisplayConfig as DC, GameConfig as GC, TextConstants as TC, PatternConfig as PC, ProfileConfig as PFC
+
+# 入力や記録の変化がない限り描画内容が変わらない状態（変化がないフレームは描画を省略）
+IDLE_STATES = frozenset({
+    TimerState.READY, TimerState.STATS, TimerState.HISTORY, TimerState.PROFILE_SELECT,
+    TimerState.PATTERN_LIST_SELECT, TimerState.PATTERN_ALGORITHM_SELECT, TimerState.PATTERN_READY,
+    TimerState.PATTERN_FINISH, TimerState.PATTERN_STATS,
+})
+
+# ホールド表示の点滅がある状態
+BLINK_STATES = frozenset({TimerState.READY, TimerState.PATTERN_READY})
+
 
 class SpeedcubeRenderer:
     def __init__(self, app):
-    # フォントの初期化
-        self.middle_font = pyxel.Font(DC.MIDDLE_FONT_FILE)
-        self.large_font = pyxel.Font(DC.LARGE_FONT_FILE)
+    # フォントの初期化（グリフアトラスがあればイメージバンクから、なければBDFフォントから）
+        self.middle_font, self.large_font = self._load_fonts()
         
         # アプリケーションの参照を保持
         self.app = app
         
+        # 変化の少ないテキストの描画済みレイヤー
+        # （BDFフォントの文字列描画はレイヤーの転送と同程度に速いため、グリフアトラス使用時のみ）
+        self.layers = TextLayerCache(DC.TEXT_LAYER_CACHE and isinstance(self.middle_font, GlyphAtlasFont))
+        
+        # アイドル状態の再描画の省略
+        self.skip_idle_frames = DC.SKIP_IDLE_REDRAW
+        self._last_frame_key = None
+        self.skipped_frames = 0  # 描画を省略したフレーム数（計測用）
+        
+    def _load_fonts(self):
+        """
+        中・大のフォントを読み込む
+
+        グリフアトラス（python -m src.font_atlas で作成）をイメージバンクに読み込み、
+        アトラスにない文字を含む文字列のみBDFフォントを初回使用時に読み込んで描画する。
+        アトラスがない場合はBDFフォントを読み込む。
+
+        Returns:
+            (中フォント, 大フォント)
+        """
+        data_dir = get_default_data_dir()
+        metrics = load_atlas_metrics(data_dir)
+        if metrics is not None:
+            try:
+                image = pyxel.images[DC.GLYPH_ATLAS_IMAGE_BANK]
+                image.load(0, 0, get_atlas_paths(data_dir)[0])
+                return (
+                    GlyphAtlasFont(image, metrics["fonts"]["middle"], lambda: pyxel.Font(DC.MIDDLE_FONT_FILE)),
+                    GlyphAtlasFont(image, metrics["fonts"]["large"], lambda: pyxel.Font(DC.LARGE_FONT_FILE)),
+                )
+            except Exception as e:
+                print(f"DEBUG: グリフアトラスの読み込みに失敗。BDFフォントを使用します: {e}")
+        return pyxel.Font(DC.MIDDLE_FONT_FILE), pyxel.Font(DC.LARGE_FONT_FILE)
+
+    def _idle_frame_key(self):
+        """
+        アイドル状態の描画内容を決める値の組（アプリの属性以外の要素）
+
+        Returns:
+            tuple: 値の組（アニメーション中など毎フレーム描画が必要な場合はNone）
+        """
+        state = self.app.state
+        if not self.skip_idle_frames or state not in IDLE_STATES:
+            return None
+        if self.app.space_hold_start > 0 or self.app.s_key_hold_start > 0:
+            return None
+        blink_on = state in BLINK_STATES and self._blink_on()
+        browser = self.app.history_browser
+        return (state, blink_on, self.app.stats.revision, browser.top_id if browser is not None else None)
+
+    def _blink_on(self) -> bool:
+        """点滅表示の表示中の位相か（経過時間で判定するためフレームレートによらない）"""
+        return self.app.clock() % DC.BLINK_PERIOD < DC.BLINK_ON_DURATION
+
     def draw(self):
-        """状態に応じた描画処理"""
+        """状態に応じた描画処理（アイドル状態で変化がない場合は前フレームの画面をそのまま使う）"""
+        frame_key = self._idle_frame_key()
+        if frame_key is not None and frame_key == self._last_frame_key and not self.app.dirty:
+            self.skipped_frames += 1
+            return
+        self._last_frame_key = frame_key
+        self.app.dirty = False
+        
         # 背景を描画
         pyxel.cls(self.app.bg_color)
           # 状態に応じた描画処理
@@ -28,6 +106,10 @@ class SpeedcubeRenderer:
                 self._draw_syncing_state()
             case TimerState.STATS:
                 self._draw_stats_state()
+            case TimerState.HISTORY:
+                self._draw_history_state()
+            case TimerState.PROFILE_SELECT:
+                self._draw_profile_select_state()
             case TimerState.PATTERN_LIST_SELECT:
                 self._draw_pattern_list_select()
             case TimerState.PATTERN_ALGORITHM_SELECT:
@@ -36,6 +118,8 @@ class SpeedcubeRenderer:
                 self._draw_pattern_ready()
             case TimerState.PATTERN_FINISH:
                 self._draw_pattern_finish()
+            case TimerState.PATTERN_STATS:
+                self._draw_pattern_stats()
         
         # 共通UI要素の描画
         self._draw_common_elements()
@@ -47,17 +131,21 @@ class SpeedcubeRenderer:
         self._draw_hold_status()
         self._draw_results(self.app.stats)
         self._draw_ready_instructions()
+    
+    def _text_signature(self, *values):
+        """レイヤーのシグネチャ（表示内容を決める値 + 色）"""
+        return values + (self.app.text_color, self.app.bg_color)
 
     def _draw_countdown_state(self):
         """COUNTDOWN状態の描画"""
         # インスペクションヘッダー
         inspection_x = (DC.WINDOW_WIDTH - len(TC.INSPECTION) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(inspection_x, DC.SCRAMBLE_Y, TC.INSPECTION, self.app.text_color, self.large_font)
+        draw_text(pyxel, inspection_x, DC.SCRAMBLE_Y, TC.INSPECTION, self.app.text_color, self.large_font)
           # カウントダウン表示
-        countdown_time = GC.INSPECTION_TIME - (pyxel.frame_count - self.app.countdown_start) / DC.FPS
+        countdown_time = GC.INSPECTION_TIME - (self.app.clock() - self.app.countdown_start)
         color = DC.DEFAULT_WARNING_COLOR if countdown_time <= 4 else self.app.text_color
         time_x = (DC.WINDOW_WIDTH - len(f"{countdown_time:.1f}") * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(time_x, DC.TIMER_Y, f"{countdown_time:.1f}", color, self.large_font)
+        draw_text(pyxel, time_x, DC.TIMER_Y, f"{countdown_time:.1f}", color, self.large_font)
         
         # ホールド状態の描画
         self._draw_hold_status()
@@ -71,24 +159,24 @@ class SpeedcubeRenderer:
             # パターンモード：パターン情報を表示
             pattern_text = f"{self.app.current_pattern.name}"
             pattern_x = DC.MARGIN_X
-            pyxel.text(pattern_x, DC.SCRAMBLE_Y, pattern_text, 
-                      self.app.text_color, self.middle_font)
+            draw_text(pyxel, pattern_x, DC.SCRAMBLE_Y, pattern_text, 
+                            self.app.text_color, self.middle_font)
             
             # アルゴリズム情報を表示
             if hasattr(self.app, 'current_algorithm') and self.app.current_algorithm:
                 algo_text = f"{self.app.current_algorithm.name}: {self.app.current_algorithm.moves}"
-                pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, algo_text, 
-                          self.app.text_color, self.middle_font)
+                draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, algo_text, 
+                                self.app.text_color, self.middle_font)
         else:
             # 通常モード：停止方法表示
             press_space_x = (DC.WINDOW_WIDTH - len(TC.PRESS_SPACE) * DC.LARGE_FONT_WIDTH) // 2
-            pyxel.text(press_space_x, DC.SCRAMBLE_Y, TC.PRESS_SPACE, 
-                       self.app.text_color, self.middle_font)
+            draw_text(pyxel, press_space_x, DC.SCRAMBLE_Y, TC.PRESS_SPACE, 
+                             self.app.text_color, self.middle_font)
         
         # 経過時間表示
         time_x = (DC.WINDOW_WIDTH - len(f"{self.app.current_time:.2f}") * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(time_x, DC.TIMER_Y, f"{self.app.current_time:.2f}", 
-                   self.app.text_color, self.large_font)
+        draw_text(pyxel, time_x, DC.TIMER_Y, f"{self.app.current_time:.2f}", 
+                         self.app.text_color, self.large_font)
 
     def _draw_syncing_state(self):
         """同期中の描画処理"""
@@ -100,7 +188,8 @@ class SpeedcubeRenderer:
             success, message = self.app.sync_result
             status_text = message
               # ステータスメッセージの描画
-        pyxel.text(
+        draw_text(
+            pyxel,
             DC.WINDOW_WIDTH // 2 - len(status_text) * 2,
             DC.WINDOW_HEIGHT // 2,
             status_text,            self.app.text_color if success is None or success else self.app.warning_color
@@ -111,7 +200,7 @@ class SpeedcubeRenderer:
         # ヘッダー
         header_text = "MONTHLY STATISTICS"
         header_x = (DC.WINDOW_WIDTH - len(header_text) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        draw_text(pyxel, header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
         
         # キャッシュされた月次統計情報を使用
         if self.app.monthly_stats_cache is not None:
@@ -126,7 +215,7 @@ class SpeedcubeRenderer:
         
         # 月次ソルブ数
         solve_count_text = f"This Month Solves: {monthly_solve_count}"
-        pyxel.text(DC.MARGIN_X, y_pos, solve_count_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, solve_count_text, self.app.text_color, self.middle_font)
         y_pos += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y * 2
         
         # 月次平均時間
@@ -134,55 +223,132 @@ class SpeedcubeRenderer:
             avg_time_text = f"This Month Average: {monthly_avg_time:.2f}s"
         else:
             avg_time_text = "This Month Average: -"
-        pyxel.text(DC.MARGIN_X, y_pos, avg_time_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, avg_time_text, self.app.text_color, self.middle_font)
         y_pos += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y * 3
         
         # 現在のセッション統計
         session_stats = self.app.stats.get_stats_summary()
         session_text = f"Session Solves: {session_stats['solve_count']}"
-        pyxel.text(DC.MARGIN_X, y_pos, session_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, session_text, self.app.text_color, self.middle_font)
         y_pos += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
         
         if session_stats['best_time'] is not None:
             best_text = f"Session Best: {session_stats['best_time']:.2f}s"
         else:
             best_text = "Session Best: -"
-        pyxel.text(DC.MARGIN_X, y_pos, best_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, best_text, self.app.text_color, self.middle_font)
         y_pos += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
         
         if session_stats['session_avg'] is not None:
             session_avg_text = f"Session Average: {session_stats['session_avg']:.2f}s"
         else:
             session_avg_text = "Session Average: -"
-        pyxel.text(DC.MARGIN_X, y_pos, session_avg_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, session_avg_text, self.app.text_color, self.middle_font)
+        y_pos += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y * 3
+        
+        # 現在のプロファイルとセッション
+        logger = self.app.logger
+        profile_text = f"Profile: {logger.profile.name} / {logger.profile.current_session or 'NEW SESSION'}"
+        draw_text(pyxel, DC.MARGIN_X, y_pos, profile_text, self.app.text_color, self.middle_font)
           # 操作説明
         self._draw_instruction_text("PRESS [<-] TO BACK")
 
+    def _draw_history_state(self):
+        """履歴画面の描画（表示範囲の行のみを参照）"""
+        header_text = "HISTORY"
+        draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        
+        browser = self.app.history_browser
+        rows = browser.visible_rows(DC.HISTORY_VISIBLE_ROWS) if browser is not None else []
+        if not rows:
+            no_data_text = "NO SOLVES YET"
+            no_data_x = (DC.WINDOW_WIDTH - len(no_data_text) * DC.LARGE_FONT_WIDTH) // 2
+            draw_text(pyxel, no_data_x, DC.TIMER_Y, no_data_text, self.app.text_color, self.large_font)
+        else:
+            # 先頭行のセッションと日付
+            top = rows[0]
+            position_text = f"SESSION: {top.session or 'IMPORTED'}   DATE: {top.datetime[:10]}"
+            draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, position_text, DC.DEFAULT_WARNING_COLOR, self.middle_font)
+            
+            # セッションの境目に区切り線を引く
+            y = DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
+            previous_session = top.session
+            for row in rows:
+                if row.session != previous_session:
+                    pyxel.line(DC.MARGIN_X, y - 2, DC.WINDOW_WIDTH - DC.MARGIN_X, y - 2, DC.STATS_BAND_COLOR)
+                    previous_session = row.session
+                draw_text(pyxel, DC.MARGIN_X, y, row.text, self.app.text_color, self.middle_font)
+                y += DC.HISTORY_ROW_HEIGHT
+        
+        # 操作説明
+        self._draw_instruction_text("[UP/DOWN/PGUP/PGDN] SCROLL, [<-/->] SESSION, [D/F] DAY, [HOME] LATEST, [ESC] BACK")
+
+    def _draw_profile_select_state(self):
+        """プロファイル・セッション選択画面の描画"""
+        header_text = "PROFILE"
+        draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        
+        profiles = self.app.profile_list
+        if profiles:
+            # プロファイル一覧（選択中の行が表示範囲に入るようにスクロール）
+            max_rows = PFC.VISIBLE_PROFILES
+            selected = self.app.selected_profile_index
+            first = min(max(0, selected - max_rows // 2), max(0, len(profiles) - max_rows))
+            current_id = self.app.logger.profile.id
+            y = DC.SCRAMBLE_TEXT_Y
+            for index in range(first, min(first + max_rows, len(profiles))):
+                profile = profiles[index]
+                color = DC.DEFAULT_WARNING_COLOR if index == selected else self.app.text_color
+                marker = ">" if index == selected else " "
+                profile_text = f"{marker} {profile.name}" + ("  (IN USE)" if profile.id == current_id else "")
+                draw_text(pyxel, DC.MARGIN_X, y, profile_text, color, self.middle_font)
+                y += DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y
+            
+            # 選択中のプロファイルのセッション
+            session = self.app.profile_sessions[self.app.selected_session_index]
+            session_text = f"SESSION: < {session or 'NEW SESSION'} >"
+            y += DC.MARGIN_Y
+            draw_text(pyxel, DC.MARGIN_X, y, session_text, DC.DEFAULT_WARNING_COLOR, self.middle_font)
+        
+        # 操作説明
+        self._draw_instruction_text("[UP/DOWN] PROFILE, [<-/->] SESSION, [ENTER] SWITCH, [ESC] BACK")
+
     def _draw_ready_instructions(self):
         """READY状態での操作説明を描画"""
-        self._draw_instruction_text("PRESS [->] FOR STATS, [P] FOR PATTERN, [ESC] FOR NEW SCRAMBLE, [Q] TO QUIT")
+        self._draw_instruction_text("PRESS [->] STATS, [H] HISTORY, [U] PROFILE, [P] PATTERN, [ESC] NEW SCRAMBLE, [Q] QUIT")
 
-    def _draw_instruction_text(self, text: str):
+    def _draw_instruction_text(self, text: str, canvas=None):
         """指示テキストを画面下部に描画する共通メソッド
         
         Args:
             text: 表示するテキスト
+            canvas: 描画先のレイヤー（Noneの場合は指示テキスト用のレイヤーを経由して画面に描画）
         """
         # 画面下部中央に配置
         instruction_x = DC.MARGIN_X
         instruction_y = DC.WINDOW_HEIGHT - DC.SMALL_FONT_HEIGHT
-        pyxel.text(instruction_x, instruction_y, text, self.app.text_color)
+        if canvas is not None:
+            draw_text(canvas, instruction_x, instruction_y, text, self.app.text_color)
+            return
+        self.layers.blit(
+            "instruction", 0, instruction_y, DC.WINDOW_WIDTH, DC.SMALL_FONT_HEIGHT, self.app.bg_color,
+            self._text_signature(text),
+            lambda canvas: draw_text(canvas, instruction_x, 0, text, self.app.text_color))
 
     def _draw_common_elements(self):
         """共通UI要素の描画処理"""
         pass  # 共通要素が必要になったらここに追加
 
     def _draw_scramble(self, scramble: str):
-        """スクランブルの描画"""
-        pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_Y, TC.SCRAMBLE, 
-                  self.app.text_color, self.middle_font)
-        pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, scramble, 
-                  self.app.text_color, self.middle_font)
+        """スクランブルの描画（スクランブルが変わった場合のみレイヤーを描き直す）"""
+        def render(canvas):
+            draw_text(canvas, DC.MARGIN_X, DC.SCRAMBLE_Y, TC.SCRAMBLE, 
+                              self.app.text_color, self.middle_font)
+            draw_text(canvas, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, scramble, 
+                              self.app.text_color, self.middle_font)
+        height = DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT
+        self.layers.blit("scramble", 0, 0, DC.WINDOW_WIDTH, height, self.app.bg_color,
+                         self._text_signature(scramble), render)
 
     def _draw_hold_status(self):
         """ホールド状態の描画"""
@@ -197,63 +363,70 @@ class SpeedcubeRenderer:
     def _draw_hold_text(self):
         # ホールド指示テキストの表示
         hold_x = (DC.WINDOW_WIDTH - len(TC.HOLD_INSTRUCTION) * DC.LARGE_FONT_WIDTH) // 2
-        if self.app.space_hold_start > 0 or pyxel.frame_count % DC.BLINK_CYCLE < DC.BLINK_ON_TIME:
-            pyxel.text(hold_x, DC.TIMER_Y, TC.HOLD_INSTRUCTION, 
-                       self.app.text_color, self.large_font)
+        if self.app.space_hold_start > 0 or self._blink_on():
+            self.layers.blit(
+                "hold_text", 0, DC.TIMER_Y, DC.WINDOW_WIDTH, DC.LARGE_FONT_HEIGHT, self.app.bg_color,
+                self._text_signature(),
+                lambda canvas: draw_text(canvas, hold_x, 0, TC.HOLD_INSTRUCTION, self.app.text_color, self.large_font))
 
     def _draw_hold_time(self):
         """ホールド時間の描画"""
-        hold_time = (pyxel.frame_count - self.app.space_hold_start) / DC.FPS
+        hold_time = self.app.clock() - self.app.space_hold_start
         hold_text = TC.HOLD_FORMAT.format(hold_time)
         hold_x = (DC.WINDOW_WIDTH - len(hold_text) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(hold_x, DC.RESULTS_Y, hold_text, 
-                   self.app.text_color, self.middle_font)
+        draw_text(pyxel, hold_x, DC.RESULTS_Y, hold_text, 
+                         self.app.text_color, self.middle_font)
 
     def _draw_results(self, stats):
-        """記録表示の共通処理"""
+        """記録表示の共通処理（統計が更新された場合のみレイヤーを描き直す）"""
         if not stats.session_results:
             return
         
-        self._draw_recent_results(stats)
-        self._draw_averages(stats)
+        def render(canvas):
+            self._draw_recent_results(stats, canvas)
+            self._draw_averages(stats, canvas)
+        # 記録の表示範囲（RESULTS_Yから操作説明の上まで）
+        height = DC.WINDOW_HEIGHT - DC.SMALL_FONT_HEIGHT - DC.RESULTS_Y
+        self.layers.blit("results", 0, DC.RESULTS_Y, DC.WINDOW_WIDTH, height, self.app.bg_color,
+                         self._text_signature(stats.revision), render)
 
-    def _draw_recent_results(self, stats):
-        """直近の記録表示"""
-        pyxel.text(DC.MARGIN_X, DC.RESULTS_Y, TC.RECENT, 
-                   self.app.text_color, self.middle_font)
-        next_result_y = DC.RESULTS_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
-        
-        # session_resultsの形式は(scramble, time_result, id)のリスト
-        for solve_id, time_result, _, _ in stats.session_results[:5]:
-            result_text = TC.SOLVE_FORMAT.format(solve_id, time_result)
-            pyxel.text(DC.MARGIN_X, next_result_y, result_text, 
-                       self.app.text_color, self.middle_font)
+    def _draw_recent_results(self, stats, canvas):
+        """直近の記録表示（RESULTS_Yを原点とした座標で描画）"""
+        draw_text(canvas, DC.MARGIN_X, 0, TC.RECENT, 
+                          self.app.text_color, self.middle_font)
+        next_result_y = DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
+        
+        # session_resultsの形式は(番号, タイム, スクランブル, セッションID, ペナルティ)のリスト（新しい順）
+        for solve_id, time_result, _, _, penalty in islice(stats.session_results, 5):
+            result_text = TC.SOLVE_FORMAT.format(solve_id, format_result(time_result, penalty))
+            draw_text(canvas, DC.MARGIN_X, next_result_y, result_text, 
+                              self.app.text_color, self.middle_font)
             next_result_y += DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
 
-    def _draw_averages(self, stats):
-        """平均値の表示"""
+    def _draw_averages(self, stats, canvas):
+        """平均値の表示（RESULTS_Yを原点とした座標で描画）"""
         # statsクラスから直接統計情報を取得
         ao5 = stats.ao5
         ao12 = stats.ao12
         
-        ao5_text = TC.AO5_FORMAT.format(ao5) if ao5 else TC.AO_EMPTY.format("AO5")
-        ao12_text = TC.AO12_FORMAT.format(ao12) if ao12 else TC.AO_EMPTY.format("AO12")
+        ao5_text = TC.AO5_FORMAT.format(format_time(ao5)) if ao5 else TC.AO_EMPTY.format("AO5")
+        ao12_text = TC.AO12_FORMAT.format(format_time(ao12)) if ao12 else TC.AO_EMPTY.format("AO12")
         
         stats_x = DC.WINDOW_WIDTH // 2 + DC.MARGIN_X // 2
-        pyxel.text(stats_x, DC.RESULTS_Y, TC.AVERAGE, 
-                   self.app.text_color, self.middle_font)
-        ao5_y = DC.RESULTS_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
+        draw_text(canvas, stats_x, 0, TC.AVERAGE, 
+                          self.app.text_color, self.middle_font)
+        ao5_y = DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
         ao12_y = ao5_y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
-        pyxel.text(stats_x, ao5_y, ao5_text, 
-                   self.app.text_color, self.middle_font)
-        pyxel.text(stats_x, ao12_y, ao12_text, 
-                   self.app.text_color, self.middle_font)
+        draw_text(canvas, stats_x, ao5_y, ao5_text, 
+                          self.app.text_color, self.middle_font)
+        draw_text(canvas, stats_x, ao12_y, ao12_text, 
+                          self.app.text_color, self.middle_font)
 
     def _draw_quit_message(self):
         """終了メッセージの描画"""
         quit_x = DC.WINDOW_WIDTH - len(TC.QUIT) * DC.SMALL_FONT_WIDTH - DC.MARGIN_X
         quit_y = DC.WINDOW_HEIGHT - DC.SMALL_FONT_HEIGHT
-        pyxel.text(quit_x, quit_y, TC.QUIT, self.app.text_color)
+        draw_text(pyxel, quit_x, quit_y, TC.QUIT, self.app.text_color)
 
     def _draw_progress_circle(self):
         """ホールド進捗を示す円を描画"""
@@ -265,7 +438,7 @@ class SpeedcubeRenderer:
         center_y = DC.WINDOW_HEIGHT // 2
         
         # ホールド時間に基づいて円の半径を計算
-        hold_time = (pyxel.frame_count - self.app.space_hold_start) / DC.FPS
+        hold_time = self.app.clock() - self.app.space_hold_start
         max_radius = min(DC.WINDOW_WIDTH, DC.WINDOW_HEIGHT) // 2
         radius = min(int(hold_time * 100), max_radius)
         
@@ -278,7 +451,7 @@ class SpeedcubeRenderer:
             return
         
         # ホールド時間を計算
-        hold_time = (pyxel.frame_count - self.app.s_key_hold_start) / DC.FPS
+        hold_time = self.app.clock() - self.app.s_key_hold_start
         
         # 矢印の基本パラメータ
         arrow_width = DC.WINDOW_WIDTH // 2  # 矢印の幅
@@ -319,49 +492,50 @@ class SpeedcubeRenderer:
     
     def _draw_pattern_list_select(self):
         """パターン一覧選択画面の描画"""
-        # ヘッダー
-        header_text = "PATTERN PRACTICE"
-        header_x = (DC.WINDOW_WIDTH - len(header_text) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
-        
-        # カテゴリタブの表示（RAND/PLL/OLL）
-        tab_y = DC.SCRAMBLE_Y + DC.LARGE_FONT_HEIGHT + DC.FONT_SPACING_Y
-        tab_x = DC.MARGIN_X
-        
-        categories = self.app.pattern_db.get_available_categories()  # [OLL, PLL]
-        
-        # RANDタブ（最初）
-        rand_color = DC.DEFAULT_WARNING_COLOR if self.app.selected_category_tab == 0 else self.app.text_color
-        rand_tab_text = "[RAND]"
-        pyxel.text(tab_x, tab_y, rand_tab_text, rand_color, self.middle_font)
-        tab_x += len(rand_tab_text) * DC.MIDDLE_FONT_WIDTH + DC.MARGIN_X
-        
-        # PLLタブ（2番目）
-        pll_color = DC.DEFAULT_WARNING_COLOR if self.app.selected_category_tab == 1 else self.app.text_color
-        pll_count = self.app.pattern_db.get_category_count(categories[1])  # PLL
-        pll_tab_text = f"[{categories[1].value}:{pll_count}]"
-        pyxel.text(tab_x, tab_y, pll_tab_text, pll_color, self.middle_font)
-        tab_x += len(pll_tab_text) * DC.MIDDLE_FONT_WIDTH + DC.MARGIN_X
-        
-        # OLLタブ（3番目）
-        oll_color = DC.DEFAULT_WARNING_COLOR if self.app.selected_category_tab == 2 else self.app.text_color
-        oll_count = self.app.pattern_db.get_category_count(categories[0])  # OLL
-        oll_tab_text = f"[{categories[0].value}:{oll_count}]"
-        pyxel.text(tab_x, tab_y, oll_tab_text, oll_color, self.middle_font)
-        
-        # RANDタブ選択時は専用UIを表示
+        # RANDタブ選択時は専用UIを表示（選択方式・セットの進捗で変わるため直接描画）
         if self.app.selected_category_tab == 0:
+            tab_y = self._draw_pattern_list_header(pyxel)
             self._draw_rand_tab_content(tab_y)
             return
         
-        # パターンデータベースから選択されたカテゴリのパターンを取得
-        if not hasattr(self.app, 'pattern_db'):
-            return
+        # カテゴリタブは表示範囲・選択・記録が変わった場合のみレイヤーを描き直す
+        signature = self._text_signature(
+            self.app.selected_category_tab, self.app.selected_subset, self.app.selected_pattern_index,
+            self.app.pattern_list_scroll_offset, self.app.stats.revision)
+        self.layers.blit("pattern_list", 0, 0, DC.WINDOW_WIDTH, DC.WINDOW_HEIGHT, self.app.bg_color,
+                         signature, self._render_pattern_list)
+    
+    def _draw_pattern_list_header(self, canvas):
+        """
+        パターン一覧のヘッダーとカテゴリタブを描画
+        
+        Returns:
+            int: タブのY座標
+        """
+        # ヘッダー
+        header_text = "PATTERN PRACTICE"
+        header_x = (DC.WINDOW_WIDTH - len(header_text) * DC.LARGE_FONT_WIDTH) // 2
+        draw_text(canvas, header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
         
-        # selected_category_tab: 0=RAND, 1=PLL, 2=OLL
-        category_index = 2 - self.app.selected_category_tab  # 1->1(PLL), 2->0(OLL)
-        selected_category = categories[category_index]
-        patterns = self.app.pattern_db.get_patterns_by_category(selected_category)
+        # カテゴリタブの表示（RAND + データが存在するカテゴリ）
+        tab_y = DC.SCRAMBLE_Y + DC.LARGE_FONT_HEIGHT + DC.FONT_SPACING_Y
+        category_tabs = self.app.pattern_db.get_category_tabs()
+        tab_texts = ["[RAND]"] + [
+            f"[{category.value}:{self.app.pattern_db.get_category_count(category)}]" for category in category_tabs
+        ]
+        self._draw_tabs(canvas, tab_y, tab_texts, self.app.selected_category_tab)
+        return tab_y
+    
+    def _render_pattern_list(self, canvas):
+        """カテゴリタブのパターン一覧をレイヤーに描画"""
+        tab_y = self._draw_pattern_list_header(canvas)
+        category_tabs = self.app.pattern_db.get_category_tabs()
+        
+        # selected_category_tab: 0=RAND, 1以降=get_category_tabs()の順
+        selected_category = category_tabs[self.app.selected_category_tab - 1]
+        subset = self.app.selected_subset
+        has_subsets = bool(self.app.pattern_db.get_subsets(selected_category))
+        pattern_count = self.app.pattern_db.get_category_count(selected_category, subset)
         selected_index = getattr(self.app, 'selected_pattern_index', 0)
         scroll_offset = getattr(self.app, 'pattern_list_scroll_offset', 0)
         
@@ -374,32 +548,35 @@ class SpeedcubeRenderer:
         item_height = DC.MIDDLE_FONT_HEIGHT * 2 + DC.FONT_SPACING_Y * 2
         max_visible_items = available_height // item_height
         
-        # 表示範囲を計算
+        # 表示範囲を計算（表示範囲のパターンのみ取得する）
         start_index = scroll_offset
-        end_index = min(start_index + max_visible_items, len(patterns))
+        end_index = min(start_index + max_visible_items, pattern_count)
+        visible_patterns = self.app.pattern_db.get_patterns_page(
+            selected_category, start_index, end_index - start_index, subset)
+        
+        # 表示するパターンの統計と選択中のアルゴリズムはまとめて取得する（1行ごとにクエリを発行しない）
+        summaries = self.app.stats.get_pattern_summaries([pattern.id for pattern in visible_patterns])
+        selected_algorithms = self.app.stats.get_user_selected_algorithms()
         
         # パターン一覧を描画
         y_pos = start_y
-        for i in range(start_index, end_index):
-            pattern = patterns[i]
+        for i, pattern in enumerate(visible_patterns, start_index):
             
             # 選択中のパターンをハイライト
             color = DC.DEFAULT_WARNING_COLOR if i == selected_index else self.app.text_color
             
             # 統計情報を取得
-            count = self.app.stats.get_pattern_count(pattern.id)
-            best = self.app.stats.get_pattern_best(pattern.id)
+            count, best = summaries.get(pattern.id, (0, None))
             best_text = f"{best:.2f}s" if best is not None else "---"
             
             # パターン名と統計を1行で表示
             pattern_text = f"{i + 1}. {pattern.name}  ×{count}  {best_text}"
-            pyxel.text(DC.MARGIN_X, y_pos, pattern_text, color, self.middle_font)
+            draw_text(canvas, DC.MARGIN_X, y_pos, pattern_text, color, self.middle_font)
             
             # 現在選択されているアルゴリズムを表示
-            selected_algo_id = self.app.stats.get_user_selected_algorithm(pattern.id)
+            selected_algo_id = selected_algorithms.get(pattern.id)
             if selected_algo_id:
-                algorithms = self.app.pattern_db.get_algorithms_for_pattern(pattern.id)
-                selected_algo = next((a for a in algorithms if a.id == selected_algo_id), None)
+                selected_algo = self.app.pattern_db.get_pattern_algorithm(pattern.id, selected_algo_id)
                 if selected_algo:
                     algo_text = f"  ({selected_algo.name})"
                 else:
@@ -409,20 +586,58 @@ class SpeedcubeRenderer:
                 default_algo = self.app.pattern_db.get_default_algorithm(pattern.id)
                 algo_text = f"  ({default_algo.name if default_algo else 'None'})"
             
-            pyxel.text(DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT + 2, 
-                      algo_text, color, None)
+            draw_text(canvas, DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT + 2, 
+                              algo_text, color, None)
             
             y_pos += item_height
         
         # スクロールインジケータ（必要な場合）
-        if len(patterns) > max_visible_items:
-            indicator_text = f"({start_index + 1}-{end_index}/{len(patterns)})"
+        indicator_y = start_y - DC.SMALL_FONT_HEIGHT - 2
+        if pattern_count > max_visible_items:
+            indicator_text = f"({start_index + 1}-{end_index}/{pattern_count})"
             indicator_x = DC.WINDOW_WIDTH - len(indicator_text) * DC.SMALL_FONT_WIDTH - DC.MARGIN_X
-            indicator_y = start_y - DC.SMALL_FONT_HEIGHT - 2
-            pyxel.text(indicator_x, indicator_y, indicator_text, self.app.text_color)
+            draw_text(canvas, indicator_x, indicator_y, indicator_text, self.app.text_color)
+        
+        # サブセット（サブセットを持つカテゴリのみ）
+        if has_subsets:
+            draw_text(canvas, DC.MARGIN_X, indicator_y, f"SUBSET: {subset or 'ALL'}", DC.DEFAULT_WARNING_COLOR)
         
         # 操作説明
-        self._draw_instruction_text("PRESS [TAB] TO SWITCH CATEGORY, [ENTER] TO START, [A] TO CHANGE, [ESC] TO BACK")
+        if has_subsets:
+            self._draw_instruction_text("[TAB] CATEGORY, [S] SUBSET, [ENTER] START, [A] CHANGE, [I] STATS, [ESC] BACK", canvas)
+        else:
+            self._draw_instruction_text("[TAB] CATEGORY, [ENTER] START, [A] CHANGE ALGORITHM, [I] STATS, [ESC] BACK", canvas)
+    
+    def _draw_tabs(self, canvas, tab_y, tab_texts, selected_tab):
+        """
+        タブを横一列に描画する
+        
+        画面幅に収まらない場合は、選択中のタブが見える位置から描画する。
+        
+        Args:
+            canvas: 描画先（pyxel またはレイヤーのイメージ）
+            tab_y: 描画位置のY座標
+            tab_texts: タブの表示テキスト
+            selected_tab: 選択中のタブのインデックス
+        """
+        widths = [len(text) * DC.MIDDLE_FONT_WIDTH + DC.MARGIN_X for text in tab_texts]
+        available_width = DC.WINDOW_WIDTH - DC.MARGIN_X
+        
+        # 選択中のタブが右端に収まるように先頭のタブを決める
+        first_tab = 0
+        while sum(widths[first_tab:selected_tab + 1]) > available_width and first_tab < selected_tab:
+            first_tab += 1
+        
+        tab_x = DC.MARGIN_X
+        if first_tab > 0:
+            draw_text(canvas, 0, tab_y, "<", self.app.text_color, self.middle_font)
+        for i in range(first_tab, len(tab_texts)):
+            if tab_x + widths[i] - DC.MARGIN_X > DC.WINDOW_WIDTH:
+                draw_text(canvas, DC.WINDOW_WIDTH - DC.MIDDLE_FONT_WIDTH, tab_y, ">", self.app.text_color, self.middle_font)
+                break
+            color = DC.DEFAULT_WARNING_COLOR if i == selected_tab else self.app.text_color
+            draw_text(canvas, tab_x, tab_y, tab_texts[i], color, self.middle_font)
+            tab_x += widths[i]
     
     def _draw_rand_tab_content(self, tab_y):
         """RANDタブのコンテンツを描画"""
@@ -431,24 +646,25 @@ class SpeedcubeRenderer:
         # タイトル
         title_text = "RANDOM PRACTICE MODE"
         title_x = (DC.WINDOW_WIDTH - len(title_text) * DC.MIDDLE_FONT_WIDTH) // 2
-        pyxel.text(title_x, start_y, title_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, title_x, start_y, title_text, self.app.text_color, self.middle_font)
         
         # カテゴリ選択
         category_y = start_y + DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y * 3
         
-        categories = ["OLL", "PLL", "ALL"]
+        available_categories = self.app.pattern_db.get_available_categories()
+        categories = [category.name for category in available_categories] + ["ALL"]
+        if self.app.random_strategy == "set":
+            # 練習セット一覧（カテゴリ一覧と同じ行数の範囲をスクロール表示）
+            self._draw_set_list(category_y, len(categories))
+            categories = []
         for i, cat in enumerate(categories):
             color = DC.DEFAULT_WARNING_COLOR if cat == self.app.random_category else self.app.text_color
             
             # カテゴリごとの件数を表示
-            if cat == "OLL":
-                from .patterns import PatternCategory
-                count = self.app.pattern_db.get_category_count(PatternCategory.OLL)
-            elif cat == "PLL":
-                from .patterns import PatternCategory
-                count = self.app.pattern_db.get_category_count(PatternCategory.PLL)
-            else:  # ALL
+            if cat == "ALL":
                 count = self.app.pattern_db.get_pattern_count()
+            else:
+                count = self.app.pattern_db.get_category_count(available_categories[i])
             
             cat_text = f"{cat} ({count} patterns)"
             cat_x = (DC.WINDOW_WIDTH - len(cat_text) * DC.MIDDLE_FONT_WIDTH) // 2
@@ -457,37 +673,86 @@ class SpeedcubeRenderer:
             # 選択中のカテゴリにマーカーを表示
             if cat == self.app.random_category:
                 marker_x = cat_x - DC.MIDDLE_FONT_WIDTH * 2
-                pyxel.text(marker_x, y, ">", color, self.middle_font)
+                draw_text(pyxel, marker_x, y, ">", color, self.middle_font)
             
-            pyxel.text(cat_x, y, cat_text, color, self.middle_font)
+            draw_text(pyxel, cat_x, y, cat_text, color, self.middle_font)
+        
+        # 選択方式
+        rows = len(available_categories) + 1
+        strategy_y = category_y + rows * (DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y) + DC.MARGIN_Y
+        strategy_name = {"spaced": "SPACED REPETITION", "weighted": "WEIGHTED",
+                         "set": "PRACTICE SET"}.get(self.app.random_strategy, "UNIFORM")
+        strategy_text = f"< MODE: {strategy_name} >"
+        strategy_x = (DC.WINDOW_WIDTH - len(strategy_text) * DC.MIDDLE_FONT_WIDTH) // 2
+        draw_text(pyxel, strategy_x, strategy_y, strategy_text, DC.DEFAULT_WARNING_COLOR, self.middle_font)
         
         # 説明テキスト
-        info_y = category_y + len(categories) * (DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y) + DC.MARGIN_Y * 2
-        info_text = "Select category and press ENTER to start"
+        info_y = strategy_y + DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y * 2
+        if self.app.random_strategy == "set":
+            info_text = "Select set and press ENTER to start or resume"
+        else:
+            info_text = "Select category and press ENTER to start"
         info_x = (DC.WINDOW_WIDTH - len(info_text) * 5) // 2  # 小さいフォント想定
-        pyxel.text(info_x, info_y, info_text, self.app.text_color)
+        draw_text(pyxel, info_x, info_y, info_text, self.app.text_color)
         
-        # 重複回避の説明
+        # 選択方式の説明
         note_y = info_y + DC.SMALL_FONT_HEIGHT + DC.MARGIN_Y
-        note_text = "* Last 5 patterns will be avoided"
+        if self.app.random_strategy == "spaced":
+            note_text = "* Slow, inconsistent and low-rated cases come back sooner"
+        elif self.app.random_strategy == "weighted":
+            note_text = "* Slow, difficult and low-rated cases are drawn more often"
+        elif self.app.random_strategy == "set":
+            note_text = "* Each pattern once in shuffled order, progress is saved"
+        else:
+            note_text = f"* Last {PC.RANDOM_RECENT_LIMIT} patterns will be avoided"
         note_x = (DC.WINDOW_WIDTH - len(note_text) * 5) // 2
-        pyxel.text(note_x, note_y, note_text, self.app.text_color)
+        draw_text(pyxel, note_x, note_y, note_text, self.app.text_color)
         
         # 操作説明
-        self._draw_instruction_text("PRESS [UP/DOWN] TO SELECT, [ENTER] TO START, [TAB] TO SWITCH TAB, [ESC] TO BACK")
+        self._draw_instruction_text("[UP/DOWN] CATEGORY, [LEFT/RIGHT] MODE, [ENTER] START, [TAB] TAB, [ESC] BACK")
+    
+    def _draw_set_list(self, list_y, max_rows):
+        """RANDタブの練習セット一覧を描画"""
+        sets, progress = self.app.practice_sets or ([], {})
+        if not sets:
+            return
+        selected = self.app.selected_set_index % len(sets)
+        first = min(max(0, selected - max_rows // 2), max(0, len(sets) - max_rows))
+        for row, pattern_set in enumerate(sets[first:first + max_rows]):
+            index = first + row
+            color = DC.DEFAULT_WARNING_COLOR if index == selected else self.app.text_color
+            if pattern_set.id in progress:
+                done, total = progress[pattern_set.id]
+                set_text = f"{pattern_set.name} ({done}/{total} done)"
+            elif pattern_set.kind == "weak":
+                set_text = f"{pattern_set.name} (slowest {PC.WEAK_SET_SIZE})"
+            else:
+                set_text = f"{pattern_set.name} ({len(pattern_set.pattern_ids)} patterns)"
+            set_x = (DC.WINDOW_WIDTH - len(set_text) * DC.MIDDLE_FONT_WIDTH) // 2
+            y = list_y + row * (DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y)
+            if index == selected:
+                draw_text(pyxel, set_x - DC.MIDDLE_FONT_WIDTH * 2, y, ">", color, self.middle_font)
+            draw_text(pyxel, set_x, y, set_text, color, self.middle_font)
+        
+        # 表示範囲外にセットがある場合のマーカー
+        if first > 0:
+            draw_text(pyxel, DC.WINDOW_WIDTH - DC.MARGIN_X - DC.MIDDLE_FONT_WIDTH, list_y, "^", self.app.text_color, self.middle_font)
+        if first + max_rows < len(sets):
+            last_y = list_y + (max_rows - 1) * (DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y)
+            draw_text(pyxel, DC.WINDOW_WIDTH - DC.MARGIN_X - DC.MIDDLE_FONT_WIDTH, last_y, "v", self.app.text_color, self.middle_font)
     
     def _draw_algorithm_select(self):
         """アルゴリズム選択画面の描画"""
         # ヘッダー
         header_text = "SELECT ALGORITHM"
         header_x = (DC.WINDOW_WIDTH - len(header_text) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        draw_text(pyxel, header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
         
         # 現在のパターン名
         if hasattr(self.app, 'current_pattern') and self.app.current_pattern:
             pattern_text = f"Pattern: {self.app.current_pattern.name}"
-            pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, pattern_text, 
-                      self.app.text_color, self.middle_font)
+            draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, pattern_text, 
+                            self.app.text_color, self.middle_font)
         
         # アルゴリズム一覧
         y_pos = DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y * 2
@@ -495,26 +760,28 @@ class SpeedcubeRenderer:
         if hasattr(self.app, 'available_algorithms'):
             algorithms = self.app.available_algorithms
             selected_index = getattr(self.app, 'selected_algorithm_index', 0)
+            ratings = self.app.stats.get_algorithm_ratings()  # 評価は1回のクエリでまとめて取得
             
             for i, algo in enumerate(algorithms):
                 # 選択中のアルゴリズムをハイライト
                 color = DC.DEFAULT_WARNING_COLOR if i == selected_index else self.app.text_color
                 
-                # アルゴリズム名
-                algo_text = f"{i + 1}. {algo.name}"
-                pyxel.text(DC.MARGIN_X, y_pos, algo_text, color, self.middle_font)
+                # アルゴリズム名と手数
+                moves = algo.compiled_moves
+                algo_text = f"{i + 1}. {algo.name}  ({moves.htm()} HTM / {moves.stm()} STM)"
+                draw_text(pyxel, DC.MARGIN_X, y_pos, algo_text, color, self.middle_font)
                 
                 # 手順（長い場合は省略）
                 moves_text = algo.moves if len(algo.moves) < 40 else algo.moves[:37] + "..."
-                pyxel.text(DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT + 2, 
-                          moves_text, color, None)
+                draw_text(pyxel, DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT + 2, 
+                                moves_text, color, None)
                 
                 # 評価があれば表示
-                rating, notes = self.app.stats.get_algorithm_rating(algo.id)
+                rating = ratings.get(algo.id)
                 if rating:
                     rating_text = f"  Rating: {'★' * rating}"
-                    pyxel.text(DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT * 2 + 4, 
-                              rating_text, color, None)
+                    draw_text(pyxel, DC.MARGIN_X + 10, y_pos + DC.MIDDLE_FONT_HEIGHT * 2 + 4, 
+                                    rating_text, color, None)
                     y_pos += DC.MIDDLE_FONT_HEIGHT * 3 + DC.FONT_SPACING_Y
                 else:
                     y_pos += DC.MIDDLE_FONT_HEIGHT * 2 + DC.FONT_SPACING_Y * 2
@@ -528,18 +795,19 @@ class SpeedcubeRenderer:
         if hasattr(self.app, 'current_pattern') and self.app.current_pattern:
             # パターン名
             pattern_text = f"Pattern: {self.app.current_pattern.name}"
-            pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_Y, pattern_text, 
-                      self.app.text_color, self.large_font)
+            draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_Y, pattern_text, 
+                            self.app.text_color, self.large_font)
             
             # アルゴリズム情報
             if hasattr(self.app, 'current_algorithm') and self.app.current_algorithm:
-                algo_text = f"Algorithm: {self.app.current_algorithm.name}"
-                pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, 
-                          algo_text, self.app.text_color, self.middle_font)
+                moves = self.app.current_algorithm.compiled_moves
+                algo_text = f"Algorithm: {self.app.current_algorithm.name}  ({moves.htm()} HTM / {moves.stm()} STM)"
+                draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, 
+                                algo_text, self.app.text_color, self.middle_font)
                 
                 moves_text = f"{self.app.current_algorithm.moves}"
-                pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y, 
-                          moves_text, self.app.text_color, self.middle_font)
+                draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y, 
+                                moves_text, self.app.text_color, self.middle_font)
         
         # ホールド指示
         self._draw_hold_text()
@@ -557,19 +825,19 @@ class SpeedcubeRenderer:
         # 結果表示
         header_text = "PRACTICE COMPLETE!"
         header_x = (DC.WINDOW_WIDTH - len(header_text) * DC.LARGE_FONT_WIDTH) // 2
-        pyxel.text(header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        draw_text(pyxel, header_x, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
         
         # パターン情報
         if hasattr(self.app, 'current_pattern') and self.app.current_pattern:
             pattern_text = f"Pattern: {self.app.current_pattern.name}"
-            pyxel.text(DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, pattern_text, 
-                      self.app.text_color, self.middle_font)
+            draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, pattern_text, 
+                            self.app.text_color, self.middle_font)
         
         # タイム表示
         if hasattr(self.app, 'pattern_result_time'):
             time_text = f"Time: {self.app.pattern_result_time:.2f}s"
             time_x = (DC.WINDOW_WIDTH - len(time_text) * DC.LARGE_FONT_WIDTH) // 2
-            pyxel.text(time_x, DC.TIMER_Y, time_text, self.app.text_color, self.large_font)
+            draw_text(pyxel, time_x, DC.TIMER_Y, time_text, self.app.text_color, self.large_font)
         
         # ベストタイム表示
         if hasattr(self.app, 'current_pattern'):
@@ -578,19 +846,129 @@ class SpeedcubeRenderer:
                 best_text = f"Best: {best_time:.2f}s"
             else:
                 best_text = "Best: -"
-            pyxel.text(DC.MARGIN_X, DC.RESULTS_Y, best_text, 
-                      self.app.text_color, self.middle_font)
+            draw_text(pyxel, DC.MARGIN_X, DC.RESULTS_Y, best_text, 
+                            self.app.text_color, self.middle_font)
+        
+        # 練習セットの進捗
+        run = self.app.practice_set_run
+        if self.app.random_mode and self.app.random_strategy == "set" and run:
+            set_text = f"SET: {min(run.position, len(run.queue))}/{len(run.queue)}"
+            set_x = DC.WINDOW_WIDTH - DC.MARGIN_X - len(set_text) * DC.MIDDLE_FONT_WIDTH
+            draw_text(pyxel, set_x, DC.RESULTS_Y, set_text, self.app.text_color, self.middle_font)
         
         # 評価入力UI
         y_pos = DC.RESULTS_Y + DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y * 2
         rating_text = "Rate this algorithm (1-5):"
-        pyxel.text(DC.MARGIN_X, y_pos, rating_text, self.app.text_color, self.middle_font)
+        draw_text(pyxel, DC.MARGIN_X, y_pos, rating_text, self.app.text_color, self.middle_font)
         
         # 評価の星表示
         if hasattr(self.app, 'pending_rating'):
             stars = '★' * self.app.pending_rating + '☆' * (5 - self.app.pending_rating)
-            pyxel.text(DC.MARGIN_X, y_pos + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y, 
-                      stars, DC.DEFAULT_WARNING_COLOR, self.large_font)
+            draw_text(pyxel, DC.MARGIN_X, y_pos + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y, 
+                            stars, DC.DEFAULT_WARNING_COLOR, self.large_font)
+        
+        # 操作説明
+        self._draw_instruction_text("SPACE/ENTER: Continue  R: Retry  ESC: Back (Auto-saved)")
+    
+    def _draw_pattern_stats(self):
+        """パターン統計画面の描画（事前集計したタイム分布のみを参照）"""
+        pattern_ids = self.app.stats_pattern_ids
+        if not pattern_ids or self.app.pattern_histograms is None:
+            return
+        pattern = self.app.pattern_db.get_pattern(pattern_ids[self.app.stats_pattern_index])
+        if pattern is None:
+            return
+        
+        # 集計対象（0: 全アルゴリズム, 1以降: 各アルゴリズム）
+        algorithms = self.app.pattern_db.get_algorithms_for_pattern(pattern.id)
+        algorithm = None
+        if 0 < self.app.stats_algorithm_index <= len(algorithms):
+            algorithm = algorithms[self.app.stats_algorithm_index - 1]
+        distribution = self.app.pattern_histograms.get(pattern.id, algorithm.id if algorithm else None)
+        
+        # ヘッダー
+        header_text = f"{pattern.name}  ({self.app.stats_pattern_index + 1}/{len(pattern_ids)})"
+        draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_Y, header_text, self.app.text_color, self.large_font)
+        scope_text = f"ALGORITHM: {algorithm.name if algorithm else 'ALL'}"
+        draw_text(pyxel, DC.MARGIN_X, DC.SCRAMBLE_TEXT_Y, scope_text, DC.DEFAULT_WARNING_COLOR, self.middle_font)
+        
+        if distribution is None or distribution.count == 0:
+            no_data_text = "NO SOLVES YET"
+            no_data_x = (DC.WINDOW_WIDTH - len(no_data_text) * DC.LARGE_FONT_WIDTH) // 2
+            draw_text(pyxel, no_data_x, DC.TIMER_Y, no_data_text, self.app.text_color, self.large_font)
+        else:
+            # 概要とパーセンタイル
+            summary_y = DC.SCRAMBLE_TEXT_Y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
+            summary_text = (f"Solves: {distribution.count}  Best: {distribution.best:.2f}s  "
+                            f"Mean: {distribution.mean:.2f}s")
+            draw_text(pyxel, DC.MARGIN_X, summary_y, summary_text, self.app.text_color, self.middle_font)
+            p10, p25, p50, p75, p90 = distribution.percentiles()
+            percentile_y = summary_y + DC.MIDDLE_FONT_HEIGHT + DC.FONT_SPACING_Y
+            percentile_text = f"P10 {p10:.2f}  P25 {p25:.2f}  MEDIAN {p50:.2f}  P75 {p75:.2f}  P90 {p90:.2f}"
+            draw_text(pyxel, DC.MARGIN_X, percentile_y, percentile_text, self.app.text_color, self.middle_font)
+            
+            histogram_y = percentile_y + DC.MIDDLE_FONT_HEIGHT + DC.MARGIN_Y
+            self._draw_histogram(distribution, histogram_y, DC.STATS_HISTOGRAM_HEIGHT)
+            trend_y = histogram_y + DC.STATS_HISTOGRAM_HEIGHT + DC.SMALL_FONT_HEIGHT * 2 + DC.MARGIN_Y
+            self._draw_trend(distribution.trend(), trend_y, DC.STATS_TREND_HEIGHT)
         
         # 操作説明
-        self._draw_instruction_text("SPACE/ENTER: Continue  R: Retry  ESC: Back (Auto-saved)")
\ No newline at end of file
+        self._draw_instruction_text("[LEFT/RIGHT] PATTERN, [UP/DOWN] ALGORITHM, [ESC] BACK")
+    
+    def _draw_histogram(self, distribution, top, height):
+        """タイムのヒストグラムとパーセンタイル帯を描画（記録のあるビンの範囲を表示）"""
+        counts = distribution.counts
+        used = [i for i, n in enumerate(counts) if n]
+        first, last = used[0], used[-1]
+        n_bins = last - first + 1
+        left = DC.MARGIN_X
+        width = DC.WINDOW_WIDTH - DC.MARGIN_X * 2
+        bar_width = max(1, width // n_bins)
+        peak = max(counts[first:last + 1])
+        bottom = top + height
+        
+        for i in range(first, last + 1):
+            bar_height = counts[i] * height // peak
+            if bar_height:
+                x = left + (i - first) * width // n_bins
+                pyxel.rect(x, bottom - bar_height, max(1, bar_width - 1), bar_height, self.app.text_color)
+        
+        # パーセンタイル帯（P10-P90: 線、P25-P75: 帯、中央値: 強調線）
+        low_edge, high_edge = BUCKET_EDGES[first], BUCKET_EDGES[last + 1]
+        span = math.log(high_edge / low_edge)
+        
+        def x_of(t):
+            return left + int(width * math.log(t / low_edge) / span)
+        
+        p10, p25, p50, p75, p90 = distribution.percentiles()
+        band_y = bottom + 2
+        pyxel.line(x_of(p10), band_y + 2, x_of(p90), band_y + 2, self.app.text_color)
+        pyxel.rect(x_of(p25), band_y, max(1, x_of(p75) - x_of(p25)), 5, DC.STATS_BAND_COLOR)
+        pyxel.line(x_of(p50), top, x_of(p50), band_y + 4, DC.DEFAULT_WARNING_COLOR)
+        
+        # 横軸の範囲
+        label_y = band_y + DC.SMALL_FONT_HEIGHT
+        draw_text(pyxel, left, label_y, f"{low_edge:.1f}s", self.app.text_color)
+        high_text = f"{high_edge:.1f}s"
+        draw_text(pyxel, left + width - len(high_text) * DC.SMALL_FONT_WIDTH, label_y, high_text, self.app.text_color)
+    
+    def _draw_trend(self, points, top, height):
+        """推移（ブロック平均）の折れ線を描画"""
+        draw_text(pyxel, DC.MARGIN_X, top - DC.SMALL_FONT_HEIGHT, "TREND (moving average)", self.app.text_color)
+        if len(points) < 2:
+            return
+        left = DC.MARGIN_X
+        width = DC.WINDOW_WIDTH - DC.MARGIN_X * 2
+        low, high = min(points), max(points)
+        scale = (height - 1) / (high - low) if high > low else 0
+        
+        def y_of(t):
+            return top + height - 1 - int((t - low) * scale)
+        
+        last = len(points) - 1
+        for i in range(last):
+            x1 = left + i * width // last
+            x2 = left + (i + 1) * width // last
+            pyxel.line(x1, y_of(points[i]), x2, y_of(points[i + 1]), DC.DEFAULT_WARNING_COLOR)
+        draw_text(pyxel, left + width + 2, top, f"{high:.1f}", self.app.text_color)
+        draw_text(pyxel, left + width + 2, top + height - DC.SMALL_FONT_HEIGHT, f"{low:.1f}", self.app.text_color)
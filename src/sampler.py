@@ -0,0 +1,176 @@
+"""重み付きランダムサンプラー（Vose のエイリアス法）
+
+重みに比例した確率で要素を1回O(1)で選ぶ。要素をブロックに分け、
+ブロックの合計重みに対する上位のエイリアス表と、ブロックごとのエイリアス表の
+2段で選択する。重みを変更したときは、その要素のブロックと上位の表だけを
+作り直すため、n件に対して更新1回あたりO(√n)で済む。
+
+除外集合は表を作り直さずに扱う（除外された要素が出たら引き直す）。
+"""
+import math
+import random
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# 除外された要素を引き直す最大回数（超えた場合は除外を適用した線形走査で選ぶ）
+MAX_REJECTIONS = 32
+
+
+def build_alias_table(weights: Sequence[float]) -> Tuple[List[float], List[int]]:
+    """
+    Vose のエイリアス法の表を作成する
+
+    Args:
+        weights: 各要素の重み（0以上、合計は正）
+
+    Returns:
+        tuple: (prob, alias)。i番目の列を一様に選び、確率prob[i]でi、それ以外はalias[i]を選ぶ
+    """
+    n = len(weights)
+    total = sum(weights)
+    prob = [0.0] * n
+    alias = list(range(n))
+    scaled = [w * n / total for w in weights]
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large[-1]
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(large.pop())
+    # 丸め誤差で残った列は確率1とする
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class _Block:
+    """連続した要素のまとまりとそのエイリアス表"""
+
+    __slots__ = ('start', 'total', 'prob', 'alias')
+
+    def __init__(self, start: int, weights: Sequence[float]):
+        self.start = start
+        self.total = sum(weights)
+        if self.total > 0:
+            self.prob, self.alias = build_alias_table(weights)
+        else:
+            self.prob, self.alias = [], []
+
+
+class WeightedSampler:
+    """重み付きサンプラー
+
+    draw() は除外がない場合O(1)、update() はO(√n)。
+    重みが0の要素は選ばれない。
+    """
+
+    def __init__(self, keys: Iterable[Hashable], weights: Iterable[float],
+                 rng: Optional[random.Random] = None, block_size: Optional[int] = None):
+        """
+        Args:
+            keys: 要素（パターンIDなど）
+            weights: 各要素の重み（0以上）
+            rng: 乱数生成器
+            block_size: 1ブロックの要素数（省略時は√n）
+        """
+        self._keys: List[Hashable] = list(keys)
+        self._weights: List[float] = [float(w) for w in weights]
+        if len(self._keys) != len(self._weights):
+            raise ValueError("keys and weights must have the same length")
+        if any(w < 0 or math.isnan(w) for w in self._weights):
+            raise ValueError("weights must be non-negative")
+        self._position: Dict[Hashable, int] = {key: i for i, key in enumerate(self._keys)}
+        self._rng = rng or random.Random()
+
+        n = len(self._keys)
+        self._block_size = block_size or max(1, math.isqrt(n))
+        self._blocks = [_Block(start, self._weights[start:start + self._block_size])
+                        for start in range(0, n, self._block_size)]
+        self._rebuild_top()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._position
+
+    @property
+    def total(self) -> float:
+        """重みの合計"""
+        return self._total
+
+    def weight(self, key: Hashable) -> float:
+        """要素の現在の重み"""
+        return self._weights[self._position[key]]
+
+    def _rebuild_top(self):
+        """ブロックの合計重みに対する上位の表を作り直す"""
+        totals = [block.total for block in self._blocks]
+        self._total = sum(totals)
+        if self._total > 0:
+            self._top_prob, self._top_alias = build_alias_table(totals)
+        else:
+            self._top_prob, self._top_alias = [], []
+
+    def update(self, key: Hashable, weight: float):
+        """
+        要素の重みを変更する（その要素のブロックと上位の表のみ作り直す）
+
+        Args:
+            key: 要素
+            weight: 新しい重み（0以上）
+        """
+        if weight < 0 or math.isnan(weight):
+            raise ValueError("weights must be non-negative")
+        i = self._position[key]
+        if self._weights[i] == weight:
+            return
+        self._weights[i] = float(weight)
+        b = i // self._block_size
+        start = b * self._block_size
+        self._blocks[b] = _Block(start, self._weights[start:start + self._block_size])
+        self._rebuild_top()
+
+    def _draw_index(self) -> int:
+        """除外なしで要素番号を1つ選ぶ"""
+        rng = self._rng
+        column = int(rng.random() * len(self._top_prob))
+        b = column if rng.random() < self._top_prob[column] else self._top_alias[column]
+        block = self._blocks[b]
+        column = int(rng.random() * len(block.prob))
+        i = column if rng.random() < block.prob[column] else block.alias[column]
+        return block.start + i
+
+    def draw(self, exclude=None) -> Optional[Hashable]:
+        """
+        重みに比例した確率で要素を1つ選ぶ
+
+        Args:
+            exclude: 除外する要素の集合（表は作り直さない）
+
+        Returns:
+            選んだ要素。選べる要素がない場合はNone
+        """
+        if self._total <= 0:
+            return None
+        if not exclude:
+            return self._keys[self._draw_index()]
+
+        for _ in range(MAX_REJECTIONS):
+            key = self._keys[self._draw_index()]
+            if key not in exclude:
+                return key
+
+        # 除外された要素に重みが偏っている場合は、残りの要素から線形走査で選ぶ
+        candidates = [(key, w) for key, w in zip(self._keys, self._weights) if w > 0 and key not in exclude]
+        if not candidates:
+            return None
+        point = self._rng.random() * sum(w for _, w in candidates)
+        for key, w in candidates:
+            point -= w
+            if point < 0:
+                return key
+        return candidates[-1][0]
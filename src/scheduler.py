@@ -0,0 +1,270 @@
+"""パターン練習の出題スケジューラー
+
+RANDモードの選択方式のうち、練習記録を使うもの。
+
+spaced（間隔反復）:
+    各パターンに「次に出題するステップ」を割り当て、優先度付きキュー（ヒープ）から
+    最も早いものを取り出す。ステップは出題ごとに1進む論理時刻。
+    未練習のパターンは最優先で（ランダムな順に）出題し、練習済みのパターンは
+    最後に練習した時刻が古いものほど早く出題する。
+weighted（重み付きランダム）:
+    優先度と難易度に比例した確率で、エイリアス法のサンプラーから選ぶ。
+
+優先度は次の値から決め、遅い・不安定・評価の低いパターンほど高くなる。
+    - 直近タイムのトリム平均（カテゴリ内の中央値に対する比）
+    - 直近タイムのばらつき（変動係数）
+    - アルゴリズム評価（user_algorithm_ratings、未評価は3とみなす）
+"""
+import heapq
+import random
+import statistics
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .constants import PatternConfig as PC
+from .sampler import WeightedSampler
+
+
+def trimmed_mean(times: Sequence[float]) -> Optional[float]:
+    """最良・最悪を1件ずつ除いた平均（5件未満の場合は単純平均）"""
+    if not times:
+        return None
+    if len(times) < 5:
+        return sum(times) / len(times)
+    ordered = sorted(times)
+    return sum(ordered[1:-1]) / (len(ordered) - 2)
+
+
+class _Progress:
+    """パターンごとの練習状況"""
+
+    __slots__ = ('pattern_id', 'category', 'times', 'rating', 'last_step', 'version')
+
+    def __init__(self, pattern_id: str, category: str, times: List[float], rating: Optional[int]):
+        self.pattern_id = pattern_id
+        self.category = category
+        self.times = times            # 直近タイム（新しい順）
+        self.rating = rating
+        self.last_step: Optional[int] = None
+        self.version = 0              # ヒープ内の古いエントリを見分けるための番号
+
+
+class PracticeScheduler:
+    """間隔反復によるパターン出題スケジューラー
+
+    next()・record()・set_rating() はいずれもヒープ操作1回分のO(log n)。
+    更新されたパターンは新しいエントリを追加し、古いエントリは取り出し時に読み飛ばす。
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]], recent_times: Dict[str, List[float]],
+                 ratings: Optional[Dict[str, int]] = None, rng: Optional[random.Random] = None):
+        """
+        Args:
+            patterns: 出題対象の (パターンID, カテゴリ) のリスト
+            recent_times: パターンID -> 直近タイム（新しい順）。最後に練習した時刻が新しい順に並べること
+            ratings: パターンID -> 使用アルゴリズムの評価（1-5）
+            rng: 乱数生成器（未練習パターンの順序に使用）
+        """
+        ratings = ratings or {}
+        self._rng = rng or random.Random()
+        self._step = 0
+        self._seq = 0
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._progress: Dict[str, _Progress] = {
+            pattern_id: _Progress(pattern_id, category, list(recent_times.get(pattern_id, ())[:PC.SCHEDULER_RECENT_SOLVES]),
+                                  ratings.get(pattern_id))
+            for pattern_id, category in patterns
+        }
+
+        # カテゴリごとの基準タイム（トリム平均の中央値）。セッション中は固定する
+        means_by_category: Dict[str, List[float]] = {}
+        for progress in self._progress.values():
+            mean = trimmed_mean(progress.times)
+            if mean is not None:
+                means_by_category.setdefault(progress.category, []).append(mean)
+        self._reference = {category: statistics.median(means) for category, means in means_by_category.items()}
+        self._start(recent_times)
+
+    def _start(self, recent_times: Dict[str, List[float]]):
+        """初回の出題予定を作成"""
+        # 練習済みのパターンは練習順に1ステップずつ過去に練習したものとみなす
+        practiced = [pattern_id for pattern_id in recent_times if pattern_id in self._progress
+                     and self._progress[pattern_id].times]
+        for age, pattern_id in enumerate(practiced):
+            progress = self._progress[pattern_id]
+            progress.last_step = -(age + 1)
+            self._push(progress, progress.last_step + self.interval(pattern_id))
+
+        # 未練習のパターンは練習済みのものより先に、ランダムな順で出題する
+        for progress in self._progress.values():
+            if progress.last_step is None:
+                self._push(progress, -len(practiced) - 1 - self._rng.random())
+
+    def __len__(self) -> int:
+        return len(self._progress)
+
+    def _push(self, progress: _Progress, due: float):
+        """パターンを出題予定ステップdueでヒープに追加"""
+        progress.version += 1
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, progress.version, progress.pattern_id))
+
+    def urgency(self, pattern_id: str) -> float:
+        """パターンの優先度（カテゴリ内で標準的なパターンが1）"""
+        progress = self._progress[pattern_id]
+        mean = trimmed_mean(progress.times)
+        reference = self._reference.get(progress.category)
+        relative = mean / reference if mean and reference else 1.0
+        if len(progress.times) >= 2 and mean:
+            variation = statistics.pstdev(progress.times) / mean
+        else:
+            variation = PC.SCHEDULER_DEFAULT_VARIATION
+        rating = progress.rating or 3
+
+        # 遅いほど・ばらつくほど・評価が低いほど優先度が高くなる
+        return relative * relative * (1 + variation) * (6 - rating) / 3
+
+    def interval(self, pattern_id: str) -> float:
+        """パターンの出題間隔（ステップ数）"""
+        interval = PC.SCHEDULER_BASE_INTERVAL / max(self.urgency(pattern_id), 1e-6)
+        return min(max(interval, PC.SCHEDULER_MIN_INTERVAL), PC.SCHEDULER_MAX_INTERVAL)
+
+    def weakest(self, count: int) -> List[str]:
+        """練習済みのパターンのうち優先度の高い順にcount件のパターンID"""
+        practiced = [pattern_id for pattern_id, progress in self._progress.items() if progress.times]
+        return heapq.nlargest(count, practiced, key=self.urgency)
+
+    def next(self) -> Optional[str]:
+        """
+        次に出題するパターンIDを取り出す
+
+        結果が記録されなかった場合（中断など）に備え、取り出したパターンは
+        最小間隔後に再出題する予定でヒープに戻しておく。
+
+        Returns:
+            str: パターンID（出題対象がない場合はNone）
+        """
+        while self._heap:
+            _, _, version, pattern_id = heapq.heappop(self._heap)
+            progress = self._progress[pattern_id]
+            if version != progress.version:
+                continue
+            progress.last_step = self._step
+            self._push(progress, self._step + PC.SCHEDULER_MIN_INTERVAL)
+            self._step += 1
+            return pattern_id
+        return None
+
+    def record(self, pattern_id: str, solve_time: float):
+        """ソルブ結果を記録し、次の出題予定を更新する"""
+        progress = self._progress.get(pattern_id)
+        if progress is None:
+            return
+        progress.times.insert(0, solve_time)
+        del progress.times[PC.SCHEDULER_RECENT_SOLVES:]
+        self._reschedule(progress)
+
+    def set_rating(self, pattern_id: str, rating: int):
+        """アルゴリズム評価の変更を反映する"""
+        progress = self._progress.get(pattern_id)
+        if progress is None:
+            return
+        progress.rating = rating
+        self._reschedule(progress)
+
+    def _reschedule(self, progress: _Progress):
+        """最後に出題したステップから出題間隔後に再出題する"""
+        last_step = progress.last_step if progress.last_step is not None else self._step - 1
+        self._push(progress, last_step + self.interval(progress.pattern_id))
+
+
+class WeightedPractice(PracticeScheduler):
+    """優先度 x 難易度に比例した確率でパターンを選ぶスケジューラー
+
+    next() はO(1)、record()・set_rating() はサンプラーの部分的な作り直しでO(√n)。
+    直近に出題したパターンは、サンプラーを作り直さずに除外する。
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]], recent_times: Dict[str, List[float]],
+                 ratings: Optional[Dict[str, int]] = None, difficulties: Optional[Dict[str, int]] = None,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            patterns: 出題対象の (パターンID, カテゴリ) のリスト
+            recent_times: パターンID -> 直近タイム（新しい順）
+            ratings: パターンID -> 使用アルゴリズムの評価（1-5）
+            difficulties: パターンID -> 難易度（1-5、未指定は3）
+            rng: 乱数生成器
+        """
+        self._difficulties = difficulties or {}
+        self._recent: List[str] = []
+        super().__init__(patterns, recent_times, ratings, rng)
+
+    def _start(self, recent_times: Dict[str, List[float]]):
+        """サンプラーを作成"""
+        pattern_ids = list(self._progress)
+        self._sampler = WeightedSampler(pattern_ids, [self.weight(pattern_id) for pattern_id in pattern_ids],
+                                        self._rng)
+
+    def weight(self, pattern_id: str) -> float:
+        """パターンの選択確率の重み"""
+        return self.urgency(pattern_id) * self._difficulties.get(pattern_id, 3)
+
+    def next(self) -> Optional[str]:
+        """
+        次に出題するパターンIDを選ぶ（直近RANDOM_RECENT_LIMIT件は除外）
+
+        Returns:
+            str: パターンID（出題対象がない場合はNone）
+        """
+        limit = min(PC.RANDOM_RECENT_LIMIT, len(self._progress) - 1)
+        exclude = self._recent[-limit:] if limit > 0 else ()
+        pattern_id = self._sampler.draw(set(exclude))
+        if pattern_id is not None:
+            self._recent.append(pattern_id)
+            del self._recent[:-PC.RANDOM_RECENT_LIMIT]
+        return pattern_id
+
+    def _reschedule(self, progress: _Progress):
+        """サンプラー内の重みを更新する"""
+        self._sampler.update(progress.pattern_id, self.weight(progress.pattern_id))
+
+
+def create_practice_scheduler(pattern_db, stats, category: str = "ALL", strategy: str = "spaced",
+                              rng: Optional[random.Random] = None) -> PracticeScheduler:
+    """
+    練習記録からスケジューラーを作成する
+
+    Args:
+        pattern_db: PatternDatabase
+        stats: SpeedcubeStats（直近タイムと評価の取得に使用）
+        category: カテゴリ名（PatternCategoryの名前）または "ALL"
+        strategy: "spaced"（間隔反復）または "weighted"（重み付きランダム）
+        rng: 乱数生成器
+
+    Returns:
+        PracticeScheduler: 作成したスケジューラー
+    """
+    from .patterns import PatternCategory
+
+    if category == "ALL":
+        pattern_ids = [pattern_id for c in pattern_db.get_available_categories()
+                       for pattern_id in pattern_db.get_pattern_ids_by_category(c)]
+        patterns = [(pattern_id, pattern_db.get_pattern_category(pattern_id).name) for pattern_id in pattern_ids]
+    else:
+        pattern_ids = pattern_db.get_pattern_ids_by_category(PatternCategory[category])
+        patterns = [(pattern_id, category) for pattern_id in pattern_ids]
+
+    recent_times = stats.get_recent_pattern_times(PC.SCHEDULER_RECENT_SOLVES)
+
+    # RANDモードではデフォルトアルゴリズムを使用するため、その評価を使う
+    algorithm_ratings = stats.get_algorithm_ratings()
+    ratings = {}
+    for pattern_id in pattern_ids:
+        algorithm = pattern_db.get_default_algorithm(pattern_id)
+        if algorithm is not None and algorithm.id in algorithm_ratings:
+            ratings[pattern_id] = algorithm_ratings[algorithm.id]
+
+    if strategy == "weighted":
+        difficulties = {pattern_id: pattern_db.get_pattern(pattern_id).difficulty for pattern_id in pattern_ids}
+        return WeightedPractice(patterns, recent_times, ratings, difficulties, rng)
+    return PracticeScheduler(patterns, recent_times, ratings, rng)
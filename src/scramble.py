@@ -29,4 +29,60 @@ def generate_wca_cube_scramble(length=20):
         last_face = face
         last_axis = axis
     
-    return ' '.join(scramble)
\ No newline at end of file
+    return ' '.join(scramble)
+
+
+# バッチ生成用の面コード（面コード // 2 が軸コードになる並び）
+BATCH_FACES = ['F', 'B', 'U', 'D', 'L', 'R']
+BATCH_MODIFIERS = ['', "'", '2']
+
+
+def generate_wca_cube_scramble_batch(count, length=20, seed=None):
+    """
+    generate_wca_cube_scrambleと同じ規則のスクランブルをまとめて生成する
+
+    面・軸コードのNumPy配列を手数ごとに一括で引き、規則違反（同じ面の連続、
+    同じ軸の3連続）となった要素だけをマスクして引き直す。
+
+    Args:
+        count: 生成するスクランブル数
+        length: 1スクランブルの手数
+        seed: 乱数シード（同じシードなら同じ結果を返す）
+
+    Returns:
+        list: スクランブル文字列のリスト
+    """
+    import numpy as np
+
+    if length <= 0:
+        return [''] * count
+
+    rng = np.random.default_rng(seed)
+    faces = np.empty((count, length), dtype=np.int8)
+
+    for i in range(length):
+        column = rng.integers(0, 6, size=count, dtype=np.int8)
+        while True:
+            invalid = np.zeros(count, dtype=bool)
+            if i >= 1:
+                invalid |= column == faces[:, i - 1]
+            if i >= 2:
+                axis = column // 2
+                invalid |= (axis == faces[:, i - 1] // 2) & (axis == faces[:, i - 2] // 2)
+            n_invalid = int(invalid.sum())
+            if n_invalid == 0:
+                break
+            column[invalid] = rng.integers(0, 6, size=n_invalid, dtype=np.int8)
+        faces[:, i] = column
+
+    modifiers = rng.integers(0, 3, size=(count, length), dtype=np.int8)
+    move_codes = faces.astype(np.intp) * 3 + modifiers
+
+    # 各ムーブを「2文字 + 区切り空白」の固定幅バイト列にして行単位で一括変換する
+    # （1文字のムーブは空白が2つ続くので、最後にまとめて1つに詰める）
+    tokens = ''.join((face + modifier).ljust(2) + ' '
+                     for face in BATCH_FACES for modifier in BATCH_MODIFIERS)
+    token_table = np.frombuffer(tokens.encode('ascii'), dtype=np.uint8).reshape(-1, 3)
+    rows = np.ascontiguousarray(token_table[move_codes].reshape(count, 3 * length))
+    return [row.decode('ascii').replace('  ', ' ').rstrip()
+            for row in rows.view(f'S{3 * length}').ravel().tolist()]
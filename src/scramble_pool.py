@@ -0,0 +1,238 @@
+"""スクランブルの事前生成プール
+
+スクランブル生成をソルブ完了フレームから切り離すため、
+一定数のスクランブルを常にキューに用意しておき、バックグラウンドスレッドで補充する。
+未使用のスクランブルは終了時にファイルへ保存し、次回起動時に再利用する。
+
+ランダムステートの生成は純Pythonの探索（1つ約215ms、初回はテーブル構築に約40秒）のため、
+補充スレッドで直接実行するとPyxelのメインループとGILを奪い合い、計測中のフレームが遅れる。
+そのためProcessGeneratorで子プロセスに生成させ、補充スレッドは結果を待つだけにする。
+"""
+import json
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+from .constants import ScrambleConfig as SCC
+from .scramble import generate_wca_cube_scramble
+
+
+def _generator_worker(func: Callable[[], str], requests, results):
+    """子プロセスの本体: 要求ごとにスクランブルを1つ生成して返す（Noneで終了）"""
+    while requests.get() is not None:
+        try:
+            results.put((True, func()))
+        except Exception as e:
+            results.put((False, repr(e)))
+
+
+class ProcessGenerator:
+    """スクランブル生成関数を子プロセスで実行する呼び出し可能オブジェクト
+
+    子プロセスは最初の呼び出しで起動し、テーブルの読み込み・構築も子プロセス側で行う。
+    呼び出し元のスレッドは結果を待つ間GILを解放するため、メインループの描画を妨げない。
+    """
+
+    POLL_INTERVAL = 0.1  # 子プロセスの終了を確認する間隔（秒）
+
+    def __init__(self, func: Callable[[], str]):
+        """
+        Args:
+            func: スクランブルを1つ生成する関数（子プロセスに渡すためモジュールの関数であること）
+        """
+        self._func = func
+        # Pyxelや同期処理のスレッドを持つ親プロセスをforkしないようspawnで起動する
+        self._context = multiprocessing.get_context("spawn")
+        self._requests = None
+        self._results = None
+        self._process = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        """子プロセスでスクランブルを1つ生成する（子プロセスが終了している場合はRuntimeError）"""
+        with self._lock:
+            if self._process is None:
+                self._start()
+            process = self._process
+            self._requests.put(1)
+            while True:
+                try:
+                    ok, value = self._results.get(timeout=self.POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise RuntimeError("スクランブル生成プロセスが終了しました")
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def close(self):
+        """子プロセスを停止する（生成中の場合は待たずに終了させる）"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        process.terminate()
+        process.join(timeout=1.0)
+
+    def _start(self):
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = self._context.Process(
+            target=_generator_worker, args=(self._func, self._requests, self._results),
+            name="ScramblePoolGenerator", daemon=True)
+        self._process.start()
+
+
+class ScramblePool:
+    """スクランブルを事前生成して保持するプール
+
+    next()はキュー先頭を取り出すだけなのでO(1)で完了する。
+    キューが空の場合のみ、その場で同期生成にフォールバックする。
+    """
+
+    def __init__(self, generator: Callable[[], str] = generate_wca_cube_scramble,
+                 size: int = SCC.POOL_SIZE, low_water: int = SCC.POOL_LOW_WATER,
+                 cache_path: Optional[str] = None, kind: str = "random_move",
+                 fallback: Optional[Callable[[], str]] = None):
+        """
+        Args:
+            generator: スクランブルを1つ生成する関数
+            size: 事前生成しておくスクランブル数
+            low_water: この数を下回ったら補充を開始する
+            cache_path: 未使用スクランブルの保存先（Noneの場合は保存しない）
+            kind: スクランブルの種類（保存ファイルとの整合性確認に使用）
+            fallback: プールが空の場合に同期生成する関数（省略時はgeneratorを使用）
+        """
+        self._generator = generator
+        self._fallback = fallback or generator
+        self.size = size
+        self.low_water = min(low_water, size)
+        self.cache_path = cache_path
+        self.kind = kind
+
+        # dequeのappend/popleftはスレッドセーフなのでロック不要
+        self._queue = deque()
+        self._refill_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._closed = False
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """バックグラウンド補充スレッドを開始する"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._refill_loop, name="ScramblePoolRefill", daemon=True)
+        self._thread.start()
+        self._refill_event.set()
+
+    def next(self) -> str:
+        """
+        次のスクランブルを取り出す
+
+        Returns:
+            str: スクランブル文字列
+        """
+        try:
+            scramble = self._queue.popleft()
+        except IndexError:
+            # 補充が追いついていない場合のみ同期生成
+            scramble = self._fallback()
+
+        if len(self._queue) < self.low_water:
+            self._refill_event.set()
+        return scramble
+
+    def close(self):
+        """補充スレッドと生成プロセスを停止し、未使用スクランブルを保存する（複数回呼び出し可）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        self._refill_event.set()
+        if isinstance(self._generator, ProcessGenerator):
+            self._generator.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._save()
+
+    def _refill_loop(self):
+        """補充要求を待ち、プールが満杯になるまで生成を続ける"""
+        while not self._stop_event.is_set():
+            self._refill_event.wait()
+            self._refill_event.clear()
+            while len(self._queue) < self.size and not self._stop_event.is_set():
+                try:
+                    self._queue.append(self._generator())
+                except Exception as e:
+                    # 終了時に生成プロセスを止めた場合は失敗として扱わない
+                    if not self._stop_event.is_set():
+                        print(f"DEBUG: スクランブルの事前生成に失敗: {e}")
+                    break
+
+    def _load(self):
+        """保存済みの未使用スクランブルを読み込む"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # 種類が異なるスクランブルは再利用しない
+            if data.get('kind') != self.kind:
+                return
+            scrambles = data.get('scrambles', [])
+            self._queue.extend(s for s in scrambles[:self.size] if isinstance(s, str) and s)
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: スクランブルプールの読み込みに失敗: {e}")
+
+    def _save(self):
+        """未使用スクランブルをファイルに保存する"""
+        if not self.cache_path:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            # 書き込み途中で終了しても壊れないよう一時ファイル経由で置き換える
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'kind': self.kind, 'scrambles': list(self._queue)}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"DEBUG: スクランブルプールの保存に失敗: {e}")
+
+
+def create_scramble_pool(scramble_type: str = SCC.SCRAMBLE_TYPE) -> ScramblePool:
+    """
+    スクランブルの種類に応じたプールを作成する
+
+    ランダムステートの場合、生成（初回はテーブル構築を含む）は子プロセスで行い、
+    プールが空の間はランダムムーブのスクランブルで代用する。
+
+    Args:
+        scramble_type: "random_state" または "random_move"
+
+    Returns:
+        ScramblePool: 未開始のプール
+    """
+    if scramble_type == "random_state":
+        from .twophase import generate_random_state_scramble
+        return ScramblePool(generator=ProcessGenerator(generate_random_state_scramble),
+                            fallback=generate_wca_cube_scramble,
+                            cache_path=get_default_pool_path(), kind="random_state")
+    return ScramblePool(cache_path=get_default_pool_path())
+
+
+def get_default_pool_path() -> str:
+    """プールの保存先パス（プロジェクトルートのdataディレクトリ）を取得"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    return os.path.join(project_root, 'data', SCC.POOL_CACHE_FILE)
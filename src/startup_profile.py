@@ -0,0 +1,94 @@
+"""起動時間の計測
+
+起動処理をフェーズ（モジュールの読み込み・ウィンドウ作成・データベース接続など）に分けて
+所要時間を記録し、最初のフレームの描画完了（time-to-first-frame）と
+最初の入力処理の完了（time-to-interactive）までの時間と合わせてレポートにする。
+
+初回使用時まで遅延したサブシステム（パターンデータベース・スプレッドシート接続）の
+読み込みも「遅延」フェーズとして同じプロファイラに記録する。
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# マイルストーン名
+FIRST_FRAME = "first_frame"
+INTERACTIVE = "interactive"
+
+
+class StartupProfiler:
+    """起動処理のフェーズごとの所要時間とマイルストーンを記録する"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            clock: 時刻（秒）を返す関数。作成時刻を起動時刻とする
+        """
+        self.clock = clock
+        self.start = clock()
+        self.phases: List[Tuple[str, float]] = []  # (フェーズ名, 所要時間)
+        self.deferred: List[Tuple[str, float]] = []  # 起動後に遅延して実行したフェーズ
+        self.marks: Dict[str, float] = {}  # マイルストーン名 -> 起動からの経過時間
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        withブロックの所要時間をフェーズとして記録する
+
+        起動完了（INTERACTIVE）後に実行したフェーズは遅延フェーズとして記録し、
+        所要時間をデバッグ出力する。
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            if INTERACTIVE in self.marks:
+                self.deferred.append((name, elapsed))
+                print(f"DEBUG: 遅延初期化 {name}: {elapsed * 1000:.1f} ms")
+            else:
+                self.phases.append((name, elapsed))
+
+    def mark(self, name: str) -> bool:
+        """
+        マイルストーンの時刻を記録する（2回目以降は無視）
+
+        Returns:
+            bool: 初めて記録した場合はTrue
+        """
+        if name in self.marks:
+            return False
+        self.marks[name] = self.clock() - self.start
+        return True
+
+    def to_dict(self) -> dict:
+        """レポートの内容（時間はミリ秒）"""
+        return {
+            "phases": [{"name": name, "ms": round(elapsed * 1000, 3)} for name, elapsed in self.phases],
+            "deferred": [{"name": name, "ms": round(elapsed * 1000, 3)} for name, elapsed in self.deferred],
+            "time_to_first_frame_ms": round(self.marks[FIRST_FRAME] * 1000, 3) if FIRST_FRAME in self.marks else None,
+            "time_to_interactive_ms": round(self.marks[INTERACTIVE] * 1000, 3) if INTERACTIVE in self.marks else None,
+        }
+
+    def report(self) -> str:
+        """フェーズごとの所要時間とマイルストーンの表"""
+        total = sum(elapsed for _, elapsed in self.phases)
+        lines = ["起動時間レポート"]
+        for name, elapsed in self.phases:
+            share = elapsed / total * 100 if total > 0 else 0.0
+            lines.append(f"  {name:<20}{elapsed * 1000:9.1f} ms {share:5.1f}%")
+        for label, name in (("time-to-first-frame", FIRST_FRAME), ("time-to-interactive", INTERACTIVE)):
+            if name in self.marks:
+                lines.append(f"  {label:<20}{self.marks[name] * 1000:9.1f} ms")
+        for name, elapsed in self.deferred:
+            lines.append(f"  {name + '（遅延）':<20}{elapsed * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        """レポートをJSONで保存する（保存できない場合は無視）"""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"DEBUG: 起動時間レポートの保存に失敗: {e}")
@@ -3,12 +3,14 @@
 各タイマー状態に対応する処理を管理するハンドラクラスを定義します。
 これにより、状態管理ロジックがより整理され、保守性と拡張性が向上します。
 """
+import threading
 from abc import ABC, abstractmethod
 import pyxel
 from .states import TimerState
 from .constants import DisplayConfig as DC, GameConfig as GC
 from .constants import SoundConfig as SC
-from .scramble import generate_wca_cube_scramble
+from .constants import PatternConfig as PC
+from .penalty import Penalty
 
 
 class BaseStateHandler(ABC):
@@ -26,6 +28,61 @@ class BaseStateHandler(ABC):
         """状態の更新処理"""
         pass
     
+    def _now(self) -> float:
+        """現在時刻（秒）。状態の経過時間はすべてこの時刻の差で計算する"""
+        return self.app.clock()
+    
+    def _repeat_frames(self, seconds: float) -> int:
+        """キーリピートの秒数を現在のフレームレートでのフレーム数に変換"""
+        return max(1, round(seconds * self.app.fps))
+    
+    def _next_random_pattern(self):
+        """
+        RANDモードの選択方式に従って次のパターンを取得
+        
+        Returns:
+            Pattern: 次のパターン、選択できない場合はNone
+        """
+        if self.app.random_strategy == "set":
+            # 練習セット: 出題キューの現在位置のパターン（進めるのはソルブ記録時）
+            run = self.app.practice_set_run
+            if run is None or run.finished:
+                return None
+            return self.app.pattern_db.get_pattern(run.current())
+        
+        if self.app.random_strategy != "uniform":
+            # 間隔反復・重み付き: スケジューラーはRANDモード開始時に作成する
+            if self.app.practice_scheduler is None:
+                from .scheduler import create_practice_scheduler
+                self.app.practice_scheduler = create_practice_scheduler(
+                    self.app.pattern_db, self.app.stats, self.app.random_category, self.app.random_strategy)
+            pattern_id = self.app.practice_scheduler.next()
+            return self.app.pattern_db.get_pattern(pattern_id) if pattern_id else None
+        
+        # 一様ランダム: 直近のパターンを避ける
+        random_pattern = self.app.pattern_db.get_random_pattern(
+            category=self.app.random_category,
+            exclude_ids=self.app.recent_random_patterns
+        )
+        if random_pattern:
+            # 履歴に追加（最大RANDOM_RECENT_LIMIT件）
+            self.app.recent_random_patterns.append(random_pattern.id)
+            if len(self.app.recent_random_patterns) > PC.RANDOM_RECENT_LIMIT:
+                self.app.recent_random_patterns.pop(0)
+        return random_pattern
+    
+    def _get_practice_sets(self):
+        """
+        練習セットの一覧と進捗を取得（キャッシュ済みの場合はDBを参照しない）
+        
+        Returns:
+            tuple: (PatternSetのリスト, セットID -> (練習済み件数, キューの件数))
+        """
+        if self.app.practice_sets is None:
+            store = self.app.pattern_sets
+            self.app.practice_sets = (store.list_sets(), store.get_progress())
+        return self.app.practice_sets
+    
     def _handle_key_hold(self, key, hold_start_attr, next_state,
                          change_sound, extra_action=None, reset_attr=None):
         """キーの長押し処理を汎用化したメソッド
@@ -47,11 +104,10 @@ class BaseStateHandler(ABC):
         
         if pyxel.btn(key):
             if hold_start == 0:
-                setattr(self.app, attr_name, pyxel.frame_count)
+                setattr(self.app, attr_name, self._now())
                 # ホールド開始時にサウンド再生
                 pyxel.play(SC.BEEP_CHANNEL, SC.HOLD_SOUND)
-            elif ((pyxel.frame_count - hold_start) / DC.FPS >=
-                  GC.BUTTON_HOLD_TIME):
+            elif self._now() - hold_start >= GC.BUTTON_HOLD_TIME:
                 self.app.state = next_state
                 # 状態遷移時にサウンド再生
                 pyxel.play(SC.BEEP_CHANNEL, change_sound)
@@ -76,8 +132,7 @@ class ReadyStateHandler(BaseStateHandler):
         """READY状態の更新処理"""
         # ESCキーでスクランブルを再生成
         if pyxel.btnp(pyxel.KEY_ESCAPE):
-            from .scramble import generate_wca_cube_scramble
-            self.app.scramble = generate_wca_cube_scramble()
+            self.app.scramble = self.app.scramble_pool.next()
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
             return
         
@@ -89,6 +144,24 @@ class ReadyStateHandler(BaseStateHandler):
             self.app.monthly_stats_cache = None
             return
         
+        # Hキーで履歴画面に遷移
+        if pyxel.btnp(pyxel.KEY_H):
+            self._open_history()
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        # Uキーでプロファイル・セッションの選択画面に遷移
+        if pyxel.btnp(pyxel.KEY_U):
+            self._open_profile_select()
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        # 2キー / Dキーで直前の記録の +2 / DNF を切り替え（もう一度押すとOKに戻す）
+        for key, penalty in ((pyxel.KEY_2, Penalty.PLUS2), (pyxel.KEY_D, Penalty.DNF)):
+            if pyxel.btnp(key):
+                self._toggle_penalty(penalty)
+                return
+        
         # Pキーでパターン練習モードに遷移
         if pyxel.btnp(pyxel.KEY_P):
             self.app.state = TimerState.PATTERN_LIST_SELECT
@@ -97,6 +170,7 @@ class ReadyStateHandler(BaseStateHandler):
             self.app.selected_pattern_index = 0
             self.app.pattern_list_scroll_offset = 0
             self.app.selected_category_tab = 0  # カテゴリタブをリセット
+            self.app.selected_subset = None
             self.app.current_pattern = None
             self.app.current_algorithm = None
             return
@@ -123,7 +197,38 @@ class ReadyStateHandler(BaseStateHandler):
     
     def _set_countdown_start(self):
         """カウントダウン開始時間をセット"""
-        self.app.countdown_start = pyxel.frame_count
+        self.app.countdown_start = self._now()
+        self.app.countdown_elapsed = 0.0
+    
+    def _toggle_penalty(self, penalty):
+        """直前の記録のペナルティを切り替える"""
+        try:
+            if self.app.stats.toggle_last_penalty(penalty):
+                pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+        except Exception as e:
+            print(f"DEBUG: ペナルティの変更に失敗: {e}")
+    
+    def _open_history(self):
+        """履歴画面を開く（ブラウザは初回のみ作成し、以降はキャッシュを再利用）"""
+        if self.app.history_browser is None:
+            import atexit
+            from .history import HistoryBrowser
+            self.app.history_browser = HistoryBrowser(self.app.logger.db_path, connections=self.app.logger.db,
+                                                      table=self.app.logger.results_table)
+            self.app.history_browser.start()
+            atexit.register(self.app.history_browser.close)
+        self.app.history_browser.refresh()
+        self.app.history_browser.jump_to_latest()
+        self.app.state = TimerState.HISTORY
+    
+    def _open_profile_select(self):
+        """プロファイル選択画面を開く（使用中のプロファイルとセッションを選択した状態）"""
+        logger = self.app.logger
+        self.app.profile_list = logger.profiles.list_profiles()
+        self.app.selected_profile_index = next(
+            (i for i, profile in enumerate(self.app.profile_list) if profile.id == logger.profile.id), 0)
+        ProfileSelectHandler.load_sessions(self.app, logger.profile.current_session)
+        self.app.state = TimerState.PROFILE_SELECT
 
 
 class CountdownStateHandler(BaseStateHandler):
@@ -131,19 +236,19 @@ class CountdownStateHandler(BaseStateHandler):
     
     def update(self):
         """COUNTDOWN状態の更新処理"""
-        current_time = (pyxel.frame_count - self.app.countdown_start) / DC.FPS
+        current_time = self._now() - self.app.countdown_start
         
         # ESCキーでインスペクションを中断してREADYに戻る（スクランブル再生成）
         if pyxel.btnp(pyxel.KEY_ESCAPE):
-            from .scramble import generate_wca_cube_scramble
-            self.app.scramble = generate_wca_cube_scramble()
+            self.app.scramble = self.app.scramble_pool.next()
             self.app.state = TimerState.READY
             self.app.space_hold_start = 0
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
             pyxel.stop(SC.BEEP_CHANNEL)  # ホールド音を停止
             return
         
-        self._play_countdown_beeps(current_time)
+        self._play_countdown_beeps(self.app.countdown_elapsed, current_time)
+        self.app.countdown_elapsed = current_time
 
         # インスペクション開始から一定時間はホールドチェックを
         # スキップ
@@ -163,24 +268,23 @@ class CountdownStateHandler(BaseStateHandler):
         if current_time >= GC.INSPECTION_TIME:
             self._start_timer()
     
-    def _play_countdown_beeps(self, current_time: float):
+    def _play_countdown_beeps(self, previous_time: float, current_time: float):
         """カウントダウン音を再生"""
         for beep_time in GC.COUNTDOWN_BEEP_TIMES:
             target_time = GC.INSPECTION_TIME - beep_time
-            if self._should_play_beep(current_time, target_time):
+            if self._should_play_beep(previous_time, current_time, target_time):
                 pyxel.play(SC.BEEP_CHANNEL, SC.COUNTDOWN_SOUND)
                 break
     
-    def _should_play_beep(self, current_time: float,
+    def _should_play_beep(self, previous_time: float, current_time: float,
                           target_time: float) -> bool:
-        """指定された時間の最初のフレームかどうかを判定"""
-        frame_time = 1.0 / DC.FPS
-        return target_time <= current_time <= target_time + frame_time
+        """前フレームから今フレームまでの間に指定された時間を過ぎたかを判定"""
+        return previous_time < target_time <= current_time
     
     def _start_timer(self):
         """タイマーを開始する共通処理"""
         self.app.state = TimerState.RUNNING
-        self.app.start_time = pyxel.frame_count
+        self.app.start_time = self._now()
         self.app.space_hold_start = 0
         pyxel.play(SC.BEEP_CHANNEL, SC.START_SOUND)
 
@@ -190,7 +294,7 @@ class RunningStateHandler(BaseStateHandler):
     
     def update(self):
         """RUNNING状態の更新処理"""
-        self.app.current_time = (pyxel.frame_count - self.app.start_time) / DC.FPS
+        self.app.current_time = self._now() - self.app.start_time
         
         # ESCキーで計測を中断
         if pyxel.btnp(pyxel.KEY_ESCAPE):
@@ -210,17 +314,21 @@ class RunningStateHandler(BaseStateHandler):
             self.app.state = TimerState.PATTERN_READY
         else:
             # 通常モードの場合はREADYに戻る（スクランブル再生成）
-            from .scramble import generate_wca_cube_scramble
-            self.app.scramble = generate_wca_cube_scramble()
+            self.app.scramble = self.app.scramble_pool.next()
             self.app.state = TimerState.READY
         
         pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
     
+    def _save_result(self, penalty):
+        """通常モードの記録を保存し、セッションの統計に加える（統計はデータベースから読み直さない）"""
+        solve_id = self.app.logger.save_result(self.app.current_time, self.app.scramble, penalty)
+        self.app.stats.record_solve(solve_id, round(self.app.current_time, 2), self.app.scramble, penalty)
+    
     def _finish_solve(self):
         """ソルブ完了時の処理"""
         # BEEP_CHANNELはReadystateで使用されているため、SOUND_CHANNELを使用
         pyxel.play(SC.SOUND_CHANNEL, SC.FINISH_SOUND)
-        self.app.finish_frame_count = pyxel.frame_count
+        self.app.finish_time = self._now()
         
         # パターンモードかどうかを判定
         is_pattern_mode = hasattr(self.app, 'current_pattern') and self.app.current_pattern is not None
@@ -229,37 +337,61 @@ class RunningStateHandler(BaseStateHandler):
             # パターンモードの場合
             self.app.pattern_result_time = self.app.current_time
             
+            # 練習方式（manual: 手動選択, random: 一様ランダム, spaced: 間隔反復, weighted: 重み付き, set: 練習セット）
+            if not self.app.random_mode:
+                practice_mode = 'manual'
+            elif self.app.random_strategy == "uniform":
+                practice_mode = 'random'
+            else:
+                practice_mode = self.app.random_strategy
+            run = self.app.practice_set_run if practice_mode == 'set' else None
+            
             # データベースに記録を保存
             try:
-                cursor = self.app.logger.cursor
-                cursor.execute(
-                    """
-                    INSERT INTO pattern_solves 
-                    (pattern_id, pattern_name, pattern_category, solve_time, 
-                     session_id, practice_mode, algorithm_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        self.app.current_pattern.id,
-                        self.app.current_pattern.name,
-                        self.app.current_pattern.category.value,
-                        self.app.current_time,
-                        self.app.logger.session_id,
-                        'manual',  # Phase 2では手動選択モードのみ
-                        self.app.current_algorithm.id if self.app.current_algorithm else None
+                with self.app.logger.db.write() as db:
+                    db.execute(
+                        """
+                        INSERT INTO pattern_solves 
+                        (pattern_id, pattern_name, pattern_category, solve_time, 
+                         session_id, practice_mode, set_id, algorithm_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            self.app.current_pattern.id,
+                            self.app.current_pattern.name,
+                            self.app.current_pattern.category.value,
+                            self.app.current_time,
+                            self.app.logger.session_id,
+                            practice_mode,
+                            run.set_id if run else None,
+                            self.app.current_algorithm.id if self.app.current_algorithm else None
+                        )
                     )
-                )
-                self.app.logger.conn.commit()
+                    # 練習セットの進捗を同じトランザクションで保存（再実行[R]では進めない）
+                    if run and run.current() == self.app.current_pattern.id:
+                        self.app.pattern_sets.advance(run)
+                self.app.stats.mark_changed()
             except Exception as e:
                 print(f"DEBUG: パターン記録の保存に失敗: {e}")
             
+            # 統計画面のタイム分布を更新（作成済みの場合のみ）
+            if self.app.pattern_histograms is not None:
+                self.app.pattern_histograms.add(
+                    self.app.current_pattern.id,
+                    self.app.current_algorithm.id if self.app.current_algorithm else None,
+                    self.app.current_time
+                )
+            
+            # 間隔反復の出題予定を更新
+            if self.app.random_mode and self.app.practice_scheduler is not None:
+                self.app.practice_scheduler.record(self.app.current_pattern.id, self.app.current_time)
+            
             self.app.pending_rating = 0
             self.app.state = TimerState.PATTERN_FINISH
         else:
             # 通常モードの場合
-            self.app.logger.save_result(self.app.current_time, self.app.scramble)
-            self.app.stats.update_stats()
-            self.app.scramble = generate_wca_cube_scramble()
+            self._save_result(Penalty.OK)
+            self.app.scramble = self.app.scramble_pool.next()
             self.app.state = TimerState.READY
 
 
@@ -268,14 +400,27 @@ class SyncingStateHandler(BaseStateHandler):
     
     def update(self):
         """SYNCING状態の更新処理"""
-        # 初回のみ同期処理を実行
+        # 初回のみ同期処理をバックグラウンドで開始（同期中も描画を続ける）
         if self.app.sync_result is None:
-            self.app.sync_result = self.app.logger.sync_data()
-            # 同期結果表示開始時間を記録
-            self.app.sync_end_frame = pyxel.frame_count
-        # 結果表示から1秒経過したらREADY状態に戻る        if (pyxel.frame_count - self.app.sync_end_frame) > DC.FPS * 1.5:
+            if self.app.sync_thread is None:
+                self.app.sync_thread = threading.Thread(target=self._sync, name="Sync", daemon=True)
+                self.app.sync_thread.start()
+            return
+        # 結果表示から一定時間経過したらREADY状態に戻る
+        if self._now() - self.app.sync_end_time > GC.SYNC_RESULT_DISPLAY_TIME:
             self.app.sync_result = None
+            self.app.sync_thread = None
             self.app.state = TimerState.READY
+    
+    def _sync(self):
+        """同期処理（バックグラウンドのスレッド。読み込みはこのスレッドの読み込み専用の接続を使う）"""
+        try:
+            result = self.app.logger.sync_data()
+        finally:
+            self.app.logger.db.release()
+        # 同期結果表示開始時間を記録してから結果を設定する（メインスレッドは結果の設定で完了を判定する）
+        self.app.sync_end_time = self._now()
+        self.app.sync_result = result
 
 
 class StatsStateHandler(BaseStateHandler):
@@ -299,6 +444,107 @@ class StatsStateHandler(BaseStateHandler):
             return
 
 
+class HistoryStateHandler(BaseStateHandler):
+    """履歴画面のハンドラ"""
+    
+    def update(self):
+        """履歴画面の更新処理"""
+        # ESCキーまたはHキーでREADY状態に戻る
+        if pyxel.btnp(pyxel.KEY_ESCAPE) or pyxel.btnp(pyxel.KEY_H):
+            self.app.state = TimerState.READY
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        browser = self.app.history_browser
+        if browser is None or browser.empty:
+            return
+        
+        # 上下キーで1行、PageUp/PageDownで1画面スクロール（長押しでリピート）
+        rows = DC.HISTORY_VISIBLE_ROWS
+        for key, delta in ((pyxel.KEY_UP, -1), (pyxel.KEY_DOWN, 1),
+                           (pyxel.KEY_PAGEUP, -rows), (pyxel.KEY_PAGEDOWN, rows)):
+            if pyxel.btnp(key, hold=self._repeat_frames(GC.KEY_REPEAT_DELAY),
+                          repeat=self._repeat_frames(GC.KEY_REPEAT_INTERVAL)):
+                browser.scroll(delta)
+                return
+        
+        # 左右キーでセッション、D/Fキーで日付を移動
+        moves = ((pyxel.KEY_LEFT, browser.previous_session), (pyxel.KEY_RIGHT, browser.next_session),
+                 (pyxel.KEY_D, browser.previous_day), (pyxel.KEY_F, browser.next_day))
+        for key, move in moves:
+            if pyxel.btnp(key):
+                if move():
+                    pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+                return
+        
+        # HOMEキーで最新の記録に戻る
+        if pyxel.btnp(pyxel.KEY_HOME):
+            browser.jump_to_latest()
+            return
+
+
+class ProfileSelectHandler(BaseStateHandler):
+    """プロファイル・セッション選択画面のハンドラ"""
+    
+    def update(self):
+        """プロファイル選択画面の更新処理"""
+        # ESCキー / Uキーで切り替えずにREADY状態に戻る
+        if pyxel.btnp(pyxel.KEY_ESCAPE) or pyxel.btnp(pyxel.KEY_U):
+            self.app.state = TimerState.READY
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        profiles = self.app.profile_list
+        if not profiles:
+            return
+        
+        # 上下キーでプロファイルを選択（セッションはそのプロファイルの使用中のものを選び直す）
+        for key, delta in ((pyxel.KEY_UP, -1), (pyxel.KEY_DOWN, 1)):
+            if pyxel.btnp(key):
+                self.app.selected_profile_index = (self.app.selected_profile_index + delta) % len(profiles)
+                profile = profiles[self.app.selected_profile_index]
+                self.load_sessions(self.app, profile.current_session)
+                return
+        
+        # 左右キーでセッションを選択
+        for key, delta in ((pyxel.KEY_LEFT, -1), (pyxel.KEY_RIGHT, 1)):
+            if pyxel.btnp(key):
+                sessions = self.app.profile_sessions
+                self.app.selected_session_index = (self.app.selected_session_index + delta) % len(sessions)
+                return
+        
+        # ENTERキーで切り替えてREADY状態に戻る
+        if pyxel.btnp(pyxel.KEY_RETURN):
+            profile = profiles[self.app.selected_profile_index]
+            session = self.app.profile_sessions[self.app.selected_session_index]
+            try:
+                self._switch(profile, session)
+            except Exception as e:
+                print(f"DEBUG: プロファイルの切り替えに失敗: {e}")
+            self.app.state = TimerState.READY
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+    
+    @staticmethod
+    def load_sessions(app, current_session):
+        """選択中のプロファイルのセッション一覧を読み込み、使用中のセッションを選択する"""
+        profile = app.profile_list[app.selected_profile_index] if app.profile_list else None
+        sessions = [None] + (app.logger.profiles.list_sessions(profile) if profile is not None else [])
+        app.profile_sessions = sessions
+        app.selected_session_index = sessions.index(current_session) if current_session in sessions else 0
+    
+    def _switch(self, profile, session):
+        """プロファイルとセッションを切り替え、プロファイルに依存する表示用のデータを作り直す"""
+        logger = self.app.logger
+        logger.switch_profile(profile, session)
+        self.app.stats.update_stats()
+        self.app.monthly_stats_cache = None
+        # 履歴画面のブラウザは別のテーブルを閲覧するため、次に開くときに作り直す
+        browser = self.app.history_browser
+        if browser is not None and browser.table != logger.results_table:
+            browser.close()
+            self.app.history_browser = None
+
+
 class StateHandlerManager:
     """状態ハンドラを管理するマネージャークラス"""
     
@@ -314,10 +560,13 @@ class StateHandlerManager:
             TimerState.RUNNING: RunningStateHandler(app),
             TimerState.SYNCING: SyncingStateHandler(app),
             TimerState.STATS: StatsStateHandler(app),
+            TimerState.HISTORY: HistoryStateHandler(app),
+            TimerState.PROFILE_SELECT: ProfileSelectHandler(app),
             TimerState.PATTERN_LIST_SELECT: PatternListSelectHandler(app),
             TimerState.PATTERN_ALGORITHM_SELECT: PatternAlgorithmSelectHandler(app),
             TimerState.PATTERN_READY: PatternReadyHandler(app),
-            TimerState.PATTERN_FINISH: PatternFinishHandler(app)
+            TimerState.PATTERN_FINISH: PatternFinishHandler(app),
+            TimerState.PATTERN_STATS: PatternStatsHandler(app)
         }
     
     def update(self):
@@ -346,9 +595,11 @@ class PatternListSelectHandler(BaseStateHandler):
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
             return
         
-        # TABキーでカテゴリを切り替え（RAND/PLL/OLLの3つ）
+        # TABキーでカテゴリを切り替え（RAND + データが存在するカテゴリ）
+        category_tabs = self.app.pattern_db.get_category_tabs()
         if pyxel.btnp(pyxel.KEY_TAB):
-            self.app.selected_category_tab = (self.app.selected_category_tab + 1) % 3  # 0:RAND, 1:PLL, 2:OLL
+            self.app.selected_category_tab = (self.app.selected_category_tab + 1) % (len(category_tabs) + 1)
+            self.app.selected_subset = None
             self.app.selected_pattern_index = 0
             self.app.pattern_list_scroll_offset = 0
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
@@ -359,13 +610,25 @@ class PatternListSelectHandler(BaseStateHandler):
             self._handle_rand_tab()
             return
         
-        # 通常のパターン選択（PLL/OLL）
-        # selected_category_tab: 0=RAND, 1=PLL, 2=OLL
-        categories = self.app.pattern_db.get_available_categories()  # [OLL, PLL]
-        # PLLは1番目(index=1)、OLLは0番目(index=0)なので逆順にマッピング
-        category_index = 2 - self.app.selected_category_tab  # 1->1(PLL), 2->0(OLL)
-        selected_category = categories[category_index]
-        patterns = self.app.pattern_db.get_patterns_by_category(selected_category)
+        # 通常のパターン選択（selected_category_tab: 0=RAND, 1以降=get_category_tabs()の順）
+        selected_category = category_tabs[self.app.selected_category_tab - 1]
+        
+        # Sキーでサブセットを切り替え（全体 -> 各サブセット -> 全体）
+        subsets = self.app.pattern_db.get_subsets(selected_category)
+        if subsets and pyxel.btnp(pyxel.KEY_S):
+            choices = (None,) + subsets
+            current_idx = choices.index(self.app.selected_subset) if self.app.selected_subset in choices else 0
+            self.app.selected_subset = choices[(current_idx + 1) % len(choices)]
+            self.app.selected_pattern_index = 0
+            self.app.pattern_list_scroll_offset = 0
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        # パターンはIDのみ取得し、オブジェクトは選択時に取り出す
+        pattern_ids = self.app.pattern_db.get_pattern_ids_by_category(selected_category, self.app.selected_subset)
+        pattern_count = len(pattern_ids)
+        if pattern_count == 0:
+            return
         
         # 表示可能なアイテム数を計算（ページサイズ用）
         from .constants import DisplayConfig as DC
@@ -381,16 +644,16 @@ class PatternListSelectHandler(BaseStateHandler):
             self.app.selected_pattern_index -= 1
             if self.app.selected_pattern_index < 0:
                 # 先頭から末尾へ循環
-                self.app.selected_pattern_index = len(patterns) - 1
-            self._update_scroll(patterns)
+                self.app.selected_pattern_index = pattern_count - 1
+            self._update_scroll()
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
         if pyxel.btnp(pyxel.KEY_DOWN):
             self.app.selected_pattern_index += 1
-            if self.app.selected_pattern_index >= len(patterns):
+            if self.app.selected_pattern_index >= pattern_count:
                 # 末尾から先頭へ循環
                 self.app.selected_pattern_index = 0
-            self._update_scroll(patterns)
+            self._update_scroll()
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
         # 左右キーでページ移動（循環）
@@ -398,28 +661,28 @@ class PatternListSelectHandler(BaseStateHandler):
             self.app.selected_pattern_index -= page_size
             if self.app.selected_pattern_index < 0:
                 # 先頭より前に行く場合は末尾へ循環
-                self.app.selected_pattern_index = len(patterns) - 1
-            self._update_scroll(patterns)
+                self.app.selected_pattern_index = pattern_count - 1
+            self._update_scroll()
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
         if pyxel.btnp(pyxel.KEY_RIGHT):
             self.app.selected_pattern_index += page_size
-            if self.app.selected_pattern_index >= len(patterns):
+            if self.app.selected_pattern_index >= pattern_count:
                 # 末尾を超える場合は先頭へ循環
                 self.app.selected_pattern_index = 0
-            self._update_scroll(patterns)
+            self._update_scroll()
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
         # ENTERキーで現在のアルゴリズムを使って練習開始
         if pyxel.btnp(pyxel.KEY_RETURN):
-            selected_pattern = patterns[self.app.selected_pattern_index]
+            selected_pattern = self.app.pattern_db.get_pattern(pattern_ids[self.app.selected_pattern_index])
             self.app.current_pattern = selected_pattern
             
             # 保存されているアルゴリズム選択を取得
             selected_algo_id = self.app.stats.get_user_selected_algorithm(selected_pattern.id)
             if selected_algo_id:
-                algorithms = self.app.pattern_db.get_algorithms_for_pattern(selected_pattern.id)
-                self.app.current_algorithm = next((a for a in algorithms if a.id == selected_algo_id), None)
+                self.app.current_algorithm = self.app.pattern_db.get_pattern_algorithm(
+                    selected_pattern.id, selected_algo_id)
             else:
                 # デフォルトアルゴリズムを使用
                 self.app.current_algorithm = self.app.pattern_db.get_default_algorithm(selected_pattern.id)
@@ -428,9 +691,18 @@ class PatternListSelectHandler(BaseStateHandler):
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
             return
         
+        # Iキーでパターン統計画面へ（表示中の一覧内で切り替え可能）
+        if pyxel.btnp(pyxel.KEY_I):
+            self.app.stats_pattern_ids = pattern_ids
+            self.app.stats_pattern_index = self.app.selected_pattern_index
+            self.app.stats_algorithm_index = 0
+            self.app.state = TimerState.PATTERN_STATS
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
         # Aキーでアルゴリズム選択画面へ
         if pyxel.btnp(pyxel.KEY_A):
-            selected_pattern = patterns[self.app.selected_pattern_index]
+            selected_pattern = self.app.pattern_db.get_pattern(pattern_ids[self.app.selected_pattern_index])
             self.app.current_pattern = selected_pattern
             self.app.available_algorithms = self.app.pattern_db.get_algorithms_for_pattern(selected_pattern.id)
             self.app.selected_algorithm_index = 0
@@ -440,45 +712,71 @@ class PatternListSelectHandler(BaseStateHandler):
     
     def _handle_rand_tab(self):
         """RANDタブ選択時の処理"""
-        from .patterns import PatternCategory
-        
-        # 上下キーでランダムカテゴリを選択（OLL/PLL/ALL）
-        if pyxel.btnp(pyxel.KEY_UP):
-            categories = ["OLL", "PLL", "ALL"]
-            current_idx = categories.index(self.app.random_category)
-            self.app.random_category = categories[(current_idx - 1) % 3]
-            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+        if self.app.random_strategy == "set":
+            self._handle_set_list()
+        else:
+            # 上下キーでランダムカテゴリを選択（データが存在するカテゴリ + ALL）
+            categories = [category.name for category in self.app.pattern_db.get_available_categories()] + ["ALL"]
+            current_idx = categories.index(self.app.random_category) if self.app.random_category in categories else 0
+            
+            if pyxel.btnp(pyxel.KEY_UP):
+                self.app.random_category = categories[(current_idx - 1) % len(categories)]
+                pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            
+            if pyxel.btnp(pyxel.KEY_DOWN):
+                self.app.random_category = categories[(current_idx + 1) % len(categories)]
+                pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
-        if pyxel.btnp(pyxel.KEY_DOWN):
-            categories = ["OLL", "PLL", "ALL"]
-            current_idx = categories.index(self.app.random_category)
-            self.app.random_category = categories[(current_idx + 1) % 3]
+        # 左右キーで選択方式を切り替え（一様ランダム/間隔反復/重み付き/練習セット）
+        if pyxel.btnp(pyxel.KEY_LEFT) or pyxel.btnp(pyxel.KEY_RIGHT):
+            step = -1 if pyxel.btnp(pyxel.KEY_LEFT) else 1
+            strategies = PC.RANDOM_STRATEGIES
+            current_idx = strategies.index(self.app.random_strategy)
+            self.app.random_strategy = strategies[(current_idx + step) % len(strategies)]
+            self.app.practice_sets = None
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
         
         # ENTERキーでランダムモード開始
         if pyxel.btnp(pyxel.KEY_RETURN):
-            # ランダムパターンを取得
-            random_pattern = self.app.pattern_db.get_random_pattern(
-                category=self.app.random_category,
-                exclude_ids=self.app.recent_random_patterns
-            )
+            # 開始のたびに最新の練習記録からスケジューラーを作り直す
+            self.app.practice_scheduler = None
+            if self.app.random_strategy == "set":
+                # 中断中のセットは続きから再開する
+                from .pattern_sets import start_or_resume
+                sets, _ = self._get_practice_sets()
+                if not sets:
+                    return
+                self.app.practice_set_run = start_or_resume(
+                    self.app.pattern_sets, self.app.pattern_db, self.app.stats,
+                    sets[self.app.selected_set_index % len(sets)].id)
+            random_pattern = self._next_random_pattern()
             
             if random_pattern:
                 self.app.random_mode = True
                 self.app.current_pattern = random_pattern
                 
-                # 履歴に追加（最大5件）
-                self.app.recent_random_patterns.append(random_pattern.id)
-                if len(self.app.recent_random_patterns) > 5:
-                    self.app.recent_random_patterns.pop(0)
-                
                 # デフォルトアルゴリズムを使用
                 self.app.current_algorithm = self.app.pattern_db.get_default_algorithm(random_pattern.id)
                 
                 self.app.state = TimerState.PATTERN_READY
                 pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
     
-    def _update_scroll(self, patterns):
+    def _handle_set_list(self):
+        """RANDタブの練習セット一覧の処理"""
+        sets, _ = self._get_practice_sets()
+        if not sets:
+            return
+        
+        # 上下キーでセットを選択（循環）
+        if pyxel.btnp(pyxel.KEY_UP):
+            self.app.selected_set_index = (self.app.selected_set_index - 1) % len(sets)
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+        
+        if pyxel.btnp(pyxel.KEY_DOWN):
+            self.app.selected_set_index = (self.app.selected_set_index + 1) % len(sets)
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+    
+    def _update_scroll(self):
         """選択位置に応じてスクロールオフセットを更新"""
         # 表示可能なアイテム数を計算
         from .constants import DisplayConfig as DC
@@ -543,6 +841,7 @@ class PatternReadyHandler(BaseStateHandler):
         """パターン練習準備画面の更新処理"""
         # ESCキーでパターン一覧に戻る
         if pyxel.btnp(pyxel.KEY_ESCAPE):
+            self.app.practice_sets = None  # 練習セットの進捗を読み直す
             self.app.state = TimerState.PATTERN_LIST_SELECT
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
             return
@@ -560,7 +859,7 @@ class PatternReadyHandler(BaseStateHandler):
     
     def _start_pattern_timer(self):
         """パターン練習タイマー開始"""
-        self.app.start_time = pyxel.frame_count
+        self.app.start_time = self._now()
         self.app.space_hold_start = 0
 
 
@@ -605,8 +904,9 @@ class PatternFinishHandler(BaseStateHandler):
         if pyxel.btnp(pyxel.KEY_ESCAPE):
             # 評価を保存
             self._save_rating_if_exists()
-            # ランダムモードを解除してパターン一覧に戻る
+            # ランダムモードを解除してパターン一覧に戻る（セットの進捗は保存済み）
             self.app.random_mode = False
+            self.app.practice_sets = None
             self.app.pending_rating = 0
             self.app.state = TimerState.PATTERN_LIST_SELECT
             pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
@@ -615,24 +915,22 @@ class PatternFinishHandler(BaseStateHandler):
     def _continue_random_mode(self):
         """ランダムモードを継続して次のパターンへ"""
         # 次のランダムパターンを取得
-        random_pattern = self.app.pattern_db.get_random_pattern(
-            category=self.app.random_category,
-            exclude_ids=self.app.recent_random_patterns
-        )
+        random_pattern = self._next_random_pattern()
         
         if random_pattern:
             self.app.current_pattern = random_pattern
             
-            # 履歴に追加（最大5件）
-            self.app.recent_random_patterns.append(random_pattern.id)
-            if len(self.app.recent_random_patterns) > 5:
-                self.app.recent_random_patterns.pop(0)
-            
             # デフォルトアルゴリズムを使用
             self.app.current_algorithm = self.app.pattern_db.get_default_algorithm(random_pattern.id)
             
             self.app.pending_rating = 0
             self.app.state = TimerState.PATTERN_READY
+        else:
+            # 練習セットを1周した場合などはパターン一覧に戻る
+            self.app.random_mode = False
+            self.app.practice_sets = None
+            self.app.pending_rating = 0
+            self.app.state = TimerState.PATTERN_LIST_SELECT
     
     def _save_rating_if_exists(self):
         """評価が設定されていれば保存"""
@@ -641,4 +939,47 @@ class PatternFinishHandler(BaseStateHandler):
                 self.app.current_algorithm.id,
                 self.app.pending_rating
             )
+            # 間隔反復の出題間隔に反映
+            if self.app.random_mode and self.app.practice_scheduler is not None:
+                self.app.practice_scheduler.set_rating(self.app.current_pattern.id, self.app.pending_rating)
 
+
+class PatternStatsHandler(BaseStateHandler):
+    """パターン統計画面のハンドラ"""
+    
+    def update(self):
+        """パターン統計画面の更新処理"""
+        # 初回のみ全記録からタイム分布を作成（以降はソルブごとに追加更新）
+        if self.app.pattern_histograms is None:
+            from .pattern_histograms import load_pattern_histograms
+            self.app.pattern_histograms = load_pattern_histograms(self.app.stats)
+        
+        # ESCキーでパターン一覧に戻る（統計画面で表示していたパターンを選択）
+        if pyxel.btnp(pyxel.KEY_ESCAPE):
+            if self.app.stats_pattern_index != self.app.selected_pattern_index:
+                self.app.selected_pattern_index = self.app.stats_pattern_index
+                self.app.pattern_list_scroll_offset = self.app.stats_pattern_index
+            self.app.state = TimerState.PATTERN_LIST_SELECT
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        pattern_ids = self.app.stats_pattern_ids
+        if not pattern_ids:
+            return
+        
+        # 左右キーでパターンを切り替え（循環）
+        if pyxel.btnp(pyxel.KEY_LEFT) or pyxel.btnp(pyxel.KEY_RIGHT):
+            step = -1 if pyxel.btnp(pyxel.KEY_LEFT) else 1
+            self.app.stats_pattern_index = (self.app.stats_pattern_index + step) % len(pattern_ids)
+            self.app.stats_algorithm_index = 0
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
+        
+        # 上下キーで集計対象を切り替え（全アルゴリズム -> 各アルゴリズム）
+        if pyxel.btnp(pyxel.KEY_UP) or pyxel.btnp(pyxel.KEY_DOWN):
+            step = -1 if pyxel.btnp(pyxel.KEY_UP) else 1
+            pattern_id = pattern_ids[self.app.stats_pattern_index]
+            choices = len(self.app.pattern_db.get_algorithms_for_pattern(pattern_id)) + 1
+            self.app.stats_algorithm_index = (self.app.stats_algorithm_index + step) % choices
+            pyxel.play(SC.BEEP_CHANNEL, SC.CHANGE_SOUND)
+            return
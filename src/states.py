@@ -8,9 +8,12 @@ class TimerState(Enum):
     RUNNING = auto()     # 計測中状態
     SYNCING = auto()     # 同期中状態
     STATS = auto()       # 統計画面状態
+    HISTORY = auto()     # 履歴画面状態（過去のセッションの閲覧）
+    PROFILE_SELECT = auto()  # プロファイル・セッション選択画面
     
     # パターン習得モード用の状態（Phase 2）
     PATTERN_LIST_SELECT = auto()      # パターン一覧選択画面
     PATTERN_ALGORITHM_SELECT = auto()  # アルゴリズム選択画面
     PATTERN_READY = auto()            # パターン表示・準備状態
-    PATTERN_FINISH = auto()           # パターン完了・評価画面
\ No newline at end of file
+    PATTERN_FINISH = auto()           # パターン完了・評価画面
+    PATTERN_STATS = auto()            # パターン統計画面（タイム分布・推移）
\ No newline at end of file
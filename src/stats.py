@@ -1,86 +1,169 @@
+from collections import deque
 from datetime import datetime
+from itertools import islice
+
+from .penalty import DNF_TIME, EFFECTIVE_TIME_SQL, Penalty, RollingAverage, average_of, effective_time, format_time
 
 class SpeedcubeStats:
     def __init__(self, logger=None):
         """
         スピードキューブの統計情報を計算・管理するクラス
 
+        セッションの統計はペナルティを反映した実効タイムで計算する（penalty.py）。
+        記録の追加・最新の記録のペナルティ変更は、セッションの記録数によらず
+        AoNの更新（O(log n)）のみで反映する。
+
         Args:
             logger: SpeedcubeLoggerのインスタンス
         """
         self.logger = logger
         
         # 統計情報を保持する変数
-        self.session_results = []  # 現在のセッションの結果
-        self.best_time = None      # ベストタイム
-        self.worst_time = None     # ワーストタイム
-        self.ao5 = None            # 直近5回の平均
-        self.ao12 = None           # 直近12回の平均
-        self.session_avg = None    # セッション平均
+        self.revision = 0          # 記録・設定の更新回数（描画済みレイヤーの無効化に使用）
+        self._reset_session()
         
         # 初期データ読み込み
         if self.logger:
             self.update_stats()
     
+    def _reset_session(self):
+        """セッションの統計を空にする"""
+        # 現在のセッションの結果（新しい順。(番号, タイム, スクランブル, セッションID, ペナルティ)）
+        self.session_results = deque()
+        self.best_time = None      # ベストタイム（DNFを除く）
+        self.worst_time = None     # ワーストタイム（DNFがあればDNF）
+        self.ao5 = None            # 直近5回の平均
+        self.ao12 = None           # 直近12回の平均
+        self.session_avg = None    # セッション平均（DNFを除く）
+        self.last_solve_id = None  # 最新の記録のid（ペナルティの変更用）
+        self._averages = {5: RollingAverage(5), 12: RollingAverage(12)}
+        self._sum = 0.0            # DNFを除く実効タイムの合計
+        self._count = 0            # DNFを除く記録数
+        self._best = DNF_TIME
+        self._worst = -DNF_TIME
+        # 最新の記録を加える前のベスト・ワースト（最新の記録のペナルティ変更用）
+        self._best_before = DNF_TIME
+        self._worst_before = -DNF_TIME
+    
     def update_stats(self):
         """
         ロガーからデータを読み込み、すべての統計情報を更新する
         """
         if not self.logger:
             return
+        self.revision += 1
             
-        # セッションデータの取得（現在のセッションデータのみ）
+        # セッションデータの取得（現在のセッションデータのみ、新しい順）
         raw_results = self.logger.get_session_results()
-
-        if not raw_results:
-            self.session_results = []
-            return
-        
-        # 古い順に並べ替えてインデックスを追加（1から始まる番号）
-        # raw_resultsは新しい順（DESC）なので、逆順にして古い順にする
-        indexed_results = []
-        for index, result in enumerate(raw_results[::-1], 1):
-            date_time, time_result, scramble, session_id = result
-            # (scramble, time_result, result_id, solve_index)の形式で保存
-            indexed_results.append((index, time_result, scramble, session_id))
         
-        # 最新の結果が先頭に来るように再度並べ替え
-        self.session_results = list(reversed(indexed_results))
-        
-        # 時間のリストを抽出
-        times = [result[1] for result in self.session_results]
+        # 古い順に1件ずつ加える（番号は1から始まる）
+        self._reset_session()
+        for solve_id, time_result, scramble, session_id, penalty in reversed(raw_results):
+            self._append(solve_id, time_result, scramble, session_id, penalty)
+        self._refresh()
+    
+    def record_solve(self, solve_id, time_result, scramble=None, penalty=Penalty.OK):
+        """
+        保存した記録を現在のセッションの統計に加える（データベースは読み直さない）
         
-        # 基本統計の計算
-        self.best_time = min(times) if times else None
-        self.worst_time = max(times) if times else None
-        self.session_avg = sum(times) / len(times) if times else None
+        Args:
+            solve_id: 記録のid（SpeedcubeLogger.save_resultの戻り値）
+            time_result: 計測タイム（秒）
+            scramble: スクランブル
+            penalty: ペナルティ
+        """
+        self.revision += 1
+        session_id = self.logger.session_id if self.logger else None
+        self._append(solve_id, time_result, scramble, session_id, penalty)
+        self._refresh()
+    
+    def toggle_last_penalty(self, penalty):
+        """
+        最新の記録のペナルティを切り替える（同じペナルティが付いていればOKに戻す）
         
-        # 平均の計算
-        self.ao5 = self.calculate_average(self.session_results, 5)
-        self.ao12 = self.calculate_average(self.session_results, 12)
+        Args:
+            penalty: Penalty.PLUS2 または Penalty.DNF
+            
+        Returns:
+            bool: 変更した場合はTrue（セッションに記録がない場合はFalse）
+        """
+        if not self.session_results or self.last_solve_id is None:
+            return False
+        index, time_result, scramble, session_id, current = self.session_results[0]
+        new_penalty = Penalty.OK if current == penalty else penalty
+        if self.logger:
+            self.logger.set_penalty(self.last_solve_id, new_penalty)
+        self.revision += 1
+        
+        # 最新の記録の実効タイムを置き換える
+        old_value = effective_time(time_result, current)
+        new_value = effective_time(time_result, new_penalty)
+        self.session_results[0] = (index, time_result, scramble, session_id, new_penalty)
+        for average in self._averages.values():
+            average.replace_latest(new_value)
+        self._remove_value(old_value)
+        self._add_value(new_value)
+        self._best = min(self._best_before, new_value)
+        self._worst = max(self._worst_before, new_value)
+        self._refresh()
+        return True
+    
+    def _append(self, solve_id, time_result, scramble, session_id, penalty):
+        """記録を1件加える（統計の公開値は _refresh で更新）"""
+        value = effective_time(time_result, penalty)
+        self.session_results.appendleft(
+            (len(self.session_results) + 1, time_result, scramble, session_id, Penalty(penalty)))
+        self.last_solve_id = solve_id
+        for average in self._averages.values():
+            average.add(value)
+        self._add_value(value)
+        self._best_before, self._worst_before = self._best, self._worst
+        self._best = min(self._best, value)
+        self._worst = max(self._worst, value)
+    
+    def _add_value(self, value):
+        if value != DNF_TIME:
+            self._sum += value
+            self._count += 1
     
+    def _remove_value(self, value):
+        if value != DNF_TIME:
+            self._sum -= value
+            self._count -= 1
+    
+    def _refresh(self):
+        """保持している集計から統計の公開値を更新する"""
+        has_results = bool(self.session_results)
+        self.best_time = self._best if self._best != DNF_TIME else None
+        self.worst_time = self._worst if has_results else None
+        self.session_avg = self._sum / self._count if self._count else None
+        self.ao5 = self._averages[5].value
+        self.ao12 = self._averages[12].value
+    
+    
+    def mark_changed(self):
+        """パターン記録など、update_stats以外で記録が変わったことを通知する"""
+        self.revision += 1
     
     def calculate_average(self, results, n):
         """
-        直近n回の平均を計算する
+        直近n回の平均を計算する（上下それぞれ trim_count(n) 件を除いた平均）
         
         Args:
-            results: 計算に使用する結果リスト
+            results: 計算に使用する結果リスト（新しい順。(番号, タイム, ..., ペナルティ)）
             n: 平均を取る結果の数
             
         Returns:
-            平均値、または結果が不足している場合はNone
+            平均値（DNFは無限大）、または結果が不足している場合はNone
         """
         if len(results) < n:
             return None
         
-        # 結果が十分にある場合、最新のn個を使用
-        recent_results = results[:n]  # すでにDESC順で取得されているはず
+        # 最新のn個の実効タイム（ペナルティのない結果はOKとして扱う）
+        recent_times = [effective_time(result[1], result[4] if len(result) > 4 else Penalty.OK)
+                        for result in islice(results, n)]
         
-        # タイムのみを抽出 (scramble, time_result, id) の形式
-        recent_times = [result[1] for result in recent_results]
-        
-        return sum(recent_times) / len(recent_times)
+        return average_of(recent_times)
     
     def calculate_average_of_n(self, n):
         """
@@ -92,6 +175,8 @@ class SpeedcubeStats:
         Returns:
             平均値、または結果が不足している場合はNone
         """
+        if n in self._averages:
+            return self._averages[n].value
         return self.calculate_average(self.session_results, n)
     
     def format_average(self, value):
@@ -104,7 +189,7 @@ class SpeedcubeStats:
         Returns:
             フォーマットされた文字列
         """
-        return f"{value:.2f}" if value is not None else "-"
+        return format_time(value)
     
     def get_stats_summary(self):
         """
@@ -122,69 +207,30 @@ class SpeedcubeStats:
             "solve_count": len(self.session_results)
         }
     
-    def _get_monthly_results(self, year=None, month=None):
+    def _month_range(self, year=None, month=None):
         """
-        指定した月の結果データを取得する（内部用メソッド）
+        指定した月の記録の日時の範囲 [開始, 終了) を返す（内部用メソッド）
+        
+        results.datetime は "YYYY/MM/DD HH:MM:SS" 形式のため、月の範囲は文字列の比較で
+        求められる（現在のプロファイルのテーブルの datetime のインデックスを使う範囲検索になる）。
         
         Args:
             year: 年（デフォルトは現在の年）
             month: 月（デフォルトは現在の月）
-              Returns:
-            list: 指定した月の結果リスト、エラーの場合は空リスト
+            
+        Returns:
+            tuple: ("YYYY/MM/", 翌月の "YYYY/MM/")
         """
-        if not self.logger:
-            return []
-        
         # デフォルトは現在の年月
         if year is None or month is None:
             now = datetime.now()
             year = year or now.year
             month = month or now.month
-        
-        print(f"DEBUG: _get_monthly_results searching for year={year}, month={month}")        
-        # ロガーから全ての結果を取得
-        try:
-            all_results = self.logger.get_results()
-            print(f"DEBUG: Total results from logger: {len(all_results) if all_results else 0}")
-            if not all_results:
-                return []
-            
-            monthly_results = []
-            for result in all_results:
-                date_time_str, time_result, scramble, session_id = result
-                
-                # 日時文字列をdatetimeオブジェクトに変換
-                try:
-                    # 複数の日時形式に対応
-                    try:
-                        # ISO形式を試す
-                        date_time = datetime.fromisoformat(date_time_str)
-                    except ValueError:
-                        # 日本語形式 (YYYY/MM/DD HH:MM:SS) を試す
-                        date_time = datetime.strptime(date_time_str, "%Y/%m/%d %H:%M:%S")
-                    
-                    print(f"DEBUG: Processing result: {date_time_str}, parsed year={date_time.year}, month={date_time.month}")
-                    # 指定した年月と一致するかチェック
-                    if date_time.year == year and date_time.month == month:
-                        print(f"DEBUG: Match found for {date_time_str}")
-                        monthly_results.append(result)
-                    else:
-                        print(f"DEBUG: No match - looking for {year}/{month}, found {date_time.year}/{date_time.month}")
-                except ValueError as e:
-                    # 日時の形式が正しくない場合はスキップ
-                    print(f"DEBUG: ValueError parsing date {date_time_str}: {e}")
-                    continue
-            
-            print(f"DEBUG: Found {len(monthly_results)} results for {year}/{month}")
-            return monthly_results
-            
-        except Exception:
-            # エラーが発生した場合は空リストを返す
-            return []
+        return f"{year:04d}/{month:02d}/", f"{year + month // 12:04d}/{month % 12 + 1:02d}/"
 
     def get_monthly_solve_count(self, year=None, month=None):
         """
-        指定した月のソルブ回数を取得する
+        指定した月のソルブ回数を取得する（DNFを含む）
         
         Args:
             year: 年（デフォルトは現在の年）
@@ -192,8 +238,18 @@ class SpeedcubeStats:
               Returns:
             int: 指定した月のソルブ回数
         """
-        monthly_results = self._get_monthly_results(year, month)
-        return len(monthly_results)
+        if not self.logger:
+            return 0
+        
+        try:
+            result = self.logger.db.fetchone(
+                f"SELECT COUNT(*) FROM {self.logger.results_table} WHERE datetime >= ? AND datetime < ?",
+                self._month_range(year, month)
+            )
+            return result[0] if result else 0
+        except Exception as e:
+            print(f"DEBUG: get_monthly_solve_count error: {e}")
+            return 0
     
     def get_current_month_solve_count(self):
         """
@@ -206,7 +262,7 @@ class SpeedcubeStats:
     
     def get_monthly_average_time(self, year=None, month=None):
         """
-        指定した月の平均ソルブ時間を取得する
+        指定した月の平均ソルブ時間を取得する（+2を加え、DNFを除く）
         
         Args:
             year: 年（デフォルトは現在の年）
@@ -215,22 +271,18 @@ class SpeedcubeStats:
         Returns:
             float: 指定した月の平均ソルブ時間、データがない場合はNone
         """
-        print(f"DEBUG: get_monthly_average_time called with year={year}, month={month}")
-        monthly_results = self._get_monthly_results(year, month)
-        print(f"DEBUG: monthly_results length: {len(monthly_results)}")
-        
-        if not monthly_results:
-            print("DEBUG: No monthly results found, returning None")
+        if not self.logger:
             return None
         
-        # タイムのみを抽出
-        monthly_times = [result[1] for result in monthly_results]
-        print(f"DEBUG: monthly_times: {monthly_times}")
-        
-        # 平均を計算
-        average = sum(monthly_times) / len(monthly_times)
-        print(f"DEBUG: calculated average: {average}")
-        return average
+        try:
+            result = self.logger.db.fetchone(
+                f"SELECT AVG({EFFECTIVE_TIME_SQL}) FROM {self.logger.results_table} WHERE datetime >= ? AND datetime < ?",
+                self._month_range(year, month)
+            )
+            return result[0] if result else None
+        except Exception as e:
+            print(f"DEBUG: get_monthly_average_time error: {e}")
+            return None
     
     def get_current_month_average_time(self):
         """
@@ -260,19 +312,16 @@ class SpeedcubeStats:
             return []
         
         try:
-            cursor = self.logger.cursor
             if limit:
-                cursor.execute(
+                results = self.logger.db.fetchall(
                     "SELECT solve_time FROM pattern_solves WHERE pattern_id = ? ORDER BY timestamp DESC LIMIT ?",
                     (pattern_id, limit)
                 )
             else:
-                cursor.execute(
+                results = self.logger.db.fetchall(
                     "SELECT solve_time FROM pattern_solves WHERE pattern_id = ? ORDER BY timestamp DESC",
                     (pattern_id,)
                 )
-            
-            results = cursor.fetchall()
             return [row[0] for row in results]
         except Exception as e:
             print(f"DEBUG: get_pattern_times error: {e}")
@@ -292,12 +341,10 @@ class SpeedcubeStats:
             return None
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT MIN(solve_time) FROM pattern_solves WHERE pattern_id = ?",
                 (pattern_id,)
             )
-            result = cursor.fetchone()
             return result[0] if result and result[0] is not None else None
         except Exception as e:
             print(f"DEBUG: get_pattern_best error: {e}")
@@ -317,17 +364,97 @@ class SpeedcubeStats:
             return 0
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT COUNT(*) FROM pattern_solves WHERE pattern_id = ?",
                 (pattern_id,)
             )
-            result = cursor.fetchone()
             return result[0] if result else 0
         except Exception as e:
             print(f"DEBUG: get_pattern_count error: {e}")
             return 0
     
+    def get_pattern_summaries(self, pattern_ids):
+        """
+        複数パターンの試技回数とベストタイムを1回のクエリで取得（一覧の表示用）
+        
+        Args:
+            pattern_ids: パターンIDのリスト
+            
+        Returns:
+            dict: パターンID -> (試技回数, ベストタイム)。記録のないパターンは含まない
+        """
+        if not self.logger or not pattern_ids:
+            return {}
+        
+        try:
+            placeholders = ", ".join("?" * len(pattern_ids))
+            rows = self.logger.db.fetchall(
+                f"SELECT pattern_id, COUNT(*), MIN(solve_time) FROM pattern_solves "
+                f"WHERE pattern_id IN ({placeholders}) GROUP BY pattern_id",
+                tuple(pattern_ids)
+            )
+            return {pattern_id: (count, best) for pattern_id, count, best in rows}
+        except Exception as e:
+            print(f"DEBUG: get_pattern_summaries error: {e}")
+            return {}
+    
+    def get_recent_pattern_times(self, limit_per_pattern):
+        """
+        全パターンの直近タイムを1回のクエリで取得
+        
+        Args:
+            limit_per_pattern: パターンごとに取得する最大件数
+            
+        Returns:
+            dict: パターンID -> タイムのリスト（新しい順）。最後に練習した時刻が新しいパターンから順に並ぶ
+        """
+        if not self.logger:
+            return {}
+        
+        try:
+            rows = self.logger.db.fetchall(
+                """
+                SELECT pattern_id, solve_time FROM (
+                    SELECT pattern_id, solve_time, timestamp, id,
+                           ROW_NUMBER() OVER (PARTITION BY pattern_id ORDER BY timestamp DESC, id DESC) AS n,
+                           MAX(timestamp) OVER (PARTITION BY pattern_id) AS last_timestamp,
+                           MAX(id) OVER (PARTITION BY pattern_id) AS last_id
+                    FROM pattern_solves
+                )
+                WHERE n <= ?
+                ORDER BY last_timestamp DESC, last_id DESC, n
+                """,
+                (limit_per_pattern,)
+            )
+            
+            results = {}
+            for pattern_id, solve_time in rows:
+                results.setdefault(pattern_id, []).append(solve_time)
+            return results
+        except Exception as e:
+            print(f"DEBUG: get_recent_pattern_times error: {e}")
+            return {}
+    
+    def iter_pattern_solve_times(self, batch_size=10000):
+        """
+        全パターン記録のタイムを記録順に取得（分布の作成用）
+        
+        Args:
+            batch_size: 1回に読み込む行数
+            
+        Yields:
+            tuple: (パターンID, アルゴリズムID, タイム)
+        """
+        if not self.logger:
+            return
+        
+        try:
+            # 専用のカーソルで読み込むため、読み込み中に他のクエリを実行しても影響しない
+            yield from self.logger.db.iterate(
+                "SELECT pattern_id, algorithm_id, solve_time FROM pattern_solves ORDER BY id", batch_size=batch_size)
+        except Exception as e:
+            print(f"DEBUG: iter_pattern_solve_times error: {e}")
+    
     # ========================================
     # アルゴリズム別統計メソッド
     # ========================================
@@ -347,19 +474,16 @@ class SpeedcubeStats:
             return []
         
         try:
-            cursor = self.logger.cursor
             if limit:
-                cursor.execute(
+                results = self.logger.db.fetchall(
                     "SELECT solve_time FROM pattern_solves WHERE algorithm_id = ? ORDER BY timestamp DESC LIMIT ?",
                     (algorithm_id, limit)
                 )
             else:
-                cursor.execute(
+                results = self.logger.db.fetchall(
                     "SELECT solve_time FROM pattern_solves WHERE algorithm_id = ? ORDER BY timestamp DESC",
                     (algorithm_id,)
                 )
-            
-            results = cursor.fetchall()
             return [row[0] for row in results]
         except Exception as e:
             print(f"DEBUG: get_algorithm_times error: {e}")
@@ -379,12 +503,10 @@ class SpeedcubeStats:
             return None
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT MIN(solve_time) FROM pattern_solves WHERE algorithm_id = ?",
                 (algorithm_id,)
             )
-            result = cursor.fetchone()
             return result[0] if result and result[0] is not None else None
         except Exception as e:
             print(f"DEBUG: get_algorithm_best error: {e}")
@@ -404,12 +526,10 @@ class SpeedcubeStats:
             return 0
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT COUNT(*) FROM pattern_solves WHERE algorithm_id = ?",
                 (algorithm_id,)
             )
-            result = cursor.fetchone()
             return result[0] if result else 0
         except Exception as e:
             print(f"DEBUG: get_algorithm_count error: {e}")
@@ -433,17 +553,32 @@ class SpeedcubeStats:
             return None
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT selected_algorithm_id FROM user_pattern_preferences WHERE pattern_id = ?",
                 (pattern_id,)
             )
-            result = cursor.fetchone()
             return result[0] if result else None
         except Exception as e:
             print(f"DEBUG: get_user_selected_algorithm error: {e}")
             return None
     
+    def get_user_selected_algorithms(self):
+        """
+        全パターンのユーザーが選択したアルゴリズムIDを取得
+        
+        Returns:
+            dict: パターンID -> アルゴリズムID
+        """
+        if not self.logger:
+            return {}
+        
+        try:
+            return dict(self.logger.db.fetchall(
+                "SELECT pattern_id, selected_algorithm_id FROM user_pattern_preferences"))
+        except Exception as e:
+            print(f"DEBUG: get_user_selected_algorithms error: {e}")
+            return {}
+    
     def set_user_selected_algorithm(self, pattern_id, algorithm_id):
         """
         ユーザーのアルゴリズム選択を保存
@@ -459,16 +594,16 @@ class SpeedcubeStats:
             return False
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO user_pattern_preferences 
-                (pattern_id, selected_algorithm_id, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                """,
-                (pattern_id, algorithm_id)
-            )
-            self.logger.conn.commit()
+            with self.logger.db.write() as db:
+                db.execute(
+                    """
+                    INSERT OR REPLACE INTO user_pattern_preferences 
+                    (pattern_id, selected_algorithm_id, last_updated)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    """,
+                    (pattern_id, algorithm_id)
+                )
+            self.revision += 1
             return True
         except Exception as e:
             print(f"DEBUG: set_user_selected_algorithm error: {e}")
@@ -488,17 +623,32 @@ class SpeedcubeStats:
             return (None, None)
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
+            result = self.logger.db.fetchone(
                 "SELECT rating, notes FROM user_algorithm_ratings WHERE algorithm_id = ?",
                 (algorithm_id,)
             )
-            result = cursor.fetchone()
             return (result[0], result[1]) if result else (None, None)
         except Exception as e:
             print(f"DEBUG: get_algorithm_rating error: {e}")
             return (None, None)
     
+    def get_algorithm_ratings(self):
+        """
+        全アルゴリズムの評価を取得
+        
+        Returns:
+            dict: アルゴリズムID -> 評価（1-5）
+        """
+        if not self.logger:
+            return {}
+        
+        try:
+            return dict(self.logger.db.fetchall(
+                "SELECT algorithm_id, rating FROM user_algorithm_ratings WHERE rating IS NOT NULL"))
+        except Exception as e:
+            print(f"DEBUG: get_algorithm_ratings error: {e}")
+            return {}
+    
     def set_algorithm_rating(self, algorithm_id, rating, notes=""):
         """
         アルゴリズムの評価を保存
@@ -520,16 +670,15 @@ class SpeedcubeStats:
             return False
         
         try:
-            cursor = self.logger.cursor
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO user_algorithm_ratings 
-                (algorithm_id, rating, notes, last_updated)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                """,
-                (algorithm_id, rating, notes)
-            )
-            self.logger.conn.commit()
+            with self.logger.db.write() as db:
+                db.execute(
+                    """
+                    INSERT OR REPLACE INTO user_algorithm_ratings 
+                    (algorithm_id, rating, notes, last_updated)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    """,
+                    (algorithm_id, rating, notes)
+                )
             return True
         except Exception as e:
             print(f"DEBUG: set_algorithm_rating error: {e}")
@@ -0,0 +1,75 @@
+"""描画済みテキストレイヤーのキャッシュ
+
+BDFフォントによる文字列の描画は1文字ずつのラスタライズになるため、
+フレーム間で変化しないテキスト（スクランブル・直近の記録・パターン一覧など）は
+pyxel.Image に一度だけ描画しておき、毎フレームはそのイメージを転送（blt）する。
+
+各レイヤーは描画内容を決める値の組（シグネチャ）と一緒に保持し、
+シグネチャが変わった場合のみ描き直す。背景色を透明色として描画するため、
+レイヤーの下や上に描く図形（ホールド表示など）とも重ねられる。
+"""
+from typing import Callable, Dict, Hashable
+
+import pyxel
+
+
+class TextLayer:
+    """1枚のレイヤー（イメージと描画時のシグネチャ）"""
+
+    __slots__ = ('image', 'width', 'height', 'signature')
+
+    def __init__(self, width: int, height: int):
+        self.image = pyxel.Image(width, height)
+        self.width = width
+        self.height = height
+        self.signature = None
+
+
+class TextLayerCache:
+    """名前付きレイヤーのキャッシュ"""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: Falseの場合はキャッシュせず毎回画面に直接描画する（計測用）
+        """
+        self.enabled = enabled
+        self._layers: Dict[str, TextLayer] = {}
+        self.render_count = 0  # レイヤーを描き直した回数（計測用）
+
+    def blit(self, name: str, x: int, y: int, width: int, height: int, colkey: int,
+             signature: Hashable, render: Callable):
+        """
+        レイヤーを画面に転送する（シグネチャが変わった場合のみ描き直す）
+
+        Args:
+            name: レイヤー名
+            x, y: 画面上の転送先
+            width, height: レイヤーの大きさ
+            colkey: 透明色（画面の背景色）
+            signature: 描画内容を決める値の組（背景色を含めること）
+            render: render(canvas) でレイヤー内の座標に描画する関数
+                    （canvasは pyxel.Image または pyxel モジュール）
+        """
+        if not self.enabled:
+            # 画面に直接描画（レイヤー内の座標を画面の位置にずらす）
+            pyxel.camera(-x, -y)
+            render(pyxel)
+            pyxel.camera()
+            return
+
+        layer = self._layers.get(name)
+        if layer is None or layer.width != width or layer.height != height:
+            layer = self._layers[name] = TextLayer(width, height)
+        if layer.signature != signature:
+            layer.image.cls(colkey)
+            render(layer.image)
+            layer.signature = signature
+            self.render_count += 1
+        pyxel.blt(x, y, layer.image, 0, 0, width, height, colkey)
+
+    def invalidate(self, name: str = None):
+        """レイヤーを次回の転送時に描き直す（Noneの場合はすべて）"""
+        layers = self._layers.values() if name is None else [self._layers[name]] if name in self._layers else []
+        for layer in layers:
+            layer.signature = None
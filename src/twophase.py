@@ -0,0 +1,414 @@
+"""二段階アルゴリズム（Kociemba法）によるランダムステートスクランブル生成
+
+一様ランダムなキューブ状態を生成し、その解法の逆手順をスクランブルとする。
+WCA公式スクランブラーと同じ考え方の「ランダムステート」スクランブル。
+
+ムーブテーブルと枝刈りテーブルは初回のみ生成して data/tables/ に保存し、
+2回目以降はmmapでメモリマップして読み込む（数ミリ秒）。
+"""
+import mmap
+import os
+import random
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from . import cubie
+from .cubie import CubieCube, N_MOVES
+
+# Phase 2で使用可能なムーブ（U, U2, U', R2, F2, D, D2, D', L2, B2）
+PHASE2_MOVES = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)
+
+# 探索の既定値
+DEFAULT_MAX_LENGTH = 22   # 解法の最大手数（これ以下の解が見つかった時点で終了）
+DEFAULT_TIMEOUT = 10.0    # 探索打ち切りまでの秒数
+
+_UNKNOWN = 0xFF
+TABLES_VERSION = 1
+
+
+class TwoPhaseError(Exception):
+    """二段階ソルバーに関する例外クラス"""
+    pass
+
+
+def get_default_table_dir() -> str:
+    """テーブルの保存先（プロジェクトルートのdata/tables）を取得"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    return os.path.join(project_root, 'data', 'tables')
+
+
+class TwoPhaseTables:
+    """ムーブテーブルと枝刈りテーブルの集合
+
+    各テーブルはディスク上のファイルをmmapしたmemoryviewとして保持する。
+    ファイルが存在しない場合は生成して保存する。
+    """
+
+    # (属性名, 型コード)
+    MOVE_TABLES = (
+        ('twist_move', 'H'),
+        ('flip_move', 'H'),
+        ('slice_sorted_move', 'H'),
+        ('corners_move', 'H'),
+        ('ud_edges_move', 'H'),
+    )
+    PRUNING_TABLES = (
+        'slice_twist_prun',
+        'slice_flip_prun',
+        'corners_slice_prun',
+        'ud_edges_slice_prun',
+    )
+
+    def __init__(self, table_dir: Optional[str] = None):
+        """
+        Args:
+            table_dir: テーブルファイルの保存ディレクトリ
+        """
+        self.table_dir = table_dir or get_default_table_dir()
+        self._mmaps = []
+
+        for name, typecode in self.MOVE_TABLES:
+            setattr(self, name, self._load_or_build(name, typecode, getattr(self, f'_build_{name}')))
+
+        # スライス位置（0..494）のみのムーブテーブルは小さいのでメモリ上で作る
+        self.slice_move = array('H', (self.slice_sorted_move[(s * cubie.N_PERM_4) * N_MOVES + m] // cubie.N_PERM_4
+                                      for s in range(cubie.N_SLICE) for m in range(N_MOVES)))
+
+        for name in self.PRUNING_TABLES:
+            setattr(self, name, self._load_or_build(name, 'B', getattr(self, f'_build_{name}')))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.table_dir, f"{name}_v{TABLES_VERSION}.bin")
+
+    def _load_or_build(self, name: str, typecode: str, builder):
+        """テーブルをmmapで読み込む。存在しない場合は生成して保存する"""
+        path = self._path(name)
+        if os.path.exists(path):
+            table = self._mmap(path, typecode)
+            if table is not None:
+                return table
+        table = builder()
+        expected_size = len(table) * table.itemsize
+        os.makedirs(self.table_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            table.tofile(f)
+        os.replace(tmp_path, path)
+        loaded = self._mmap(path, typecode)
+        if loaded is None or len(loaded) * loaded.itemsize != expected_size:
+            return table
+        return loaded
+
+    def _mmap(self, path: str, typecode: str):
+        """ファイルを読み取り専用でmmapし、型付きmemoryviewを返す"""
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        self._mmaps.append(mm)
+        view = memoryview(mm)
+        return view if typecode == 'B' else view.cast(typecode)
+
+    # ========================================
+    # ムーブテーブルの生成
+    # ========================================
+
+    @staticmethod
+    def _build_move_table(size: int, setter, getter, multiply, moves=range(6)) -> array:
+        """座標sizeに対するムーブテーブル（size * 18）を生成
+
+        moves: 生成対象の面（Phase 2専用テーブルでは使用しない面の値は0のまま）
+        """
+        table = array('H', bytes(2 * size * N_MOVES))
+        cube = CubieCube()
+        for i in range(size):
+            setter(cube, i)
+            for face in moves:
+                basic = cubie.BASIC_MOVES[face]
+                for power in range(3):
+                    multiply(cube, basic)
+                    table[N_MOVES * i + 3 * face + power] = getter(cube)
+                # 4回目で元に戻す
+                multiply(cube, basic)
+        return table
+
+    def _build_twist_move(self) -> array:
+        return self._build_move_table(cubie.N_TWIST, CubieCube.set_twist, CubieCube.get_twist,
+                                      CubieCube.corner_multiply)
+
+    def _build_flip_move(self) -> array:
+        return self._build_move_table(cubie.N_FLIP, CubieCube.set_flip, CubieCube.get_flip,
+                                      CubieCube.edge_multiply)
+
+    def _build_slice_sorted_move(self) -> array:
+        return self._build_move_table(cubie.N_SLICE_SORTED, CubieCube.set_slice_sorted,
+                                      CubieCube.get_slice_sorted, CubieCube.edge_multiply)
+
+    def _build_corners_move(self) -> array:
+        return self._build_move_table(cubie.N_CORNERS, CubieCube.set_corners, CubieCube.get_corners,
+                                      CubieCube.corner_multiply)
+
+    def _build_ud_edges_move(self) -> array:
+        # U面・D面エッジの座標はPhase 2ムーブでのみ閉じているため、R/F/L/Bは半回転のみ有効
+        table = self._build_move_table(cubie.N_UD_EDGES, CubieCube.set_ud_edges, CubieCube.get_ud_edges,
+                                       CubieCube.edge_multiply, moves=(0, 3))
+        cube = CubieCube()
+        for i in range(cubie.N_UD_EDGES):
+            cube.set_ud_edges(i)
+            for face in (1, 2, 4, 5):
+                basic = cubie.BASIC_MOVES[face]
+                cube.edge_multiply(basic)
+                cube.edge_multiply(basic)
+                table[N_MOVES * i + 3 * face + 1] = cube.get_ud_edges()
+                cube.edge_multiply(basic)
+                cube.edge_multiply(basic)
+        return table
+
+    # ========================================
+    # 枝刈りテーブルの生成（幅優先探索）
+    # ========================================
+
+    @staticmethod
+    def _build_pruning_table(n_slice: int, slice_move, n_coord: int, coord_move, moves) -> array:
+        """(slice, coord)の組に対する最短手数テーブルを幅優先探索で生成"""
+        table = array('B', [_UNKNOWN]) * (n_slice * n_coord)
+        table[0] = 0
+        frontier = [0]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            append = next_frontier.append
+            for idx in frontier:
+                s, c = divmod(idx, n_coord)
+                s_base = s * N_MOVES
+                c_base = c * N_MOVES
+                for m in moves:
+                    idx2 = slice_move[s_base + m] * n_coord + coord_move[c_base + m]
+                    if table[idx2] == _UNKNOWN:
+                        table[idx2] = depth
+                        append(idx2)
+            frontier = next_frontier
+        return table
+
+    def _phase2_slice_move(self) -> array:
+        """Phase 2でのスライスエッジ並び（0..23）のムーブテーブル"""
+        return array('H', (self.slice_sorted_move[s * N_MOVES + m] if m in PHASE2_MOVES else 0
+                           for s in range(cubie.N_PERM_4) for m in range(N_MOVES)))
+
+    def _build_slice_twist_prun(self) -> array:
+        return self._build_pruning_table(cubie.N_SLICE, self.slice_move, cubie.N_TWIST,
+                                         self.twist_move, range(N_MOVES))
+
+    def _build_slice_flip_prun(self) -> array:
+        return self._build_pruning_table(cubie.N_SLICE, self.slice_move, cubie.N_FLIP,
+                                         self.flip_move, range(N_MOVES))
+
+    def _build_corners_slice_prun(self) -> array:
+        # (corners, slice)の順に並べ替えるため座標を入れ替えて生成する
+        return self._build_pruning_table(cubie.N_CORNERS, self.corners_move, cubie.N_PERM_4,
+                                         self._phase2_slice_move(), PHASE2_MOVES)
+
+    def _build_ud_edges_slice_prun(self) -> array:
+        return self._build_pruning_table(cubie.N_UD_EDGES, self.ud_edges_move, cubie.N_PERM_4,
+                                         self._phase2_slice_move(), PHASE2_MOVES)
+
+
+class TwoPhaseSolver:
+    """二段階アルゴリズムによるソルバー"""
+
+    def __init__(self, tables: TwoPhaseTables):
+        self.tables = tables
+
+    def solve(self, cube: CubieCube, max_length: int = DEFAULT_MAX_LENGTH,
+              timeout: float = DEFAULT_TIMEOUT) -> List[int]:
+        """
+        キューブを解くムーブ列を探索する
+
+        max_length以下の解が見つかった時点で返す。
+
+        Args:
+            cube: 解く対象のキューブ
+            max_length: 許容する最大手数
+            timeout: 探索打ち切りまでの秒数
+
+        Returns:
+            list: ムーブ番号のリスト
+
+        Raises:
+            TwoPhaseError: 解けない状態、または時間内に解が見つからなかった場合
+        """
+        if not cube.is_solvable():
+            raise TwoPhaseError("キューブの状態が不正です")
+
+        self._cube = cube
+        self._max_length = max_length
+        self._deadline = time.perf_counter() + timeout
+        self._best = None
+        self._path = []
+
+        t = self.tables
+        twist = cube.get_twist()
+        flip = cube.get_flip()
+        slice_sorted = cube.get_slice_sorted()
+        slice_ = slice_sorted // cubie.N_PERM_4
+        lower = max(t.slice_twist_prun[slice_ * cubie.N_TWIST + twist],
+                    t.slice_flip_prun[slice_ * cubie.N_FLIP + flip])
+
+        try:
+            for depth1 in range(lower, max_length + 1):
+                if self._search1(twist, flip, slice_, depth1, -1):
+                    break
+        except _SearchTimeout:
+            pass
+
+        if self._best is None:
+            raise TwoPhaseError("時間内に解が見つかりませんでした")
+        return self._best
+
+    def _search1(self, twist: int, flip: int, slice_: int, togo: int, last_face: int) -> bool:
+        """Phase 1の反復深化探索"""
+        t = self.tables
+        if togo == 0:
+            # Phase 1で最後に使ったムーブがPhase 2ムーブだと冗長になる
+            if self._path and self._path[-1] in PHASE2_MOVES:
+                return False
+            return self._start_phase2()
+
+        if time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        twist_move, flip_move, slice_move = t.twist_move, t.flip_move, t.slice_move
+        slice_twist_prun, slice_flip_prun = t.slice_twist_prun, t.slice_flip_prun
+        for m in range(N_MOVES):
+            face = m // 3
+            # 同じ面の連続、および逆面の順序違いを除外
+            if face == last_face or face == last_face - 3:
+                continue
+            twist2 = twist_move[twist * N_MOVES + m]
+            flip2 = flip_move[flip * N_MOVES + m]
+            slice2 = slice_move[slice_ * N_MOVES + m]
+            dist = max(slice_twist_prun[slice2 * cubie.N_TWIST + twist2],
+                       slice_flip_prun[slice2 * cubie.N_FLIP + flip2])
+            if dist >= togo:
+                continue
+            # 手前で目標に到達した場合はtogo=0まで余計な手を回さない
+            if dist == 0 and togo > 1:
+                continue
+            self._path.append(m)
+            if self._search1(twist2, flip2, slice2, togo - 1, face):
+                return True
+            self._path.pop()
+        return False
+
+    def _start_phase2(self) -> bool:
+        """Phase 1の解からPhase 2の探索を開始する"""
+        t = self.tables
+        phase1 = self._path
+        remaining = self._max_length - len(phase1)
+        if remaining < 0:
+            return False
+
+        cube = self._cube.copy().apply_moves(phase1)
+        corners = cube.get_corners()
+        ud_edges = cube.get_ud_edges()
+        slice_sorted = cube.get_slice_sorted()
+        lower = max(t.corners_slice_prun[corners * cubie.N_PERM_4 + slice_sorted],
+                    t.ud_edges_slice_prun[ud_edges * cubie.N_PERM_4 + slice_sorted])
+        if lower > remaining:
+            return False
+
+        last_face = phase1[-1] // 3 if phase1 else -1
+        self._path2 = []
+        for depth2 in range(lower, remaining + 1):
+            if self._search2(corners, ud_edges, slice_sorted, depth2, last_face):
+                self._best = phase1 + self._path2
+                return True
+        return False
+
+    def _search2(self, corners: int, ud_edges: int, slice_sorted: int, togo: int, last_face: int) -> bool:
+        """Phase 2の反復深化探索"""
+        if togo == 0:
+            return corners == 0 and ud_edges == 0 and slice_sorted == 0
+        t = self.tables
+        corners_move, ud_edges_move, slice_sorted_move = t.corners_move, t.ud_edges_move, t.slice_sorted_move
+        corners_slice_prun, ud_edges_slice_prun = t.corners_slice_prun, t.ud_edges_slice_prun
+        for m in PHASE2_MOVES:
+            face = m // 3
+            if face == last_face or face == last_face - 3:
+                continue
+            corners2 = corners_move[corners * N_MOVES + m]
+            ud_edges2 = ud_edges_move[ud_edges * N_MOVES + m]
+            slice2 = slice_sorted_move[slice_sorted * N_MOVES + m]
+            dist = max(corners_slice_prun[corners2 * cubie.N_PERM_4 + slice2],
+                       ud_edges_slice_prun[ud_edges2 * cubie.N_PERM_4 + slice2])
+            if dist >= togo:
+                continue
+            self._path2.append(m)
+            if self._search2(corners2, ud_edges2, slice2, togo - 1, face):
+                return True
+            self._path2.pop()
+        return False
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def invert_moves(moves: List[int]) -> List[int]:
+    """ムーブ番号の列の逆手順を返す（R -> R', R2 -> R2）"""
+    return [3 * (m // 3) + (2 - m % 3) for m in reversed(moves)]
+
+
+def within_one_move(cube: CubieCube) -> bool:
+    """完成状態、または1手で完成する状態かどうか（18通りのムーブを実際に試す）"""
+    if cube.is_solved():
+        return True
+    return any(cube.copy().apply_moves([m]).is_solved() for m in range(N_MOVES))
+
+
+# グローバルインスタンス（テーブル読み込みは初回のみ）
+_solver_instance: Optional[TwoPhaseSolver] = None
+_solver_lock = threading.Lock()
+
+
+def get_solver() -> TwoPhaseSolver:
+    """ソルバーのシングルトンインスタンスを取得（初回はテーブルの読み込み・生成を行う）"""
+    global _solver_instance
+    with _solver_lock:
+        if _solver_instance is None:
+            _solver_instance = TwoPhaseSolver(TwoPhaseTables())
+    return _solver_instance
+
+
+def generate_random_state_scramble(rng: Optional[random.Random] = None,
+                                   max_length: int = DEFAULT_MAX_LENGTH) -> str:
+    """
+    ランダムステートスクランブルを生成する
+
+    Args:
+        rng: 乱数生成器（再現性が必要な場合に指定）
+        max_length: スクランブルの最大手数
+
+    Returns:
+        str: スクランブル文字列
+    """
+    solver = get_solver()
+    while True:
+        cube = cubie.random_cube(rng)
+        try:
+            solution = solver.solve(cube, max_length=max_length)
+        except TwoPhaseError:
+            # 時間内に解けなかった状態は捨てて引き直す。
+            # 解くのに時間がかかる状態ほど選ばれにくくなるため、厳密な一様分布ではない
+            continue
+        # WCA規則と同様、完成までに2手以上かかる状態のみ採用する。
+        # 二段階法の解は最短とは限らず手数は距離の下限にならないため、1手以内かどうかは直接確認する
+        if not within_one_move(cube):
+            return cubie.moves_to_string(invert_moves(solution))
@@ -0,0 +1,147 @@
+"""
+patterns.json / algorithms.json の整合性検証コマンド
+
+各アルゴリズムが対応するパターンのケースを実際に解くことをシミュレーターで確認する。
+ケースの状態はセットアップムーブの逆手順を完成状態に適用して作る
+（setup_movesには標準アルゴリズムと同じ手順が登録されているため）。
+判定はAUF（U面の調整）と持ち替えを除いて行う。
+
+    OLL: アルゴリズム適用後にF2Lが崩れずU面が1色になること
+    PLL: アルゴリズム適用後にAUFを除いて完成すること
+
+使い方:
+    python -m src.validate_catalog
+"""
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from . import cube_sim as cs
+from .notation import NotationError
+from .patterns import PatternCategory, PatternDatabase, get_pattern_database
+
+
+@dataclass
+class ValidationMismatch:
+    """検証で見つかった不整合"""
+    pattern_id: str
+    algorithm_id: Optional[str]
+    reason: str
+
+    def __str__(self) -> str:
+        target = self.algorithm_id or self.pattern_id
+        return f"{target}: {self.reason}"
+
+
+# カテゴリごとの判定関数（アルゴリズム適用後の状態に対して）
+_SOLVED_CHECKS = {
+    PatternCategory.OLL: cs.is_oll_solved,
+    PatternCategory.PLL: cs.is_solved_modulo_auf,
+}
+
+
+def _case_is_valid(category: PatternCategory, case_state: np.ndarray) -> bool:
+    """ケースの状態がカテゴリの前提（OLL: F2L完成、PLL: OLL完成）を満たすか"""
+    normalized = cs.normalize_orientation(case_state[None, :])[0]
+    if not np.all(normalized[cs.F2L_MASK] == cs.SOLVED[cs.F2L_MASK]):
+        return False
+    if category == PatternCategory.PLL:
+        return bool(np.all(normalized[cs.U_FACE] == cs.U_COLOR))
+    return True
+
+
+def validate_catalog(pattern_db: Optional[PatternDatabase] = None) -> List[ValidationMismatch]:
+    """
+    全アルゴリズムが対応パターンを解くか検証する
+
+    Args:
+        pattern_db: 検証対象（省略時は共有インスタンス）
+
+    Returns:
+        list: 見つかった不整合のリスト（問題がなければ空）
+    """
+    db = pattern_db or get_pattern_database()
+    mismatches: List[ValidationMismatch] = []
+
+    # ケースの状態を作成
+    case_states = {}
+    for pattern in db.get_all_patterns():
+        if pattern.category not in _SOLVED_CHECKS:
+            continue
+        try:
+            case_state = cs.apply(cs.SOLVED, pattern.compiled_setup_moves.inverse())
+        except NotationError as e:
+            mismatches.append(ValidationMismatch(pattern.id, None, f"invalid setup notation ({e.message})"))
+            continue
+        if not _case_is_valid(pattern.category, case_state):
+            mismatches.append(ValidationMismatch(
+                pattern.id, None, f"setup does not produce a {pattern.category.value} case"))
+        case_states[pattern.id] = case_state
+        if not db.get_algorithms_for_pattern(pattern.id):
+            mismatches.append(ValidationMismatch(pattern.id, None, "no algorithms"))
+
+    # (アルゴリズム, 事前AUF)の組ごとに初期状態と手順の置換を並べ、カテゴリ単位で一括判定
+    batches = {category: ([], [], []) for category in _SOLVED_CHECKS}
+    for algorithm in db.get_all_algorithms():
+        pattern = db.get_pattern(algorithm.pattern_id)
+        if pattern is None:
+            mismatches.append(ValidationMismatch(algorithm.pattern_id, algorithm.id, "unknown pattern"))
+            continue
+        if pattern.id not in case_states:
+            continue
+        try:
+            perm = cs.sequence_permutation(algorithm.compiled_moves)
+        except NotationError as e:
+            mismatches.append(ValidationMismatch(pattern.id, algorithm.id, f"invalid notation ({e.message})"))
+            continue
+        states, perms, owners = batches[pattern.category]
+        for auf in cs.AUF_PERMS:
+            states.append(case_states[pattern.id])
+            perms.append(auf[perm])
+            owners.append(algorithm)
+
+    for category, (states, perms, owners) in batches.items():
+        if not owners:
+            continue
+        results = _SOLVED_CHECKS[category](cs.apply_each(np.array(states), np.array(perms)))
+        # 事前AUFのいずれか1つで解ければよい
+        solved = results.reshape(-1, len(cs.AUF_PERMS)).any(axis=1)
+        for algorithm, ok in zip(owners[::len(cs.AUF_PERMS)], solved):
+            if not ok:
+                mismatches.append(ValidationMismatch(
+                    algorithm.pattern_id, algorithm.id, f"does not solve {algorithm.pattern_id}"))
+
+    return mismatches
+
+
+def main() -> int:
+    print("=" * 60)
+    print("パターン・アルゴリズム整合性検証")
+    print("=" * 60)
+
+    db = get_pattern_database()
+    start = time.perf_counter()
+    mismatches = validate_catalog(db)
+    elapsed = time.perf_counter() - start
+
+    print()
+    for category in _SOLVED_CHECKS:
+        print(f"✓ {category.value}: {db.get_category_count(category)}パターン")
+    print(f"✓ アルゴリズム数: {len(db.get_all_algorithms())}")
+    print(f"✓ 検証時間: {elapsed * 1000:.1f} ms")
+
+    if not mismatches:
+        print("\n✅ 不整合はありません")
+        return 0
+
+    print(f"\n✗ {len(mismatches)}件の不整合:")
+    for mismatch in mismatches:
+        print(f"  - {mismatch}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
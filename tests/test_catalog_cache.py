@@ -0,0 +1,112 @@
+"""
+マスターデータのバイナリキャッシュのテスト
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.catalog_cache import open_catalog_cache, write_catalog_cache
+from src.patterns import CATALOG_CACHE_FILE, Pattern, PatternCategory, PatternDatabase, get_default_data_dir
+
+
+def _copy_sources(tmp_dir: str):
+    for name in ('patterns.json', 'algorithms.json'):
+        shutil.copy2(os.path.join(get_default_data_dir(), name), os.path.join(tmp_dir, name))
+
+
+def test_cache_round_trip():
+    """JSONからの読み込み結果とキャッシュからの読み込み結果が一致すること"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _copy_sources(tmp_dir)
+        from_json = PatternDatabase(data_dir=tmp_dir)
+        assert from_json._catalog is None
+        assert os.path.exists(os.path.join(tmp_dir, CATALOG_CACHE_FILE)), "Cache should be written"
+
+        from_cache = PatternDatabase(data_dir=tmp_dir)
+        assert from_cache._catalog is not None, "Second load should use the cache"
+        assert from_cache._patterns.materialized_count == 0, "Objects should be created lazily"
+
+        assert list(from_cache.get_all_patterns()) == list(from_json.get_all_patterns())
+        assert list(from_cache.get_all_algorithms()) == list(from_json.get_all_algorithms())
+        assert from_cache.get_available_categories() == from_json.get_available_categories()
+        assert from_cache.get_default_algorithm("PLL_Ua") == from_json.get_default_algorithm("PLL_Ua")
+    print("✓ キャッシュの読み込み結果がJSONと一致")
+
+
+def test_stale_cache_falls_back_to_json():
+    """ソースが変更されたらJSONから読み直してキャッシュを更新すること"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _copy_sources(tmp_dir)
+        PatternDatabase(data_dir=tmp_dir)
+
+        patterns_path = os.path.join(tmp_dir, 'patterns.json')
+        with open(patterns_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['patterns'][0]['name'] = "Renamed"
+        with open(patterns_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+        db = PatternDatabase(data_dir=tmp_dir)
+        assert db._catalog is None, "Stale cache should not be used"
+        assert db.get_all_patterns()[0].name == "Renamed"
+
+        db = PatternDatabase(data_dir=tmp_dir)
+        assert db._catalog is not None, "Cache should be rebuilt"
+        assert db.get_all_patterns()[0].name == "Renamed"
+    print("✓ 古いキャッシュはJSONにフォールバック")
+
+
+def test_touched_source_reuses_cache():
+    """内容が同じならmtimeが変わってもハッシュ一致でキャッシュを使うこと"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _copy_sources(tmp_dir)
+        PatternDatabase(data_dir=tmp_dir)
+        patterns_path = os.path.join(tmp_dir, 'patterns.json')
+        st = os.stat(patterns_path)
+        os.utime(patterns_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        db = PatternDatabase(data_dir=tmp_dir)
+        assert db._catalog is not None, "Unchanged content should keep the cache"
+    print("✓ 内容が同じならキャッシュを再利用")
+
+
+def test_corrupt_cache_is_ignored():
+    """壊れたキャッシュは無視してJSONから読み込むこと"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _copy_sources(tmp_dir)
+        with open(os.path.join(tmp_dir, CATALOG_CACHE_FILE), 'wb') as f:
+            f.write(b"SCPC broken")
+        db = PatternDatabase(data_dir=tmp_dir)
+        assert db._catalog is None
+        assert db.get_pattern_count() > 0
+    print("✓ 壊れたキャッシュを無視")
+
+
+def test_subset_round_trip():
+    """サブセットがキャッシュに保存されること"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'patterns.json')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        pattern = Pattern(id="ZBLL_T_1", name="ZBLL T1", category=PatternCategory.ZBLL,
+                          setup_moves="R U R'", description="", difficulty=3, subset="T")
+        cache_path = os.path.join(tmp_dir, CATALOG_CACHE_FILE)
+        assert write_catalog_cache(cache_path, [source], [pattern], [])
+        catalog = open_catalog_cache(cache_path, [source])
+        assert catalog.patterns["ZBLL_T_1"] == pattern
+        assert catalog.pattern_keys() == [("ZBLL_T_1", PatternCategory.ZBLL, "T")]
+    print("✓ サブセットの保存")
+
+
+if __name__ == "__main__":
+    test_cache_round_trip()
+    test_stale_cache_falls_back_to_json()
+    test_touched_source_reuses_cache()
+    test_corrupt_cache_is_ignored()
+    test_subset_round_trip()
+    print("\n✅ All catalog cache tests passed!\n")
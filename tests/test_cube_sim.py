@@ -0,0 +1,73 @@
+"""
+キューブシミュレーターとマスターデータ検証のテスト
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cube_sim as cs
+from src.patterns import Algorithm, PatternDatabase
+from src.validate_catalog import validate_catalog
+
+
+def test_move_orders():
+    """基本的な手順の周期"""
+    for moves, order in (("R", 4), ("r", 4), ("M", 4), ("x", 4), ("R U R' U'", 6),
+                         ("R U R' U R U2 R'", 6), ("R U R' U' R' F R2 U' R' U' R U R' F'", 2)):
+        perm = cs.sequence_permutation(moves)
+        state = cs.SOLVED
+        for _ in range(order - 1):
+            state = state[perm]
+            assert not np.array_equal(state, cs.SOLVED), f"{moves} has order below {order}"
+        assert np.array_equal(state[perm], cs.SOLVED), f"{moves} should have order {order}"
+    print("✓ 手順の周期が正しい")
+
+
+def test_wide_slice_and_rotation_identities():
+    """ワイド・スライス・持ち替えの関係（r = R M', x = R M' L'）"""
+    assert np.array_equal(cs.apply(cs.SOLVED, "r"), cs.apply(cs.SOLVED, "R M'"))
+    assert np.array_equal(cs.apply(cs.SOLVED, "x"), cs.apply(cs.SOLVED, "R M' L'"))
+    assert np.array_equal(cs.apply(cs.SOLVED, "y"), cs.apply(cs.SOLVED, "U E' D'"))
+    assert np.array_equal(cs.apply(cs.SOLVED, "z"), cs.apply(cs.SOLVED, "F S B'"))
+    assert cs.is_solved(cs.apply(cs.SOLVED, "x y2 z'")[None, :])[0], "Rotations should count as solved"
+    print("✓ ワイド・スライス・持ち替えの関係")
+
+
+def test_batch_apply():
+    """複数状態への一括適用"""
+    states = cs.states_from(["R", "U", "F2", ""])
+    assert states.shape == (4, cs.N_STICKERS)
+    restored = cs.apply_each(states, np.array([cs.sequence_permutation(m) for m in ("R'", "U'", "F2", "")]))
+    assert cs.is_solved(restored).all()
+    print("✓ 一括適用")
+
+
+def test_validate_catalog():
+    """マスターデータ検証が1秒未満で完了し、同梱のマスターデータに不整合がなく、壊れた手順を検出すること"""
+    db = PatternDatabase()
+    start = time.perf_counter()
+    mismatches = validate_catalog(db)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0, f"Validation took {elapsed:.2f}s"
+    print(f"✓ 検証時間: {elapsed * 1000:.1f} ms（不整合 {len(mismatches)}件）")
+    assert not mismatches, "\n".join(str(mismatch) for mismatch in mismatches)
+
+    broken = Algorithm(id="PLL_Ua_broken", pattern_id="PLL_Ua", name="Broken", moves="R U R' U'")
+    db.add_patterns(algorithms=[broken])
+    found = [m.algorithm_id for m in validate_catalog(db)]
+    assert "PLL_Ua_broken" in found, "Broken algorithm should be reported"
+    assert "PLL_Ua_standard" not in found, "Standard algorithm should pass"
+    print("✓ 壊れた手順を検出")
+
+
+if __name__ == "__main__":
+    test_move_orders()
+    test_wide_slice_and_rotation_identities()
+    test_batch_apply()
+    test_validate_catalog()
+    print("\n✅ All cube simulator tests passed!\n")
@@ -0,0 +1,251 @@
+"""
+データアクセス層（クエリの計測）のテスト
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import ConnectionManager, QueryMonitor, QueryStats, connect
+from src.stats import SpeedcubeStats
+
+
+def _database(monitor=None):
+    db = connect(":memory:", monitor)
+    db.execute("""
+        CREATE TABLE pattern_solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_id TEXT NOT NULL,
+            pattern_name TEXT NOT NULL, pattern_category TEXT NOT NULL, solve_time REAL NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, session_id TEXT, practice_mode TEXT,
+            set_id TEXT, algorithm_id TEXT)
+    """)
+    db.execute("CREATE INDEX idx_pattern_solves_pattern_id ON pattern_solves(pattern_id)")
+    db.executemany(
+        "INSERT INTO pattern_solves (pattern_id, pattern_name, pattern_category, solve_time) VALUES (?, '', '', ?)",
+        [(f"p{i % 10}", 1.0 + i % 7) for i in range(200)])
+    db.commit()
+    return db
+
+
+def test_query_stats_histogram():
+    """所要時間を2のべき乗の区間に数え、パーセンタイルを区間の上限で返すこと"""
+    stats = QueryStats()
+    for elapsed in [0.000003] * 90 + [0.0005] * 10:
+        stats.add(elapsed)
+    assert stats.calls == 100 and stats.max == 0.0005
+    assert stats.histogram[2] == 90  # 3µs は [2, 4) µs
+    assert stats.histogram[9] == 10  # 500µs は [256, 512) µs
+    assert stats.percentile(0.5) == 4e-6
+    assert stats.percentile(0.95) == 0.0005  # 区間の上限（512µs）より最大値が小さい
+    print("✓ 所要時間のヒストグラム")
+
+
+def test_queries_grouped_by_statement():
+    """空白の違うSQL文を同じ文として集計し、結果を読み込みの途中でも他のクエリを実行できること"""
+    db = _database()
+    for pattern_id in ("p1", "p2", "p3"):
+        db.fetchone("SELECT COUNT(*)  FROM pattern_solves\n WHERE pattern_id = ?", (pattern_id,))
+    db.fetchone("SELECT COUNT(*) FROM pattern_solves WHERE pattern_id = ?", ("p4",))
+    stats = db.monitor.queries["SELECT COUNT(*) FROM pattern_solves WHERE pattern_id = ?"]
+    assert stats.calls == 4
+
+    rows = 0
+    for _ in db.iterate("SELECT pattern_id FROM pattern_solves ORDER BY id", batch_size=16):
+        if rows == 0:
+            assert db.scalar("SELECT MAX(solve_time) FROM pattern_solves") == 7.0
+        rows += 1
+    assert rows == 200
+    assert db.monitor.queries["SELECT pattern_id FROM pattern_solves ORDER BY id"].calls == 1
+    print("✓ SQL文ごとの集計と読み込み中のクエリ")
+
+
+def test_slow_query_plan():
+    """遅いクエリは初回のみ実行計画を取得し、以降は同じ計画で記録すること"""
+    db = _database()
+    db.monitor.slow_query = 0  # すべてのクエリを遅いクエリとして記録する
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        db.fetchall("SELECT solve_time FROM pattern_solves WHERE pattern_id = ?", ("p1",))
+        db.fetchall("SELECT solve_time FROM pattern_solves WHERE pattern_id = ?", ("p2",))
+        db.fetchall("SELECT solve_time FROM pattern_solves WHERE solve_time > ?", (3.0,))
+    slow = list(db.monitor.slow_queries)
+    assert len(slow) == 3
+    assert "idx_pattern_solves_pattern_id" in slow[0].plan and slow[1].plan == slow[0].plan
+    assert "SCAN" in slow[2].plan
+    assert output.getvalue().count("実行計画") == 2
+    print("✓ 遅いクエリの実行計画")
+
+
+def test_queries_per_frame():
+    """フレームごとのクエリ数を数え、多すぎるフレームでは最も多いSQL文を1回だけ出力すること"""
+    db = _database(QueryMonitor(frame_query_warning=5))
+    db.monitor.end_frame()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for _ in range(2):
+            for i in range(10):
+                db.fetchone("SELECT MIN(solve_time) FROM pattern_solves WHERE pattern_id = ?", (f"p{i}",))
+            db.fetchone("SELECT COUNT(*) FROM pattern_solves")
+            assert db.monitor.end_frame() == 11
+        assert db.monitor.end_frame() == 0
+    assert output.getvalue().count("1フレームで11件のクエリ（10件: SELECT MIN(solve_time)") == 1
+    assert db.monitor.frame_counts[11] == 2
+
+    summary = db.monitor.summary()
+    json.dumps(summary)
+    assert summary["queries_per_frame"]["11"] == 2 and summary["frames"] == 4
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "query_profile.json")
+        db.monitor.save(path)
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["frames"] == 4
+    assert "1フレームの最大クエリ数: 11" in db.monitor.report()
+    print("✓ フレームごとのクエリ数")
+
+
+def test_background_queries_not_in_frame():
+    """バックグラウンドのスレッド（同期・先読み）のクエリはフレームのクエリ数に含めないこと"""
+    db = _database(QueryMonitor(frame_query_warning=5))
+    db.monitor.end_frame()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        db.fetchone("SELECT COUNT(*) FROM pattern_solves")
+        sync = threading.Thread(target=lambda: [db.monitor.record("SELECT * FROM results", 0.0) for _ in range(20)])
+        sync.start()
+        sync.join()
+        assert db.monitor.end_frame() == 1
+    assert "1フレームで" not in output.getvalue()
+    assert db.monitor.queries["SELECT * FROM results"].calls == 20  # 所要時間の集計には含める
+    assert 21 not in db.monitor.frame_counts
+    print("✓ バックグラウンドのクエリはフレームに含めない")
+
+def test_pattern_summaries_single_query():
+    """パターン一覧の統計を1回のクエリで取得し、パターンごとの取得と一致すること"""
+    db = _database()
+
+    class _Logger:
+        pass
+    logger = _Logger()
+    logger.db = db
+    stats = SpeedcubeStats()
+    stats.logger = logger
+
+    pattern_ids = [f"p{i}" for i in range(10)] + ["missing"]
+    db.monitor.end_frame()
+    summaries = stats.get_pattern_summaries(pattern_ids)
+    assert db.monitor.end_frame() == 1
+    for pattern_id in pattern_ids:
+        expected = (stats.get_pattern_count(pattern_id), stats.get_pattern_best(pattern_id))
+        assert summaries.get(pattern_id, (0, None)) == expected
+    assert stats.get_pattern_summaries([]) == {}
+    print("✓ パターン一覧の統計（1回のクエリ）")
+
+
+def _manager(tmpdir, readers=2):
+    manager = ConnectionManager(os.path.join(tmpdir, "wal.db"), readers=readers)
+    with manager.write() as db:
+        db.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, time_result REAL)")
+        db.executemany("INSERT INTO results (time_result) VALUES (?)", [(float(i),) for i in range(10)])
+    return manager
+
+
+def test_read_during_write():
+    """書き込みのトランザクション中も、読み込みはコミット済みの記録を待たずに読めること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _manager(tmpdir)
+        assert manager.writer.fetchone("PRAGMA journal_mode")[0] == "wal"
+        with manager.write() as db:
+            db.execute("INSERT INTO results (time_result) VALUES (99.0)")
+            assert manager.scalar("SELECT COUNT(*) FROM results") == 10
+            # 別のスレッドからも読める（check_same_thread のエラーにならない）
+            counts = []
+            thread = threading.Thread(target=lambda: counts.append(manager.scalar("SELECT COUNT(*) FROM results")))
+            thread.start()
+            thread.join()
+            assert counts == [10]
+        assert manager.scalar("SELECT COUNT(*) FROM results") == 11
+        manager.close()
+    print("✓ 書き込み中の読み込み")
+
+
+def test_nested_write():
+    """入れ子の書き込みは外側でまとめてコミットし、例外の場合はすべてロールバックすること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _manager(tmpdir)
+        commits = manager.monitor.queries["COMMIT"].calls
+        with manager.write() as db:
+            db.execute("INSERT INTO results (time_result) VALUES (1.0)")
+            with manager.write() as inner:
+                inner.execute("INSERT INTO results (time_result) VALUES (2.0)")
+        assert manager.monitor.queries["COMMIT"].calls == commits + 1
+
+        try:
+            with manager.write() as db:
+                db.execute("INSERT INTO results (time_result) VALUES (3.0)")
+                with manager.write() as inner:
+                    inner.execute("INSERT INTO results (time_result) VALUES (4.0)")
+                raise RuntimeError("失敗")
+        except RuntimeError:
+            pass
+        assert manager.scalar("SELECT COUNT(*) FROM results") == 12
+        manager.close()
+    print("✓ 入れ子の書き込みとロールバック")
+
+
+def test_reader_per_thread():
+    """スレッドごとに同じ接続を割り当て、終了したスレッドや返却された接続を再利用すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _manager(tmpdir, readers=2)
+        main = manager.read()
+        assert manager.read() is main and main is not manager.writer
+
+        # 上限まで割り当てた後は、終了したスレッドの接続を引き継ぐ
+        assigned = []
+        for _ in range(3):
+            thread = threading.Thread(target=lambda: assigned.append(manager.read()))
+            thread.start()
+            thread.join()
+        assert main not in assigned and len(set(map(id, assigned))) == 1
+        assert manager._opened == 2
+
+        # 返却された接続は待っているスレッドに渡す
+        release = threading.Event()
+
+        def hold():
+            manager.read()
+            release.wait()
+            manager.release()
+        holder = threading.Thread(target=hold)
+        holder.start()
+        waiter = threading.Thread(target=lambda: assigned.append(manager.read()))
+        waiter.start()
+        waiter.join(timeout=0.3)
+        assert waiter.is_alive()  # 空きがないため待っている
+        release.set()
+        waiter.join(timeout=1.0)
+        holder.join()
+        assert not waiter.is_alive() and manager._opened == 2
+        manager.close()
+    print("✓ スレッドごとの読み込み用接続")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("データアクセス層のテスト")
+    print("=" * 60)
+    test_query_stats_histogram()
+    test_queries_grouped_by_statement()
+    test_slow_query_plan()
+    test_queries_per_frame()
+    test_background_queries_not_in_frame()
+    test_pattern_summaries_single_query()
+    test_read_during_write()
+    test_nested_write()
+    test_reader_per_thread()
+    print("\n✅ すべてのテストに合格しました")
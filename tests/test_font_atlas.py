@@ -0,0 +1,184 @@
+"""
+グリフアトラスの作成（BDFの解析・画像とメトリクス表の書き出し）と描画のテスト
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.font_atlas import (ATLAS_BACKGROUND, ATLAS_INK, GlyphAtlasFont, build_atlas,
+                            collect_ui_chars, draw_text, parse_bdf, write_png)
+
+# 幅4・高さ6（ベースラインより下に1ピクセル）のフォント。'A'と'あ'（字送り8）と'B'を含む
+_BDF = """STARTFONT 2.1
+FONT -test-fixed
+SIZE 6 75 75
+FONTBOUNDINGBOX 8 6 0 -1
+STARTPROPERTIES 2
+FONT_ASCENT 5
+FONT_DESCENT 1
+ENDPROPERTIES
+CHARS 3
+STARTCHAR A
+ENCODING 65
+SWIDTH 500 0
+DWIDTH 5 0
+BBX 4 5 0 0
+BITMAP
+60
+90
+F0
+90
+90
+ENDCHAR
+STARTCHAR B
+ENCODING 66
+SWIDTH 500 0
+DWIDTH 5 0
+BBX 4 5 0 0
+BITMAP
+E0
+90
+E0
+90
+E0
+ENDCHAR
+STARTCHAR hiragana_a
+ENCODING 12354
+SWIDTH 1000 0
+DWIDTH 8 0
+BBX 8 6 0 -1
+BITMAP
+10
+FE
+24
+7C
+A6
+58
+ENDCHAR
+ENDFONT
+"""
+
+
+def _write_bdf(tmpdir):
+    path = os.path.join(tmpdir, "test.bdf")
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(_BDF)
+    return path
+
+
+def _read_png(path):
+    """write_pngが書き出したグレースケールPNGを行のリストに戻す"""
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    pos, idat = 8, b""
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        if kind == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    raw = zlib.decompress(idat)
+    stride = width + 1
+    return [raw[y * stride + 1:(y + 1) * stride] for y in range(height)]
+
+
+class _Canvas:
+    """描画呼び出しを記録する描画先"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name,) + args)
+
+
+def test_parse_bdf_only_requested_chars():
+    """指定した文字のグリフのみ読み込み、アセントと行の高さを取得すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ascent, line_height, glyphs = parse_bdf(_write_bdf(tmpdir), "Aあ")
+    assert (ascent, line_height) == (5, 6)
+    assert sorted(glyphs) == ["A", "あ"]
+    a = glyphs["A"]
+    assert [[a.pixel(x, y) for x in range(4)] for y in range(2)] == [
+        [False, True, True, False], [True, False, False, True]]
+    assert glyphs["あ"].advance == 8 and glyphs["あ"].y_offset == -1
+    print("✓ BDFの解析（指定した文字のみ）")
+
+
+def test_build_and_write_atlas():
+    """アトラス画像とメトリクス表の位置・上端のオフセットが一致すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bdf = _write_bdf(tmpdir)
+        pixels, metrics = build_atlas({"middle": bdf, "large": bdf}, "ABあ")
+        png = os.path.join(tmpdir, "atlas.png")
+        write_png(png, pixels)
+        rows = _read_png(png)
+
+    assert metrics["height"] == len(rows) == 12  # フォント2つ分（各1行）
+    middle = metrics["fonts"]["middle"]["glyphs"]
+    large = metrics["fonts"]["large"]["glyphs"]
+    u, v, w, h, x_offset, top, advance = middle["A"]
+    assert (w, h, top, advance) == (4, 5, 0, 5)
+    # 'A'の1行目（.XX.）が画像の同じ位置にある
+    assert [rows[v][u + x] for x in range(4)] == [0, 255, 255, 0]
+    assert {p for row in pixels for p in row} == {ATLAS_BACKGROUND, ATLAS_INK}
+    # ベースラインより下にはみ出すグリフは上端のオフセットで位置を合わせる
+    assert middle["あ"][5] == 0 and middle["あ"][3] == 6
+    assert large["A"][1] == 6
+    json.dumps(metrics)
+    print("✓ アトラス画像とメトリクス表")
+
+
+def test_collect_ui_chars():
+    """UIの文字列とマスターデータの文字を含み、docstringの文字は含まないこと"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    chars = collect_ui_chars(os.path.join(root, "src"), os.path.join(root, "data"))
+    assert "A" in chars and " " in chars and "★" in chars and "☆" in chars
+    assert "描" not in chars  # 描画処理のdocstringのみに含まれる文字
+    print(f"✓ UIで使う文字: {len(chars)}文字")
+
+
+def test_draw_and_fallback():
+    """アトラスの文字は1文字ずつ転送し、アトラスにない文字を含む文字列はBDFフォントで描画すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _, metrics = build_atlas({"middle": _write_bdf(tmpdir)}, "AB")
+    loaded = []
+    font = GlyphAtlasFont("atlas", metrics["fonts"]["middle"], lambda: loaded.append(1) or "bdf")
+
+    canvas = _Canvas()
+    draw_text(canvas, 10, 20, "AB", 3, font)
+    assert canvas.calls[0] == ("pal", ATLAS_INK, 3) and canvas.calls[-1] == ("pal",)
+    blts = [call for call in canvas.calls if call[0] == "blt"]
+    assert [(call[1], call[2]) for call in blts] == [(10, 20), (15, 20)]
+    assert all(call[3] == "atlas" and call[-1] == ATLAS_BACKGROUND for call in blts)
+    assert loaded == []
+
+    canvas = _Canvas()
+    draw_text(canvas, 0, 0, "Aあ", 3, font)
+    draw_text(canvas, 0, 0, "Bあ", 3, font)
+    assert canvas.calls == [("text", 0, 0, "Aあ", 3, "bdf"), ("text", 0, 0, "Bあ", 3, "bdf")]
+    assert loaded == [1]  # BDFフォントは初回のみ読み込む
+
+    canvas = _Canvas()
+    draw_text(canvas, 0, 0, "AB", 3)
+    assert canvas.calls == [("text", 0, 0, "AB", 3)]
+    print("✓ アトラスからの描画とBDFフォントへのフォールバック")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("グリフアトラスのテスト")
+    print("=" * 60)
+    test_parse_bdf_only_requested_chars()
+    test_build_and_write_atlas()
+    test_collect_ui_chars()
+    test_draw_and_fallback()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,213 @@
+"""
+フレームレートによらない状態遷移のテスト
+
+同じキー入力の台本（押し始め・離す時刻を秒で指定）を30/60/120FPSで再生し、
+状態ハンドラの遷移の順序・時刻、記録されるタイム、カウントダウン音の回数が
+フレームレートによらず一致することを確認する。
+
+Pyxelのウィンドウを作らずにフレームを進めるため、入力と時刻を台本から返す
+最小限のpyxelモジュールでハンドラを読み込む（読み込み後は元のモジュールに戻す）。
+"""
+import importlib
+import os
+import sys
+import types
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import GameConfig as GC
+from src.constants import SoundConfig as SC
+from src.states import TimerState
+
+FRAME_RATES = (30, 60, 120)
+START_TIME = 100.0  # 時刻の起点（ホールド開始時刻の0は未ホールドを表すため0以外）
+
+
+class _ScriptedPyxel(types.ModuleType):
+    """台本どおりの入力を返すpyxelモジュール"""
+
+    def __init__(self):
+        super().__init__("pyxel")
+        self.frame_count = 0
+        self.now = 0.0
+        self.script = []
+        self.previous_keys = set()
+        self.sounds = []
+
+    def __getattr__(self, name):
+        if name.startswith("KEY_"):
+            return name
+        raise AttributeError(name)
+
+    def held_keys(self, t):
+        return {key for key, start, end in self.script if start <= t < end}
+
+    def btn(self, key):
+        return key in self.held_keys(self.now)
+
+    def btnp(self, key, hold=0, repeat=0):
+        return self.btn(key) and key not in self.previous_keys
+
+    def play(self, channel, sound):
+        self.sounds.append(sound)
+
+    def stop(self, channel=None):
+        pass
+
+
+def _load_handlers(fake_pyxel):
+    """偽のpyxelでstate_handlersを読み込む（sys.modulesは元に戻す）"""
+    saved = {name: sys.modules.get(name) for name in ("pyxel", "src.state_handlers")}
+    sys.modules["pyxel"] = fake_pyxel
+    sys.modules.pop("src.state_handlers", None)
+    try:
+        return importlib.import_module("src.state_handlers")
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+class _App:
+    """通常モードのタイマーに必要な属性のみを持つアプリケーションの代わり"""
+
+    def __init__(self, fps, fake_pyxel):
+        self.fps = fps
+        self.clock = lambda: fake_pyxel.now
+        self.state = TimerState.READY
+        self.space_hold_start = 0
+        self.s_key_hold_start = 0
+        self.countdown_start = 0
+        self.countdown_elapsed = 0.0
+        self.start_time = 0
+        self.current_time = 0.0
+        self.finish_time = 0
+        self.sync_result = None
+        self.sync_thread = None
+        self.sync_end_time = 0
+        self.current_pattern = None
+        self.scramble = "R U"
+        self.saved_times = []
+        self.scramble_pool = types.SimpleNamespace(next=lambda: "R U")
+        self.stats = types.SimpleNamespace(update_stats=lambda: None, record_solve=lambda *args: None)
+        self.logger = types.SimpleNamespace(
+            save_result=lambda time_result, scramble, penalty: self.saved_times.append(time_result),
+            sync_data=lambda: (True, "synced"),
+            db=types.SimpleNamespace(release=lambda: None))
+
+
+def run_script(fps, script, duration):
+    """
+    台本を指定のフレームレートで再生する
+
+    Returns:
+        (遷移のリスト[(状態, 起点からの時刻)], 記録されたタイム, カウントダウン音の回数)
+    """
+    fake_pyxel = _ScriptedPyxel()
+    fake_pyxel.script = [(key, START_TIME + start, START_TIME + end) for key, start, end in script]
+    handlers = _load_handlers(fake_pyxel)
+    app = _App(fps, fake_pyxel)
+    manager = handlers.StateHandlerManager(app)
+
+    transitions = [(app.state, 0.0)]
+    for frame in range(int(duration * fps)):
+        fake_pyxel.frame_count = frame
+        fake_pyxel.now = START_TIME + frame / fps
+        manager.update()
+        if app.sync_thread is not None:
+            app.sync_thread.join()  # 同期処理は1フレーム内に終わるものとする
+        fake_pyxel.previous_keys = fake_pyxel.held_keys(fake_pyxel.now)
+        if app.state != transitions[-1][0]:
+            transitions.append((app.state, fake_pyxel.now - START_TIME))
+    beeps = fake_pyxel.sounds.count(SC.COUNTDOWN_SOUND)
+    return transitions, app.saved_times, beeps
+
+
+def _assert_same_at_all_rates(script, duration):
+    """
+    全フレームレートで遷移の順序が一致し、時刻・タイムの差が30FPSの2フレーム以内であること
+
+    入力・遷移はフレームの境目でしか検出できないため、開始と終了の2回分の量子化誤差を許容する。
+    """
+    tolerance = 2 / FRAME_RATES[0] + 1e-9
+    results = {fps: run_script(fps, script, duration) for fps in FRAME_RATES}
+    reference, reference_times, reference_beeps = results[FRAME_RATES[0]]
+    for fps, (transitions, times, beeps) in results.items():
+        assert [state for state, _ in transitions] == [state for state, _ in reference], fps
+        for (_, t), (_, expected) in zip(transitions, reference):
+            assert abs(t - expected) <= tolerance, (fps, t, expected)
+        assert len(times) == len(reference_times)
+        for t, expected in zip(times, reference_times):
+            assert abs(t - expected) <= tolerance, (fps, t, expected)
+        assert beeps == reference_beeps
+    return reference, reference_times, reference_beeps
+
+
+def test_hold_inspection_and_solve():
+    """ホールド -> インスペクション -> ホールドで計測開始 -> 停止 -> 同期"""
+    script = [
+        ("KEY_SPACE", 0.5, 2.0),    # 1秒ホールドでインスペクション開始
+        ("KEY_SPACE", 6.0, 7.5),    # 猶予期間後に1秒ホールドで計測開始
+        ("KEY_SPACE", 17.0, 17.2),  # 停止
+        ("KEY_S", 18.0, 19.5),      # 1秒ホールドで同期
+    ]
+    transitions, times, beeps = _assert_same_at_all_rates(script, 22.0)
+    states = [state for state, _ in transitions]
+    assert states == [TimerState.READY, TimerState.COUNTDOWN, TimerState.RUNNING,
+                      TimerState.READY, TimerState.SYNCING, TimerState.READY]
+    assert abs(transitions[1][1] - (0.5 + GC.BUTTON_HOLD_TIME)) < 0.05
+    assert abs(times[0] - 10.0) < 0.05 and beeps == 0
+    # 同期結果は一定時間表示してからREADYに戻る（同期処理は遷移の次のフレームで行う）
+    syncing_time = transitions[5][1] - transitions[4][1]
+    assert abs(syncing_time - GC.SYNC_RESULT_DISPLAY_TIME) <= 2 / FRAME_RATES[0] + 1e-9
+    print(f"✓ ホールド・インスペクション・計測・同期: タイム {times[0]:.2f}s（{FRAME_RATES}FPSで一致）")
+
+
+def test_inspection_timeout_and_beeps():
+    """インスペクション時間の経過で自動的に計測が始まり、カウントダウン音が各1回鳴ること"""
+    script = [
+        ("KEY_SPACE", 0.5, 2.0),
+        ("KEY_SPACE", 20.0, 20.1),
+    ]
+    transitions, times, beeps = _assert_same_at_all_rates(script, 21.0)
+    assert [state for state, _ in transitions] == [TimerState.READY, TimerState.COUNTDOWN,
+                                                   TimerState.RUNNING, TimerState.READY]
+    assert abs(transitions[2][1] - transitions[1][1] - GC.INSPECTION_TIME) < 0.05
+    assert beeps == len(GC.COUNTDOWN_BEEP_TIMES)
+    print(f"✓ インスペクションの時間切れ: カウントダウン音 {beeps}回（{FRAME_RATES}FPSで一致）")
+
+
+def test_short_hold_does_not_start():
+    """ホールド時間が足りない場合はどのフレームレートでも開始しないこと"""
+    script = [("KEY_SPACE", 0.5, 0.5 + GC.BUTTON_HOLD_TIME - 0.1)]
+    transitions, _, _ = _assert_same_at_all_rates(script, 3.0)
+    assert [state for state, _ in transitions] == [TimerState.READY]
+    print("✓ 短いホールドでは開始しない")
+
+
+def test_escape_discards_solve():
+    """計測中のESCは記録を保存せずにREADYに戻ること（DNFは停止後にDキーで付ける）"""
+    script = [
+        ("KEY_SPACE", 0.5, 2.0),
+        ("KEY_SPACE", 6.0, 7.5),
+        ("KEY_ESCAPE", 12.0, 12.1),  # 計測中に中断
+    ]
+    transitions, times, _ = _assert_same_at_all_rates(script, 14.0)
+    assert [state for state, _ in transitions] == [TimerState.READY, TimerState.COUNTDOWN,
+                                                   TimerState.RUNNING, TimerState.READY]
+    assert times == []
+    print("✓ 計測中のESCは記録せずに破棄")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("フレームレートによらない状態遷移のテスト")
+    print("=" * 60)
+    test_hold_inspection_and_solve()
+    test_inspection_timeout_and_beeps()
+    test_short_hold_does_not_start()
+    test_escape_discards_solve()
+    print("\n✅ すべてのテストに合格しました")
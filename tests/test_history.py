@@ -0,0 +1,166 @@
+"""
+履歴ブラウザ（results のページ単位の閲覧）のテスト
+"""
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import HistoryBrowser, create_history_indexes
+
+
+def _create_db(path, sessions=20, solves_per_session=37):
+    """1日1セッションの記録を持つデータベースを作成（最初のセッションは取り込み分）"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL,
+            time_result REAL NOT NULL, scramble TEXT, session TEXT, penalty INTEGER NOT NULL DEFAULT 0)
+    """)
+    create_history_indexes(conn.cursor())
+    rows = []
+    start = datetime.datetime(2025, 1, 1, 9, 0, 0)
+    for s in range(sessions):
+        day = start + datetime.timedelta(days=s * 2)
+        session = None if s == 0 else day.strftime("%Y%m%d_%H%M%S")
+        for i in range(solves_per_session):
+            solved_at = day + datetime.timedelta(minutes=i)
+            rows.append((solved_at.strftime("%Y/%m/%d %H:%M:%S"), 10.0 + i / 100, session))
+    conn.executemany("INSERT INTO results (datetime, time_result, scramble, session) VALUES (?, ?, '', ?)", rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def _browser(tmpdir, **kwargs):
+    path = os.path.join(tmpdir, "history.db")
+    rows = _create_db(path, **kwargs)
+    return HistoryBrowser(path, page_size=16, cache_pages=4), rows
+
+
+def test_visible_rows_and_scroll():
+    """表示中の行が新しい順に並び、スクロールで1行ずつ移動すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        browser, rows = _browser(tmpdir)
+        total = len(rows)
+        visible = browser.visible_rows(10)
+        assert [row.id for row in visible] == list(range(total, total - 10, -1))
+        assert visible[0].text.startswith(f"#{total}")
+
+        browser.scroll(25)
+        assert browser.visible_rows(10)[0].id == total - 25
+        browser.scroll(-5)
+        assert browser.visible_rows(10)[0].id == total - 20
+        # 範囲外へのスクロールは端で止まる
+        browser.scroll(-1000)
+        assert browser.top_id == total
+        browser.scroll(10 ** 6)
+        assert browser.top_id == 1 and [row.id for row in browser.visible_rows(10)] == [1]
+        browser.close()
+    print("✓ 表示中の行とスクロール")
+
+
+def test_lru_and_prefetch():
+    """キャッシュがページ数の上限を超えず、前後のページが先読みされること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        browser, rows = _browser(tmpdir)
+        browser.start()
+        browser.scroll(100)
+        visible = browser.visible_rows(10)
+        assert browser.wait_prefetch()
+        assert browser.is_cached(browser._page_no(visible[-1].id) - 1)
+        assert browser.is_cached(browser._page_no(visible[0].id) + 1)
+
+        # 先読み済みのページへのスクロールはSQLを発行しない
+        statements = []
+        browser.connections.read().conn.set_trace_callback(statements.append)
+        browser.scroll(16)
+        browser.visible_rows(10)
+        browser.connections.read().conn.set_trace_callback(None)
+        assert statements == []
+
+        for _ in range(40):
+            browser.scroll(16)
+            browser.visible_rows(10)
+        assert len(browser._cache) <= browser.cache_pages
+        browser.close()
+    print("✓ LRUキャッシュと先読み")
+
+
+def test_session_and_date_jumps():
+    """セッション・日付へのジャンプと前後のセッション・日付への移動"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        browser, rows = _browser(tmpdir)
+        per_session = 37
+        sessions = [rows[i][2] for i in range(0, len(rows), per_session)]
+
+        assert browser.jump_to_session(sessions[5])
+        assert browser.top_id == per_session * 6
+        assert not browser.jump_to_session("19990101_000000")
+        assert browser.previous_session() and browser.top_id == per_session * 5
+        assert browser.next_session() and browser.top_id == per_session * 6
+        # 取り込み分（session NULL）も1つのセッションとして扱う
+        assert browser.jump_to_session(None) and browser.top_id == per_session
+        assert not browser.previous_session()
+
+        # 記録のない日は、それ以前の最新の記録へ
+        assert browser.jump_to_date("2025/01/03") and browser.top_id == per_session * 2
+        assert browser.jump_to_date(datetime.date(2025, 1, 4)) and browser.top_id == per_session * 2
+        assert not browser.jump_to_date("2024/12/31")
+        assert browser.next_day() and browser.top_id == per_session * 3
+        assert browser.previous_day() and browser.top_id == per_session * 2
+        browser.close()
+    print("✓ セッション・日付へのジャンプ")
+
+
+def test_jumps_use_indexes():
+    """ジャンプの検索がテーブル全体を走査しないこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        browser, _ = _browser(tmpdir)
+        queries = [
+            ("SELECT id FROM results WHERE session IS ? ORDER BY id DESC LIMIT 1", ("x",)),
+            ("SELECT id FROM results WHERE session IS ? ORDER BY id LIMIT 1", (None,)),
+            ("SELECT id FROM results WHERE datetime < ? ORDER BY datetime DESC LIMIT 1", ("2025/01/02",)),
+            ("SELECT datetime FROM results WHERE datetime >= ? ORDER BY datetime LIMIT 1", ("2025/01/02",)),
+            ("SELECT id, datetime, time_result, session, penalty FROM results WHERE id >= ? AND id < ? ORDER BY id DESC",
+             (0, 16)),
+        ]
+        for sql, params in queries:
+            plan = browser.connections.read().conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            details = " ".join(row[-1] for row in plan)
+            assert "SEARCH" in details and "TEMP B-TREE" not in details, details
+        browser.close()
+    print("✓ ジャンプはインデックス検索のみ")
+
+
+def test_refresh_sees_new_results():
+    """画面を開き直すと追加された記録が表示されること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        browser, rows = _browser(tmpdir, sessions=2, solves_per_session=10)
+        browser.visible_rows(5)
+        conn = sqlite3.connect(browser.db_path)
+        conn.execute("INSERT INTO results (datetime, time_result, session) VALUES ('2025/02/01 10:00:00', 9.5, 'new')")
+        conn.commit()
+        conn.close()
+        browser.refresh()
+        browser.jump_to_latest()
+        top = browser.visible_rows(5)[0]
+        assert top.id == len(rows) + 1 and top.session == "new"
+        browser.close()
+    print("✓ 追加された記録の反映")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("履歴ブラウザのテスト")
+    print("=" * 60)
+    test_visible_rows_and_scroll()
+    test_lru_and_prefetch()
+    test_session_and_date_jumps()
+    test_jumps_use_indexes()
+    test_refresh_sees_new_results()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,142 @@
+"""
+合成のソルブ履歴の生成ツールのテスト
+"""
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history_generator import MIN_YEAR, HistoryModel, _session_layout, generate_history, main
+from src.penalty import Penalty
+
+_CATALOG = [("OLL-1", "OLL 1", "OLL", "OLL-1-a"), ("PLL-Aa", "Aa Perm", "PLL", None)]
+
+
+def _generate(tmpdir, name="history.db", solves=2000, pattern_solves=0, **model_args):
+    path = os.path.join(tmpdir, name)
+    result = generate_history(path, solves, pattern_solves, HistoryModel(**model_args), catalog=_CATALOG)
+    return path, result
+
+
+def _rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_same_seed_same_history():
+    """同じシードからは同じ記録、異なるシードからは異なる記録を生成すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        a, _ = _generate(tmpdir, "a.db", seed=3)
+        b, _ = _generate(tmpdir, "b.db", seed=3)
+        c, _ = _generate(tmpdir, "c.db", seed=4)
+        sql = "SELECT datetime, time_result, session FROM results ORDER BY id"
+        assert _rows(a, sql) == _rows(b, sql)
+        assert _rows(a, sql) != _rows(c, sql)
+    print("✓ シードによる再現性")
+
+
+def test_results_rows_and_sessions():
+    """行数・ペナルティ・セッションの並びが分布どおりで、最後のセッションがendに始まること"""
+    end = datetime.datetime(2026, 1, 31, 20, 0, 0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path, result = _generate(tmpdir, solves=20000, seed=1, end=end, plus2_rate=0.05, dnf_rate=0.02)
+        rows = _rows(path, "SELECT datetime, time_result, session, penalty FROM results ORDER BY id")
+
+    # DNFの試技もペナルティ付きで記録する
+    assert len(rows) == result.results_rows == 20000
+    assert sum(1 for row in rows if row[3] == Penalty.DNF) == result.dnf
+    assert sum(1 for row in rows if row[3] == Penalty.PLUS2) == result.plus2
+    assert 0.015 < result.dnf / 20000 < 0.025
+    assert 0.04 < result.plus2 / 20000 < 0.06
+    datetimes = [row[0] for row in rows]
+    assert datetimes == sorted(datetimes)
+    assert result.first_datetime == datetimes[0] and result.last_datetime == datetimes[-1]
+    assert datetimes[-1].startswith("2026/01/31 ")
+    assert all(datetime.datetime.strptime(value, "%Y/%m/%d %H:%M:%S") for value in datetimes[:100])
+
+    # セッションは連続して並び、最後のセッションはendに始まる
+    sessions = [row[2] for row in rows]
+    assert len(set(sessions)) == result.sessions
+    assert sum(1 for i in range(1, len(sessions)) if sessions[i] != sessions[i - 1]) == result.sessions - 1
+    assert result.last_session_id == sessions[-1] == end.strftime("%Y%m%d_%H%M%S")
+
+    # 上達曲線に沿って最初より最後のほうが速い
+    times = [row[1] for row in rows]
+    first, last = sorted(times[:1000]), sorted(times[-1000:])
+    assert last[500] < first[500]
+    assert all(time > 0 for time in times)
+    print(f"✓ 記録の行数とセッション: {result.results_rows}行, {result.sessions}セッション")
+
+
+def test_pattern_solves_and_indexes():
+    """パターン練習の記録を書き込み、インデックスを作り直すこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path, result = _generate(tmpdir, solves=100, pattern_solves=3000, seed=2)
+        rows = _rows(path, "SELECT pattern_id, pattern_category, algorithm_id, practice_mode, timestamp "
+                           "FROM pattern_solves")
+        indexes = {row[0] for row in _rows(path, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    assert len(rows) == result.pattern_rows == 3000
+    assert {row[0] for row in rows} == {"OLL-1", "PLL-Aa"}
+    assert all((row[1], row[2]) in {("OLL", "OLL-1-a"), ("PLL", None)} for row in rows)
+    assert {row[3] for row in rows} <= {"manual", "random", "spaced", "weighted"}
+    assert datetime.datetime.strptime(rows[0][4], "%Y-%m-%d %H:%M:%S")
+    assert {"idx_pattern_solves_pattern_id", "idx_pattern_solves_category",
+            "idx_pattern_solves_timestamp"} <= indexes
+    print("✓ パターン練習の記録とインデックス")
+
+
+def test_cli_refuses_existing_file():
+    """既存のファイルには --overwrite なしでは書き込まないこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cli.db")
+        assert main([path, "--solves", "50"]) == 0
+        assert main([path, "--solves", "50"]) == 1
+        assert main([path, "--solves", "80", "--overwrite"]) == 0
+        count = _rows(path, "SELECT COUNT(*) FROM results")[0][0]
+        assert count == 80
+    print("✓ 既存ファイルの保護")
+
+
+def test_large_history_fits_period():
+    """既定の分布では1900年より前に及ぶ記録数でも、1セッションのソルブ数を増やして収めること"""
+    model = HistoryModel()
+    assert model.for_attempts(100000) is model
+    fitted = model.for_attempts(10_000_000)
+    assert fitted.solves_per_session > model.solves_per_session and fitted.sessions_per_day == model.sessions_per_day
+    layout = _session_layout(np.random.default_rng(0), 10_000_000, fitted)
+    assert int(layout.sizes.sum()) == 10_000_000 and layout.base_date.year >= MIN_YEAR
+    print(f"✓ 1000万件の期間: {layout.base_date} から（1セッション平均 {fitted.solves_per_session:.0f}）")
+
+
+def test_too_long_history_rejected():
+    """最後のセッションが1900年より前の場合など、期間に収まらない分布は拒否すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            _generate(tmpdir, solves=100, end=datetime.datetime(1899, 12, 31, 20, 0, 0))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("ValueErrorが発生しませんでした")
+    print("✓ 長すぎる期間の拒否")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("合成のソルブ履歴の生成ツールのテスト")
+    print("=" * 60)
+    test_same_seed_same_history()
+    test_results_rows_and_sessions()
+    test_pattern_solves_and_indexes()
+    test_cli_refuses_existing_file()
+    test_large_history_fits_period()
+    test_too_long_history_rejected()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,84 @@
+"""
+ムーブ記法パーサーのテスト
+"""
+import json
+import os
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.notation import compile_moves, MoveSequence, NotationError
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def test_parse_all_notation_kinds():
+    """面回転・ワイド・スライス・持ち替え・括弧を解析できること"""
+    seq = compile_moves("R U' F2 r Rw2 M' S E2 x y2 z'")
+    assert str(seq) == "R U' F2 r r2 M' S E2 x y2 z'"
+    assert str(compile_moves("F(R U R')(U' F')")) == "F R U R' U' F'"
+    assert str(compile_moves("(R U)2 R'")) == "R U R U R'"
+    print(f"✓ 解析結果: {seq}")
+
+
+def test_invalid_notation():
+    """不正な記法で例外が発生すること"""
+    for text in ("R Q", "(R U", "R U)", "Mw"):
+        try:
+            compile_moves(text)
+        except NotationError:
+            continue
+        raise AssertionError(f"Should reject {text!r}")
+    print("✓ 不正な記法を検出")
+
+
+def test_inverse_and_simplify():
+    """逆手順と簡約化"""
+    seq = compile_moves("R U R' U' d' M2 y")
+    assert str(seq.inverse()) == "y' M2 d U R U' R'"
+    assert len((seq + seq.inverse()).simplify()) == 0, "Sequence times its inverse should cancel"
+    assert str(compile_moves("U D U").simplify()) == "U2 D"
+    assert str(compile_moves("R R R").simplify()) == "R'"
+    assert str(compile_moves("R L R'").simplify()) == "L"
+    assert str(compile_moves("R U R").simplify()) == "R U R"
+    print("✓ 逆手順・簡約化")
+
+
+def test_metrics():
+    """HTM/QTM/STMの手数"""
+    seq = compile_moves("M2 U M2 U2 M2 U M2")
+    assert (seq.htm(), seq.qtm(), seq.stm()) == (11, 20, 7)
+    seq = compile_moves("y R U2 R' x")
+    assert (seq.htm(), seq.qtm(), seq.stm()) == (3, 4, 3)
+    print("✓ HTM/QTM/STM")
+
+
+def test_compiled_forms_are_cached():
+    """同じ文字列のコンパイル結果が共有されること"""
+    assert compile_moves("R U R' U'") is compile_moves("R U R' U'")
+    assert isinstance(MoveSequence.parse("R"), MoveSequence)
+    print("✓ コンパイル結果をキャッシュ")
+
+
+def test_all_master_data_parses():
+    """patterns.json / algorithms.jsonの全手順を解析できること"""
+    with open(os.path.join(DATA_DIR, 'patterns.json'), encoding='utf-8') as f:
+        patterns = json.load(f)['patterns']
+    with open(os.path.join(DATA_DIR, 'algorithms.json'), encoding='utf-8') as f:
+        algorithms = json.load(f)['algorithms']
+    for pattern in patterns:
+        compile_moves(pattern['setup_moves'])
+    for algorithm in algorithms:
+        compile_moves(algorithm['moves'])
+    print(f"✓ {len(patterns)}パターン・{len(algorithms)}アルゴリズムを解析")
+
+
+if __name__ == "__main__":
+    test_parse_all_notation_kinds()
+    test_invalid_notation()
+    test_inverse_and_simplify()
+    test_metrics()
+    test_compiled_forms_are_cached()
+    test_all_master_data_parses()
+    print("\n✅ All notation tests passed!\n")
@@ -0,0 +1,150 @@
+"""
+パターン統計画面のタイム分布のテスト
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import PatternConfig as PC
+from src.database import Database
+from src.pattern_histograms import (BUCKET_EDGES, TREND_ALPHA, PatternHistograms, TimeDistribution,
+                                    bucket_index, load_pattern_histograms)
+from src.stats import SpeedcubeStats
+
+
+def test_buckets_cover_range():
+    """ビンが範囲全体を対数間隔で覆い、範囲外のタイムは両端に入ること"""
+    assert len(BUCKET_EDGES) == PC.HISTOGRAM_BUCKETS + 1
+    assert abs(BUCKET_EDGES[0] - PC.HISTOGRAM_MIN_TIME) < 1e-9
+    assert abs(BUCKET_EDGES[-1] - PC.HISTOGRAM_MAX_TIME) < 1e-9
+    assert bucket_index(0.01) == 0 and bucket_index(1000) == PC.HISTOGRAM_BUCKETS - 1
+    for i in range(PC.HISTOGRAM_BUCKETS):
+        assert bucket_index((BUCKET_EDGES[i] + BUCKET_EDGES[i + 1]) / 2) == i
+    print("✓ ビンの範囲")
+
+
+def test_percentiles_match_exact():
+    """パーセンタイルが実データの値とビン幅程度の誤差で一致すること"""
+    rng = random.Random(1)
+    times = [rng.lognormvariate(1.0, 0.3) for _ in range(5000)]
+    distribution = TimeDistribution()
+    for t in times:
+        distribution.add(t)
+    exact = statistics.quantiles(times, n=100)
+    ratio = BUCKET_EDGES[1] / BUCKET_EDGES[0]
+    for q, value in zip((10, 25, 50, 75, 90), distribution.percentiles()):
+        assert exact[q - 1] / ratio <= value <= exact[q - 1] * ratio
+    assert distribution.best == min(times) and distribution.worst == max(times)
+    assert abs(distribution.mean - statistics.fmean(times)) < 1e-9
+    print("✓ パーセンタイルの精度")
+
+
+def test_trend_is_bounded_moving_average():
+    """推移の点数が上限以下で、各点がその時点の指数移動平均であること"""
+    distribution = TimeDistribution()
+    times = [10.0 - i * 0.001 for i in range(3000)]
+    ema = []
+    for t in times:
+        distribution.add(t)
+        ema.append(t if not ema else ema[-1] + TREND_ALPHA * (t - ema[-1]))
+    trend = distribution.trend()
+    assert len(trend) <= PC.TREND_POINTS
+    interval = distribution._sample_interval
+    for i, point in enumerate(trend[:-1]):
+        assert abs(point - ema[(i + 1) * interval - 1]) < 1e-9
+    assert abs(trend[-1] - ema[-1]) < 1e-9
+    assert trend == sorted(trend, reverse=True)
+    print(f"✓ 推移: {len(trend)}点（1点 = {interval}ソルブ）")
+
+
+def test_trend_follows_recent_change():
+    """長い記録の後でも、最近の変化が記録件数によらず最後の点に現れること"""
+    distribution = TimeDistribution()
+    for _ in range(5000):
+        distribution.add(10.0)
+    for _ in range(PC.TREND_WINDOW * 2):
+        distribution.add(5.0)
+    trend = distribution.trend()
+    assert trend[-1] < 5.5, trend[-1]
+    assert abs(trend[0] - 10.0) < 1e-9
+    print(f"✓ 最近の変化: {trend[-1]:.2f}s（{PC.TREND_WINDOW * 2}件の5秒の後）")
+
+
+def test_incremental_matches_bulk():
+    """1件ずつの追加とまとめての作成で同じ分布になること"""
+    rng = random.Random(2)
+    rows = [(f"p{rng.randrange(5)}", rng.choice(["a1", "a2", None]), rng.uniform(1, 8)) for _ in range(2000)]
+    bulk = PatternHistograms()
+    bulk.add_many(rows)
+    incremental = PatternHistograms()
+    for row in rows:
+        incremental.add(*row)
+    for pattern_id in {row[0] for row in rows}:
+        assert bulk.get(pattern_id).counts == incremental.get(pattern_id).counts
+        assert bulk.get(pattern_id).trend() == incremental.get(pattern_id).trend()
+        for algorithm_id in bulk.algorithms_for(pattern_id):
+            expected = [t for p, a, t in rows if p == pattern_id and a == algorithm_id]
+            assert bulk.get(pattern_id, algorithm_id).count == len(expected)
+        assert sum(bulk.get(pattern_id, a).count for a in bulk.algorithms_for(pattern_id)) == \
+            sum(1 for p, a, _ in rows if p == pattern_id and a)
+    print("✓ 追加更新と一括作成の一致")
+
+
+def test_load_and_frame_cost_at_scale():
+    """10万件の記録から作成でき、1フレーム分の参照が記録件数によらないこと"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE pattern_solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_id TEXT NOT NULL,
+            pattern_name TEXT NOT NULL, pattern_category TEXT NOT NULL, solve_time REAL NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, session_id TEXT, practice_mode TEXT,
+            set_id TEXT, algorithm_id TEXT)
+    """)
+    rng = random.Random(3)
+    conn.executemany(
+        "INSERT INTO pattern_solves (pattern_id, pattern_name, pattern_category, solve_time, algorithm_id) "
+        "VALUES (?, '', '', ?, ?)",
+        [(f"p{i % 50}", rng.uniform(1, 10), f"a{i % 3}") for i in range(100000)])
+
+    class _Logger:
+        pass
+    logger = _Logger()
+    logger.db = Database(conn)
+    stats = SpeedcubeStats()
+    stats.logger = logger
+
+    start = time.perf_counter()
+    histograms = load_pattern_histograms(stats)
+    load_time = time.perf_counter() - start
+    assert sum(histograms.get(f"p{i}").count for i in range(50)) == 100000
+
+    # 統計画面の1フレームで参照する値（ヒストグラム・パーセンタイル・推移）
+    distribution = histograms.get("p0")
+    start = time.perf_counter()
+    for _ in range(300):
+        peak = max(distribution.counts)
+        distribution.percentiles()
+        distribution.trend()
+    frame_time = (time.perf_counter() - start) / 300
+    assert peak > 0
+    assert frame_time < 1 / 30 / 10
+    print(f"✓ 10万件: 作成 {load_time * 1000:.0f}ms, 1フレーム {frame_time * 1e6:.1f}µs")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("パターン統計のタイム分布のテスト")
+    print("=" * 60)
+    test_buckets_cover_range()
+    test_percentiles_match_exact()
+    test_trend_is_bounded_moving_average()
+    test_trend_follows_recent_change()
+    test_incremental_matches_bulk()
+    test_load_and_frame_cost_at_scale()
+    print("\n✅ すべてのテストに合格しました")
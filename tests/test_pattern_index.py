@@ -0,0 +1,151 @@
+"""
+PatternDatabaseの索引付き検索のテスト
+"""
+import os
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.patterns import Algorithm, Pattern, PatternCategory, PatternDatabase
+
+
+def _reference_lookups(db: PatternDatabase):
+    """索引を使わない線形走査での検索結果"""
+    patterns = list(db._patterns.values())
+    algorithms = list(db._algorithms.values())
+    by_category = {c: [p for p in patterns if p.category == c] for c in PatternCategory}
+    by_pattern = {p.id: [a for a in algorithms if a.pattern_id == p.id] for p in patterns}
+    return by_category, by_pattern
+
+
+def test_indexes_match_linear_scan():
+    """索引の結果が線形走査と一致すること（順序を含む）"""
+    db = PatternDatabase()
+    by_category, by_pattern = _reference_lookups(db)
+    for category, expected in by_category.items():
+        assert list(db.get_patterns_by_category(category)) == expected
+        assert list(db.get_pattern_ids_by_category(category)) == [p.id for p in expected]
+        assert db.get_category_count(category) == len(expected)
+    for pattern_id, expected in by_pattern.items():
+        assert list(db.get_algorithms_for_pattern(pattern_id)) == expected
+        default = next((a for a in expected if a.is_default), expected[0] if expected else None)
+        assert db.get_default_algorithm(pattern_id) is default
+        assert db.has_multiple_algorithms(pattern_id) == (len(expected) > 1)
+    assert list(db.get_available_categories()) == [c for c in PatternCategory if by_category[c]]
+    print("✓ 索引の結果が線形走査と一致")
+
+
+def test_lookups_do_not_allocate():
+    """同じ検索は同じタプルを返すこと"""
+    db = PatternDatabase()
+    assert db.get_patterns_by_category(PatternCategory.PLL) is db.get_patterns_by_category(PatternCategory.PLL)
+    assert db.get_algorithms_for_pattern("PLL_Ua") is db.get_algorithms_for_pattern("PLL_Ua")
+    assert db.get_algorithms_for_pattern("UNKNOWN") == ()
+    assert db.get_default_algorithm("UNKNOWN") is None
+    print("✓ 検索結果を使い回している")
+
+
+def test_pattern_algorithm_lookup():
+    """パターンとIDによるアルゴリズム検索"""
+    db = PatternDatabase()
+    assert db.get_pattern_algorithm("PLL_Ua", "PLL_Ua_standard").id == "PLL_Ua_standard"
+    assert db.get_pattern_algorithm("PLL_Ub", "PLL_Ua_standard") is None, "Other pattern's id should not match"
+    assert db.get_pattern_algorithm("PLL_Ua", "UNKNOWN") is None
+    print("✓ パターンとIDによるアルゴリズム検索")
+
+
+def test_add_patterns_updates_indexes():
+    """明示的に渡したデータと追加データで索引が更新されること"""
+    pattern = Pattern(id="F2L_01", name="F2L #1", category=PatternCategory.F2L,
+                      setup_moves="R U R'", description="", difficulty=1)
+    db = PatternDatabase(patterns=[pattern], algorithms=[])
+    assert db.get_available_categories() == (PatternCategory.F2L,)
+    assert db.get_default_algorithm("F2L_01") is None
+
+    first = Algorithm(id="F2L_01_a", pattern_id="F2L_01", name="A", moves="R U' R'")
+    second = Algorithm(id="F2L_01_b", pattern_id="F2L_01", name="B", moves="U R U' R'", is_default=True)
+    db.add_patterns(algorithms=[first, second])
+    assert db.get_algorithms_for_pattern("F2L_01") == (first, second)
+    assert db.get_default_algorithm("F2L_01") is second
+    assert db.has_multiple_algorithms("F2L_01")
+    print("✓ 追加時に索引を更新")
+
+
+def test_records_are_compact():
+    """Pattern / Algorithm が__dict__を持たない不変オブジェクトで、共有文字列を使うこと"""
+    import dataclasses
+    db = PatternDatabase()
+    algorithm = db.get_algorithm("PLL_Ua_standard")
+    assert not hasattr(algorithm, '__dict__'), "Algorithm should use __slots__"
+    assert not hasattr(db.get_pattern("PLL_Ua"), '__dict__'), "Pattern should use __slots__"
+    try:
+        algorithm.name = "Changed"
+        assert False, "Algorithm should be frozen"
+    except dataclasses.FrozenInstanceError:
+        pass
+    assert algorithm.compiled_moves is algorithm.compiled_moves
+    names = [a.name for a in db.get_all_algorithms() if a.name == "Standard"]
+    assert all(name is names[0] for name in names), "Repeated names should be interned"
+    print("✓ __slots__・不変・文字列共有")
+
+
+def _zbll_database(per_subset: int = 100) -> PatternDatabase:
+    """サブセットを持つ大規模カテゴリの合成データベース"""
+    patterns = [Pattern(id="PLL_T", name="PLL T", category=PatternCategory.PLL,
+                        setup_moves="R U R' U'", description="", difficulty=1)]
+    for subset in ("T", "U", "L"):
+        for i in range(per_subset):
+            patterns.append(Pattern(id=f"ZBLL_{subset}_{i}", name=f"ZBLL {subset}{i}",
+                                    category=PatternCategory.ZBLL, setup_moves="R U R' U R U2 R'",
+                                    description="", difficulty=3, subset=subset))
+    return PatternDatabase(patterns=patterns, algorithms=[])
+
+
+def test_category_tabs_and_subsets():
+    """タブはデータが存在するカテゴリのみをPLL, OLL, ...の順で並べること"""
+    assert PatternDatabase().get_category_tabs()[:2] == (PatternCategory.PLL, PatternCategory.OLL)
+    db = _zbll_database()
+    assert db.get_category_tabs() == (PatternCategory.PLL, PatternCategory.ZBLL)
+    assert db.get_subsets(PatternCategory.ZBLL) == ("T", "U", "L")
+    assert db.get_subsets(PatternCategory.PLL) == ()
+    assert db.get_category_count(PatternCategory.ZBLL) == 300
+    assert db.get_category_count(PatternCategory.ZBLL, "U") == 100
+    assert db.get_pattern_ids_by_category(PatternCategory.ZBLL, "L")[0] == "ZBLL_L_0"
+    print("✓ カテゴリタブとサブセット")
+
+
+def test_patterns_page():
+    """表示範囲のパターンのみを取得できること"""
+    db = _zbll_database()
+    page = db.get_patterns_page(PatternCategory.ZBLL, 98, 5)
+    assert [p.id for p in page] == ["ZBLL_T_98", "ZBLL_T_99", "ZBLL_U_0", "ZBLL_U_1", "ZBLL_U_2"]
+    page = db.get_patterns_page(PatternCategory.ZBLL, 98, 5, subset="U")
+    assert [p.id for p in page] == ["ZBLL_U_98", "ZBLL_U_99"]
+    assert db.get_patterns_page(PatternCategory.F2L, 0, 5) == ()
+    print("✓ 表示範囲のみの取得")
+
+
+def test_random_pattern_for_any_category():
+    """任意のカテゴリ名でランダム選択でき、除外IDを避けること"""
+    db = _zbll_database(per_subset=2)
+    for _ in range(50):
+        pattern = db.get_random_pattern("ZBLL", exclude_ids=["ZBLL_T_0", "ZBLL_T_1", "ZBLL_U_0", "PLL_T"])
+        assert pattern.id in ("ZBLL_U_1", "ZBLL_L_0", "ZBLL_L_1")
+    # 全候補が除外されている場合は除外なしで選択
+    assert db.get_random_pattern("PLL", exclude_ids=["PLL_T"]).id == "PLL_T"
+    assert db.get_random_pattern("F2L") is None
+    assert db.get_random_pattern("UNKNOWN") is None
+    print("✓ 任意カテゴリのランダム選択")
+
+
+if __name__ == "__main__":
+    test_indexes_match_linear_scan()
+    test_lookups_do_not_allocate()
+    test_pattern_algorithm_lookup()
+    test_add_patterns_updates_indexes()
+    test_records_are_compact()
+    test_category_tabs_and_subsets()
+    test_patterns_page()
+    test_random_pattern_for_any_category()
+    print("\n✅ All pattern index tests passed!\n")
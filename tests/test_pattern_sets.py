@@ -0,0 +1,134 @@
+"""
+練習セットと出題キューの保存のテスト
+"""
+import os
+import random
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import PatternConfig as PC
+from src.database import ConnectionManager
+from src.pattern_sets import PatternSetStore, create_pattern_set_tables, start_or_resume
+from src.patterns import PatternDatabase
+from src.stats import SpeedcubeStats
+
+
+class _MemoryLogger:
+    """インメモリのSQLiteを持つロガーの代わり"""
+
+    def __init__(self):
+        self.db = ConnectionManager(":memory:")
+        with self.db.write() as db:
+            db.execute("""
+                CREATE TABLE pattern_solves (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_id TEXT NOT NULL,
+                    pattern_name TEXT NOT NULL, pattern_category TEXT NOT NULL, solve_time REAL NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, session_id TEXT, practice_mode TEXT,
+                    set_id TEXT, algorithm_id TEXT)
+            """)
+            db.execute("""
+                CREATE TABLE user_algorithm_ratings (
+                    algorithm_id TEXT PRIMARY KEY, rating INTEGER, notes TEXT, last_updated DATETIME)
+            """)
+            create_pattern_set_tables(db)
+
+
+def _store():
+    logger = _MemoryLogger()
+    db = PatternDatabase()
+    store = PatternSetStore(logger)
+    store.sync_presets(db)
+    return logger, db, store
+
+
+def test_presets_follow_catalog():
+    """カテゴリごとのプリセットセットと苦手セットが登録されること"""
+    logger, db, store = _store()
+    store.sync_presets(db)  # 2回目の同期で重複しないこと
+    sets = {pattern_set.id: pattern_set for pattern_set in store.list_sets()}
+    for category in db.get_available_categories():
+        assert sets[f"preset:{category.name}"].pattern_ids == db.get_pattern_ids_by_category(category)
+        assert sets[f"weak:{category.name}"].pattern_ids == ()
+    assert len(sets["preset:ALL"].pattern_ids) == db.get_pattern_count()
+    assert [s.kind for s in store.list_sets()][0] == "preset"
+    print(f"✓ プリセットセット: {len(sets)}件")
+
+
+def test_run_is_persisted_and_resumed():
+    """シャッフルしたキューが保存され、中断後に同じ位置から再開できること"""
+    logger, db, store = _store()
+    category = db.get_available_categories()[0]
+    set_id = f"preset:{category.name}"
+    run = start_or_resume(store, db, None, set_id, random.Random(1))
+    assert sorted(run.queue) == sorted(db.get_pattern_ids_by_category(category))
+
+    for _ in range(3):
+        store.advance(run)
+    resumed = PatternSetStore(logger).get_run(set_id)
+    assert resumed.queue == run.queue and resumed.position == 3
+    assert start_or_resume(store, db, None, set_id).current() == run.queue[3]
+    assert store.get_progress() == {set_id: (3, len(run.queue))}
+
+    # 最後まで進めると完了扱いになり、次回は新しいキューで開始する
+    while not run.finished:
+        store.advance(run)
+    assert store.get_run(set_id) is None and store.get_progress() == {}
+    assert start_or_resume(store, db, None, set_id, random.Random(2)).position == 0
+    print("✓ 出題キューの保存と再開")
+
+
+def test_advance_does_not_scan():
+    """進める処理が主キーでの1行更新のみであること"""
+    logger, db, store = _store()
+    run = start_or_resume(store, db, None, "preset:ALL", random.Random(3))
+    statements = []
+    logger.db.writer.conn.set_trace_callback(statements.append)
+    store.advance(run)
+    logger.db.writer.conn.set_trace_callback(None)
+    updates = [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "SELECT"))]
+    assert len(updates) == 1 and "WHERE set_id" in updates[0]
+    plan = logger.db.writer.conn.execute(
+        "EXPLAIN QUERY PLAN UPDATE pattern_set_runs SET position = 1 WHERE set_id = 'preset:ALL'").fetchall()
+    assert all("SCAN" not in row[-1] for row in plan)
+    print("✓ 1件進める処理は主キー検索の1行更新のみ")
+
+
+def test_custom_and_weak_sets():
+    """カスタムセットの作成と、練習記録からの苦手セットの選択"""
+    logger, db, store = _store()
+    category = db.get_available_categories()[0]
+    pattern_ids = db.get_pattern_ids_by_category(category)
+    custom = store.save_custom_set("MY SET", pattern_ids[:3])
+    assert custom.id == "custom:0" and store.get_set(custom.id).pattern_ids == pattern_ids[:3]
+    assert store.save_custom_set("MY SET 2", pattern_ids[3:5]).id == "custom:1"
+    assert store.list_sets()[-1].name == "MY SET 2"
+
+    # 遅いパターンから苦手セットに入る
+    times = {pattern_id: 2.0 + i for i, pattern_id in enumerate(pattern_ids[:PC.WEAK_SET_SIZE + 5])}
+    with logger.db.write() as conn:
+        conn.executemany(
+            "INSERT INTO pattern_solves (pattern_id, pattern_name, pattern_category, solve_time) VALUES (?, '', '', ?)",
+            [(pattern_id, t) for pattern_id, t in times.items() for _ in range(3)])
+    stats = SpeedcubeStats()
+    stats.logger = logger
+    run = start_or_resume(store, db, stats, f"weak:{category.name}", random.Random(4))
+    slowest = sorted(times, key=times.get, reverse=True)[:PC.WEAK_SET_SIZE]
+    assert sorted(run.queue) == sorted(slowest)
+    assert sorted(store.get_set(f"weak:{category.name}").pattern_ids) == sorted(slowest)
+
+    store.delete_set(custom.id)
+    assert store.get_set(custom.id) is None
+    print("✓ カスタムセットと苦手セット")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("練習セットのテスト")
+    print("=" * 60)
+    test_presets_follow_catalog()
+    test_run_is_persisted_and_resumed()
+    test_advance_does_not_scan()
+    test_custom_and_weak_sets()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,279 @@
+"""
+ペナルティ（OK / +2 / DNF）とペナルティを考慮した集計のテスト
+
+集計は乱数で作った記録の列に対して、定義どおりに毎回計算し直す参照実装と比較する
+（シードを変えて繰り返す性質ベースのテスト）。
+"""
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log_handler import SpeedcubeLogger
+from src.penalty import (DNF_TIME, Penalty, RollingAverage, average_of, decode_sheet_time,
+                         effective_time, encode_sheet_time, format_result, trim_count)
+from src.stats import SpeedcubeStats
+
+SEEDS = range(20)
+
+
+def _random_solve(rng, dnf_rate=0.15, plus2_rate=0.15):
+    time_result = round(rng.uniform(5.0, 30.0), 2)
+    draw = rng.random()
+    if draw < dnf_rate:
+        return time_result, Penalty.DNF
+    if draw < dnf_rate + plus2_rate:
+        return time_result, Penalty.PLUS2
+    return time_result, Penalty.OK
+
+
+def _reference_value(time_result, penalty):
+    """実効タイム（参照実装。DNFはNone）"""
+    if penalty == Penalty.DNF:
+        return None
+    return time_result + (2.0 if penalty == Penalty.PLUS2 else 0.0)
+
+
+def _reference_average(solves):
+    """直近の記録の平均（参照実装: 速い順・遅い順に1件ずつ除き、残りにDNFがあればDNF）"""
+    n = len(solves)
+    if n < 3:
+        return None
+    values = [_reference_value(*solve) for solve in solves]
+    remaining = [math.inf if value is None else value for value in values]
+    for _ in range(max(1, math.ceil(n * 0.05))):
+        remaining.remove(min(remaining))
+        remaining.remove(max(remaining))
+    if math.inf in remaining:
+        return DNF_TIME
+    return sum(remaining) / len(remaining)
+
+
+def _same(actual, expected):
+    if actual is None or expected is None:
+        return actual is expected
+    if math.isinf(expected):
+        return math.isinf(actual)
+    return math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_trim_count():
+    """上下それぞれ5%（切り上げ、最低1件）を除くこと"""
+    assert [trim_count(n) for n in (3, 5, 12, 20, 21, 50, 100, 1000)] == [1, 1, 1, 1, 2, 3, 5, 50]
+    print("✓ 除く件数")
+
+
+def test_rolling_average_matches_reference():
+    """追加と最新の記録の置き換えを繰り返しても、毎回計算し直した平均と一致すること"""
+    checked = 0
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        for n in (3, 5, 12, 50, 100):
+            average = RollingAverage(n)
+            solves = []
+            for _ in range(3 * n):
+                solve = _random_solve(rng)
+                solves.append(solve)
+                average.add(effective_time(*solve))
+                if rng.random() < 0.3:  # 最新の記録のペナルティを変更
+                    solves[-1] = (solves[-1][0], Penalty(rng.randrange(3)))
+                    average.replace_latest(effective_time(*solves[-1]))
+                expected = _reference_average(solves[-n:]) if len(solves) >= n else None
+                assert _same(average.value, expected), (seed, n, len(solves))
+                if len(solves) >= n:
+                    assert _same(average_of([effective_time(*solve) for solve in solves[-n:]]), expected)
+                checked += 1
+    print(f"✓ AoNの逐次計算: {checked}回の比較が参照実装と一致")
+
+
+def test_dnf_rules():
+    """除く件数までのDNFは最も遅い記録として除き、それを超えると平均もDNFになること"""
+    ao5 = RollingAverage(5)
+    for value in (10.0, 11.0, 12.0, 13.0, DNF_TIME):
+        ao5.add(value)
+    assert ao5.value == 12.0
+    ao5.add(DNF_TIME)
+    assert ao5.value == DNF_TIME
+    assert average_of([DNF_TIME] * 5) == DNF_TIME
+    assert average_of([1.0, 2.0]) is None
+    print("✓ DNFの規則")
+
+
+def test_sheet_encoding_round_trip():
+    """スプレッドシートの文字列との変換で計測タイムとペナルティが保たれること"""
+    rng = random.Random(0)
+    for _ in range(500):
+        time_result, penalty = _random_solve(rng)
+        assert decode_sheet_time(encode_sheet_time(time_result, penalty)) == (time_result, penalty)
+    assert decode_sheet_time("12,34") == (12.34, Penalty.OK)
+    assert decode_sheet_time("DNF") == (0.0, Penalty.DNF)
+    assert format_result(12.34, Penalty.PLUS2) == "14.34+" and format_result(12.34, Penalty.DNF) == "DNF"
+    print("✓ スプレッドシートの文字列との変換")
+
+
+def test_session_stats_match_reference():
+    """記録の追加・ペナルティの切り替えで、統計が読み直しと参照実装に一致すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for seed in range(5):
+            logger = SpeedcubeLogger.open_local(os.path.join(tmpdir, f"stats_{seed}.db"))
+            stats = SpeedcubeStats(logger)
+            rng = random.Random(seed)
+            solves = []
+            for i in range(60):
+                time_result, penalty = _random_solve(rng)
+                solve_id = logger.save_result(time_result, "R U", penalty)
+                stats.record_solve(solve_id, time_result, "R U", penalty)
+                solves.append((time_result, penalty))
+                if rng.random() < 0.3:  # 直前の記録の +2 / DNF を切り替える
+                    toggled = Penalty.PLUS2 if rng.random() < 0.5 else Penalty.DNF
+                    assert stats.toggle_last_penalty(toggled)
+                    current = solves[-1][1]
+                    solves[-1] = (time_result, Penalty.OK if current == toggled else toggled)
+
+                values = [_reference_value(*solve) for solve in solves]
+                finite = [value for value in values if value is not None]
+                assert _same(stats.best_time, min(finite) if finite else None)
+                assert _same(stats.session_avg, sum(finite) / len(finite) if finite else None)
+                assert _same(stats.worst_time, DNF_TIME if None in values else max(values))
+                assert _same(stats.ao5, _reference_average(solves[-5:]) if len(solves) >= 5 else None)
+                assert _same(stats.ao12, _reference_average(solves[-12:]) if len(solves) >= 12 else None)
+                assert stats.session_results[0][0] == len(solves) and stats.session_results[0][4] == solves[-1][1]
+
+            # データベースから読み直した統計と一致する（ペナルティの変更も保存されている）
+            reloaded = SpeedcubeStats(logger)
+            for name in ("best_time", "worst_time", "session_avg", "ao5", "ao12"):
+                assert _same(getattr(reloaded, name), getattr(stats, name)), name
+            assert list(reloaded.session_results) == list(stats.session_results)
+            logger.db.close()
+    print("✓ セッションの統計（逐次更新・読み直し・参照実装が一致）")
+
+
+def test_monthly_aggregates():
+    """月次のソルブ回数はDNFを含み、平均は+2を加えてDNFを除くこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SpeedcubeLogger.open_local(os.path.join(tmpdir, "monthly.db"))
+        rng = random.Random(7)
+        rows = []
+        for i in range(400):
+            month = 11 + i % 3  # 2025/11, 2025/12, 2026/01
+            year, month = (2025, month) if month <= 12 else (2026, month - 12)
+            time_result, penalty = _random_solve(rng)
+            rows.append((f"{year}/{month:02d}/{1 + i % 28:02d} 12:{i % 60:02d}:00", time_result, int(penalty)))
+        with logger.db.write() as db:
+            db.executemany("INSERT INTO results (datetime, time_result, penalty) VALUES (?, ?, ?)", rows)
+        stats = SpeedcubeStats(logger)
+        for year, month in ((2025, 11), (2025, 12), (2026, 1), (2026, 2)):
+            prefix = f"{year}/{month:02d}/"
+            monthly = [row for row in rows if row[0].startswith(prefix)]
+            values = [_reference_value(row[1], row[2]) for row in monthly]
+            finite = [value for value in values if value is not None]
+            assert stats.get_monthly_solve_count(year, month) == len(monthly)
+            assert _same(stats.get_monthly_average_time(year, month), sum(finite) / len(finite) if finite else None)
+        logger.db.close()
+    print("✓ 月次の集計")
+
+
+class _Sheet:
+    """同期先のワークシート（gspread.Worksheet の同期で使うメソッドのみ）"""
+
+    def __init__(self):
+        self.rows = []
+
+    def get_all_values(self):
+        return [["datetime", "time"]] + self.rows
+
+    def append_rows(self, rows, value_input_option=None):
+        self.rows.extend(rows)
+
+    def batch_update(self, updates, value_input_option=None):
+        for update in updates:
+            assert update["range"][0] == "B"
+            self.rows[int(update["range"][1:]) - 2][1] = update["values"][0][0]
+
+
+def test_penalty_column_migration_and_sync():
+    """ペナルティの列がないデータベースに列を追加し、同期でペナルティを受け渡すこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old_path = os.path.join(tmpdir, "old.db")
+        conn = sqlite3.connect(old_path)
+        conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, "
+                     "time_result REAL NOT NULL, scramble TEXT, session TEXT)")
+        conn.execute("INSERT INTO results (datetime, time_result) VALUES ('2025/01/01 10:00:00', 12.5)")
+        conn.commit()
+        conn.close()
+
+        source = SpeedcubeLogger.open_local(old_path)
+        assert source.get_results()[0][4] == Penalty.OK
+        solve_id = source.save_result(10.0, None, Penalty.PLUS2)
+        source.save_result(20.0, None, Penalty.DNF)
+        source.set_penalty(solve_id, Penalty.PLUS2)
+        sheet = _Sheet()
+        source.sheet = sheet
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 3")
+        assert sorted(row[1] for row in sheet.rows) == ["12.00+", "12.50", "DNF(20.00)"]
+
+        target = SpeedcubeLogger.open_local(os.path.join(tmpdir, "new.db"))
+        target.sheet = sheet
+        assert target.sync_data() == (True, "downloaded: 3, Uploaded: 0")
+        assert sorted(row[1:] for row in target.db.fetchall("SELECT datetime, time_result, penalty FROM results")) \
+            == [(10.0, Penalty.PLUS2), (12.5, Penalty.OK), (20.0, Penalty.DNF)]
+        # 2回目の同期では差分がない
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 0")
+        source.db.close()
+        target.db.close()
+    print("✓ ペナルティの列の追加と同期")
+
+
+def test_penalty_change_after_sync():
+    """同期済みの記録のペナルティの変更が、データベース・スプレッドシートのどちらからも反映されること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = SpeedcubeLogger.open_local(os.path.join(tmpdir, "source.db"))
+        first = source.save_result(10.0)
+        second = source.save_result(11.0)
+        sheet = _Sheet()
+        source.sheet = sheet
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 2")
+        target = SpeedcubeLogger.open_local(os.path.join(tmpdir, "target.db"))
+        target.sheet = sheet
+        assert target.sync_data() == (True, "downloaded: 2, Uploaded: 0")
+
+        # データベースで変更 -> スプレッドシートの値が変わる
+        source.set_penalty(first, Penalty.PLUS2)
+        source.set_penalty(second, Penalty.DNF)
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 0, Penalties: 0 down / 2 up")
+        assert sorted(row[1] for row in sheet.rows) == ["12.00+", "DNF(11.00)"]
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 0")
+
+        # スプレッドシートの変更 -> 同期済みの他のデータベースに取り込む
+        assert target.sync_data() == (True, "downloaded: 0, Uploaded: 0, Penalties: 2 down / 0 up")
+        assert sorted(target.db.fetchall("SELECT time_result, penalty FROM results")) \
+            == [(10.0, Penalty.PLUS2), (11.0, Penalty.DNF)]
+
+        # スプレッドシートで直接編集した場合も取り込む（+2 を外す）
+        row = next(row for row in sheet.rows if row[1] == "12.00+")
+        row[1] = "10.00"
+        assert source.sync_data() == (True, "downloaded: 0, Uploaded: 0, Penalties: 1 down / 0 up")
+        assert source.db.scalar("SELECT penalty FROM results WHERE id = ?", (first,)) == Penalty.OK
+        source.db.close()
+        target.db.close()
+    print("✓ 同期済みの記録のペナルティの変更")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ペナルティと集計のテスト")
+    print("=" * 60)
+    test_trim_count()
+    test_rolling_average_matches_reference()
+    test_dnf_rules()
+    test_sheet_encoding_round_trip()
+    test_session_stats_match_reference()
+    test_monthly_aggregates()
+    test_penalty_column_migration_and_sync()
+    test_penalty_change_after_sync()
+    print("\n✅ すべてのテストに合格しました")
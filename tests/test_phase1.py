@@ -64,7 +64,7 @@ def test_database_schema():
         logger = SpeedcubeLogger()
         
         # テーブルの存在確認
-        cursor = logger.cursor
+        cursor = logger.db.writer.conn.cursor()
         
         # pattern_solvesテーブルの確認
         cursor.execute("""
@@ -119,14 +119,14 @@ def test_pattern_stats_methods():
         test_pattern_id = "OLL_01"
         test_times = [3.5, 4.2, 3.8, 5.1, 3.3]
         
-        cursor = logger.cursor
+        cursor = logger.db.writer.conn.cursor()
         for time in test_times:
             cursor.execute("""
                 INSERT INTO pattern_solves 
                 (pattern_id, pattern_name, pattern_category, solve_time, session_id, practice_mode)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (test_pattern_id, "OLL #1", "OLL", time, logger.session_id, "manual"))
-        logger.conn.commit()
+        logger.db.writer.commit()
         
         print(f"  {len(test_times)}件のテストデータを挿入しました")
         
@@ -100,7 +100,7 @@ def test_pattern_solve_recording():
     
     # 解法記録を保存
     solve_time = 2.45
-    cursor = logger.cursor
+    cursor = logger.db.writer.conn.cursor()
     cursor.execute(
         """
         INSERT INTO pattern_solves 
@@ -118,7 +118,7 @@ def test_pattern_solve_recording():
             algorithm.id if algorithm else None
         )
     )
-    logger.conn.commit()
+    logger.db.writer.commit()
     print(f"✓ Recorded solve: {pattern.name} - {solve_time}s")
     
     # 記録の取得
@@ -150,7 +150,7 @@ def test_database_tables():
     print("=" * 50)
     
     logger = SpeedcubeLogger()
-    cursor = logger.cursor
+    cursor = logger.db.writer.conn.cursor()
     
     # user_pattern_preferencesテーブルの確認
     cursor.execute(
@@ -0,0 +1,163 @@
+"""
+プロファイル（利用者）と名前付きセッション、プロファイルごとの記録のテーブルのテスト
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import HistoryBrowser
+from src.history_generator import generate_history
+from src.log_handler import SpeedcubeLogger
+from src.penalty import Penalty
+from src.stats import SpeedcubeStats
+
+
+def _save(logger, stats, times, penalty=Penalty.OK):
+    for time_result in times:
+        solve_id = logger.save_result(time_result, "R U", penalty)
+        stats.record_solve(solve_id, time_result, "R U", penalty)
+
+
+def test_profiles_are_isolated():
+    """プロファイルごとに別のテーブルに保存し、統計・記録の取得は現在のプロファイルのみを対象にすること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SpeedcubeLogger.open_local(os.path.join(tmpdir, "profiles.db"))
+        assert logger.results_table == "results" and logger.profile.name == "DEFAULT"
+        stats = SpeedcubeStats(logger)
+        _save(logger, stats, [10.0, 11.0, 12.0, 13.0, 14.0])
+
+        alice = logger.profiles.create_profile("Alice")
+        assert alice.table == f"results_p{alice.id}"
+        logger.switch_profile(alice, "OH")
+        stats.update_stats()
+        assert stats.session_results == type(stats.session_results)() and stats.best_time is None
+        _save(logger, stats, [30.0, 31.0])
+        assert [row[1] for row in logger.get_results()] == [31.0, 30.0]
+        assert {row[3] for row in logger.get_results()} == {"OH"}
+        assert stats.get_current_month_solve_count() == 2
+
+        # 既定のプロファイルに戻すと、元のセッションの記録と統計が読み直される
+        default = logger.profiles.get_profile("DEFAULT")
+        logger.switch_profile(default)
+        stats.update_stats()
+        assert len(stats.session_results) == 5 and stats.best_time == 10.0 and stats.ao5 == 12.0
+        assert stats.get_current_month_solve_count() == 5
+        assert logger.db.scalar(f"SELECT COUNT(*) FROM {alice.table}") == 2
+        logger.db.close()
+    print("✓ プロファイルごとの記録の分離")
+
+
+def test_queries_touch_one_partition():
+    """統計・履歴のクエリが現在のプロファイルのテーブルとそのインデックスだけを使うこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SpeedcubeLogger.open_local(os.path.join(tmpdir, "plan.db"), profile="Bob")
+        table = logger.results_table
+        indexes = {row[0] for row in logger.db.fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))}
+        assert {f"idx_{table}_session", f"idx_{table}_datetime"} <= indexes
+
+        stats = SpeedcubeStats(logger)
+        logger.db.monitor.queries.clear()
+        stats.get_monthly_solve_count(2025, 1)
+        stats.get_monthly_average_time(2025, 1)
+        logger.get_session_results()
+        for sql in list(logger.db.monitor.queries):
+            if not sql.startswith("SELECT"):
+                continue
+            params = (None,) * sql.count("?")
+            plan = " ".join(row[3] for row in logger.db.fetchall(f"EXPLAIN QUERY PLAN {sql}", params))
+            assert table in plan and "results " not in plan.replace(table, ""), plan
+            assert f"idx_{table}_" in plan, plan
+        logger.db.close()
+    print("✓ 1つのテーブルのみを参照するクエリ")
+
+
+def test_profiles_and_sessions_persist():
+    """config.iniの列挙から登録したプロファイル・セッションと、最後に使ったものを保存すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "persist.db")
+        logger = SpeedcubeLogger.open_local(path)
+        logger.profiles.register(["Alice", "Bob", "Alice"], ["3x3 main", "OH"])
+        logger.profiles.register(["Bob"], ["OH"])  # 2回目は何も変わらない
+        profiles = logger.profiles.list_profiles()
+        assert [profile.name for profile in profiles] == ["DEFAULT", "Alice", "Bob"]
+        for profile in profiles:
+            assert logger.profiles.list_sessions(profile) == ["3x3 main", "OH"]
+            assert logger.db.scalar("SELECT COUNT(*) FROM sqlite_master WHERE name = ?", (profile.table,)) == 1
+
+        bob = logger.profiles.get_profile("Bob")
+        logger.switch_profile(bob, "BLD")  # 未登録のセッションは登録する
+        logger.save_result(42.0)
+        assert logger.profiles.list_sessions(bob) == ["3x3 main", "OH", "BLD"]
+        logger.db.close()
+
+        reopened = SpeedcubeLogger.open_local(path)
+        last = reopened.profiles.last_used()
+        assert (last.name, last.current_session) == ("Bob", "BLD")
+        reopened.switch_profile(last, last.current_session)
+        assert reopened.get_session_results()[0][1:4] == (42.0, None, "BLD")
+
+        # 名前付きセッションを選ばない場合は起動時刻のセッション
+        reopened.switch_profile(last, None)
+        assert reopened.session_id == reopened.startup_session_id and not reopened.get_session_results()
+        assert reopened.profiles.last_used().current_session is None
+        reopened.db.close()
+    print("✓ プロファイルとセッションの保存")
+
+
+def test_legacy_database_is_default_profile():
+    """プロファイルのテーブルがない既存のデータベースの記録は既定のプロファイルの記録になること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, "
+                     "time_result REAL NOT NULL, scramble TEXT, session TEXT)")
+        conn.execute("INSERT INTO results (datetime, time_result) VALUES ('2025/01/01 10:00:00', 12.5)")
+        conn.commit()
+        conn.close()
+
+        logger = SpeedcubeLogger.open_local(path)
+        assert logger.profile.id == 1 and logger.get_results()[0][:2] == ("2025/01/01 10:00:00", 12.5)
+        logger.sheet_name = "Times"
+        assert logger._worksheet_title() == "Times"
+        logger.switch_profile(logger.profiles.create_profile("Carol"))
+        assert logger.get_results() == [] and logger._worksheet_title() == "Times - Carol"
+        logger.db.close()
+    print("✓ 既存のデータベースの記録と同期先のワークシート名")
+
+
+def test_generate_history_and_browse_profile():
+    """合成の記録をプロファイルのテーブルに書き込み、履歴ブラウザがそのテーブルだけを閲覧すること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "generated.db")
+        generate_history(path, 300, catalog=[], profile="Dave")
+        generate_history(path, 50, catalog=[])
+
+        logger = SpeedcubeLogger.open_local(path, profile="Dave")
+        assert logger.db.scalar(f"SELECT COUNT(*) FROM {logger.results_table}") == 300
+        assert logger.db.scalar("SELECT COUNT(*) FROM results") == 50
+
+        browser = HistoryBrowser(path, connections=logger.db, table=logger.results_table)
+        assert browser.max_id == 300
+        rows = browser.visible_rows(10)
+        assert len(rows) == 10 and rows[0].id == 300
+        assert browser.jump_to_session(rows[-1].session)
+        browser.close()
+        logger.db.close()
+    print("✓ プロファイルへの合成の記録と履歴の閲覧")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("プロファイルとセッションのテスト")
+    print("=" * 60)
+    test_profiles_are_isolated()
+    test_queries_touch_one_partition()
+    test_profiles_and_sessions_persist()
+    test_legacy_database_is_default_profile()
+    test_generate_history_and_browse_profile()
+    print("\n✅ すべてのテストに合格しました")
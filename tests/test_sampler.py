@@ -0,0 +1,156 @@
+"""
+重み付きランダムサンプラーのテスト
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.patterns import PatternDatabase
+from src.sampler import WeightedSampler, build_alias_table
+from src.scheduler import WeightedPractice
+
+
+def _distribution(prob, alias):
+    """エイリアス表が表す確率分布"""
+    n = len(prob)
+    result = [0.0] * n
+    for i in range(n):
+        result[i] += prob[i] / n
+        result[alias[i]] += (1 - prob[i]) / n
+    return result
+
+
+def _frequencies(sampler, draws, exclude=None):
+    counts = Counter(sampler.draw(exclude) for _ in range(draws))
+    return {key: count / draws for key, count in counts.items()}
+
+
+def test_alias_table_is_exact():
+    """エイリアス表が重みに比例した分布を表すこと"""
+    weights = [1, 0, 3, 2.5, 0.5, 7]
+    total = sum(weights)
+    for p, expected in zip(_distribution(*build_alias_table(weights)), weights):
+        assert abs(p - expected / total) < 1e-9
+    print("✓ エイリアス表の分布が重みと一致")
+
+
+def test_draw_follows_weights():
+    """選択の頻度が重みに比例し、重み0の要素は選ばれないこと"""
+    keys = [f"p{i}" for i in range(50)]
+    weights = [i % 5 for i in range(50)]
+    sampler = WeightedSampler(keys, weights, random.Random(1))
+    frequencies = _frequencies(sampler, 100000)
+    total = sum(weights)
+    for key, w in zip(keys, weights):
+        assert abs(frequencies.get(key, 0) - w / total) < 0.01
+        if w == 0:
+            assert key not in frequencies
+    print("✓ 選択頻度が重みに比例")
+
+
+def test_update_matches_rebuild():
+    """重みの変更後の分布が作り直した場合と一致すること"""
+    rng = random.Random(2)
+    keys = list(range(200))
+    weights = [rng.uniform(0, 3) for _ in keys]
+    sampler = WeightedSampler(keys, weights, rng)
+    for _ in range(50):
+        i = rng.randrange(len(keys))
+        weights[i] = rng.choice([0.0, rng.uniform(0, 10)])
+        sampler.update(keys[i], weights[i])
+    assert abs(sampler.total - sum(weights)) < 1e-9
+    assert [sampler.weight(key) for key in keys] == weights
+
+    # ブロックごと・上位の表の分布を合成して元の重みと比較
+    top = _distribution(sampler._top_prob, sampler._top_alias)
+    for b, block in enumerate(sampler._blocks):
+        if block.total == 0:
+            continue
+        for i, p in enumerate(_distribution(block.prob, block.alias)):
+            assert abs(top[b] * p - weights[block.start + i] / sum(weights)) < 1e-9
+    print("✓ 重み変更後の分布が作り直しと一致")
+
+
+def test_exclusion_without_rebuild():
+    """除外集合の要素は選ばれず、残りの要素の比率は保たれること"""
+    keys = ["a", "b", "c", "d"]
+    sampler = WeightedSampler(keys, [100, 1, 1, 2], random.Random(3))
+    frequencies = _frequencies(sampler, 20000, exclude={"a"})
+    assert "a" not in frequencies
+    assert abs(frequencies["d"] - 0.5) < 0.02
+    # 全要素を除外した場合・重みがすべて0の場合は選べない
+    assert sampler.draw(set(keys)) is None
+    assert WeightedSampler(keys, [0, 0, 0, 0]).draw() is None
+    print("✓ 除外集合を作り直しなしで適用")
+
+
+def test_draw_is_constant_time():
+    """要素数によらず1回の選択がほぼ一定時間で終わること"""
+    def average_draw(n):
+        rng = random.Random(4)
+        sampler = WeightedSampler(range(n), [rng.uniform(0.1, 5) for _ in range(n)], rng)
+        exclude = {0, 1, 2, 3, 4}
+        start = time.perf_counter()
+        for _ in range(5000):
+            sampler.draw(exclude)
+        return (time.perf_counter() - start) / 5000
+
+    small = average_draw(100)
+    large = average_draw(100000)
+    assert large < small * 3
+    print(f"✓ 1回あたり: 100件 {small * 1e6:.2f}µs, 100000件 {large * 1e6:.2f}µs")
+
+
+def test_pattern_database_sampler():
+    """PatternDatabaseからカテゴリ内のサンプラーを作成できること（既定の重みは難易度）"""
+    db = PatternDatabase()
+    category = db.get_available_categories()[0]
+    pattern_ids = db.get_pattern_ids_by_category(category)
+    sampler = db.create_weighted_sampler(category.name, rng=random.Random(5))
+    assert len(sampler) == len(pattern_ids)
+    for pattern_id in pattern_ids:
+        assert sampler.weight(pattern_id) == db.get_pattern(pattern_id).difficulty
+
+    only = db.create_weighted_sampler(category.name, {pattern_id: 0 for pattern_id in pattern_ids[1:]})
+    assert only.draw() == pattern_ids[0]
+    assert db.create_weighted_sampler("UNKNOWN") is None
+    print("✓ PatternDatabaseのサンプラー")
+
+
+def test_weighted_practice():
+    """重み付きRANDモードで遅いパターンが多く選ばれ、直近のパターンは避けられること"""
+    patterns = [(f"p{i}", "PLL") for i in range(20)]
+    recent = {f"p{i}": [2.0] * 5 for i in range(20)}
+    recent["p0"] = [5.0] * 5
+    practice = WeightedPractice(patterns, recent, difficulties={"p1": 5}, rng=random.Random(6))
+    history = [practice.next() for _ in range(3000)]
+    counts = Counter(history)
+    assert counts["p0"] > counts["p2"] * 2
+    assert counts["p1"] > counts["p2"]
+    for i in range(1, len(history)):
+        assert history[i] not in history[max(0, i - 5):i]
+
+    # 記録したタイムで重みが更新されること
+    before = practice._sampler.weight("p2")
+    practice.record("p2", 10.0)
+    assert practice._sampler.weight("p2") > before
+    print(f"✓ 重み付きRANDモード: 遅い {counts['p0']}, 難しい {counts['p1']}, 通常 {counts['p2']}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("重み付きランダムサンプラーのテスト")
+    print("=" * 60)
+    test_alias_table_is_exact()
+    test_draw_follows_weights()
+    test_update_matches_rebuild()
+    test_exclusion_without_rebuild()
+    test_draw_is_constant_time()
+    test_pattern_database_sampler()
+    test_weighted_practice()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,146 @@
+"""
+間隔反復スケジューラーのテスト
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import PatternConfig as PC
+from src.database import ConnectionManager
+from src.scheduler import PracticeScheduler, create_practice_scheduler, trimmed_mean
+from src.patterns import PatternDatabase
+from src.stats import SpeedcubeStats
+
+
+def _patterns(n, category="PLL"):
+    return [(f"p{i}", category) for i in range(n)]
+
+
+def test_trimmed_mean():
+    """最良・最悪を除いた平均になること"""
+    assert trimmed_mean([]) is None
+    assert trimmed_mean([2.0, 4.0]) == 3.0
+    assert trimmed_mean([1.0, 2.0, 3.0, 4.0, 100.0]) == 3.0
+    print("✓ トリム平均")
+
+
+def test_unseen_patterns_first():
+    """未練習のパターンが練習済みより先に出題されること"""
+    recent = {"p0": [2.0, 2.1], "p1": [3.0, 2.9]}
+    scheduler = PracticeScheduler(_patterns(5), recent, rng=random.Random(1))
+    first = [scheduler.next() for _ in range(3)]
+    assert set(first) == {"p2", "p3", "p4"}
+    print("✓ 未練習のパターンを優先")
+
+
+def test_slow_patterns_recur_more_often():
+    """遅い・評価の低いパターンほど多く出題されること"""
+    recent = {f"p{i}": [2.0] * 5 for i in range(10)}
+    recent["p0"] = [6.0, 5.0, 7.0, 6.0, 6.5]
+    scheduler = PracticeScheduler(_patterns(10), recent, ratings={"p1": 1}, rng=random.Random(2))
+    counts = Counter()
+    for _ in range(200):
+        pattern_id = scheduler.next()
+        counts[pattern_id] += 1
+        scheduler.record(pattern_id, 6.0 if pattern_id == "p0" else 2.0)
+    assert counts["p0"] > counts["p5"] * 2
+    assert counts["p1"] > counts["p5"]
+    print(f"✓ 遅いパターンの出題回数: {counts['p0']}, 低評価: {counts['p1']}, 通常: {counts['p5']}")
+
+
+def test_no_immediate_repeat():
+    """同じパターンが最小間隔より短い間隔で出題されないこと"""
+    recent = {f"p{i}": [2.0 + i] * 5 for i in range(8)}
+    scheduler = PracticeScheduler(_patterns(8), recent, rng=random.Random(3))
+    history = []
+    for _ in range(100):
+        pattern_id = scheduler.next()
+        history.append(pattern_id)
+        scheduler.record(pattern_id, 9.0)
+    gap = int(PC.SCHEDULER_MIN_INTERVAL)
+    for i in range(len(history) - gap):
+        assert history[i] not in history[i + 1:i + gap]
+    print("✓ 最小間隔内の再出題なし")
+
+
+def test_selection_is_logarithmic():
+    """大規模なカタログでも1回の選択がほぼ一定時間で終わること"""
+    def average_step(n):
+        rng = random.Random(4)
+        recent = {f"p{i}": [rng.uniform(1, 5) for _ in range(5)] for i in range(n)}
+        scheduler = PracticeScheduler(_patterns(n), recent, rng=rng)
+        start = time.perf_counter()
+        for _ in range(2000):
+            pattern_id = scheduler.next()
+            scheduler.record(pattern_id, rng.uniform(1, 5))
+        return (time.perf_counter() - start) / 2000
+
+    small = average_step(50)
+    large = average_step(5000)
+    assert large < small * 5
+    print(f"✓ 1回あたり: 50件 {small * 1e6:.1f}µs, 5000件 {large * 1e6:.1f}µs")
+
+
+class _MemoryLogger:
+    """インメモリのSQLiteを持つロガーの代わり"""
+
+    def __init__(self):
+        self.db = ConnectionManager(":memory:")
+        with self.db.write() as db:
+            db.execute("""
+                CREATE TABLE pattern_solves (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_id TEXT NOT NULL,
+                    pattern_name TEXT NOT NULL, pattern_category TEXT NOT NULL, solve_time REAL NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, session_id TEXT, practice_mode TEXT,
+                    set_id TEXT, algorithm_id TEXT)
+            """)
+            db.execute("""
+                CREATE TABLE user_algorithm_ratings (
+                    algorithm_id TEXT PRIMARY KEY, rating INTEGER, notes TEXT, last_updated DATETIME)
+            """)
+
+
+def test_create_from_stats():
+    """練習記録とアルゴリズム評価からスケジューラーを作成できること"""
+    logger = _MemoryLogger()
+    stats = SpeedcubeStats()
+    stats.logger = logger
+    db = PatternDatabase()
+    pll_ids = list(db.get_pattern_ids_by_category(db.get_available_categories()[0]))
+    rows = [(pll_ids[0], 3.0, "2026-01-01 10:00:00"), (pll_ids[0], 2.5, "2026-01-02 10:00:00"),
+            (pll_ids[1], 4.0, "2026-01-03 10:00:00")]
+    default = db.get_default_algorithm(pll_ids[1])
+    with logger.db.write() as conn:
+        conn.executemany(
+            "INSERT INTO pattern_solves (pattern_id, pattern_name, pattern_category, solve_time, timestamp) "
+            "VALUES (?, '', '', ?, ?)", rows)
+        conn.execute("INSERT INTO user_algorithm_ratings (algorithm_id, rating) VALUES (?, 2)", (default.id,))
+
+    recent = stats.get_recent_pattern_times(PC.SCHEDULER_RECENT_SOLVES)
+    assert list(recent) == [pll_ids[1], pll_ids[0]]
+    assert recent[pll_ids[0]] == [2.5, 3.0]
+    assert stats.get_algorithm_ratings() == {default.id: 2}
+
+    category = db.get_pattern_category(pll_ids[0]).name
+    scheduler = create_practice_scheduler(db, stats, category, rng=random.Random(5))
+    assert len(scheduler) == len(pll_ids)
+    assert scheduler.next() not in pll_ids[:2]
+    print("✓ 練習記録からスケジューラーを作成")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("間隔反復スケジューラーのテスト")
+    print("=" * 60)
+    test_trimmed_mean()
+    test_unseen_patterns_first()
+    test_slow_patterns_recur_more_often()
+    test_no_immediate_repeat()
+    test_selection_is_logarithmic()
+    test_create_from_stats()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,55 @@
+"""
+スクランブル生成のテスト
+"""
+import os
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scramble import generate_wca_cube_scramble, generate_wca_cube_scramble_batch
+
+AXIS_MAP = {'F': 'FB', 'B': 'FB', 'U': 'UD', 'D': 'UD', 'L': 'LR', 'R': 'LR'}
+
+
+def assert_valid_scramble(scramble, length):
+    """スクランブルがWCA規則（同じ面の連続なし、同じ軸の3連続なし）を満たすか確認"""
+    tokens = scramble.split()
+    assert len(tokens) == length, f"Scramble should have {length} moves: {scramble}"
+    for token in tokens:
+        assert token[0] in AXIS_MAP and token[1:] in ('', "'", '2'), f"Invalid move: {token}"
+    for a, b in zip(tokens, tokens[1:]):
+        assert a[0] != b[0], f"Same face twice in a row: {scramble}"
+    for a, b, c in zip(tokens, tokens[1:], tokens[2:]):
+        assert not (AXIS_MAP[a[0]] == AXIS_MAP[b[0]] == AXIS_MAP[c[0]]), f"Same axis three times: {scramble}"
+
+
+def test_single_scramble():
+    """1件ずつの生成が規則を満たすこと"""
+    for _ in range(200):
+        assert_valid_scramble(generate_wca_cube_scramble(), 20)
+    print("✓ generate_wca_cube_scramble: 200件すべて有効")
+
+
+def test_batch_scramble():
+    """一括生成が同じ規則を満たすこと"""
+    scrambles = generate_wca_cube_scramble_batch(5000, 25, seed=1)
+    assert len(scrambles) == 5000
+    for scramble in scrambles:
+        assert_valid_scramble(scramble, 25)
+    print("✓ generate_wca_cube_scramble_batch: 5000件すべて有効")
+
+
+def test_batch_scramble_is_reproducible():
+    """同じシードで同じ結果になること"""
+    assert generate_wca_cube_scramble_batch(100, seed=5) == generate_wca_cube_scramble_batch(100, seed=5)
+    assert generate_wca_cube_scramble_batch(100, seed=5) != generate_wca_cube_scramble_batch(100, seed=6)
+    assert generate_wca_cube_scramble_batch(0) == []
+    print("✓ シード指定で再現可能")
+
+
+if __name__ == "__main__":
+    test_single_scramble()
+    test_batch_scramble()
+    test_batch_scramble_is_reproducible()
+    print("\n✅ All scramble tests passed!\n")
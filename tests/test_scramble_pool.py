@@ -0,0 +1,87 @@
+"""
+スクランブルプールのテスト
+"""
+import os
+import sys
+import tempfile
+import time
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scramble import generate_wca_cube_scramble
+from src.scramble_pool import ProcessGenerator, ScramblePool
+
+
+def test_pool_refills_in_background():
+    """バックグラウンドで満杯まで補充されること"""
+    pool = ScramblePool(size=10, low_water=5)
+    pool.start()
+    deadline = time.time() + 2.0
+    while len(pool) < 10 and time.time() < deadline:
+        time.sleep(0.01)
+    print(f"✓ プール内スクランブル数: {len(pool)}")
+    assert len(pool) == 10, "Pool should be filled to its size"
+
+    scramble = pool.next()
+    assert len(scramble.split()) == 20, "Scramble should have 20 moves"
+    pool.close()
+
+
+def test_pool_falls_back_when_empty():
+    """プールが空でもスクランブルを返すこと"""
+    pool = ScramblePool(generator=lambda: "R U R' U'", size=3, low_water=1)
+    assert pool.next() == "R U R' U'", "Empty pool should generate synchronously"
+    print("✓ 空のプールから同期生成で取得")
+    pool.close()
+
+
+def test_pool_persists_unused_scrambles():
+    """未使用スクランブルが保存・復元されること"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, 'pool.json')
+        counter = iter(range(1000))
+        pool = ScramblePool(generator=lambda: f"R{next(counter)}", size=5, low_water=2,
+                            cache_path=cache_path)
+        pool.start()
+        deadline = time.time() + 2.0
+        while len(pool) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        first = pool.next()
+        pool.close()
+
+        restored = ScramblePool(generator=lambda: "X", size=5, cache_path=cache_path)
+        assert len(restored) == 4, "Unused scrambles should be restored"
+        assert restored.next() != first, "Consumed scramble should not be restored"
+        print(f"✓ 復元されたスクランブル数: {len(restored)}")
+
+        # 種類が異なる保存ファイルは再利用しない
+        other = ScramblePool(generator=lambda: "X", size=5, cache_path=cache_path, kind="random_state")
+        assert len(other) == 0, "Scrambles of a different kind should be discarded"
+        print("✓ 種類の異なるスクランブルは破棄")
+
+
+def test_pool_generates_in_child_process():
+    """ProcessGeneratorの生成が子プロセスで行われ、終了時に子プロセスが止まること"""
+    generator = ProcessGenerator(generate_wca_cube_scramble)
+    pool = ScramblePool(generator=generator, size=5, low_water=2)
+    pool.start()
+    deadline = time.time() + 30.0
+    while len(pool) < 5 and time.time() < deadline:
+        time.sleep(0.05)
+    assert len(pool) == 5, "Pool should be filled by the child process"
+    assert len(pool.next().split()) == 20, "Scramble should have 20 moves"
+
+    process = generator._process
+    assert process is not None and process.pid != os.getpid(), "Generation should run in a child process"
+    pool.close()
+    assert not process.is_alive(), "Child process should be stopped on close"
+    print(f"✓ 子プロセス（pid {process.pid}）で生成")
+
+
+if __name__ == "__main__":
+    test_pool_refills_in_background()
+    test_pool_falls_back_when_empty()
+    test_pool_persists_unused_scrambles()
+    test_pool_generates_in_child_process()
+    print("\n✅ All scramble pool tests passed!\n")
@@ -0,0 +1,103 @@
+"""
+起動時間の計測（StartupProfiler）と遅延初期化のテスト
+"""
+import json
+import os
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.startup_profile import FIRST_FRAME, INTERACTIVE, StartupProfiler
+
+
+class _Clock:
+    """呼び出し側で進める時計"""
+
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+def _profile():
+    """起動処理（2フェーズ -> 最初のフレーム -> 入力処理 -> 遅延フェーズ）を記録したプロファイラ"""
+    clock = _Clock()
+    profiler = StartupProfiler(clock)
+    with profiler.phase("window"):
+        clock.now += 0.2
+    with profiler.phase("database"):
+        clock.now += 0.05
+    clock.now += 0.03
+    assert profiler.mark(FIRST_FRAME)
+    clock.now += 0.02
+    assert profiler.mark(INTERACTIVE)
+    assert not profiler.mark(INTERACTIVE)
+    with profiler.phase("pattern_db"):
+        clock.now += 0.4
+    return profiler
+
+
+def test_phases_and_milestones():
+    """フェーズの所要時間とマイルストーン、起動後のフェーズが遅延として記録されること"""
+    profiler = _profile()
+    assert [name for name, _ in profiler.phases] == ["window", "database"]
+    assert abs(profiler.phases[0][1] - 0.2) < 1e-9
+    assert abs(profiler.marks[FIRST_FRAME] - 0.28) < 1e-9
+    assert abs(profiler.marks[INTERACTIVE] - 0.30) < 1e-9
+    assert [name for name, _ in profiler.deferred] == ["pattern_db"]
+
+    report = profiler.report()
+    assert "time-to-first-frame" in report and "time-to-interactive" in report
+    assert "pattern_db（遅延）" in report
+    print("✓ フェーズとマイルストーンの記録")
+
+
+def test_phase_recorded_on_error():
+    """例外で中断したフェーズも所要時間が記録されること"""
+    clock = _Clock()
+    profiler = StartupProfiler(clock)
+    try:
+        with profiler.phase("assets"):
+            clock.now += 0.1
+            raise OSError("missing")
+    except OSError:
+        pass
+    assert [name for name, _ in profiler.phases] == ["assets"]
+    print("✓ 例外で中断したフェーズの記録")
+
+
+def test_save_json():
+    """レポートがミリ秒単位のJSONで保存されること"""
+    profiler = _profile()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "startup_profile.json")
+        profiler.save(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    assert data["phases"][0] == {"name": "window", "ms": 200.0}
+    assert data["time_to_interactive_ms"] == 300.0
+    assert data["deferred"][0]["name"] == "pattern_db"
+    print("✓ JSONでの保存")
+
+
+def test_logger_import_does_not_load_gspread():
+    """ロガーの読み込みだけではgspreadを読み込まないこと（最初の同期まで遅延）"""
+    sys.modules.pop("src.log_handler", None)
+    had_gspread = "gspread" in sys.modules
+    import src.log_handler  # noqa: F401
+    assert had_gspread or "gspread" not in sys.modules
+    print("✓ gspreadの遅延読み込み")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("起動時間の計測のテスト")
+    print("=" * 60)
+    test_phases_and_milestones()
+    test_phase_recorded_on_error()
+    test_save_json()
+    test_logger_import_does_not_load_gspread()
+    print("\n✅ すべてのテストに合格しました")
@@ -0,0 +1,104 @@
+"""
+キュービーモデルと二段階ソルバーのテスト
+"""
+import os
+import random
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cubie
+from src.cubie import CubieCube
+from src.twophase import get_solver, invert_moves, generate_random_state_scramble, within_one_move
+
+
+def test_moves_have_order_four():
+    """各面の4回転で元に戻ること"""
+    for face in range(6):
+        cube = CubieCube()
+        for _ in range(4):
+            cube.multiply(cubie.BASIC_MOVES[face])
+        assert cube.is_solved(), f"{cubie.FACES[face]}4 should be identity"
+    print("✓ 全ての面回転の4乗が恒等置換")
+
+
+def test_sexy_move_order():
+    """(R U R' U')を6回で元に戻ること"""
+    cube = CubieCube()
+    moves = cubie.parse_face_moves("R U R' U'")
+    for _ in range(6):
+        cube.apply_moves(moves)
+    assert cube.is_solved(), "(R U R' U')6 should be identity"
+    print("✓ (R U R' U')x6 で元に戻る")
+
+
+def test_coordinates_round_trip():
+    """座標の設定と取得が一致すること"""
+    cube = CubieCube()
+    for value in (0, 1, 1000, cubie.N_TWIST - 1):
+        cube.set_twist(value)
+        assert cube.get_twist() == value
+    for value in (0, 1, 1000, cubie.N_FLIP - 1):
+        cube.set_flip(value)
+        assert cube.get_flip() == value
+    for value in (0, 23, 5000, cubie.N_SLICE_SORTED - 1):
+        cube.set_slice_sorted(value)
+        assert cube.get_slice_sorted() == value
+    for value in (0, 1, 20000, cubie.N_CORNERS - 1):
+        cube.set_corners(value)
+        assert cube.get_corners() == value
+        cube.set_ud_edges(value)
+        assert cube.get_ud_edges() == value
+    print("✓ 座標の往復変換が一致")
+
+
+def test_random_cube_is_solvable():
+    """ランダム生成した状態が到達可能であること"""
+    rng = random.Random(42)
+    for _ in range(100):
+        assert cubie.random_cube(rng).is_solvable()
+    print("✓ ランダム状態100件すべて到達可能")
+
+
+def test_solver_solves_random_states():
+    """ソルバーの解でランダム状態が揃うこと（初回はテーブル生成に時間がかかる）"""
+    solver = get_solver()
+    rng = random.Random(7)
+    for _ in range(5):
+        cube = cubie.random_cube(rng)
+        solution = solver.solve(cube)
+        assert len(solution) <= 22
+        assert cube.copy().apply_moves(solution).is_solved()
+        assert CubieCube().apply_moves(invert_moves(solution)) == cube
+    print("✓ ランダム状態5件を22手以内で解決")
+
+
+def test_random_state_scramble_format():
+    """スクランブルが同じ面の連続を含まないこと"""
+    scramble = generate_random_state_scramble(random.Random(3))
+    tokens = scramble.split()
+    for a, b in zip(tokens, tokens[1:]):
+        assert a[0] != b[0], f"Consecutive moves on the same face: {a} {b}"
+    print(f"✓ スクランブル: {scramble}")
+
+
+def test_within_one_move():
+    """完成状態と1手の状態は除外し、2手の状態は採用すること"""
+    assert within_one_move(CubieCube())
+    for move in range(cubie.N_MOVES):
+        assert within_one_move(CubieCube().apply_moves([move])), cubie.move_to_string(move)
+    assert not within_one_move(CubieCube().apply_moves(cubie.parse_face_moves("R U")))
+    assert not within_one_move(CubieCube().apply_moves(cubie.parse_face_moves("R L")))
+    print("✓ 1手以内の状態の判定")
+
+
+if __name__ == "__main__":
+    test_moves_have_order_four()
+    test_sexy_move_order()
+    test_coordinates_round_trip()
+    test_random_cube_is_solvable()
+    test_solver_solves_random_states()
+    test_random_state_scramble_format()
+    test_within_one_move()
+    print("\n✅ All two-phase tests passed!\n")